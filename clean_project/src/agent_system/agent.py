@@ -2,13 +2,16 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import threading
 import time
+from collections import deque
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, TypeVar
 
 from .ai_debugging import ai_debugger
 from .ai_performance_monitor import ai_performance_monitor
 from .ai_planner import AIHierarchicalPlanner
+from .async_utils import run_blocking
 from .config_simple import settings
 from .cross_session_learning import cross_session_learning
 from .enhanced_persistence import get_storage_info, load_all, save_all_async
@@ -18,13 +21,16 @@ from .intelligent_action_selector import IntelligentActionSelector
 from .intelligent_observation_analyzer import intelligent_analyzer
 from .learning import LearningSystem
 from .memory import MemorySystem
-from .models import ActionStatus, Goal, GoalStatus, Plan
+from .models import Action, ActionStatus, Goal, GoalStatus, Observation, Plan
+from .plan_graph import PlanGraph
 from .plugin_loader import load_plugins
 from .real_tools import RealCodeExecutorTool, RealFileReaderTool, RealFileWriterTool
 
 # Import intelligent components
 from .tools import GenericTool, WebSearchTool
 
+T = TypeVar("T")
+
 logger = logging.getLogger(__name__)
 
 
@@ -34,8 +40,17 @@ class GoalExecutionContext:
 
     goal: Goal
     plan: Optional[Plan] = None
+    graph: Optional[PlanGraph] = None
     completed_actions: List[str] = field(default_factory=list)
     initialized: bool = False
+    steps: int = 0
+    step_latencies_ms: Deque[float] = field(default_factory=lambda: deque(maxlen=100))
+
+    @property
+    def avg_step_latency_ms(self) -> float:
+        if not self.step_latencies_ms:
+            return 0.0
+        return sum(self.step_latencies_ms) / len(self.step_latencies_ms)
 
 
 class AutonomousAgent:
@@ -55,7 +70,17 @@ class AutonomousAgent:
 
         self.goal_contexts: Dict[str, GoalExecutionContext] = {}
         self.max_concurrent_goals = max(1, getattr(settings, "MAX_CONCURRENT_GOALS", 1))
+        self.max_parallel_actions = max(1, getattr(settings, "MAX_PARALLEL_ACTIONS", 1))
+        self.max_parallel_actions_per_tool = max(
+            1, getattr(settings, "MAX_PARALLEL_ACTIONS_PER_TOOL", 1)
+        )
         self.is_running = False
+        # Planning and analysis run off the event loop; the subsystems they touch are
+        # not thread-safe, so offloaded work is serialized while tool I/O overlaps it.
+        self._offload_lock = threading.Lock()
+        # Goals can finish concurrently and their saves upsert the same rows
+        self._save_lock = asyncio.Lock()
+        self._step_budget = 0
 
         # Enable real tools if APIs are configured
         if self._should_use_real_tools():
@@ -121,25 +146,56 @@ class AutonomousAgent:
             )
         raise RuntimeError("run() cannot be called from an async context; use run_async instead.")
 
-    async def run_async(self, max_cycles: int = 100, max_concurrent_goals: Optional[int] = None) -> None:
-        """Run the agent for a maximum number of cycles asynchronously."""
+    async def run_async(
+        self, max_cycles: int = 100, max_concurrent_goals: Optional[int] = None
+    ) -> None:
+        """Run the agent asynchronously, advancing each goal independently.
+
+        Up to ``max_concurrent_goals`` goals are in flight at once and each starts
+        its next step as soon as the previous one finishes, so a slow tool call only
+        delays its own goal. ``max_cycles`` bounds the work to what that many
+        lock-step cycles could do: ``max_cycles * max_concurrent_goals`` steps.
+        """
         concurrency_limit = max(1, max_concurrent_goals or self.max_concurrent_goals)
         self.is_running = True
-        cycle = 0
+        self._step_budget = max_cycles * concurrency_limit
+        workers: Dict[str, asyncio.Task[None]] = {}
+        steps_before = self._step_budget
 
         logger.info("Starting agent (max %s cycles, concurrency=%s)", max_cycles, concurrency_limit)
 
         try:
-            while self.is_running and cycle < max_cycles:
-                cycle += 1
-                worked = await self.run_cycle_async(concurrency_limit=concurrency_limit)
-
-                if not worked and not self.goal_contexts:
-                    logger.info("Agent idle, no more work")
+            while self.is_running:
+                if self._step_budget > 0:
+                    self._fill_goal_contexts(concurrency_limit)
+                    for goal_id, context in self.goal_contexts.items():
+                        if goal_id not in workers:
+                            workers[goal_id] = asyncio.create_task(self._drive_goal(context))
+
+                if not workers:
+                    if self._step_budget > 0:
+                        logger.info("Agent idle, no more work")
                     break
+
+                done, _ = await asyncio.wait(workers.values(), return_when=asyncio.FIRST_COMPLETED)
+                for goal_id, task in list(workers.items()):
+                    if task in done:
+                        del workers[goal_id]
+                        task.result()
         finally:
+            for task in workers.values():
+                task.cancel()
+            if workers:
+                await asyncio.gather(*workers.values(), return_exceptions=True)
             self.is_running = False
-            logger.info("Agent stopped after %s cycles", cycle)
+            logger.info("Agent stopped after %s steps", steps_before - self._step_budget)
+
+    async def _drive_goal(self, context: GoalExecutionContext) -> None:
+        """Advance one goal step after step until it finishes or the run ends."""
+        goal_id = context.goal.id
+        while self.is_running and self._step_budget > 0 and goal_id in self.goal_contexts:
+            self._step_budget -= 1
+            await self._timed_goal_step(context)
 
     def stop(self) -> None:
         """Stop the agent."""
@@ -168,9 +224,29 @@ class AutonomousAgent:
             return False
 
         contexts = list(self.goal_contexts.values())
-        results = await asyncio.gather(*(self._process_goal_step(ctx) for ctx in contexts))
+        results = await asyncio.gather(*(self._timed_goal_step(ctx) for ctx in contexts))
         return any(results)
 
+    async def _timed_goal_step(self, context: GoalExecutionContext) -> bool:
+        """Run one goal step and record its wall-clock latency."""
+        start = time.perf_counter()
+        try:
+            return await self._process_goal_step(context)
+        finally:
+            latency_ms = (time.perf_counter() - start) * 1000
+            context.steps += 1
+            context.step_latencies_ms.append(latency_ms)
+            self.performance_monitor.record_step_latency(context.goal.id, latency_ms)
+
+    async def _offload(self, func: Callable[..., T], *args: Any) -> T:
+        """Run CPU-heavy work in a worker thread, one offloaded call at a time."""
+
+        def _locked() -> T:
+            with self._offload_lock:
+                return func(*args)
+
+        return await run_blocking(_locked)
+
     def _fill_goal_contexts(self, limit: int) -> None:
         """Populate active goal contexts up to the concurrency limit."""
         while len(self.goal_contexts) < limit:
@@ -179,7 +255,7 @@ class AutonomousAgent:
                 break
             self.goal_contexts[goal.id] = GoalExecutionContext(goal=goal)
 
-    def _initialize_goal_context(self, context: GoalExecutionContext) -> None:
+    async def _initialize_goal_context(self, context: GoalExecutionContext) -> None:
         """Perform one-time setup for a goal context."""
         if context.initialized:
             return
@@ -187,20 +263,13 @@ class AutonomousAgent:
         goal = context.goal
         logger.info("Starting goal: %s", goal.description)
 
-        best_sequence = self.cross_session_learning.get_best_action_sequence(goal.description)
-        if best_sequence:
-            logger.info(
-                "Found cross-session pattern for %s: %s", goal.id, " -> ".join(best_sequence)
-            )
+        # The planner consults cross-session patterns itself and may skip analysis entirely
+        memory_context = self.memory_system.get_working_memory_context()
+        goal_analysis, execution_time, context.plan = await self._offload(
+            self._plan_goal, goal, self.tool_registry.get_available_tools(), memory_context
+        )
 
-        start_time = time.time() * 1000
-        if hasattr(self.planner, "reasoning_engine") and self.planner.reasoning_engine:
-            reasoning_engine = self.planner.reasoning_engine
-            if hasattr(reasoning_engine, "enhanced_analyze_goal"):
-                goal_analysis = reasoning_engine.enhanced_analyze_goal(goal.description)
-            else:
-                goal_analysis = reasoning_engine.analyze_goal(goal.description)
-            execution_time = time.time() * 1000 - start_time
+        if goal_analysis is not None:
             self.ai_debugger.log_goal_analysis(goal.description, goal_analysis, execution_time)
 
             confidence = goal_analysis.get("confidence", 0.0)
@@ -208,12 +277,9 @@ class AutonomousAgent:
                 "goal_analysis", execution_time, confidence, True
             )
 
-        memory_context = self.memory_system.get_working_memory_context()
-        context.plan = self.planner.create_plan(
-            goal, self.tool_registry.get_available_tools(), memory_context
-        )
-
         if context.plan:
+            context.graph = PlanGraph(context.plan.actions)
+            goal.metadata["critical_path_length"] = context.graph.critical_path_length
             suggestions = self.learning_system.suggest_improvements(goal, context.plan)
             if suggestions:
                 logger.info("Learning suggestions for %s: %s", goal.id, suggestions)
@@ -221,18 +287,49 @@ class AutonomousAgent:
         context.completed_actions = []
         context.initialized = True
 
+    def _plan_goal(
+        self, goal: Goal, available_tools: List[str], memory_context: Dict[str, Any]
+    ) -> Tuple[Optional[Dict[str, Any]], float, Optional[Plan]]:
+        """Build a goal's plan and collect the analysis behind it (runs in a worker thread)."""
+        start_time = time.time() * 1000
+        plan = self.planner.create_plan(goal, available_tools, memory_context)
+        execution_time = time.time() * 1000 - start_time
+
+        goal_cache = getattr(self.planner, "goal_cache", None)
+        goal_analysis = goal_cache.pop(goal.id, None) if goal_cache is not None else None
+        return goal_analysis, execution_time, plan
+
+    def _analyze_step(
+        self,
+        results: List[Tuple[Action, Observation]],
+        goal: Goal,
+    ) -> Tuple[List[Tuple[Dict[str, Any], float]], List[Any]]:
+        """Analyze a step's observations and scan for anomalies (runs in a worker thread)."""
+        analyses = []
+        for action, observation in results:
+            start_time = time.time() * 1000
+            analysis = self.observation_analyzer.analyze_observation(
+                observation, action.expected_outcome, goal
+            )
+            analyses.append((analysis, time.time() * 1000 - start_time))
+        # The analyzer keeps its own rolling window of recent observations
+        anomalies = self.observation_analyzer.detect_anomalies()
+        return analyses, anomalies
+
     async def _process_goal_step(self, context: GoalExecutionContext) -> bool:
         """Execute the next step for a goal context."""
-        self._initialize_goal_context(context)
+        await self._initialize_goal_context(context)
 
         if not context.plan or not context.plan.actions:
             logger.warning("No plan available for goal %s", context.goal.id)
             await self._finalize_goal(context, success=False)
             return True
 
-        available_actions = [
-            action for action in context.plan.actions if action.id not in context.completed_actions
-        ]
+        if context.graph is None:
+            context.graph = PlanGraph(context.plan.actions)
+
+        # Only actions whose prerequisites have completed are candidates this step
+        available_actions = context.graph.ready(context.completed_actions)
 
         if not available_actions:
             await self._finalize_goal(context, success=True)
@@ -282,21 +379,61 @@ class AutonomousAgent:
             await self._finalize_goal(context, success=False)
             return True
 
-        observation = await self.tool_registry.execute_action_async(selected_action)
+        batch = self._select_batch(selected_action, available_actions)
+        observations = await self._execute_batch(batch)
+        results = list(zip(batch, observations))
 
-        start_time = time.time() * 1000
-        analysis = self.observation_analyzer.analyze_observation(
-            observation, selected_action.expected_outcome, context.goal
+        analyses, anomalies = await self._offload(self._analyze_step, results, context.goal)
+
+        for (action, observation), (analysis, execution_time) in zip(results, analyses):
+            self._record_action_result(context, action, observation, analysis, execution_time)
+
+        if anomalies:
+            logger.warning("Anomalies detected: %s", anomalies)
+
+        return True
+
+    def _select_batch(self, selected_action: Action, ready: List[Action]) -> List[Action]:
+        """The selected action plus other ready actions, capped overall and per tool."""
+        batch = [selected_action]
+        per_tool = {selected_action.tool_name: 1}
+        for action in ready:
+            if len(batch) >= self.max_parallel_actions:
+                break
+            if action.id == selected_action.id:
+                continue
+            if per_tool.get(action.tool_name, 0) >= self.max_parallel_actions_per_tool:
+                continue
+            per_tool[action.tool_name] = per_tool.get(action.tool_name, 0) + 1
+            batch.append(action)
+        return batch
+
+    async def _execute_batch(self, batch: List[Action]) -> List[Observation]:
+        """Run independent actions concurrently and join their observations in order."""
+        if len(batch) == 1:
+            return [await self.tool_registry.execute_action_async(batch[0])]
+        return list(
+            await asyncio.gather(
+                *(self.tool_registry.execute_action_async(action) for action in batch)
+            )
         )
-        execution_time = time.time() * 1000 - start_time
 
+    def _record_action_result(
+        self,
+        context: GoalExecutionContext,
+        action: Action,
+        observation: Observation,
+        analysis: Dict[str, Any],
+        execution_time: float,
+    ) -> None:
+        """Fold one executed action into memory, scores and goal progress."""
         self.ai_debugger.log_observation_analysis(
             {
                 "status": observation.status.value,
                 "result": str(observation.result)[:200] if observation.result else "",
-                "tool_name": selected_action.tool_name,
+                "tool_name": action.tool_name,
             },
-            selected_action.expected_outcome,
+            action.expected_outcome,
             analysis,
             execution_time,
         )
@@ -319,13 +456,13 @@ class AutonomousAgent:
         success_score = 1.0 if observation.status == ActionStatus.SUCCESS else 0.0
         self.memory_system.store_memory(
             context.goal.id,
-            selected_action,
+            action,
             observation,
             {"goal_description": context.goal.description},
             success_score,
         )
 
-        self.action_selector.update_action_score(selected_action, success_score)
+        self.action_selector.update_action_score(action, success_score)
 
         progress_increment = analysis.get("goal_progress", 0.0)
         new_progress = min(context.goal.progress + progress_increment, 1.0)
@@ -334,16 +471,7 @@ class AutonomousAgent:
         if analysis.get("replanning_needed", False):
             logger.warning("Replanning needed for goal %s", context.goal.id)
 
-        context.completed_actions.append(selected_action.id)
-
-        recent_observations = [
-            memory.observation for memory in self.memory_system.working_memory[-5:]
-        ]
-        anomalies = self.observation_analyzer.detect_anomalies(recent_observations)
-        if anomalies:
-            logger.warning("Anomalies detected: %s", anomalies)
-
-        return True
+        context.completed_actions.append(action.id)
 
     async def _finalize_goal(self, context: GoalExecutionContext, success: bool) -> None:
         """Finalize a goal and persist learning signals."""
@@ -381,6 +509,12 @@ class AutonomousAgent:
         self.cross_session_learning.learn_from_goal(goal.description, action_dicts, success_score)
 
         self.performance_monitor.record_goal_metrics(success, 1, 1 if success else 0)
+        if context.graph is not None:
+            self.performance_monitor.record_plan_structure_metrics(
+                len(context.graph.actions),
+                context.graph.critical_path_length,
+                context.graph.critical_path_cost,
+            )
 
         knowledge_stats = self.cross_session_learning.get_knowledge_statistics()
         self.performance_monitor.record_learning_metrics(
@@ -391,7 +525,9 @@ class AutonomousAgent:
 
         logger.info("Goal %s: %s", final_status.value, goal.description)
 
-        await save_all_async(self)
+        # The snapshot is taken on the loop, so only the database write is offloaded
+        async with self._save_lock:
+            await save_all_async(self)
 
         self.goal_contexts.pop(goal.id, None)
 
@@ -404,6 +540,9 @@ class AutonomousAgent:
                 "status": ctx.goal.status.value,
                 "progress": ctx.goal.progress,
                 "priority": ctx.goal.priority,
+                "steps": ctx.steps,
+                "critical_path_length": ctx.graph.critical_path_length if ctx.graph else 0,
+                "avg_step_latency_ms": ctx.avg_step_latency_ms,
             }
             for ctx in self.goal_contexts.values()
         ]
@@ -416,6 +555,9 @@ class AutonomousAgent:
             "tool_stats": self.tool_registry.get_tool_stats(),
             "learning_stats": self.learning_system.get_learning_stats(),
             "cross_session_learning_stats": self.cross_session_learning.get_knowledge_statistics(),
+            "plan_cache_stats": (
+                self.planner.get_cache_stats() if hasattr(self.planner, "get_cache_stats") else {}
+            ),
             "ai_debug_stats": self.ai_debugger.generate_debug_report(),
             "performance_monitor_stats": self.performance_monitor.get_current_performance(),
             "is_running": self.is_running,
@@ -4,14 +4,19 @@ AI Debugging and Explainability system for transparent decision-making.
 
 from __future__ import annotations
 
+import itertools
 import json
 import logging
 import time
+from collections import deque
 from dataclasses import asdict, dataclass
 from datetime import datetime
 from enum import Enum
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Deque, Dict, List, Optional
+
+from .async_utils import run_blocking
+from .unified_config import unified_config
 
 logger = logging.getLogger(__name__)
 
@@ -82,18 +87,43 @@ class AIDecision:
 
 
 class AIDebugger:
-    """Main class for debugging and explaining AI decisions."""
+    """Main class for debugging and explaining AI decisions.
+
+    Decisions live in a ring buffer of the last ``max_decisions`` entries, with an
+    id index and per-type id queues that are trimmed as entries are evicted. With
+    ``sample_rate`` below 1.0 only that fraction of each decision type is recorded;
+    skipped decisions are counted but never built.
+    """
 
-    def __init__(self, debug_dir: str = ".agent_debug"):
+    def __init__(
+        self, debug_dir: str = ".agent_debug", max_decisions: int = 1000, sample_rate: float = 1.0
+    ):
         self.debug_dir = Path(debug_dir)
         self.debug_dir.mkdir(exist_ok=True)
-        self.decisions: List[AIDecision] = []
-        self.decision_history: Dict[str, List[str]] = {}  # For session tracking
-        self.max_decisions = 1000  # Keep last 1000 decisions
+        self.max_decisions = max_decisions  # Keep only the most recent decisions
+        self.decisions: Deque[AIDecision] = deque(maxlen=max_decisions)
+        self._decisions_by_id: Dict[str, AIDecision] = {}
+        self.decision_history: Dict[str, Deque[str]] = {}  # For session tracking
+        self.sample_rate = min(1.0, max(0.0, sample_rate))
+        self._sample_credit: Dict[DecisionType, float] = {}
+        self.decisions_sampled_out = 0
+        self._id_counter = itertools.count()
 
     def _generate_decision_id(self) -> str:
         """Generate unique decision ID."""
-        return f"decision_{int(time.time() * 1000)}"
+        return f"decision_{int(time.time() * 1000)}_{next(self._id_counter)}"
+
+    def _should_record(self, decision_type: DecisionType) -> bool:
+        """Deterministic per-type sampling, so rare decision types are not starved."""
+        if self.sample_rate >= 1.0:
+            return True
+        credit = self._sample_credit.get(decision_type, 0.0) + self.sample_rate
+        if credit >= 1.0:
+            self._sample_credit[decision_type] = credit - 1.0
+            return True
+        self._sample_credit[decision_type] = credit
+        self.decisions_sampled_out += 1
+        return False
 
     def _determine_confidence_level(self, confidence: float) -> ConfidenceLevel:
         """Determine confidence level from numerical value."""
@@ -113,6 +143,9 @@ class AIDebugger:
     ) -> str:
         """Log and explain a goal analysis decision."""
 
+        if not self._should_record(DecisionType.GOAL_ANALYSIS):
+            return ""
+
         decision_id = self._generate_decision_id()
         factors = []
 
@@ -197,6 +230,9 @@ class AIDebugger:
     ) -> str:
         """Log and explain an action selection decision."""
 
+        if not self._should_record(DecisionType.ACTION_SELECTION):
+            return ""
+
         decision_id = self._generate_decision_id()
         factors = []
         reasoning_chain = []
@@ -303,6 +339,9 @@ class AIDebugger:
     ) -> str:
         """Log and explain a planning decision."""
 
+        if not self._should_record(DecisionType.PLANNING):
+            return ""
+
         decision_id = self._generate_decision_id()
         factors = []
 
@@ -385,6 +424,9 @@ class AIDebugger:
     ) -> str:
         """Log and explain an observation analysis decision."""
 
+        if not self._should_record(DecisionType.OBSERVATION_ANALYSIS):
+            return ""
+
         decision_id = self._generate_decision_id()
         factors = []
         reasoning_chain = []
@@ -463,21 +505,30 @@ class AIDebugger:
 
     def _store_decision(self, decision: AIDecision) -> None:
         """Store a decision in the history."""
+        # Keep only the most recent decisions; the oldest decision is also the
+        # oldest entry of its type's index
+        if len(self.decisions) == self.decisions.maxlen:
+            evicted = self.decisions[0]
+            self._decisions_by_id.pop(evicted.decision_id, None)
+            history = self.decision_history.get(evicted.decision_type.value)
+            if history and history[0] == evicted.decision_id:
+                history.popleft()
         self.decisions.append(decision)
-
-        # Keep only the most recent decisions
-        if len(self.decisions) > self.max_decisions:
-            self.decisions = self.decisions[-self.max_decisions :]
+        self._decisions_by_id[decision.decision_id] = decision
 
         # Also store by decision type for quick access
         decision_type = decision.decision_type.value
         if decision_type not in self.decision_history:
-            self.decision_history[decision_type] = []
+            self.decision_history[decision_type] = deque()
         self.decision_history[decision_type].append(decision.decision_id)
 
+    def get_decision(self, decision_id: str) -> Optional[AIDecision]:
+        """Look up a retained decision by id."""
+        return self._decisions_by_id.get(decision_id)
+
     def get_decision_explanation(self, decision_id: str) -> Optional[Dict[str, Any]]:
         """Get a human-readable explanation of a specific decision."""
-        decision = next((d for d in self.decisions if d.decision_id == decision_id), None)
+        decision = self._decisions_by_id.get(decision_id)
         if not decision:
             return None
 
@@ -533,9 +584,10 @@ class AIDebugger:
         """Generate a comprehensive debug report."""
         if session_id:
             # Filter decisions by session
-            session_decisions = self.decisions  # In a real implementation, we'd filter by session
+            # In a real implementation, we'd filter by session
+            session_decisions = list(self.decisions)
         else:
-            session_decisions = self.decisions
+            session_decisions = list(self.decisions)
 
         # Calculate statistics
         total_decisions = len(session_decisions)
@@ -577,6 +629,8 @@ class AIDebugger:
                 "high_confidence_decisions": sum(
                     confidence_distribution[level] for level in ["very_high", "high"]
                 ),
+                "sample_rate": self.sample_rate,
+                "decisions_sampled_out": self.decisions_sampled_out,
             },
             "recent_decisions": [
                 {
@@ -639,23 +693,46 @@ class AIDebugger:
         return insights
 
     def save_debug_data(self, filepath: Optional[Path | str] = None) -> str:
-        """Save all debug data to a file."""
+        """Stream debug data to a JSONL file: a header line, then one decision per line."""
+        path, header, decisions = self._export_snapshot(filepath)
+        self._write_jsonl(path, header, decisions)
+        return str(path)
+
+    async def save_debug_data_async(self, filepath: Optional[Path | str] = None) -> str:
+        """Like save_debug_data, but the file is written off the event loop."""
+        path, header, decisions = self._export_snapshot(filepath)
+        await run_blocking(self._write_jsonl, path, header, decisions)
+        return str(path)
+
+    def _export_snapshot(
+        self, filepath: Optional[Path | str]
+    ) -> tuple[Path, Dict[str, Any], List[AIDecision]]:
         if not filepath:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filepath = self.debug_dir / f"debug_report_{timestamp}.json"
+            filepath = self.debug_dir / f"debug_report_{timestamp}.jsonl"
 
-        debug_data = {
+        header = {
             "export_timestamp": datetime.now().isoformat(),
-            "decisions": [decision.to_dict() for decision in self.decisions],
             "statistics": self.generate_debug_report()["statistics"],
         }
+        return Path(filepath), header, list(self.decisions)
 
-        with open(filepath, "w") as f:
-            json.dump(debug_data, f, indent=2)
+    def _write_jsonl(
+        self, filepath: Path, header: Dict[str, Any], decisions: List[AIDecision]
+    ) -> None:
+        with open(filepath, "w", encoding="utf-8") as f:
+            f.write(json.dumps(header, default=str) + "\n")
+            for decision in decisions:
+                f.write(json.dumps(decision.to_dict(), default=str) + "\n")
 
         logger.info(f"Debug data saved to {filepath}")
-        return str(filepath)
 
 
 # Global AI debugger instance
-ai_debugger = AIDebugger()
+ai_debugger = AIDebugger(
+    sample_rate=(
+        unified_config.agent.debug_sample_rate
+        if unified_config.agent.enable_debug_tracking
+        else 0.0
+    )
+)
@@ -7,13 +7,17 @@ from __future__ import annotations
 import json
 import logging
 import math
+import threading
 import time
-from collections import defaultdict, deque
+from array import array
+from collections import deque
 from dataclasses import asdict, dataclass, field
-from datetime import datetime, timedelta
+from datetime import datetime
 from enum import Enum
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+
+from .streaming_stats import WindowedStats
 
 # Try to import numpy for performance calculations
 NUMPY_AVAILABLE = False
@@ -82,6 +86,83 @@ class MetricPoint:
         return cls(**data)
 
 
+class MetricSeries:
+    """Preallocated ring buffer of samples for one metric.
+
+    Timestamps are ``time.monotonic()`` readings and values live in flat float
+    arrays; metadata is kept only for every ``metadata_interval``-th sample, keyed
+    by sequence number. Appends are a few array stores under a per-series lock:
+    the event loop, offloaded planning threads and tool pool threads all record
+    into the same series. Iterating yields ``MetricPoint`` objects for export
+    and reporting.
+    """
+
+    __slots__ = (
+        "capacity",
+        "timestamps",
+        "values",
+        "metadata",
+        "metadata_interval",
+        "_metadata_span",
+        "_count",
+        "_wall_offset",
+        "_lock",
+    )
+
+    def __init__(self, capacity: int = 1000, metadata_interval: int = 10) -> None:
+        self.capacity = capacity
+        self.timestamps = array("d", bytes(8 * capacity))
+        self.values = array("d", bytes(8 * capacity))
+        self.metadata: Dict[int, Dict[str, Any]] = {}
+        self.metadata_interval = max(1, metadata_interval)
+        # Sampled metadata older than this many sequence numbers has left the ring
+        self._metadata_span = -(-capacity // self.metadata_interval) * self.metadata_interval
+        self._count = 0
+        # Converts monotonic readings back to wall-clock time for reporting
+        self._wall_offset = time.time() - time.monotonic()
+        self._lock = threading.Lock()
+
+    def append(
+        self, timestamp: float, value: float, metadata: Dict[str, Any] | None = None
+    ) -> None:
+        with self._lock:
+            seq = self._count
+            slot = seq % self.capacity
+            self.timestamps[slot] = timestamp
+            self.values[slot] = value
+            self._count = seq + 1
+            if metadata and seq % self.metadata_interval == 0:
+                self.metadata[seq] = metadata
+                self.metadata.pop(seq - self._metadata_span, None)
+
+    def __len__(self) -> int:
+        return min(self._count, self.capacity)
+
+    @property
+    def total_count(self) -> int:
+        """Number of samples ever appended (the next sequence number)."""
+        return self._count
+
+    def samples(self, start: int, end: int) -> Iterator[tuple[float, float]]:
+        """(timestamp, value) pairs for sequence numbers in [start, end) still held."""
+        for seq in range(max(start, self._count - len(self)), end):
+            slot = seq % self.capacity
+            yield self.timestamps[slot], self.values[slot]
+
+    def _sequence(self) -> range:
+        """Sequence numbers still held in the ring, oldest first."""
+        return range(self._count - len(self), self._count)
+
+    def __iter__(self) -> Iterator[MetricPoint]:
+        for seq in self._sequence():
+            slot = seq % self.capacity
+            yield MetricPoint(
+                timestamp=datetime.fromtimestamp(self.timestamps[slot] + self._wall_offset),
+                value=self.values[slot],
+                metadata=self.metadata.get(seq, {}),
+            )
+
+
 @dataclass
 class PerformanceAlert:
     """Represents a performance alert."""
@@ -127,15 +208,46 @@ class MetricThresholds:
 
 
 class AIPerformanceMonitor:
-    """Real-time AI performance monitoring and alerting system."""
+    """Real-time AI performance monitoring and alerting system.
+
+    Recording only writes into preallocated per-metric series and marks the
+    metric for a threshold check; thresholds are evaluated and the streaming
+    trend windows are filled in batches on a background tick (or on demand
+    before reporting), keeping the agent's hot path cheap.
+    """
 
-    def __init__(self, monitor_dir: str = ".agent_monitoring"):
+    def __init__(
+        self,
+        monitor_dir: str = ".agent_monitoring",
+        history_size: int = 1000,
+        metadata_interval: int = 10,
+        threshold_check_interval: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
         self.monitor_dir = Path(monitor_dir)
         self.monitor_dir.mkdir(exist_ok=True)
 
         # Time series data storage
-        self.metrics_history: Dict[str, deque[Any]] = defaultdict(lambda: deque(maxlen=1000))
+        self.history_size = history_size
+        self.metadata_interval = metadata_interval
+        self.metrics_history: Dict[str, MetricSeries] = {}
         self.current_metrics: Dict[str, float] = {}
+        self._series_lock = threading.Lock()
+
+        # Streaming per-metric windows (10-minute buckets over 7 days) for trends,
+        # filled from the series in batches rather than on every record
+        self._clock = clock
+        self.metric_windows: Dict[str, WindowedStats] = {}
+        self._windowed_upto: Dict[str, int] = {}
+        self._window_lock = threading.Lock()
+
+        # Metrics awaiting a threshold check on the next tick
+        self.threshold_check_interval = threshold_check_interval
+        self._pending_thresholds: Set[str] = set()
+        self._thresholds_checked_upto: Dict[str, int] = {}
+        self._threshold_lock = threading.Lock()
+        self._tick_thread: Optional[threading.Thread] = None
+        self._stop_tick = threading.Event()
 
         # Performance tracking
         self.decision_times: deque[float] = deque(maxlen=100)
@@ -282,9 +394,6 @@ class AIPerformanceMonitor:
             },
         )
 
-        # Trigger alerts if necessary
-        self._check_thresholds("goal_completion_rate", completion_rate)
-
     def record_learning_metrics(
         self, patterns_learned: int, knowledge_base_size: int, confidence_scores: List[float]
     ) -> None:
@@ -341,6 +450,20 @@ class AIPerformanceMonitor:
             {"action_count": action_count, "execution_success_rate": execution_success_rate},
         )
 
+    def record_plan_structure_metrics(
+        self, action_count: int, critical_path_length: int, critical_path_cost: float
+    ) -> None:
+        """Record the dependency shape of an executed plan."""
+        self._record_metric(
+            "plan_critical_path_length",
+            critical_path_length,
+            {
+                "action_count": action_count,
+                "critical_path_cost": critical_path_cost,
+                "parallelism": action_count / critical_path_length if critical_path_length else 0.0,
+            },
+        )
+
     def record_cross_session_metrics(
         self, knowledge_retention_rate: float, pattern_reuse_success: float
     ) -> None:
@@ -351,19 +474,101 @@ class AIPerformanceMonitor:
             {"pattern_reuse_success": pattern_reuse_success},
         )
 
+    def record_cache_metrics(self, cache_name: str, hits: int, misses: int) -> None:
+        """Record hit rate for an internal cache from its cumulative counters."""
+        lookups = hits + misses
+        if not lookups:
+            return
+        self._record_metric(
+            f"{cache_name}_cache_hit_rate",
+            hits / lookups,
+            {"hits": hits, "misses": misses},
+        )
+
+    def record_planning_time_saved(self, saved_ms: float, cross_session_plans: int) -> None:
+        """Record cumulative planning time avoided by cached and reused plans."""
+        self._record_metric(
+            "planning_time_saved_ms", saved_ms, {"cross_session_plans": cross_session_plans}
+        )
+
+    def record_step_latency(self, goal_id: str, latency_ms: float) -> None:
+        """Record wall-clock latency of one agent step for a goal."""
+        self._record_metric("goal_step_latency_ms", latency_ms, {"goal_id": goal_id})
+
     def _record_metric(self, metric_name: str, value: float, metadata: Dict[str, Any] | None = None) -> None:
         """Record a metric data point."""
-        timestamp = datetime.now()
-        metric_point = MetricPoint(timestamp=timestamp, value=value, metadata=metadata or {})
+        series = self.metrics_history.get(metric_name)
+        if series is None:
+            with self._series_lock:
+                series = self.metrics_history.get(metric_name)
+                if series is None:
+                    series = self.metrics_history[metric_name] = MetricSeries(
+                        self.history_size, self.metadata_interval
+                    )
 
         # Store in history
-        self.metrics_history[metric_name].append(metric_point)
+        series.append(self._clock(), value, metadata)
 
         # Update current value
         self.current_metrics[metric_name] = value
 
-        # Check thresholds
-        self._check_thresholds(metric_name, value)
+        # Defer threshold checks and window updates to the next tick
+        if metric_name in self.thresholds:
+            self._pending_thresholds.add(metric_name)
+        if self._tick_thread is None:
+            self._start_threshold_tick()
+
+    def _start_threshold_tick(self) -> None:
+        with self._threshold_lock:
+            if self._tick_thread is not None:
+                return
+            self._tick_thread = threading.Thread(
+                target=self._run_threshold_tick, name="ai-performance-thresholds", daemon=True
+            )
+            self._tick_thread.start()
+
+    def _run_threshold_tick(self) -> None:
+        while not self._stop_tick.wait(self.threshold_check_interval):
+            try:
+                self.check_pending_thresholds()
+                self.update_metric_windows()
+            except Exception as e:  # pragma: no cover - keep the tick alive
+                logger.error(f"Threshold check failed: {e}")
+
+    def check_pending_thresholds(self) -> None:
+        """Evaluate thresholds for every sample recorded since the last check.
+
+        Every sample is checked, not just the latest value, so a breach followed by
+        a normal reading within one tick still raises its alert.
+        """
+        with self._threshold_lock:
+            while self._pending_thresholds:
+                metric_name = self._pending_thresholds.pop()
+                series = self.metrics_history[metric_name]
+                start = self._thresholds_checked_upto.get(metric_name, 0)
+                end = self._thresholds_checked_upto[metric_name] = series.total_count
+                for _, value in series.samples(start, end):
+                    self._check_thresholds(metric_name, value)
+
+    def update_metric_windows(self) -> None:
+        """Fold samples recorded since the last update into the streaming windows."""
+        with self._window_lock:
+            for metric_name, series in list(self.metrics_history.items()):
+                window = self.metric_windows.get(metric_name)
+                if window is None:
+                    window = self.metric_windows[metric_name] = WindowedStats(
+                        bucket_seconds=600, bucket_count=1008, clock=self._clock
+                    )
+                start, end = self._windowed_upto.get(metric_name, 0), series.total_count
+                for timestamp, value in series.samples(start, end):
+                    window.add(value, timestamp)
+                self._windowed_upto[metric_name] = end
+
+    def close(self) -> None:
+        """Stop the background tick after a final check."""
+        self._stop_tick.set()
+        self.check_pending_thresholds()
+        self.update_metric_windows()
 
     def _check_thresholds(self, metric_name: str, current_value: float) -> None:
         """Check if metric value triggers any alerts."""
@@ -480,6 +685,7 @@ class AIPerformanceMonitor:
 
     def get_current_performance(self) -> Dict[str, Any]:
         """Get current performance metrics."""
+        self.check_pending_thresholds()
         performance_levels: Dict[str, Any] = {}
         performance_data: Dict[str, Any] = {
             "timestamp": datetime.now().isoformat(),
@@ -559,22 +765,24 @@ class AIPerformanceMonitor:
 
     def get_performance_trends(self, hours: int = 24) -> Dict[str, Any]:
         """Get performance trends over specified time period."""
-        cutoff_time = datetime.now() - timedelta(hours=hours)
+        self.update_metric_windows()
+        window_seconds = hours * 3600
         trends = {}
 
-        for metric_name, history in self.metrics_history.items():
-            # Filter data points within time window
-            recent_points = [point for point in history if point.timestamp >= cutoff_time]
+        for metric_name, window in self.metric_windows.items():
+            summary = window.summary(window_seconds)
 
-            if recent_points:
-                values = [point.value for point in recent_points]
+            if summary["count"]:
                 trends[metric_name] = {
-                    "data_points": len(values),
-                    "min_value": min(values),
-                    "max_value": max(values),
-                    "avg_value": sum(values) / len(values),
+                    "data_points": summary["count"],
+                    "min_value": summary["min"],
+                    "max_value": summary["max"],
+                    "avg_value": summary["mean"],
+                    "p50_value": summary["p50"],
+                    "p95_value": summary["p95"],
+                    "p99_value": summary["p99"],
                     "current_value": self.current_metrics.get(metric_name, 0),
-                    "trend": self._calculate_trend(values),
+                    "trend": self._calculate_trend(window.halves(window_seconds)),
                     "time_span_hours": hours,
                 }
 
@@ -585,19 +793,16 @@ class AIPerformanceMonitor:
             "summary": self._analyze_trends(trends),
         }
 
-    def _calculate_trend(self, values: List[float]) -> str:
-        """Calculate trend direction for a series of values."""
-        if len(values) < 2:
+    def _calculate_trend(self, halves: Optional[tuple[float, float]]) -> str:
+        """Calculate trend direction from the older and newer half of a window."""
+        if halves is None:
             return "stable"
 
-        # Simple linear trend calculation
-        first_half = values[: len(values) // 2]
-        second_half = values[len(values) // 2 :]
-
-        first_avg = sum(first_half) / len(first_half)
-        second_avg = sum(second_half) / len(second_half)
+        first_avg, second_avg = halves
+        if not first_avg:
+            return "stable"
 
-        change_percent = ((second_avg - first_avg) / first_avg) * 100
+        change_percent = ((second_avg - first_avg) / abs(first_avg)) * 100
 
         if change_percent > 5:
             return "improving"
@@ -668,7 +873,7 @@ class AIPerformanceMonitor:
             ],  # Last 100 alerts
             "metrics_history": {
                 metric_name: [point.to_dict() for point in history]
-                for metric_name, history in self.metrics_history.items()
+                for metric_name, history in list(self.metrics_history.items())
             },
         }
 
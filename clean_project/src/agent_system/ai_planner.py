@@ -5,9 +5,14 @@ AI-powered hierarchical planner with real intelligence.
 from __future__ import annotations
 
 import logging
-from typing import TYPE_CHECKING, Any, Dict, List, Optional
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, FrozenSet, List, Optional, Tuple
 
+from .cross_session_learning import cross_session_learning
 from .models import Action, Goal, Plan
+from .unified_config import unified_config
 
 # Import the global reasoning engine instance with a typing-friendly fallback.
 # We keep a local Optional-typed alias to satisfy mypy when the import is unavailable.
@@ -17,6 +22,7 @@ if TYPE_CHECKING:  # pragma: no cover - type checkers only
 _reasoning_engine: Optional["ReasoningEngine"] = None
 try:
     from .reasoning_engine import reasoning_engine as _re
+
     _reasoning_engine = _re
 except Exception:
     _reasoning_engine = None
@@ -26,6 +32,27 @@ reasoning_engine: Optional["ReasoningEngine"] = _reasoning_engine
 
 logger = logging.getLogger(__name__)
 
+# (goal pattern, suggested actions, parameter names, available tools)
+TemplateKey = Tuple[str, Tuple[str, ...], Tuple[str, ...], FrozenSet[str]]
+
+
+@dataclass(frozen=True)
+class PlanStep:
+    """One action of a plan template; parameters are filled in per goal."""
+
+    action_id: str
+    name: str
+    tool_name: str
+    expected_outcome: str
+    prerequisites: Tuple[int, ...]  # Indices of earlier steps
+
+
+@dataclass(frozen=True)
+class PlanTemplate:
+    """Tool-resolved plan structure shared by goals of the same kind."""
+
+    steps: Tuple[PlanStep, ...]
+
 
 class AIPlanner:
     """AI-powered planner that uses reasoning engine for intelligent planning."""
@@ -33,12 +60,30 @@ class AIPlanner:
     def __init__(self) -> None:
         # Hold an Optional reference to the global reasoning engine instance
         self.reasoning_engine = reasoning_engine
-        self.goal_cache: Dict[str, Any] = {}  # Cache analyzed goals
+        self.cross_session_learning = cross_session_learning
+        # Goal analyses by goal id, until the caller takes them
+        self.goal_cache: Dict[str, Any] = {}
+
+        # LRU of plan templates; goal-specific parameters are applied on instantiation
+        self._plan_templates: OrderedDict[TemplateKey, PlanTemplate] = OrderedDict()
+        self._plan_cache_size = max(0, unified_config.ai.plan_cache_size)
+        self.cross_session_confidence = unified_config.ai.cross_session_plan_confidence
+        self.template_hits = 0
+        self.template_misses = 0
+        self.cross_session_plans = 0
+        self.planning_time_saved_ms = 0.0
+        self._full_planning_ms: Optional[float] = None  # EWMA of uncached planning time
 
     def create_intelligent_plan(
         self, goal: Goal, available_tools: List[str], context: Optional[Dict[str, Any]] = None
     ) -> Plan:
-        """Create an intelligent plan using AI reasoning."""
+        """Create an intelligent plan using AI reasoning.
+
+        A high-confidence action sequence learned in earlier sessions is reused
+        without analyzing the goal. Otherwise the goal is analyzed and its plan is
+        instantiated from a template cached per goal pattern, parameter names and
+        tool set, so only the goal-specific parameters are recomputed.
+        """
 
         logger.info(f"Creating intelligent plan for goal: {goal.description}")
 
@@ -46,17 +91,24 @@ class AIPlanner:
             # Fallback to simple planning
             return self._create_simple_plan(goal, available_tools)
 
+        start = time.perf_counter()
+        plan = self._plan_from_cross_session(goal, available_tools)
+        if plan is not None:
+            self._record_planning_time(start, cached=True)
+            return plan
+
         # Analyze the goal with AI (use enhanced method if available)
         if hasattr(self.reasoning_engine, "enhanced_analyze_goal"):
             goal_analysis = self.reasoning_engine.enhanced_analyze_goal(goal.description)
         else:
             goal_analysis = self.reasoning_engine.analyze_goal(goal.description)
 
-        # Generate action plan using AI
-        actions = self.reasoning_engine.generate_action_plan(goal_analysis)
-
-        # Optimize actions based on available tools
-        optimized_actions = self._optimize_actions_for_tools(actions, available_tools)
+        optimized_actions, cached = self._plan_actions(
+            goal_analysis["pattern"],
+            goal_analysis["suggested_actions"],
+            goal_analysis["parameters"],
+            available_tools,
+        )
 
         # Calculate plan metrics
         estimated_cost = self._estimate_plan_cost(optimized_actions)
@@ -72,6 +124,7 @@ class AIPlanner:
 
         # Store analysis for learning
         self.goal_cache[goal.id] = goal_analysis
+        self._record_planning_time(start, cached=cached)
 
         logger.info(
             f"Created plan with {len(optimized_actions)} actions, confidence: {confidence:.2f}"
@@ -79,6 +132,164 @@ class AIPlanner:
 
         return plan
 
+    def _plan_from_cross_session(self, goal: Goal, available_tools: List[str]) -> Optional[Plan]:
+        """Reuse a learned action sequence when it is trusted enough to skip planning."""
+        if self.cross_session_learning is None or self.reasoning_engine is None:
+            return None
+
+        best = self.cross_session_learning.get_best_action_sequence_with_confidence(
+            goal.description
+        )
+        if not best:
+            return None
+        sequence, confidence = best
+        templates = self.reasoning_engine.action_templates
+        if (
+            confidence < self.cross_session_confidence
+            or not sequence
+            or any(name not in templates for name in sequence)
+        ):
+            return None
+
+        parameters = {"description": goal.description}
+        parameters.update(self.reasoning_engine.extract_parameters(goal.description, {}))
+        actions, _ = self._plan_actions("learned", sequence, parameters, available_tools)
+
+        self.cross_session_plans += 1
+        logger.info(
+            "Reusing cross-session sequence for %s (confidence %.2f): %s",
+            goal.id,
+            confidence,
+            " -> ".join(sequence),
+        )
+        return Plan(
+            goal_id=goal.id,
+            actions=actions,
+            estimated_cost=self._estimate_plan_cost(actions),
+            confidence=confidence,
+        )
+
+    def _plan_actions(
+        self,
+        pattern: str,
+        suggested_actions: List[str],
+        parameters: Dict[str, Any],
+        available_tools: List[str],
+    ) -> Tuple[List[Action], bool]:
+        """Build actions from a cached template, creating the template on a miss."""
+        key: TemplateKey = (
+            pattern,
+            tuple(suggested_actions),
+            tuple(sorted(parameters)),
+            frozenset(available_tools),
+        )
+        template = self._plan_templates.get(key)
+        if template is not None:
+            self._plan_templates.move_to_end(key)
+            self.template_hits += 1
+            return self._instantiate_template(template, parameters), True
+
+        self.template_misses += 1
+        analysis = {
+            "pattern": pattern,
+            "suggested_actions": suggested_actions,
+            "parameters": parameters,
+        }
+        # Generate action plan using AI, then optimize actions based on available tools
+        actions = self.reasoning_engine.generate_action_plan(analysis)
+        optimized_actions = self._optimize_actions_for_tools(actions, available_tools)
+
+        if self._plan_cache_size:
+            self._plan_templates[key] = self._template_from_actions(optimized_actions)
+            if len(self._plan_templates) > self._plan_cache_size:
+                self._plan_templates.popitem(last=False)
+        return optimized_actions, False
+
+    @staticmethod
+    def _template_from_actions(actions: List[Action]) -> PlanTemplate:
+        index = {action.id: i for i, action in enumerate(actions)}
+        return PlanTemplate(
+            steps=tuple(
+                PlanStep(
+                    action_id=action.id,
+                    name=action.name,
+                    tool_name=action.tool_name,
+                    expected_outcome=action.expected_outcome,
+                    prerequisites=tuple(
+                        index[prereq] for prereq in action.prerequisites if prereq in index
+                    ),
+                )
+                for action in actions
+            )
+        )
+
+    def _instantiate_template(
+        self, template: PlanTemplate, parameters: Dict[str, Any]
+    ) -> List[Action]:
+        """Fill a template with one goal's parameters and cost estimates."""
+        templates = self.reasoning_engine.action_templates
+        actions: List[Action] = []
+        for step in template.steps:
+            base_parameters = templates.get(step.name, {}).get("parameters", {})
+            step_parameters = self.reasoning_engine.customize_parameters(
+                base_parameters, parameters, step.name
+            )
+            actions.append(
+                Action(
+                    id=step.action_id,
+                    name=step.name,
+                    tool_name=step.tool_name,
+                    parameters=step_parameters,
+                    expected_outcome=step.expected_outcome,
+                    cost=self._estimate_action_cost(
+                        {"name": step.name, "parameters": step_parameters}
+                    ),
+                    prerequisites=[template.steps[i].action_id for i in step.prerequisites],
+                )
+            )
+        return actions
+
+    def _record_planning_time(self, start: float, cached: bool) -> None:
+        """Track uncached planning time and how much cached plans saved against it."""
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if not cached:
+            previous = self._full_planning_ms
+            self._full_planning_ms = (
+                elapsed_ms if previous is None else 0.8 * previous + 0.2 * elapsed_ms
+            )
+        elif self._full_planning_ms is not None:
+            self.planning_time_saved_ms += max(0.0, self._full_planning_ms - elapsed_ms)
+        self._report_cache_metrics()
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for plan templates and cross-session plan reuse."""
+        lookups = self.template_hits + self.template_misses
+        return {
+            "size": len(self._plan_templates),
+            "capacity": self._plan_cache_size,
+            "hits": self.template_hits,
+            "misses": self.template_misses,
+            "hit_rate": self.template_hits / lookups if lookups else 0.0,
+            "cross_session_plans": self.cross_session_plans,
+            "planning_time_saved_ms": self.planning_time_saved_ms,
+        }
+
+    def clear_plan_cache(self) -> None:
+        self._plan_templates.clear()
+
+    def _report_cache_metrics(self) -> None:
+        try:
+            from .ai_performance_monitor import ai_performance_monitor
+
+            ai_performance_monitor.record_cache_metrics(
+                "plan_template", self.template_hits, self.template_misses
+            )
+            ai_performance_monitor.record_planning_time_saved(
+                self.planning_time_saved_ms, self.cross_session_plans
+            )
+        except Exception as e:  # pragma: no cover - monitoring must never break planning
+            logger.debug(f"Failed to report plan cache metrics: {e}")
+
     def _create_simple_plan(self, goal: Goal, available_tools: List[str]) -> Plan:
         """Create a simple plan when AI reasoning is not available."""
         goal_lower = goal.description.lower()
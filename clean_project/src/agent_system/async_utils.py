@@ -1,21 +1,40 @@
 from __future__ import annotations
 
 import asyncio
+import atexit
+import concurrent.futures
 import logging
 import threading
 from functools import partial
-from typing import Any, Callable, TypeVar
+from typing import Any, Awaitable, Callable, TypeVar
 
 T = TypeVar("T")
 logger = logging.getLogger(__name__)
 
 
 async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
-    """Execute a blocking callable in a dedicated thread and return its result."""
+    """Execute a blocking callable in a dedicated thread and return its result.
+
+    The awaiting task is resumed through ``call_soon_threadsafe`` once the thread
+    finishes, so the event loop stays idle rather than polling while it waits.
+    """
     call = partial(func, *args, **kwargs)
-    done = threading.Event()
-    result_container: list[T] = []
-    error_container: list[BaseException] = []
+    loop = asyncio.get_running_loop()
+    future: asyncio.Future[T] = loop.create_future()
+
+    def _set_result(value: T) -> None:
+        if not future.done():
+            future.set_result(value)
+
+    def _set_exception(exc: BaseException) -> None:
+        if not future.done():
+            future.set_exception(exc)
+
+    def _resolve(callback: Callable[[Any], None], value: Any) -> None:
+        try:
+            loop.call_soon_threadsafe(callback, value)
+        except RuntimeError:  # pragma: no cover - loop closed while the call was running
+            logger.debug("Event loop closed before %r completed", func)
 
     def _target() -> None:
         logger.debug(
@@ -23,30 +42,115 @@ async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
             getattr(func, "__qualname__", repr(func)),
         )
         try:
-            result_container.append(call())
+            result = call()
         except BaseException as exc:  # pragma: no cover - best-effort logging
-            error_container.append(exc)
-        finally:
-            done.set()
+            _resolve(_set_exception, exc)
+        else:
+            _resolve(_set_result, result)
 
     threading.Thread(target=_target, daemon=True).start()
 
-    while not done.is_set():
-        await asyncio.sleep(0)
-
-    if error_container:
-        exc = error_container[0]
+    try:
+        result = await future
+    except BaseException as exc:
         logger.debug(
             "Blocking function %s raised %s",
             getattr(func, "__qualname__", repr(func)),
             exc,
             exc_info=True,
         )
-        raise exc
+        raise
 
-    result = result_container[0]
     logger.debug(
         "Completed blocking function %s",
         getattr(func, "__qualname__", repr(func)),
     )
     return result
+
+
+class BackgroundLoop:
+    """A long-lived event loop on a daemon thread for running coroutines from sync code.
+
+    Coroutines submitted here share one loop for the life of the process, so
+    anything they cache on it (client sessions, connection pools) survives
+    between calls instead of being torn down with a per-call ``asyncio.run``.
+    """
+
+    def __init__(self, name: str = "agent-background-loop") -> None:
+        self.name = name
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The running loop, started on first use."""
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                ready = threading.Event()
+                loop = asyncio.new_event_loop()
+
+                def _serve() -> None:
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+
+                self._thread = threading.Thread(target=_serve, name=self.name, daemon=True)
+                self._thread.start()
+                ready.wait()
+                self._loop = loop
+            return self._loop
+
+    def in_loop_thread(self) -> bool:
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def submit(self, coro: Awaitable[T]) -> concurrent.futures.Future[T]:
+        """Schedule ``coro`` on the background loop and return a thread-safe future."""
+        return asyncio.run_coroutine_threadsafe(_as_coroutine(coro), self.loop)
+
+    def run(self, coro: Awaitable[T], timeout: float | None = None) -> T:
+        """Block the calling thread until ``coro`` finishes on the background loop.
+
+        Calling this from the loop's own thread would deadlock, so that case
+        raises RuntimeError; code already on the loop should ``await`` instead.
+        """
+        if self.in_loop_thread():
+            raise RuntimeError("BackgroundLoop.run() called from the background loop itself")
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Cancel outstanding tasks, stop the loop and join its thread."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None or loop.is_closed():
+            return
+
+        async def _cancel_pending() -> None:
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        try:
+            asyncio.run_coroutine_threadsafe(_cancel_pending(), loop).result(timeout)
+        except Exception as exc:  # pragma: no cover - best-effort cleanup at exit
+            logger.debug("Background loop shutdown: %s", exc)
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join(timeout)
+        if not loop.is_running():
+            loop.close()
+
+
+async def _as_coroutine(awaitable: Awaitable[T]) -> T:
+    return await awaitable
+
+
+background_loop = BackgroundLoop()
+atexit.register(background_loop.shutdown)
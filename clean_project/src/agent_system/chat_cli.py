@@ -57,8 +57,13 @@ SYSTEM_PROMPT = (
     '2) {"type":"tool_batch","calls":[{"tool":...,"args":{...}}, ...]} (max 5 calls). '
     "For shell: args {cmd: <ls|cat|head|tail|wc|grep|stat|pwd|echo>, args: [<tokens>]}. "
     "For code_search: args {pattern: <regex>, path: '.', include?: pattern|[...], exclude?: pattern|[...], max_results?: N}. "
-    "For git: args {cmd: <status|log|diff>, n?: <1..100>, path?: <path>, range?: <rev..rev>}. "
-    "For tests: args {path?: 'tests', pattern?: 'test*.py'}. "
+    "For git: args {cmd: <status|log|diff>, n?: <1..100>, path?: <path>, range?: <rev..rev>, "
+    "offset?: <int>, limit?: <int>} or {queries: [<up to 10 such objects>]}; "
+    "results are paginated, pass next_offset as offset for more. "
+    "For tests: args {path?: 'tests', pattern?: 'test*.py', full?: bool} "
+    "(only tests affected by changed files run unless full). "
+    "For large files use file_reader mode <range|tail|grep|sample> "
+    "(range: offset/length or start_line/line_count; tail: lines; grep: pattern; sample: count). "
     "Otherwise, output plain text. No markdown fences."
 )
 
@@ -118,14 +123,35 @@ def sanitize_tool_call(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         if not fp:
             return None
         fmt = str(args.get("format", "auto")).lower()
-        args = {"filepath": fp, "format": fmt}
+        view_keys = (
+            "mode",
+            "offset",
+            "length",
+            "start_line",
+            "line_count",
+            "lines",
+            "pattern",
+            "ignore_case",
+            "max_matches",
+            "first_line",
+            "count",
+            "seed",
+        )
+        extra = {k: args[k] for k in view_keys if args.get(k) is not None}
+        args = {"filepath": fp, "format": fmt, **extra}
     elif tool == "file_writer":
         fp = str(args.get("filepath", "")).strip()
         if not fp:
             return None
         content = args.get("content", "")
         fmt = str(args.get("format", "text")).lower()
-        args = {"filepath": fp, "content": content, "format": fmt}
+        mode = str(args.get("mode", "write")).lower()
+        if mode not in {"write", "append"}:
+            return None
+        fsync = args.get("fsync")
+        args = {"filepath": fp, "content": content, "format": fmt, "mode": mode}
+        if isinstance(fsync, bool):
+            args["fsync"] = fsync
     elif tool == "shell":
         cmd = str(args.get("cmd", "")).lower().strip()
         arg_list = args.get("args", [])
@@ -158,33 +184,54 @@ def sanitize_tool_call(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
             "include": include,
             "exclude": exclude,
             "max_edits": max_edits,
+            "dry_run": bool(args.get("dry_run", False)),
         }
     elif tool == "restore_backup":
         latest = bool(args.get("latest", True))
         backup = args.get("backup")
         args = {"latest": latest, "backup": backup}
     elif tool == "git":
-        cmd = str(args.get("cmd", "")).lower().strip()
-        if cmd not in {"status", "log", "diff"}:
-            return None
-        out: Dict[str, Any] = {"cmd": cmd}
-        if cmd == "log":
-            try:
-                out["n"] = max(1, min(100, int(args.get("n", 10))))
-            except Exception:
-                out["n"] = 10
-        if cmd == "diff":
-            rng_val = args.get("range")
-            path_val = args.get("path")
-            if isinstance(rng_val, str):
-                out["range"] = rng_val
-            if isinstance(path_val, str):
-                out["path"] = path_val
-        args = out
+        queries = args.get("queries")
+        if isinstance(queries, list):
+            batch = [_sanitize_git_query(q) for q in queries[:10] if isinstance(q, dict)]
+            if not batch or None in batch:
+                return None
+            args = {"queries": batch}
+        else:
+            single = _sanitize_git_query(args)
+            if single is None:
+                return None
+            args = single
     data["args"] = args
     return data
 
 
+def _sanitize_git_query(args: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    cmd = str(args.get("cmd", "")).lower().strip()
+    if cmd not in {"status", "log", "diff"}:
+        return None
+    out: Dict[str, Any] = {"cmd": cmd}
+    if cmd == "log":
+        try:
+            out["n"] = max(1, min(100, int(args.get("n", 10))))
+        except Exception:
+            out["n"] = 10
+    if cmd == "diff":
+        rng_val = args.get("range")
+        path_val = args.get("path")
+        if isinstance(rng_val, str):
+            out["range"] = rng_val
+        if isinstance(path_val, str):
+            out["path"] = path_val
+    for key in ("offset", "limit"):
+        try:
+            if key in args:
+                out[key] = max(0, int(args[key]))
+        except Exception:
+            pass
+    return out
+
+
 def summarize(messages: List[Dict[str, str]], limit: int = 500) -> str:
     # Naive summarizer: keep last user+assistant sentences, truncate
     chunks: List[str] = []
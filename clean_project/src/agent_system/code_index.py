@@ -0,0 +1,496 @@
+"""
+On-disk trigram index used by ``CodeSearchTool``.
+
+Every indexed file is stored with its mtime, size and the sorted set of
+(ASCII-lowercased) byte trigrams it contains. A query extracts the literal runs
+a regex requires, turns them into trigrams, and only files holding all of them
+are read and matched. The index lives under ``<root>/.agent_code_index`` and is
+refreshed incrementally: only files whose mtime or size changed are re-read.
+Trigram extraction for large batches and regex verification of large candidate
+sets run in a shared process pool.
+"""
+
+from __future__ import annotations
+
+import atexit
+import fnmatch
+import json
+import logging
+import multiprocessing
+import os
+import re
+import struct
+import tempfile
+import threading
+from array import array
+from bisect import bisect_left
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Generator, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+INDEX_DIRNAME = ".agent_code_index"
+SKIPPED_DIRS = frozenset({".git", ".hg", ".svn", "node_modules", "__pycache__", INDEX_DIRNAME})
+DEFAULT_MAX_FILE_BYTES = 4 * 1024 * 1024  # Larger files are never filtered out, only scanned
+PARALLEL_MIN_FILES = 64  # Below this, a process pool costs more than it saves
+
+_INDEX_FILE = "trigrams.bin"
+_MAGIC = b"AGTRI1\n"
+_HEADER = struct.Struct("<Q")
+_UNINDEXED = -1
+
+# (mtime_ns, size, trigrams); trigrams is None for files too large to index
+_Entry = Tuple[int, int, Optional[array]]
+
+
+# --------------------------------------------------------------------- trigrams
+def file_trigrams(data: bytes) -> array:
+    """Sorted trigram codes of a file's bytes, ASCII case folded."""
+    lowered = data.lower()
+    grams = {lowered[i : i + 3] for i in range(len(lowered) - 2)}
+    return array("I", sorted(int.from_bytes(gram, "big") for gram in grams))
+
+
+def _literal_trigrams(literal: str) -> set[int]:
+    data = literal.encode("ascii").lower()
+    return {int.from_bytes(data[i : i + 3], "big") for i in range(len(data) - 2)}
+
+
+_QUANTIFIER_RE = re.compile(r"\{(\d*)(?:,(\d*))?\}[?+]?|[*+?][?+]?")
+_CHAR_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "f": "\f", "v": "\v"}
+# Escapes spelling one character over several: \xhh, \uhhhh, \Uhhhhhhhh, \N{name},
+# and \0oo octal or \1..\99 backreferences (three octal digits also form one character)
+_MULTI_ESCAPE_RE = re.compile(
+    r"x[0-9a-fA-F]{0,2}|u[0-9a-fA-F]{0,4}|U[0-9a-fA-F]{0,8}|N\{[^}]*\}?|\d{1,3}"
+)
+
+
+def _skip_bracketed(pattern: str, start: int) -> int:
+    """Index just past the character class or group opening at ``start``."""
+    depth = 0
+    i = start
+    in_class = False
+    class_start = start
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == "\\":
+            i += 2
+            continue
+        if in_class:
+            # A ']' right after '[' or '[^' is literal
+            if ch == "]" and i > class_start + 1 and pattern[class_start + 1 : i] != "^":
+                in_class = False
+                if depth == 0:
+                    return i + 1
+        elif ch == "[":
+            in_class = True
+            class_start = i
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return len(pattern)
+
+
+def required_literals(pattern: str) -> Optional[List[List[str]]]:
+    """Literal substrings a match of ``pattern`` must contain.
+
+    Returns one list of literals per top-level alternative; a match contains every
+    literal of at least one alternative. Groups, classes and escapes other than
+    simple characters are treated as unknown text, so the result is conservative.
+    Returns None for patterns that cannot be analysed (e.g. verbose mode).
+    """
+    try:
+        if re.compile(pattern).flags & re.VERBOSE:
+            return None
+    except re.error:
+        return None
+
+    alternatives: List[List[str]] = []
+    literals: List[str] = []
+    run: List[str] = []
+
+    def flush() -> None:
+        if run:
+            literals.append("".join(run))
+            run.clear()
+
+    i = 0
+    while i < len(pattern):
+        ch = pattern[i]
+        char: Optional[str] = None
+        if ch == "\\" and i + 1 < len(pattern):
+            escaped = pattern[i + 1]
+            multi = _MULTI_ESCAPE_RE.match(pattern, i + 1)
+            if multi:
+                # Consumed whole as unknown text; a backreference may be anything
+                i = multi.end()
+            else:
+                i += 2
+                if escaped in _CHAR_ESCAPES:
+                    char = _CHAR_ESCAPES[escaped]
+                elif not escaped.isalnum():
+                    char = escaped
+        elif ch in "[(":
+            i = _skip_bracketed(pattern, i)
+        elif ch == "|":
+            flush()
+            alternatives.append(literals)
+            literals = []
+            i += 1
+            continue
+        elif ch in ".^$":
+            i += 1
+        else:
+            char = ch
+            i += 1
+
+        quantifier = _QUANTIFIER_RE.match(pattern, i)
+        if char is None or not char.isascii():
+            # Unknown text: it separates literal runs
+            flush()
+            if quantifier:
+                i = quantifier.end()
+            continue
+        if not quantifier:
+            run.append(char)
+            continue
+
+        i = quantifier.end()
+        text = quantifier.group(0)
+        at_least_once = text[0] == "+" or (text[0] == "{" and int(quantifier.group(1) or 0) > 0)
+        if at_least_once:
+            # "ab+c" still requires "ab" and "bc"
+            run.append(char)
+            flush()
+            run.append(char)
+        else:
+            flush()
+    flush()
+    alternatives.append(literals)
+    return alternatives
+
+
+def regex_trigrams(pattern: str) -> Optional[List[set[int]]]:
+    """Trigram sets per alternative, or None when the pattern cannot narrow the search."""
+    alternatives = required_literals(pattern)
+    if alternatives is None:
+        return None
+    groups = [set().union(*(_literal_trigrams(lit) for lit in lits)) for lits in alternatives]
+    if not groups or any(not group for group in groups):
+        return None
+    return groups
+
+
+def _has_trigrams(grams: array, wanted: set[int]) -> bool:
+    size = len(grams)
+    for gram in wanted:
+        pos = bisect_left(grams, gram)
+        if pos == size or grams[pos] != gram:
+            return False
+    return True
+
+
+# ---------------------------------------------------------------- worker tasks
+def _index_files(paths: Sequence[Tuple[str, str]], max_file_bytes: int) -> List[Tuple[str, _Entry]]:
+    """Process-pool task: stat and extract trigrams for (rel, abs) paths."""
+    entries: List[Tuple[str, _Entry]] = []
+    for rel, path in paths:
+        try:
+            st = os.stat(path)
+            if st.st_size > max_file_bytes:
+                entries.append((rel, (st.st_mtime_ns, st.st_size, None)))
+                continue
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            continue
+        entries.append((rel, (st.st_mtime_ns, st.st_size, file_trigrams(data))))
+    return entries
+
+
+def scan_files(
+    paths: Sequence[str], pattern: str, flags: int, max_results: int
+) -> List[Dict[str, Any]]:
+    """Process-pool task: regex-scan files line by line."""
+    regex = re.compile(pattern, flags)
+    matches: List[Dict[str, Any]] = []
+    for filepath in paths:
+        try:
+            # Read text files only (best-effort)
+            with open(filepath, encoding="utf-8", errors="ignore") as f:
+                for i, line in enumerate(f, start=1):
+                    if regex.search(line):
+                        matches.append({"file": filepath, "line": i, "text": line.strip()[:500]})
+                        if len(matches) >= max_results:
+                            return matches
+        except Exception:
+            continue
+    return matches
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def process_pool(workers: int) -> ProcessPoolExecutor:
+    """Process pool shared by code search and batch replacement."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            # Forking a threaded process can inherit held locks; use a clean server process
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else None)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_process_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+atexit.register(shutdown_process_pool)
+
+
+def chunked(items: Sequence[Any], parts: int) -> List[Sequence[Any]]:
+    """Split ``items`` into at most ``parts`` contiguous slices."""
+    size = max(1, -(-len(items) // parts))
+    return [items[start : start + size] for start in range(0, len(items), size)]
+
+
+def map_ordered(
+    fn: Callable[..., Any], chunks: Sequence[Any], *args: Any, workers: int
+) -> Generator[Any, None, None]:
+    """Yield ``fn(chunk, *args)`` for each chunk, in order, computed on the process pool.
+
+    At most ``2 * workers`` chunks are in flight, so a caller that stops iterating
+    early (closing the generator) cancels the work it no longer needs.
+    """
+    pool = process_pool(workers)
+    pending: Deque[Future[Any]] = deque()
+    submitted = 0
+    try:
+        while submitted < len(chunks) or pending:
+            while submitted < len(chunks) and len(pending) < workers * 2:
+                pending.append(pool.submit(fn, chunks[submitted], *args))
+                submitted += 1
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def parallel_scan(
+    paths: Sequence[str], pattern: str, flags: int, max_results: int, workers: int
+) -> List[Dict[str, Any]]:
+    """Scan ``paths`` in order, fanning out to the process pool for large sets."""
+    if workers <= 1 or len(paths) < PARALLEL_MIN_FILES:
+        return scan_files(paths, pattern, flags, max_results)
+
+    # Small chunks keep workers busy when match density is uneven
+    matches: List[Dict[str, Any]] = []
+    results = map_ordered(
+        scan_files, chunked(paths, workers * 8), pattern, flags, max_results, workers=workers
+    )
+    for chunk_matches in results:
+        matches.extend(chunk_matches)
+        if len(matches) >= max_results:
+            results.close()
+            break
+    return matches[:max_results]
+
+
+def path_filter(root: str, includes: List[str], excludes: List[str]) -> Callable[[str], bool]:
+    """Include/exclude matcher equivalent to fnmatch checks during an ``os.walk`` of root.
+
+    Like the walk, which prunes excluded directories, a file below an excluded
+    directory (other than root itself) is rejected.
+    """
+
+    def compile_any(patterns: List[str]) -> Optional[re.Pattern[str]]:
+        if not patterns:
+            return None
+        return re.compile("|".join(f"(?:{fnmatch.translate(p)})" for p in patterns))
+
+    excluded = compile_any(excludes)
+    included = None if "**/*" in includes else compile_any(includes)
+    pruned: Dict[str, bool] = {}
+
+    def dir_pruned(directory: str) -> bool:
+        if len(directory) <= len(root):
+            return False
+        if directory not in pruned:
+            pruned[directory] = bool(excluded and excluded.match(directory)) or dir_pruned(
+                os.path.dirname(directory)
+            )
+        return pruned[directory]
+
+    def is_selected(filepath: str) -> bool:
+        if excluded and (excluded.match(filepath) or dir_pruned(os.path.dirname(filepath))):
+            return False
+        return included is None or bool(included.match(filepath))
+
+    return is_selected
+
+
+# ------------------------------------------------------------------------ index
+class TrigramIndex:
+    """Incrementally maintained trigram index of the files below ``root``."""
+
+    def __init__(
+        self,
+        root: str,
+        index_dir: Optional[str] = None,
+        max_file_bytes: int = DEFAULT_MAX_FILE_BYTES,
+        workers: int = 0,
+    ) -> None:
+        self.root = os.path.abspath(root)
+        self.index_dir = Path(index_dir) if index_dir else Path(self.root) / INDEX_DIRNAME
+        self.max_file_bytes = max_file_bytes
+        self.workers = workers or os.cpu_count() or 1
+        self.files: Dict[str, _Entry] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def index_path(self) -> Path:
+        return self.index_dir / _INDEX_FILE
+
+    def refresh(self) -> Dict[str, int]:
+        """Bring the index up to date with the tree and persist it if anything changed."""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+                self._loaded = True
+
+            seen: set[str] = set()
+            stale: List[Tuple[str, str]] = []
+            for rel, path, st in self._walk():
+                seen.add(rel)
+                entry = self.files.get(rel)
+                if entry is None or entry[0] != st.st_mtime_ns or entry[1] != st.st_size:
+                    stale.append((rel, path))
+
+            removed = [rel for rel in self.files if rel not in seen]
+            for rel in removed:
+                del self.files[rel]
+            for rel, entry in self._index(stale):
+                self.files[rel] = entry
+
+            if stale or removed:
+                self._save()
+            return {"files": len(self.files), "updated": len(stale), "removed": len(removed)}
+
+    def candidates(self, groups: Optional[List[set[int]]]) -> List[str]:
+        """Relative paths of files that may match, in path order."""
+        with self._lock:
+            items = sorted(self.files.items())
+        return [
+            rel
+            for rel, (_, _, grams) in items
+            if groups is None or grams is None or any(_has_trigrams(grams, g) for g in groups)
+        ]
+
+    # ---------------------------------------------------------------- internals
+    def _walk(self) -> Iterator[Tuple[str, str, os.stat_result]]:
+        stack = [(self.root, "")]
+        while stack:
+            directory, prefix = stack.pop()
+            try:
+                with os.scandir(directory) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            for entry in entries:
+                rel = prefix + entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in SKIPPED_DIRS:
+                            stack.append((entry.path, rel + os.sep))
+                    elif entry.is_file():
+                        yield rel, entry.path, entry.stat()
+                except OSError:
+                    continue
+
+    def _index(self, stale: List[Tuple[str, str]]) -> List[Tuple[str, _Entry]]:
+        if self.workers <= 1 or len(stale) < PARALLEL_MIN_FILES:
+            return _index_files(stale, self.max_file_bytes)
+        chunks = chunked(stale, self.workers * 4)
+        results = map_ordered(_index_files, chunks, self.max_file_bytes, workers=self.workers)
+        return [item for entries in results for item in entries]
+
+    def _load(self) -> None:
+        try:
+            with open(self.index_path, "rb") as f:
+                if f.read(len(_MAGIC)) != _MAGIC:
+                    return
+                (header_len,) = _HEADER.unpack(f.read(_HEADER.size))
+                header = json.loads(f.read(header_len))
+                blob = f.read()
+        except (OSError, ValueError, struct.error):
+            return
+
+        offset = 0
+        files: Dict[str, _Entry] = {}
+        for rel, mtime_ns, size, count in header:
+            grams: Optional[array] = None
+            if count != _UNINDEXED:
+                grams = array("I")
+                grams.frombytes(blob[offset : offset + count * grams.itemsize])
+                offset += count * grams.itemsize
+            files[rel] = (mtime_ns, size, grams)
+        self.files = files
+
+    def _save(self) -> None:
+        header = []
+        chunks = []
+        for rel, (mtime_ns, size, grams) in self.files.items():
+            header.append([rel, mtime_ns, size, _UNINDEXED if grams is None else len(grams)])
+            if grams is not None:
+                chunks.append(grams.tobytes())
+        encoded = json.dumps(header).encode("utf-8")
+        try:
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.index_dir, suffix=".tmp")
+        except OSError as e:
+            # A read-only tree still gets an in-memory index for this process
+            logger.debug(f"Could not persist code index for {self.root}: {e}")
+            return
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_MAGIC)
+                f.write(_HEADER.pack(len(encoded)))
+                f.write(encoded)
+                for chunk in chunks:
+                    f.write(chunk)
+            os.replace(tmp, self.index_path)
+        except OSError as e:
+            os.unlink(tmp)
+            logger.debug(f"Could not persist code index for {self.root}: {e}")
+
+
+_indexes: Dict[Tuple[str, int], TrigramIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def shared_index(root: str, workers: int = 0) -> TrigramIndex:
+    """Process-wide index for ``root``, so every tool reuses one in-memory copy."""
+    key = (os.path.realpath(root), workers)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = TrigramIndex(key[0], workers=workers)
+        return index
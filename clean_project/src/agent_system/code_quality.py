@@ -0,0 +1,758 @@
+"""
+Incremental lint, format and test runs behind ``LintTool``, ``FormatTool`` and ``TestTool``.
+
+Python files are fingerprinted by content hash (re-read only when their mtime
+or size changes) and per-file outcomes are kept in
+``<root>/.agent_state/quality_cache.json`` under a signature of the tool
+version and the project's configuration files. Unchanged files are answered
+from the cache; only the others are linted or formatted.
+
+black runs in a warm worker interpreter that imports it once and then formats
+files on request over a JSON-lines pipe. ruff is a native binary with nothing
+to keep warm, so it is called directly on just the changed files, without the
+``python3 -m ruff`` interpreter in front. Tests are selected through the import
+graph: a test module only re-runs when it, or a module it transitively
+imports, changed since it last passed. Non-Python inputs such as fixtures are
+not tracked; ``full=True`` runs everything.
+
+This module only imports the standard library because it doubles as the
+formatter worker's entry point (``python3 code_quality.py``).
+"""
+
+from __future__ import annotations
+
+import ast
+import atexit
+import fnmatch
+import hashlib
+import json
+import logging
+import os
+import select
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+PYTHON = "python3"
+STATE_FILE = os.path.join(".agent_state", "quality_cache.json")
+CONFIG_FILES = ("pyproject.toml", "ruff.toml", ".ruff.toml", "setup.cfg")
+SKIPPED_DIRS = frozenset(
+    {"__pycache__", "__pypackages__", "_build", "buck-out", "build", "dist", "node_modules", "venv"}
+)
+RUFF_BATCH = 256  # Files per ruff invocation, well inside argv limits
+WORKER_START_TIMEOUT = 30.0
+RESULTS_MARKER = "__agent_test_results__ "
+RUNNER_KEY = "<runner>"  # Cache entry holding the test runner's own startup cost
+
+
+class QualityToolError(RuntimeError):
+    """The underlying linter, formatter or test runner could not be run."""
+
+
+def python_files(path: str) -> List[str]:
+    """Python sources at or below ``path``, skipping hidden, build and virtualenv directories."""
+    path = os.path.abspath(path)
+    if os.path.isfile(path):
+        return [path] if path.endswith((".py", ".pyi")) else []
+    found: List[str] = []
+    for directory, dirs, files in os.walk(path):
+        dirs[:] = sorted(d for d in dirs if not d.startswith(".") and d not in SKIPPED_DIRS)
+        found.extend(
+            os.path.join(directory, name)
+            for name in sorted(files)
+            if name.endswith((".py", ".pyi"))
+        )
+    return found
+
+
+def config_signature(root: str, *parts: str) -> str:
+    """Hash of ``parts`` (tool name, version, flags) and the root's configuration files."""
+    h = hashlib.blake2b(digest_size=8)
+    for part in parts:
+        h.update(part.encode("utf-8") + b"\0")
+    for name in CONFIG_FILES:
+        try:
+            with open(os.path.join(root, name), "rb") as f:
+                h.update(f.read())
+        except OSError:
+            pass
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class QualityCache:
+    """Content hashes and cached per-file outcomes for one project root.
+
+    Each tool owns a section tagged with its signature; a different signature
+    (new tool version, edited config) starts the section over.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = os.path.abspath(root)
+        self.path = os.path.join(self.root, STATE_FILE)
+        self._lock = threading.RLock()
+        self._files: Dict[str, List[Any]] = {}  # rel -> [mtime_ns, size, digest]
+        self._sections: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self._load()
+
+    def rel(self, path: str) -> str:
+        return os.path.relpath(os.path.abspath(path), self.root)
+
+    def digest(self, path: str) -> Optional[str]:
+        """Content hash of ``path``, re-read only when its mtime or size changed."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        rel = self.rel(path)
+        with self._lock:
+            known = self._files.get(rel)
+            if known is not None and known[0] == st.st_mtime_ns and known[1] == st.st_size:
+                return known[2]
+        try:
+            with open(path, "rb") as f:
+                digest = hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+        except OSError:
+            return None
+        with self._lock:
+            self._files[rel] = [st.st_mtime_ns, st.st_size, digest]
+            self._dirty = True
+        return digest
+
+    def lookup(self, tool: str, signature: str, rel: str, digest: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._section(tool, signature).get(rel)
+        return entry if entry is not None and entry.get("hash") == digest else None
+
+    def store(self, tool: str, signature: str, rel: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._section(tool, signature)[rel] = entry
+            self._dirty = True
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            encoded = json.dumps({"files": self._files, "sections": self._sections})
+            self._dirty = False
+        directory = os.path.dirname(self.path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        except OSError as e:
+            logger.debug(f"Could not persist quality cache for {self.root}: {e}")
+            return
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(encoded)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            os.unlink(tmp)
+            logger.debug(f"Could not persist quality cache for {self.root}: {e}")
+
+    def _section(self, tool: str, signature: str) -> Dict[str, Any]:
+        section = self._sections.get(tool)
+        if section is None or section["signature"] != signature:
+            section = self._sections[tool] = {"signature": signature, "entries": {}}
+            self._dirty = True
+        return section["entries"]
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._files = dict(data["files"])
+            self._sections = dict(data["sections"])
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+
+_caches: Dict[str, QualityCache] = {}
+_caches_lock = threading.Lock()
+
+
+def shared_quality_cache(root: str) -> QualityCache:
+    """Process-wide cache for ``root``."""
+    key = os.path.realpath(root)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = QualityCache(key)
+        return cache
+
+
+# ------------------------------------------------------------------------ lint
+_ruff: Optional[Tuple[List[str], str]] = None
+_ruff_lock = threading.Lock()
+
+
+def ruff_tool() -> Tuple[List[str], str]:
+    """Command and version of the ruff that ``python3 -m ruff`` runs, resolved once."""
+    global _ruff
+    with _ruff_lock:
+        if _ruff is None:
+            binary = ""
+            try:
+                proc = subprocess.run(
+                    [
+                        PYTHON,
+                        "-c",
+                        "from ruff.__main__ import find_ruff_bin; print(find_ruff_bin())",
+                    ],
+                    capture_output=True,
+                    text=True,
+                    timeout=30,
+                )
+                binary = proc.stdout.strip() if proc.returncode == 0 else ""
+            except (OSError, subprocess.TimeoutExpired):
+                pass
+            binary = binary or shutil.which("ruff") or ""
+            command = [binary] if binary else [PYTHON, "-m", "ruff"]
+            try:
+                proc = subprocess.run(
+                    command + ["--version"], capture_output=True, text=True, timeout=30
+                )
+            except OSError as e:
+                raise QualityToolError(f"ruff is not available: {e}") from e
+            if proc.returncode != 0:
+                raise QualityToolError(f"ruff is not available: {proc.stderr.strip()}")
+            _ruff = command, proc.stdout.strip()
+        return _ruff
+
+
+def _diagnostic(raw: Dict[str, Any]) -> Dict[str, Any]:
+    location = raw.get("location") or {}
+    return {
+        "code": raw.get("code"),
+        "message": raw.get("message", ""),
+        "row": location.get("row", 0),
+        "column": location.get("column", 0),
+        "fixable": raw.get("fix") is not None,
+    }
+
+
+def run_lint(
+    path: str, fix: bool = False, timeout: float = 60, use_cache: bool = True
+) -> Dict[str, Any]:
+    """``ruff check`` over ``path``, re-linting only files changed since their cached result.
+
+    With ``fix`` a cached file is only skipped if none of its diagnostics are fixable.
+    """
+    started = time.perf_counter()
+    cache = shared_quality_cache(os.getcwd())
+    command, version = ruff_tool()
+    signature = config_signature(cache.root, "ruff", version)
+    cmd = command + ["check", "--output-format", "json", "--force-exclude"]
+    cmd += ["--fix"] if fix else []
+
+    files = python_files(path)
+    diagnostics: Dict[str, List[Dict[str, Any]]] = {}
+    stale: List[Tuple[str, str]] = []
+    saved_ms = 0.0
+    for file in files:
+        rel = cache.rel(file)
+        digest = cache.digest(file)
+        entry = cache.lookup("ruff", signature, rel, digest) if use_cache and digest else None
+        if entry is not None and not (fix and any(d["fixable"] for d in entry["diagnostics"])):
+            diagnostics[rel] = entry["diagnostics"]
+            saved_ms += entry["cost_ms"]
+        else:
+            stale.append((file, rel))
+
+    for i in range(0, len(stale), RUFF_BATCH):
+        batch = stale[i : i + RUFF_BATCH]
+        batch_started = time.perf_counter()
+        proc = subprocess.run(
+            cmd + [file for file, _ in batch], capture_output=True, text=True, timeout=timeout
+        )
+        if proc.returncode not in (0, 1):
+            raise QualityToolError(proc.stderr.strip() or f"ruff exited with {proc.returncode}")
+        found: Dict[str, List[Dict[str, Any]]] = {}
+        for raw in json.loads(proc.stdout or "[]"):
+            found.setdefault(os.path.realpath(raw["filename"]), []).append(_diagnostic(raw))
+        cost_ms = (time.perf_counter() - batch_started) * 1000.0 / len(batch)
+        for file, rel in batch:
+            diagnostics[rel] = found.get(os.path.realpath(file), [])
+            digest = cache.digest(file)  # --fix may have rewritten it
+            if digest:
+                entry = {"hash": digest, "diagnostics": diagnostics[rel], "cost_ms": cost_ms}
+                cache.store("ruff", signature, rel, entry)
+    cache.save()
+
+    lines = [
+        f"{rel}:{d['row']}:{d['column']}: {d['code'] or 'error'} {d['message']}"
+        for rel in sorted(diagnostics)
+        for d in diagnostics[rel]
+    ]
+    total = len(lines)
+    lines.append(f"Found {total} error(s)." if total else "All checks passed!")
+    return {
+        "cmd": cmd + [path],
+        "return_code": 1 if total else 0,
+        "stdout": "\n".join(lines)[-8000:],
+        "stderr": "",
+        "diagnostics": total,
+        "files_checked": len(stale),
+        "files_cached": len(files) - len(stale),
+        "time_saved_ms": round(saved_ms, 1),
+        "duration_ms": round((time.perf_counter() - started) * 1000.0, 1),
+    }
+
+
+# ---------------------------------------------------------------------- format
+class FormatterWorker:
+    """A ``python3`` process with black imported, formatting files on request."""
+
+    def __init__(self, cwd: str) -> None:
+        started = time.perf_counter()
+        self.cwd = cwd
+        self.proc = subprocess.Popen(
+            [PYTHON, os.path.abspath(__file__)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=cwd,
+        )
+        self._buffer = b""
+        hello = self._read_reply(WORKER_START_TIMEOUT)
+        if not hello or not hello.get("ready"):
+            self.kill()
+            reason = (hello or {}).get("error", "worker exited")
+            raise QualityToolError(f"black is not available: {reason}")
+        self.version = str(hello["version"])
+        self.startup_ms = (time.perf_counter() - started) * 1000.0
+
+    @property
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def format(self, files: List[str], check: bool, timeout: float) -> List[Dict[str, Any]]:
+        """Per-file black outcomes: path, return_code (0, 1 or 123), message and cost_ms."""
+        assert self.proc.stdin is not None
+        try:
+            self.proc.stdin.write(json.dumps({"files": files, "check": check}).encode() + b"\n")
+            self.proc.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            self.kill()
+            raise QualityToolError("formatter worker exited") from e
+        reply = self._read_reply(timeout)
+        if reply is None:
+            self.kill()
+            raise QualityToolError("formatter worker exited")
+        return list(reply["results"])
+
+    def _read_reply(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """Read one JSON line; None when the worker exited first."""
+        assert self.proc.stdout is not None
+        fd = self.proc.stdout.fileno()
+        deadline = time.monotonic() + timeout
+        while b"\n" not in self._buffer:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.kill()
+                raise subprocess.TimeoutExpired(self.proc.args, timeout)
+            readable, _, _ = select.select([fd], [], [], remaining)
+            if not readable:
+                continue
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                return None
+            self._buffer += chunk
+        line, self._buffer = self._buffer.split(b"\n", 1)
+        return json.loads(line)
+
+    def kill(self) -> None:
+        if self.alive:
+            self.proc.kill()
+        try:
+            self.proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:  # pragma: no cover - SIGKILL is not ignorable
+            pass
+        for stream in (self.proc.stdin, self.proc.stdout):
+            try:
+                if stream is not None:
+                    stream.close()
+            except OSError:
+                pass
+
+
+_formatter: Optional[FormatterWorker] = None
+_formatter_lock = threading.Lock()
+
+
+@atexit.register
+def shutdown_formatter() -> None:
+    global _formatter
+    with _formatter_lock:
+        worker, _formatter = _formatter, None
+    if worker is not None:
+        worker.kill()
+
+
+def _plural(count: int, noun: str = "file") -> str:
+    return f"{count} {noun}{'' if count == 1 else 's'}"
+
+
+def run_format(
+    path: str, check: bool = False, timeout: float = 60, use_cache: bool = True
+) -> Dict[str, Any]:
+    """black over ``path`` on the warm worker, skipping files whose cached outcome still holds.
+
+    A file cached as already formatted is skipped in both modes; one cached as
+    needing changes is only skipped by ``check``.
+    """
+    global _formatter
+    started = time.perf_counter()
+    cache = shared_quality_cache(os.getcwd())
+    with _formatter_lock:
+        warm = _formatter is not None and _formatter.alive and _formatter.cwd == cache.root
+        if not warm:
+            if _formatter is not None:
+                _formatter.kill()
+            _formatter = None
+            _formatter = FormatterWorker(cache.root)
+        worker = _formatter
+        signature = config_signature(cache.root, "black", worker.version)
+
+        files = python_files(path)
+        status: Dict[str, str] = {}
+        messages: List[str] = []
+        stale: List[Tuple[str, str, str]] = []
+        saved_ms = worker.startup_ms if warm else 0.0
+        for file in files:
+            rel = cache.rel(file)
+            digest = cache.digest(file) or ""
+            entry = cache.lookup("black", signature, rel, digest) if use_cache else None
+            if entry is not None and (check or entry["status"] != "would_reformat"):
+                status[rel] = entry["status"]
+                saved_ms += entry["cost_ms"]
+                if entry["status"] == "error":
+                    messages.append(entry["message"])
+            else:
+                stale.append((file, rel, digest))
+
+        outcomes = worker.format([file for file, _, _ in stale], check, timeout) if stale else []
+    for (file, rel, before), outcome in zip(stale, outcomes):
+        code = outcome["return_code"]
+        after = cache.digest(file) or ""
+        if code == 0:
+            status[rel] = "reformatted" if after != before else "clean"
+        else:
+            status[rel] = "would_reformat" if code == 1 else "error"
+        if status[rel] == "error":
+            messages.append(outcome["message"])
+        entry = {
+            "hash": after,
+            "status": "clean" if status[rel] == "reformatted" else status[rel],
+            "message": outcome["message"],
+            "cost_ms": outcome["cost_ms"],
+        }
+        cache.store("black", signature, rel, entry)
+    cache.save()
+
+    changed = sorted(rel for rel, s in status.items() if s in ("reformatted", "would_reformat"))
+    errors = sum(1 for s in status.values() if s == "error")
+    unchanged = len(status) - len(changed) - errors
+    verb = "would reformat" if check else "reformatted"
+    lines = messages + [f"{verb} {rel}" for rel in changed]
+    if check:
+        summary = [
+            f"{_plural(len(changed))} would be reformatted",
+            f"{_plural(unchanged)} would be left unchanged",
+        ] + ([f"{_plural(errors)} would fail to reformat"] if errors else [])
+    else:
+        summary = [
+            f"{_plural(len(changed))} reformatted",
+            f"{_plural(unchanged)} left unchanged",
+        ] + ([f"{_plural(errors)} failed to reformat"] if errors else [])
+    lines.append(", ".join(summary) + ".")
+    return {
+        "cmd": [PYTHON, "-m", "black"] + (["--check"] if check else []) + [path],
+        "return_code": 123 if errors else (1 if check and changed else 0),
+        "stdout": "",
+        "stderr": "\n".join(lines)[-8000:],
+        "files_checked": len(stale),
+        "files_cached": len(files) - len(stale),
+        "worker_warm": warm,
+        "time_saved_ms": round(saved_ms, 1),
+        "duration_ms": round((time.perf_counter() - started) * 1000.0, 1),
+    }
+
+
+# ----------------------------------------------------------------------- tests
+def discover_tests(start: str, pattern: str) -> List[Tuple[str, str]]:
+    """(module name, path) of the test files ``unittest discover`` would load from ``start``."""
+    start = os.path.abspath(start)
+    found: List[Tuple[str, str]] = []
+    for directory, dirs, files in os.walk(start):
+        dirs[:] = sorted(
+            d
+            for d in dirs
+            if not d.startswith(".") and os.path.isfile(os.path.join(directory, d, "__init__.py"))
+        )
+        rel_dir = os.path.relpath(directory, start)
+        prefix = "" if rel_dir == "." else rel_dir.replace(os.sep, ".") + "."
+        for name in sorted(files):
+            if name.endswith(".py") and fnmatch.fnmatch(name, pattern):
+                found.append((prefix + name[:-3], os.path.join(directory, name)))
+    return found
+
+
+def _module_name(root: str, path: str) -> Optional[str]:
+    parts = os.path.relpath(path, root)[: -len(".py")].split(os.sep)
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    if not parts or not all(part.isidentifier() for part in parts):
+        return None
+    return ".".join(parts)
+
+
+def _parse_imports(path: str) -> List[List[Any]]:
+    """Every import statement in the file as [level, module, [names]], nested ones included."""
+    try:
+        with open(path, "rb") as f:
+            tree = ast.parse(f.read(), filename=path)
+    except (OSError, SyntaxError, ValueError):
+        return []
+    imports: List[List[Any]] = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.extend([0, alias.name, []] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            imports.append([node.level, node.module or "", [a.name for a in node.names]])
+    return imports
+
+
+class ImportGraph:
+    """Which project files each Python file imports, resolved against a list of source roots.
+
+    A file is named after the first root containing it; parsed imports are
+    cached by content hash.
+    """
+
+    def __init__(self, cache: QualityCache, roots: Sequence[str]) -> None:
+        self.cache = cache
+        self.modules: Dict[str, str] = {}
+        self.names: Dict[str, str] = {}
+        for root in roots:
+            for path in python_files(root):
+                name = _module_name(root, path) if path.endswith(".py") else None
+                if name is None:
+                    continue
+                self.modules.setdefault(name, path)
+                self.names.setdefault(path, name)
+        self._deps: Dict[str, List[str]] = {}
+
+    def dependencies(self, path: str) -> List[str]:
+        """Project files imported by ``path``, including the packages along each dotted name."""
+        if path in self._deps:
+            return self._deps[path]
+        name = self.names.get(path, "")
+        package = name if path.endswith("__init__.py") else name.rpartition(".")[0]
+        found: set[str] = set()
+        for level, module, imported in self._imports(path):
+            if level:
+                base = package.split(".") if package else []
+                if level - 1 > len(base):
+                    continue
+                module = ".".join(base[: len(base) - (level - 1)] + ([module] if module else []))
+            targets = [f"{module}.{n}" if module else n for n in imported]
+            parts = module.split(".") if module else []
+            targets += [".".join(parts[:i]) for i in range(len(parts), 0, -1)]
+            found.update(self.modules[t] for t in targets if t in self.modules)
+        found.discard(path)
+        self._deps[path] = sorted(found)
+        return self._deps[path]
+
+    def closure_digest(self, path: str) -> str:
+        """Hash over the contents of ``path`` and everything it transitively imports."""
+        seen = {path}
+        stack = [path]
+        while stack:
+            for dep in self.dependencies(stack.pop()):
+                if dep not in seen:
+                    seen.add(dep)
+                    stack.append(dep)
+        h = hashlib.blake2b(digest_size=16)
+        for dep in sorted(seen):
+            h.update(f"{self.cache.rel(dep)}\0{self.cache.digest(dep)}\0".encode("utf-8"))
+        return h.hexdigest()
+
+    def _imports(self, path: str) -> List[List[Any]]:
+        rel = self.cache.rel(path)
+        digest = self.cache.digest(path) or ""
+        entry = self.cache.lookup("imports", "ast-1", rel, digest)
+        if entry is None:
+            entry = {"hash": digest, "imports": _parse_imports(path)}
+            self.cache.store("imports", "ast-1", rel, entry)
+        return entry["imports"]
+
+
+_TEST_DRIVER = r"""
+import json, sys, time, traceback, unittest
+top, modules = sys.argv[1], sys.argv[2:]
+sys.path.insert(0, top)
+loader, runner = unittest.TestLoader(), unittest.TextTestRunner(stream=sys.stderr, verbosity=0)
+results = {}
+for name in modules:
+    started = time.perf_counter()
+    try:
+        result = runner.run(loader.loadTestsFromName(name))
+        outcome = {
+            "tests": result.testsRun,
+            "failures": len(result.failures) + len(result.unexpectedSuccesses),
+            "errors": len(result.errors),
+            "skipped": len(result.skipped),
+            "passed": result.wasSuccessful(),
+        }
+    except Exception:
+        traceback.print_exc()
+        outcome = {"tests": 0, "failures": 0, "errors": 1, "skipped": 0, "passed": False}
+    outcome["duration_ms"] = (time.perf_counter() - started) * 1000.0
+    results[name] = outcome
+sys.stdout.flush()
+print(MARKER + json.dumps(results))
+sys.exit(0 if all(r["passed"] for r in results.values()) else 1)
+""".replace("MARKER", repr(RESULTS_MARKER))
+
+
+def run_tests(
+    path: str = "tests", pattern: str = "test*.py", timeout: float = 60, full: bool = False
+) -> Dict[str, Any]:
+    """Run the test modules under ``path`` whose import closure changed since they last passed."""
+    started = time.perf_counter()
+    cache = shared_quality_cache(os.getcwd())
+    signature = config_signature(cache.root, "unittest")
+    start = os.path.abspath(path)
+    roots = [start, cache.root, os.path.join(cache.root, "src")]
+    graph = ImportGraph(
+        cache, [r for i, r in enumerate(roots) if os.path.isdir(r) and r not in roots[:i]]
+    )
+
+    selected: List[Tuple[str, str, str]] = []
+    skipped: List[str] = []
+    saved_ms = 0.0
+    for module, file in discover_tests(start, pattern):
+        closure = graph.closure_digest(file)
+        entry = None if full else cache.lookup("tests", signature, cache.rel(file), closure)
+        if entry is not None and entry["passed"]:
+            skipped.append(module)
+            saved_ms += entry["cost_ms"]
+        else:
+            selected.append((module, cache.rel(file), closure))
+    # Interpreter startup and imports of the runner itself, as measured last time
+    runner = cache.lookup("tests", signature, RUNNER_KEY, "")
+    if runner is not None and not selected:
+        saved_ms += runner["cost_ms"]
+
+    summary: Dict[str, Any] = {
+        "selected": [module for module, _, _ in selected],
+        "skipped_unchanged": skipped[:100],
+        "skipped_count": len(skipped),
+        "time_saved_ms": round(saved_ms, 1),
+    }
+    if not selected:
+        cache.save()
+        return {
+            "cmd": [],
+            "return_code": 0,
+            "output": f"No test modules affected by changes ({len(skipped)} unchanged and passing).",
+            **summary,
+            "duration_ms": round((time.perf_counter() - started) * 1000.0, 1),
+        }
+
+    cmd = [PYTHON, "-c", _TEST_DRIVER, start] + [module for module, _, _ in selected]
+    run_started = time.perf_counter()
+    proc = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    run_ms = (time.perf_counter() - run_started) * 1000.0
+    stdout, marker, tail = (proc.stdout or "").rpartition(RESULTS_MARKER)
+    results: Dict[str, Any] = {}
+    if marker:
+        try:
+            results = json.loads(tail)
+        except ValueError:
+            pass
+    else:
+        stdout = tail
+    for module, rel, closure in selected:
+        outcome = results.get(module)
+        if outcome is not None:
+            entry = {
+                "hash": closure,
+                "passed": outcome["passed"],
+                "cost_ms": outcome["duration_ms"],
+            }
+            cache.store("tests", signature, rel, entry)
+    if results:
+        overhead_ms = max(0.0, run_ms - sum(r["duration_ms"] for r in results.values()))
+        cache.store("tests", signature, RUNNER_KEY, {"hash": "", "cost_ms": overhead_ms})
+    cache.save()
+
+    out = stdout + (proc.stderr or "")
+    return {
+        "cmd": [PYTHON, "-m", "unittest"] + summary["selected"],
+        "return_code": proc.returncode,
+        "output": "\n".join(out.strip().splitlines()[-50:]),
+        **summary,
+        "tests_run": sum(r.get("tests", 0) for r in results.values()),
+        "duration_ms": round((time.perf_counter() - started) * 1000.0, 1),
+    }
+
+
+def _worker_main() -> None:
+    """Format files with an imported black until stdin closes."""
+    import contextlib
+    import io
+    import signal
+
+    # Started as a script: keep this package's modules from shadowing black's imports
+    here = os.path.dirname(os.path.abspath(__file__))
+    sys.path[:] = [p for p in sys.path if os.path.abspath(p or os.curdir) != here]
+    # The parent owns shutdown; Ctrl-C in the terminal must not kill the worker mid-reply
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    replies = sys.stdout
+    try:
+        import black
+    except Exception as e:
+        replies.write(json.dumps({"ready": False, "error": str(e)}) + "\n")
+        replies.flush()
+        return
+    replies.write(json.dumps({"ready": True, "version": black.__version__}) + "\n")
+    replies.flush()
+
+    for line in sys.stdin.buffer:
+        request = json.loads(line)
+        results = []
+        for path in request["files"]:
+            messages = io.StringIO()
+            started = time.perf_counter()
+            args = ["--quiet"] + (["--check"] if request["check"] else []) + [path]
+            try:
+                with contextlib.redirect_stdout(messages), contextlib.redirect_stderr(messages):
+                    code = black.main(args, standalone_mode=False)
+            except SystemExit as e:
+                code = e.code if isinstance(e.code, int) else 1
+            except Exception as e:
+                print(f"error: cannot format {path}: {e}", file=messages)
+                code = 123
+            results.append(
+                {
+                    "path": path,
+                    "return_code": code or 0,
+                    "message": messages.getvalue().strip(),
+                    "cost_ms": (time.perf_counter() - started) * 1000.0,
+                }
+            )
+        replies.write(json.dumps({"results": results}) + "\n")
+        replies.flush()
+
+
+if __name__ == "__main__":
+    _worker_main()
@@ -20,17 +20,36 @@ class Settings:
         # Core agent settings
         self.MAX_CYCLES = unified_config.agent.max_cycles
         self.MAX_CONCURRENT_GOALS = unified_config.agent.max_concurrent_goals
+        self.MAX_PARALLEL_ACTIONS = unified_config.agent.max_parallel_actions
+        self.MAX_PARALLEL_ACTIONS_PER_TOOL = unified_config.agent.max_parallel_actions_per_tool
+        self.DEBUG_SAMPLE_RATE = unified_config.agent.debug_sample_rate
         self.LOG_LEVEL = unified_config.logging.level
         self.DEFAULT_GOAL_PRIORITY = unified_config.agent.default_goal_priority
 
         # Tool execution settings
         self.TOOL_TIMEOUT = unified_config.tools.timeout_seconds
         self.MAX_RETRIES = unified_config.tools.max_retries
+        self.TOOL_RETRY_BACKOFF = unified_config.tools.retry_backoff_seconds
+        self.TOOL_RETRY_BACKOFF_MAX = unified_config.tools.retry_backoff_max_seconds
+        self.TOOL_RETRY_BUDGET_RATIO = unified_config.tools.retry_budget_ratio
+        self.TOOL_RETRY_BUDGET_RESERVE = unified_config.tools.retry_budget_reserve
+        self.TOOL_MAX_CONCURRENCY = unified_config.tools.max_concurrency_per_tool
+        self.TOOL_RESULT_CACHE_SIZE = unified_config.tools.result_cache_size
+        self.CODE_SEARCH_WORKERS = unified_config.tools.code_search_workers
+        self.WEB_SEARCH_CACHE_SIZE = unified_config.tools.web_search_cache_size
+        self.WEB_SEARCH_CACHE_TTL = unified_config.tools.web_search_cache_ttl_seconds
+        self.WEB_SEARCH_CACHE_PATH = unified_config.tools.web_search_cache_path
+        self.WEB_SEARCH_HEDGE_AFTER = unified_config.tools.web_search_hedge_after_seconds
+        self.WEB_FETCH_CONCURRENCY = unified_config.tools.web_fetch_concurrency
+        self.WEB_FETCH_PER_HOST = unified_config.tools.web_fetch_per_host
         self.CODE_EXECUTION_TIMEOUT = unified_config.tools.code_execution_timeout
+        self.CODE_EXECUTOR_POOL_SIZE = unified_config.tools.code_executor_pool_size
+        self.CODE_EXECUTOR_WORKER_MAX_RUNS = unified_config.tools.code_executor_worker_max_runs
 
         # File system settings
         self.ALLOWED_FILE_PATHS = unified_config.tools.safe_file_paths
         self.BLOCKED_FILE_PATHS = unified_config.tools.blocked_file_paths
+        self.FILE_WRITE_FSYNC = unified_config.tools.file_write_fsync
 
         # Web search API settings
         self.SERPAPI_KEY = unified_config.api.serpapi_key
@@ -46,6 +65,9 @@ class Settings:
         self.DATABASE_URL = unified_config.database.url
         self.DATABASE_POOL_SIZE = unified_config.database.pool_size
 
+        # Number of recent episodic memories hydrated at startup; older ones stream on recall
+        self.MEMORY_EAGER_EPISODIC = int(os.getenv("MEMORY_EAGER_EPISODIC", "100"))
+
         # Vector database for memory
         self.VECTOR_DB_PATH = os.getenv("VECTOR_DB_PATH", "./vector_db")
 
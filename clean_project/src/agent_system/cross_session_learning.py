@@ -5,19 +5,22 @@ Cross-session learning system for persistent knowledge between agent runs.
 from __future__ import annotations
 
 import hashlib
+import heapq
 import json
 import logging
-from collections import defaultdict
+import os
+import tempfile
+import threading
+from collections import Counter, defaultdict
 from dataclasses import asdict, dataclass
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional, Set, Tuple
 
 logger = logging.getLogger(__name__)
 
 # Knowledge storage directory
 KNOWLEDGE_DIR = Path(".agent_knowledge")
-KNOWLEDGE_DIR.mkdir(exist_ok=True)
 
 
 @dataclass
@@ -80,7 +83,8 @@ class LearningSession:
 class CrossSessionLearningSystem:
     """Manages learning and knowledge transfer between agent sessions."""
 
-    def __init__(self) -> None:
+    def __init__(self, knowledge_dir: Optional[Path] = None) -> None:
+        self.knowledge_dir = Path(knowledge_dir) if knowledge_dir else KNOWLEDGE_DIR
         self.knowledge_patterns: Dict[str, KnowledgePattern] = {}
         self.session_history: List[LearningSession] = []
         self.current_session: Optional[LearningSession] = None
@@ -90,6 +94,25 @@ class CrossSessionLearningSystem:
         self.max_session_history = 500  # Prevent unbounded session growth
         self.max_action_sequence = 20  # Cap stored action sequences per pattern
         self.pattern_retention_days = 90
+        self.eviction_slack = 0.1  # Let the store overshoot max_patterns by 10% between evictions
+
+        # Inverted index over goal-pattern description words. The planner searches it
+        # from a worker thread while goals learn on the event loop, so index
+        # updates and lookups hold _index_lock.
+        self._index_lock = threading.Lock()
+        self._word_index: Dict[str, Set[str]] = defaultdict(set)
+        self._pattern_words: Dict[str, FrozenSet[str]] = {}
+        self._pattern_seq: Dict[str, int] = {}
+        self._next_seq = 0
+        # Min-heap of (last_used, pattern_id); entries are stale once last_used moves on
+        self._recency_heap: List[Tuple[datetime, str]] = []
+
+        # Changes not yet appended to the on-disk journals
+        self._dirty_patterns: Set[str] = set()
+        self._deleted_patterns: Set[str] = set()
+        self._pending_sessions: List[LearningSession] = []
+        self._pattern_journal_entries = 0
+        self._session_journal_entries = 0
 
         # Load existing knowledge
         self._load_knowledge_base()
@@ -100,51 +123,188 @@ class CrossSessionLearningSystem:
         content = json.dumps(pattern_data, sort_keys=True)
         return hashlib.sha256(content.encode()).hexdigest()[:16]
 
+    @property
+    def _patterns_file(self) -> Path:
+        return self.knowledge_dir / "knowledge_patterns.json"
+
+    @property
+    def _patterns_journal(self) -> Path:
+        return self.knowledge_dir / "knowledge_patterns.jsonl"
+
+    @property
+    def _sessions_file(self) -> Path:
+        return self.knowledge_dir / "session_history.json"
+
+    @property
+    def _sessions_journal(self) -> Path:
+        return self.knowledge_dir / "session_history.jsonl"
+
     def _load_knowledge_base(self) -> None:
-        """Load knowledge patterns from disk."""
+        """Load knowledge patterns from the snapshot and replay the journal."""
         try:
-            knowledge_file = KNOWLEDGE_DIR / "knowledge_patterns.json"
-            if knowledge_file.exists():
-                with open(knowledge_file) as f:
-                    data = json.load(f)
-                    for pattern_id, pattern_data in data.items():
-                        self.knowledge_patterns[pattern_id] = KnowledgePattern.from_dict(
-                            pattern_data
-                        )
-                logger.info(f"Loaded {len(self.knowledge_patterns)} knowledge patterns")
-
-            # Load session history
-            sessions_file = KNOWLEDGE_DIR / "session_history.json"
-            if sessions_file.exists():
-                with open(sessions_file) as f:
+            if self._patterns_file.exists():
+                with open(self._patterns_file) as f:
                     data = json.load(f)
-                    self.session_history = [LearningSession.from_dict(s) for s in data]
-                logger.info(f"Loaded {len(self.session_history)} historical sessions")
+                    for pattern_data in data.values():
+                        self._add_pattern(KnowledgePattern.from_dict(pattern_data))
+
+            for entry in self._read_journal(self._patterns_journal):
+                self._pattern_journal_entries += 1
+                if entry.get("op") == "del":
+                    self._remove_pattern(entry["id"])
+                else:
+                    self._add_pattern(KnowledgePattern.from_dict(entry["pattern"]))
+            # Everything loaded is already on disk
+            self._dirty_patterns.clear()
+            self._deleted_patterns.clear()
+            logger.info(f"Loaded {len(self.knowledge_patterns)} knowledge patterns")
+
+            # Load session history; a journal may repeat sessions already in the snapshot
+            sessions: Dict[str, LearningSession] = {}
+            if self._sessions_file.exists():
+                with open(self._sessions_file) as f:
+                    for session_data in json.load(f):
+                        session = LearningSession.from_dict(session_data)
+                        sessions[session.session_id] = session
+            for entry in self._read_journal(self._sessions_journal):
+                self._session_journal_entries += 1
+                session = LearningSession.from_dict(entry)
+                sessions[session.session_id] = session
+            self.session_history = list(sessions.values())
+            self._prune_session_history()
+            logger.info(f"Loaded {len(self.session_history)} historical sessions")
 
         except Exception as e:
             logger.error(f"Error loading knowledge base: {e}")
 
+    @staticmethod
+    def _read_journal(path: Path) -> Iterator[Dict[str, Any]]:
+        if not path.exists():
+            return
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from an interrupted append is ignored
+                    logger.warning("Skipping corrupt journal entry in %s", path)
+
     def _save_knowledge_base(self) -> None:
-        """Save knowledge patterns to disk."""
+        """Append pending changes to the journals, compacting them when they grow.
+
+        Only patterns and sessions changed since the last save are written. Once a
+        journal outgrows the live data it is folded into a fresh snapshot that is
+        written to a temporary file and atomically renamed into place.
+        """
         try:
-            # Save patterns
-            patterns_data = {
-                pattern_id: pattern.to_dict()
-                for pattern_id, pattern in self.knowledge_patterns.items()
-            }
-            knowledge_file = KNOWLEDGE_DIR / "knowledge_patterns.json"
-            with open(knowledge_file, "w") as f:
-                json.dump(patterns_data, f, indent=2)
-
-            # Save session history
-            sessions_data = [session.to_dict() for session in self.session_history]
-            sessions_file = KNOWLEDGE_DIR / "session_history.json"
-            with open(sessions_file, "w") as f:
-                json.dump(sessions_data, f, indent=2)
+            self.knowledge_dir.mkdir(parents=True, exist_ok=True)
+
+            pattern_lines = [
+                json.dumps({"op": "del", "id": pattern_id}) for pattern_id in self._deleted_patterns
+            ]
+            pattern_lines.extend(
+                json.dumps({"op": "put", "pattern": self.knowledge_patterns[pattern_id].to_dict()})
+                for pattern_id in self._dirty_patterns
+                if pattern_id in self.knowledge_patterns
+            )
+            self._append_lines(self._patterns_journal, pattern_lines)
+            self._pattern_journal_entries += len(pattern_lines)
+            self._dirty_patterns.clear()
+            self._deleted_patterns.clear()
+
+            session_lines = [json.dumps(session.to_dict()) for session in self._pending_sessions]
+            self._append_lines(self._sessions_journal, session_lines)
+            self._session_journal_entries += len(session_lines)
+            self._pending_sessions.clear()
+
+            if self._pattern_journal_entries > 2 * len(self.knowledge_patterns) + 100:
+                self._write_snapshot(
+                    self._patterns_file,
+                    {pid: pattern.to_dict() for pid, pattern in self.knowledge_patterns.items()},
+                    self._patterns_journal,
+                )
+                self._pattern_journal_entries = 0
+
+            if self._session_journal_entries > self.max_session_history:
+                self._write_snapshot(
+                    self._sessions_file,
+                    [session.to_dict() for session in self.session_history],
+                    self._sessions_journal,
+                )
+                self._session_journal_entries = 0
 
         except Exception as e:
             logger.error(f"Error saving knowledge base: {e}")
 
+    @staticmethod
+    def _append_lines(path: Path, lines: List[str]) -> None:
+        if not lines:
+            return
+        with open(path, "a") as f:
+            f.write("\n".join(lines) + "\n")
+
+    @staticmethod
+    def _write_snapshot(path: Path, payload: Any, journal: Path) -> None:
+        """Atomically replace ``path`` with ``payload`` and retire ``journal``."""
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(payload, f, separators=(",", ":"))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        # Replaying a journal over its own snapshot is idempotent, so a crash here is safe
+        journal.unlink(missing_ok=True)
+
+    def _add_pattern(self, pattern: KnowledgePattern) -> None:
+        """Insert or replace a pattern and keep the indexes in sync."""
+        with self._index_lock:
+            self._index_pattern(pattern)
+        self._touch_pattern(pattern)
+
+    def _index_pattern(self, pattern: KnowledgePattern) -> None:
+        pattern_id = pattern.pattern_id
+        if pattern_id in self.knowledge_patterns:
+            self._unindex_pattern(pattern_id)
+        else:
+            self._pattern_seq[pattern_id] = self._next_seq
+            self._next_seq += 1
+        self.knowledge_patterns[pattern_id] = pattern
+
+        if pattern.pattern_type == "goal_pattern":
+            words = frozenset(pattern.description.lower().split())
+            self._pattern_words[pattern_id] = words
+            for word in words:
+                self._word_index[word].add(pattern_id)
+
+    def _touch_pattern(self, pattern: KnowledgePattern) -> None:
+        heapq.heappush(self._recency_heap, (pattern.last_used, pattern.pattern_id))
+        self._dirty_patterns.add(pattern.pattern_id)
+        self._deleted_patterns.discard(pattern.pattern_id)
+
+    def _remove_pattern(self, pattern_id: str) -> None:
+        with self._index_lock:
+            if self.knowledge_patterns.pop(pattern_id, None) is None:
+                return
+            self._unindex_pattern(pattern_id)
+            self._pattern_seq.pop(pattern_id, None)
+        self._dirty_patterns.discard(pattern_id)
+        self._deleted_patterns.add(pattern_id)
+
+    def _unindex_pattern(self, pattern_id: str) -> None:
+        for word in self._pattern_words.pop(pattern_id, ()):
+            postings = self._word_index.get(word)
+            if postings is not None:
+                postings.discard(pattern_id)
+                if not postings:
+                    del self._word_index[word]
+
     def _start_new_session(self) -> None:
         """Start a new learning session."""
         session_id = f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
@@ -164,6 +324,7 @@ class CrossSessionLearningSystem:
         if self.current_session:
             self.current_session.end_time = datetime.now()
             self.session_history.append(self.current_session)
+            self._pending_sessions.append(self.current_session)
             self._prune_session_history()
             self._save_knowledge_base()
             logger.info(
@@ -194,6 +355,7 @@ class CrossSessionLearningSystem:
             # Update success rate with exponential moving average
             pattern.success_rate = (0.7 * pattern.success_rate) + (0.3 * success_score)
             pattern.confidence_score = min(1.0, pattern.confidence_score + 0.1)
+            self._touch_pattern(pattern)
         else:
             # Create new pattern
             pattern = KnowledgePattern(
@@ -207,7 +369,7 @@ class CrossSessionLearningSystem:
                 confidence_score=min(0.8, 0.4 + success_score),
                 parameters=pattern_data,
             )
-            self.knowledge_patterns[pattern_id] = pattern
+            self._add_pattern(pattern)
             if self.current_session:
                 self.current_session.knowledge_gained += 1
 
@@ -239,33 +401,40 @@ class CrossSessionLearningSystem:
         pattern.confidence_score *= decay_factor
 
     def _cleanup_old_patterns(self) -> None:
-        """Remove old/low-value patterns to manage memory."""
-        if len(self.knowledge_patterns) <= self.max_patterns:
+        """Remove old/low-value patterns to manage memory.
+
+        Eviction runs only once the store overshoots ``max_patterns`` by
+        ``eviction_slack``, then trims back to the cap in one pass, so the cost of
+        ranking patterns is amortized over many inserts.
+        """
+        overshoot = int(self.max_patterns * (1 + self.eviction_slack))
+        if len(self.knowledge_patterns) <= overshoot:
             return
 
-        # Sort patterns by value (confidence * usage_count)
-        pattern_values = []
-        for pattern in self.knowledge_patterns.values():
-            value = pattern.confidence_score * pattern.usage_count
-            pattern_values.append((value, pattern.pattern_id))
-
-        # Remove lowest value patterns
-        pattern_values.sort(key=lambda x: x[0])
+        # Remove lowest value patterns (confidence * usage_count)
         patterns_to_remove = len(self.knowledge_patterns) - self.max_patterns
-
-        for _, pattern_id in pattern_values[:patterns_to_remove]:
-            del self.knowledge_patterns[pattern_id]
+        lowest = heapq.nsmallest(
+            patterns_to_remove,
+            self.knowledge_patterns.values(),
+            key=lambda p: p.confidence_score * p.usage_count,
+        )
+        for pattern in lowest:
+            self._remove_pattern(pattern.pattern_id)
 
     def _remove_stale_patterns(self) -> None:
         """Drop patterns that have not been used for a prolonged period."""
         cutoff = datetime.now() - timedelta(days=self.pattern_retention_days)
-        stale_ids = [
-            pattern_id
-            for pattern_id, pattern in self.knowledge_patterns.items()
-            if pattern.last_used < cutoff
-        ]
-        for pattern_id in stale_ids:
-            self.knowledge_patterns.pop(pattern_id, None)
+        heap = self._recency_heap
+        while heap and heap[0][0] < cutoff:
+            last_used, pattern_id = heapq.heappop(heap)
+            pattern = self.knowledge_patterns.get(pattern_id)
+            # Skip entries superseded by a later use of the same pattern
+            if pattern is not None and pattern.last_used == last_used:
+                self._remove_pattern(pattern_id)
+
+        if len(heap) > 2 * len(self.knowledge_patterns) + 64:
+            self._recency_heap = [(p.last_used, pid) for pid, p in self.knowledge_patterns.items()]
+            heapq.heapify(self._recency_heap)
 
     def _prune_session_history(self) -> None:
         """Keep the session history capped to avoid unbounded memory use."""
@@ -278,16 +447,25 @@ class CrossSessionLearningSystem:
         self, goal_description: str, limit: int = 5
     ) -> List[Tuple[KnowledgePattern, float]]:
         """Find patterns similar to the current goal."""
-        goal_lower = goal_description.lower()
-        similar_patterns = []
-
-        for pattern in self.knowledge_patterns.values():
-            if pattern.pattern_type == "goal_pattern":
-                # Simple text similarity (could be enhanced with embeddings)
-                pattern_desc = pattern.description.lower()
-                similarity = self._calculate_text_similarity(goal_lower, pattern_desc)
+        goal_words = set(goal_description.lower().split())
+        if not goal_words:
+            return []
+
+        with self._index_lock:
+            # Count shared words per candidate via the inverted index
+            overlaps: Counter[str] = Counter()
+            for word in goal_words:
+                postings = self._word_index.get(word)
+                if postings:
+                    overlaps.update(postings)
+
+            similar_patterns = []
+            for pattern_id in sorted(overlaps, key=self._pattern_seq.__getitem__):
+                shared = overlaps[pattern_id]
+                union = len(goal_words) + len(self._pattern_words[pattern_id]) - shared
+                similarity = shared / union
                 if similarity > 0.3:  # Minimum similarity threshold
-                    similar_patterns.append((pattern, similarity))
+                    similar_patterns.append((self.knowledge_patterns[pattern_id], similarity))
 
         # Sort by similarity and return top matches
         similar_patterns.sort(key=lambda x: x[1], reverse=True)
@@ -310,17 +488,27 @@ class CrossSessionLearningSystem:
 
     def get_best_action_sequence(self, goal_description: str) -> Optional[List[str]]:
         """Get the best action sequence for a similar goal."""
+        best = self.get_best_action_sequence_with_confidence(goal_description)
+        return best[0] if best else None
+
+    def get_best_action_sequence_with_confidence(
+        self, goal_description: str
+    ) -> Optional[Tuple[List[str], float]]:
+        """Best action sequence for a similar goal, with how far it can be trusted.
+
+        Confidence is the goal similarity capped by the pattern's own confidence.
+        """
         similar_patterns = self.find_similar_patterns(goal_description, limit=1)
 
         if similar_patterns and similar_patterns[0][1] > self.confidence_threshold:
-            pattern = similar_patterns[0][0]
+            pattern, similarity = similar_patterns[0]
             if self.current_session:
                 self.current_session.knowledge_used += 1
             seq_val = pattern.parameters.get("action_sequence", [])
             seq: List[str] = seq_val if isinstance(seq_val, list) else []
             # Best effort filter to ensure str list
             seq = [str(x) for x in seq]
-            return seq
+            return seq, min(similarity, pattern.confidence_score)
 
         return None
 
@@ -414,7 +602,7 @@ class CrossSessionLearningSystem:
                 },
             )
 
-            self.knowledge_patterns[pattern.pattern_id] = pattern
+            self._add_pattern(pattern)
             imported_count += 1
 
         if imported_count > 0:
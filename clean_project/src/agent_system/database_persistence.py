@@ -7,9 +7,9 @@ from __future__ import annotations
 
 import logging
 from datetime import UTC, datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 
-from sqlalchemy import and_, desc
+from sqlalchemy import and_, asc, desc, or_
 
 from .database_models import (
     ActionModel,
@@ -172,32 +172,136 @@ class DatabasePersistence:
             logger.error(f"Failed to save memories: {e}")
             raise
 
-    def load_memories(self) -> List[Dict[str, Any]]:
-        """Load memories from database."""
+    @staticmethod
+    def _memory_to_dict(memory: MemoryModel) -> Dict[str, Any]:
+        return {
+            "id": memory.memory_id,
+            "goal_id": memory.goal_id,
+            "action": memory.action_data or {},
+            "observation": memory.observation_data or {},
+            "context": memory.context_data or {},
+            "success_score": memory.success_score,
+            "type": memory.memory_type,
+            "timestamp": memory.created_at.isoformat() if memory.created_at else None,
+        }
+
+    def load_memories(
+        self, memory_type: Optional[str] = None, limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Load memories from database.
+
+        With ``limit`` only the most recent memories are returned (oldest first),
+        which lets callers hydrate a bounded window without touching the full table.
+        """
         try:
             with self.db.get_session() as session:
-                memories = session.query(MemoryModel).all()
-
-                result = []
-                for memory in memories:
-                    result.append(
-                        {
-                            "id": memory.memory_id,
-                            "goal_id": memory.goal_id,
-                            "action": memory.action_data or {},
-                            "observation": memory.observation_data or {},
-                            "context": memory.context_data or {},
-                            "success_score": memory.success_score,
-                            "type": memory.memory_type,
-                        }
+                query = session.query(MemoryModel)
+                if memory_type is not None:
+                    query = query.filter(MemoryModel.memory_type == memory_type)
+
+                if limit is not None:
+                    memories = (
+                        query.order_by(desc(MemoryModel.created_at), desc(MemoryModel.id))
+                        .limit(limit)
+                        .all()
                     )
+                    memories.reverse()
+                else:
+                    memories = query.order_by(
+                        asc(MemoryModel.created_at), asc(MemoryModel.id)
+                    ).all()
 
-                return result
+                return [self._memory_to_dict(memory) for memory in memories]
 
         except Exception as e:
             logger.error(f"Failed to load memories: {e}")
             return []
 
+    def iter_memories(
+        self,
+        memory_type: Optional[str] = None,
+        before: Optional[str] = None,
+        batch_size: int = 500,
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream memories oldest first using keyset pagination.
+
+        Each page is fetched in its own short-lived session so a slow consumer
+        never pins a connection. ``before`` restricts the stream to memories
+        created before the memory with that ``memory_id``.
+
+        Ties on ``created_at`` are broken by the row id, a random UUID, so the
+        order of memories created within the same clock tick is arbitrary
+        (though stable across pages and calls); it is not insertion order.
+        """
+        try:
+            upper: Optional[tuple[datetime, str]] = None
+            if before is not None:
+                with self.db.get_session() as session:
+                    anchor = (
+                        session.query(MemoryModel.created_at, MemoryModel.id)
+                        .filter(MemoryModel.memory_id == before)
+                        .first()
+                    )
+                if anchor is None:
+                    return
+                upper = (anchor[0], anchor[1])
+
+            cursor: Optional[tuple[datetime, str]] = None
+            while True:
+                with self.db.get_session() as session:
+                    query = session.query(MemoryModel)
+                    if memory_type is not None:
+                        query = query.filter(MemoryModel.memory_type == memory_type)
+                    if upper is not None:
+                        query = query.filter(
+                            or_(
+                                MemoryModel.created_at < upper[0],
+                                and_(
+                                    MemoryModel.created_at == upper[0],
+                                    MemoryModel.id < upper[1],
+                                ),
+                            )
+                        )
+                    if cursor is not None:
+                        query = query.filter(
+                            or_(
+                                MemoryModel.created_at > cursor[0],
+                                and_(
+                                    MemoryModel.created_at == cursor[0],
+                                    MemoryModel.id > cursor[1],
+                                ),
+                            )
+                        )
+                    page = (
+                        query.order_by(asc(MemoryModel.created_at), asc(MemoryModel.id))
+                        .limit(batch_size)
+                        .all()
+                    )
+                    rows = [self._memory_to_dict(memory) for memory in page]
+                    if page:
+                        cursor = (page[-1].created_at, page[-1].id)
+
+                yield from rows
+                if len(rows) < batch_size:
+                    return
+
+        except Exception as e:
+            logger.error(f"Failed to stream memories: {e}")
+            return
+
+    def count_memories(self, memory_type: Optional[str] = None) -> int:
+        """Count stored memories without loading them."""
+        try:
+            with self.db.get_session() as session:
+                query = session.query(MemoryModel)
+                if memory_type is not None:
+                    query = query.filter(MemoryModel.memory_type == memory_type)
+                return query.count()
+
+        except Exception as e:
+            logger.error(f"Failed to count memories: {e}")
+            return 0
+
     def save_learning_system(
         self, learning_data: Dict[str, Any], system_type: str = "default"
     ) -> None:
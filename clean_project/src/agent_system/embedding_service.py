@@ -0,0 +1,252 @@
+"""
+Process-wide sentence embedding service.
+
+The sentence-transformer model is loaded lazily on a background thread so that
+importing the planner stays cheap; until it is ready callers fall back to keyword
+heuristics. Encode requests from concurrent goals are coalesced into
+micro-batches, and pattern embeddings are cached on disk per model.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import queue
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Sequence, Tuple, Union
+
+from .unified_config import unified_config
+
+logger = logging.getLogger(__name__)
+
+np: Any = None
+try:
+    import numpy as _np
+
+    np = _np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+def _load_sentence_transformer(model_name: str) -> Any:
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(model_name)
+
+
+class EmbeddingService:
+    """Lazily loaded, micro-batching wrapper around a sentence-transformer model.
+
+    ``encode`` mirrors ``SentenceTransformer.encode``: a string yields one vector
+    and a sequence of strings yields a matrix.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        cache_dir: Union[str, Path, None] = None,
+        batch_window_ms: float = 5.0,
+        max_batch_size: int = 64,
+        model_factory: Callable[[str], Any] = _load_sentence_transformer,
+    ) -> None:
+        self.model_name = model_name
+        self.cache_dir = Path(cache_dir or ".agent_embeddings")
+        self.batch_window = batch_window_ms / 1000.0
+        self.max_batch_size = max(1, max_batch_size)
+        self._model_factory = model_factory
+
+        self._model: Any | None = None
+        self._load_error: Optional[BaseException] = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._loader: Optional[threading.Thread] = None
+
+        self._requests: queue.Queue[Tuple[List[str], Future[Any]]] = queue.Queue()
+        self._batcher: Optional[threading.Thread] = None
+
+        self.batches_encoded = 0
+        self.texts_encoded = 0
+
+    # ------------------------------------------------------------------ loading
+    @property
+    def is_ready(self) -> bool:
+        return self._model is not None
+
+    @property
+    def load_failed(self) -> bool:
+        return self._load_error is not None
+
+    def start_loading(self) -> None:
+        """Begin loading the model in the background (idempotent)."""
+        with self._lock:
+            if self._loader is not None or self._model is not None:
+                return
+            self._loader = threading.Thread(
+                target=self._load, name="embedding-model-loader", daemon=True
+            )
+            self._loader.start()
+
+    def load(self) -> Any:
+        """Load the model synchronously, raising if it cannot be loaded."""
+        self.start_loading()
+        self._ready.wait()
+        if self._load_error is not None:
+            raise self._load_error
+        return self._model
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        self._ready.wait(timeout)
+        return self.is_ready
+
+    def _load(self) -> None:
+        started = time.perf_counter()
+        try:
+            logger.info("Loading sentence transformer model %s", self.model_name)
+            self._model = self._model_factory(self.model_name)
+            logger.info(
+                "Sentence transformer %s ready in %.2fs",
+                self.model_name,
+                time.perf_counter() - started,
+            )
+        except BaseException as exc:  # noqa: BLE001 - surfaced through load()
+            self._load_error = exc
+            logger.warning("Failed to load sentence transformer (%s): %s", self.model_name, exc)
+        finally:
+            self._ready.set()
+
+    # ----------------------------------------------------------------- encoding
+    def encode(self, texts: Union[str, Sequence[str]]) -> Any:
+        """Encode through the shared micro-batcher; requires the model to be ready."""
+        if self._model is None:
+            raise RuntimeError("Embedding model is not loaded yet")
+
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+        if not batch:
+            return np.zeros((0, 0)) if NUMPY_AVAILABLE else []
+
+        future: Future[Any] = Future()
+        self._ensure_batcher()
+        self._requests.put((batch, future))
+        vectors = future.result()
+        return vectors[0] if single else vectors
+
+    def _ensure_batcher(self) -> None:
+        if self._batcher is not None:
+            return
+        with self._lock:
+            if self._batcher is None:
+                self._batcher = threading.Thread(
+                    target=self._run_batcher, name="embedding-batcher", daemon=True
+                )
+                self._batcher.start()
+
+    def _run_batcher(self) -> None:
+        while True:
+            pending = [self._requests.get()]
+            size = len(pending[0][0])
+            deadline = time.monotonic() + self.batch_window
+
+            # Coalesce requests that arrive within the batching window
+            while size < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._requests.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                pending.append(item)
+                size += len(item[0])
+
+            self._encode_batch(pending)
+
+    def _encode_batch(self, pending: List[Tuple[List[str], Future[Any]]]) -> None:
+        texts = [text for batch, _ in pending for text in batch]
+        try:
+            vectors = self._model.encode(texts)
+        except BaseException as exc:  # noqa: BLE001 - delivered to every waiter
+            for _, future in pending:
+                future.set_exception(exc)
+            return
+
+        self.batches_encoded += 1
+        self.texts_encoded += len(texts)
+        offset = 0
+        for batch, future in pending:
+            future.set_result(vectors[offset : offset + len(batch)])
+            offset += len(batch)
+
+    # ------------------------------------------------------------- disk caching
+    def encode_cached(self, texts: Sequence[str]) -> Any:
+        """Encode a fixed set of texts, reusing an on-disk cache keyed by model and content."""
+        texts = list(texts)
+        path = self._cache_path(texts)
+        if NUMPY_AVAILABLE and path.exists():
+            try:
+                cached = np.load(path, allow_pickle=False)
+                if len(cached) == len(texts):
+                    return cached
+            except (OSError, ValueError) as exc:
+                logger.warning("Ignoring unreadable embedding cache %s: %s", path, exc)
+
+        vectors = self.encode(texts)
+        if NUMPY_AVAILABLE:
+            self._write_cache(path, np.asarray(vectors))
+        return vectors
+
+    def _cache_path(self, texts: Sequence[str]) -> Path:
+        digest = hashlib.sha256("\x1f".join(texts).encode("utf-8")).hexdigest()[:24]
+        model_slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", self.model_name)
+        return self.cache_dir / f"{model_slug}-{digest}.npy"
+
+    def _write_cache(self, path: Path, vectors: Any) -> None:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".npy.tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    np.save(f, vectors, allow_pickle=False)
+                os.replace(tmp_name, path)
+            except BaseException:
+                Path(tmp_name).unlink(missing_ok=True)
+                raise
+        except OSError as exc:
+            logger.warning("Could not write embedding cache %s: %s", path, exc)
+
+    def get_stats(self) -> dict[str, Any]:
+        return {
+            "model_name": self.model_name,
+            "ready": self.is_ready,
+            "load_failed": self.load_failed,
+            "batches_encoded": self.batches_encoded,
+            "texts_encoded": self.texts_encoded,
+            "avg_batch_size": (
+                self.texts_encoded / self.batches_encoded if self.batches_encoded else 0.0
+            ),
+        }
+
+
+_services: dict[str, EmbeddingService] = {}
+_services_lock = threading.Lock()
+
+
+def get_embedding_service(model_name: str) -> EmbeddingService:
+    """Return the process-wide embedding service for ``model_name``."""
+    with _services_lock:
+        service = _services.get(model_name)
+        if service is None:
+            service = _services[model_name] = EmbeddingService(
+                model_name,
+                cache_dir=unified_config.ai.embedding_cache_dir,
+                batch_window_ms=unified_config.ai.embedding_batch_window_ms,
+                max_batch_size=unified_config.ai.embedding_max_batch_size,
+            )
+        return service
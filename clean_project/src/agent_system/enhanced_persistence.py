@@ -5,11 +5,13 @@ Database-backed persistence with same interface as the legacy JSON module.
 
 from __future__ import annotations
 
+import copy
 import logging
 from datetime import UTC, datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List, Optional
 
 from .async_utils import run_blocking
+from .config_simple import settings
 from .enterprise_persistence import enterprise_persistence
 from .models import Action, ActionStatus, Memory, Observation
 
@@ -63,7 +65,8 @@ def save_action_selector(selector: Any, filename: str = "action_selector.json")
 
 
 async def save_action_selector_async(selector: Any, filename: str = "action_selector.json") -> None:
-    selector_data = _normalize_action_selector(selector)
+    # The write runs in a worker thread; hand it a copy the loop cannot mutate
+    selector_data = copy.deepcopy(_normalize_action_selector(selector))
     await enterprise_persistence.save_action_selector_async(selector_data, filename)
     logger.debug("Action selector saved successfully (async)")
 
@@ -115,30 +118,16 @@ async def load_action_selector_async(
 
 
 def _normalize_learning_system(learning_system: Any) -> Dict[str, Any]:
-    if hasattr(learning_system, "strategy_performance"):
-        return {
-            "strategy_performance": learning_system.strategy_performance,
-            "pattern_library": getattr(learning_system, "pattern_library", {}),
-        }
+    if hasattr(learning_system, "to_state"):
+        return learning_system.to_state()
     if isinstance(learning_system, dict):
         return learning_system
     raise TypeError("Unsupported learning system type for persistence")
 
 
 def _apply_learning_system(learning_system: Any, data: Dict[str, Any]) -> None:
-    if hasattr(learning_system, "strategy_performance"):
-        learning_system.strategy_performance.update(data.get("strategy_performance", {}))
-
-        # Convert lists back to tuples for pattern_library (JSON doesn't preserve types)
-        pattern_library_data = data.get("pattern_library", {})
-        for pattern_key, pattern_list in pattern_library_data.items():
-            # Convert each inner list back to tuple format
-            if isinstance(pattern_list, list):
-                pattern_library_data[pattern_key] = [
-                    tuple(item) if isinstance(item, list) else item for item in pattern_list
-                ]
-
-        learning_system.pattern_library.update(pattern_library_data)
+    if hasattr(learning_system, "load_state"):
+        learning_system.load_state(data)
 
 
 def save_learning_system(learning_system: Any, filename: str = "learning_system.json") -> None:
@@ -162,29 +151,10 @@ def load_learning_system(
     if learning_system and data:
         _apply_learning_system(learning_system, data)
 
-    # If this is a LearningSystem with strategy_performance, return that format
-    if learning_system and hasattr(learning_system, "strategy_performance"):
-        # Convert lists back to tuples for pattern_library in the payload as well
-        pattern_library_payload = {}
-        for pattern_key, pattern_list in learning_system.pattern_library.items():
-            if isinstance(pattern_list, list):
-                # Make sure each item in the list is a tuple
-                pattern_library_payload[pattern_key] = [
-                    tuple(item) if isinstance(item, list) else item for item in pattern_list
-                ]
-            else:
-                pattern_library_payload[pattern_key] = pattern_list
-
-        # Return the expected payload format for tests
-        payload = {
-            "strategy_performance": learning_system.strategy_performance,
-            "pattern_library": pattern_library_payload,
-        }
-        logger.debug("Learning system loaded from database")
-        return payload
-
-    # If no learning_system or no data, return as-is
     logger.debug("Learning system loaded from database")
+    # Return the compact state of the hydrated system when one was supplied
+    if learning_system and hasattr(learning_system, "to_state"):
+        return learning_system.to_state()
     return data
 
 
@@ -195,24 +165,9 @@ async def load_learning_system_async(
     if learning_system and data:
         _apply_learning_system(learning_system, data)
 
-        if hasattr(learning_system, "strategy_performance"):
-            pattern_library_payload = {}
-            for pattern_key, pattern_list in learning_system.pattern_library.items():
-                if isinstance(pattern_list, list):
-                    pattern_library_payload[pattern_key] = [
-                        tuple(item) if isinstance(item, list) else item for item in pattern_list
-                    ]
-                else:
-                    pattern_library_payload[pattern_key] = pattern_list
-
-            payload = {
-                "strategy_performance": learning_system.strategy_performance,
-                "pattern_library": pattern_library_payload,
-            }
-            logger.debug("Learning system loaded from database (async)")
-            return payload
-
     logger.debug("Learning system loaded from database (async)")
+    if learning_system and hasattr(learning_system, "to_state"):
+        return learning_system.to_state()
     return data
 
 
@@ -300,7 +255,11 @@ def _extract_counter(memory_id: str | None) -> int:
     return int(token) if token.isdigit() else 0
 
 
-def _apply_memories(memory_system: Any, memories: List[Dict[str, Any]]) -> None:
+def _apply_memories(
+    memory_system: Any,
+    memories: List[Dict[str, Any]],
+    total: Optional[int] = None,
+) -> None:
     if not hasattr(memory_system, "working_memory"):
         return
 
@@ -318,55 +277,132 @@ def _apply_memories(memory_system: Any, memories: List[Dict[str, Any]]) -> None:
 
     memory_system.working_memory = working
     memory_system.episodic_memory = episodic
-    memory_system.memory_counter = max(counter, len(working) + len(episodic))
+    _mark_saved(memory_system, memories)
+    known = total if total is not None else len(working) + len(episodic)
+    memory_system.memory_counter = max(counter, known)
 
 
-def save_memory_system(memory_system: Any, filename: str = "episodic_memory.json") -> None:
-    if hasattr(memory_system, "episodic_memory"):
-        memories: List[Dict[str, Any]] = []
-        for memory in getattr(memory_system, "episodic_memory", []):
-            memories.append(_serialize_memory(memory, "episodic"))
-        for memory in getattr(memory_system, "working_memory", []):
-            memories.append(_serialize_memory(memory, "working"))
-    else:
-        memories = list(memory_system) if isinstance(memory_system, list) else []
+def _load_memory_window(eager_episodic: int) -> tuple[List[Dict[str, Any]], int, bool]:
+    """Load working memory plus the most recent episodic memories.
+
+    Returns the eagerly loaded payload, the total number of stored memories and
+    whether older episodic memories remain in the database.
+    """
+    working = enterprise_persistence.load_memories(memory_type="working") or []
+    episodic = (
+        enterprise_persistence.load_memories(memory_type="episodic", limit=eager_episodic) or []
+    )
+    total = enterprise_persistence.count_memories()
+    has_more = total > len(working) + len(episodic)
+    return episodic + working, total, has_more
+
+
+def _attach_episodic_stream(
+    memory_system: Any, oldest_loaded_id: Optional[str], count: int
+) -> None:
+    """Defer loading of the ``count`` episodic memories older than ``oldest_loaded_id``.
+
+    When nothing was loaded eagerly the whole episodic history is deferred.
+    """
 
+    def _stream() -> Iterator[Memory]:
+        for entry in enterprise_persistence.iter_memories(
+            memory_type="episodic", before=oldest_loaded_id
+        ):
+            yield _deserialize_memory(entry)
+
+    memory_system.defer_episodic_memory(_stream, count)
+
+
+def _supports_deferred_load(memory_system: Any) -> bool:
+    return memory_system is not None and hasattr(memory_system, "defer_episodic_memory")
+
+
+def _resident_episodic(memory_system: Any) -> List[Memory]:
+    # Deferred memories are already persisted; saving must not hydrate them.
+    if hasattr(memory_system, "loaded_episodic_memory"):
+        return memory_system.loaded_episodic_memory
+    return getattr(memory_system, "episodic_memory", [])
+
+
+def _serialize_memory_system(memory_system: Any) -> List[Dict[str, Any]]:
+    if hasattr(memory_system, "unsaved_memories"):
+        return [
+            _serialize_memory(memory, kind) for memory, kind in memory_system.unsaved_memories()
+        ]
+    # Checked via working_memory: touching episodic_memory may hydrate deferred history
+    if not hasattr(memory_system, "working_memory"):
+        return list(memory_system) if isinstance(memory_system, list) else []
+    memories = [
+        _serialize_memory(memory, "episodic") for memory in _resident_episodic(memory_system)
+    ]
+    for memory in getattr(memory_system, "working_memory", []):
+        memories.append(_serialize_memory(memory, "working"))
+    return memories
+
+
+def _mark_saved(memory_system: Any, memories: List[Dict[str, Any]]) -> None:
+    if hasattr(memory_system, "mark_saved"):
+        memory_system.mark_saved(
+            (memory.get("id", ""), memory.get("type", "working")) for memory in memories
+        )
+
+
+def save_memory_system(memory_system: Any, filename: str = "episodic_memory.json") -> None:
+    memories = _serialize_memory_system(memory_system)
     enterprise_persistence.save_memories(memories, filename)
+    _mark_saved(memory_system, memories)
     logger.debug("Memory system saved: %s memories", len(memories))
 
 
 async def save_memory_system_async(
     memory_system: Any, filename: str = "episodic_memory.json"
 ) -> None:
-    if hasattr(memory_system, "episodic_memory"):
-        memories: List[Dict[str, Any]] = []
-        for memory in getattr(memory_system, "episodic_memory", []):
-            memories.append(_serialize_memory(memory, "episodic"))
-        for memory in getattr(memory_system, "working_memory", []):
-            memories.append(_serialize_memory(memory, "working"))
-    else:
-        memories = list(memory_system) if isinstance(memory_system, list) else []
-
+    memories = _serialize_memory_system(memory_system)
     await enterprise_persistence.save_memories_async(memories, filename)
+    _mark_saved(memory_system, memories)
     logger.debug("Memory system saved (async): %s memories", len(memories))
 
 
 def load_memory_system(
-    memory_system: Any = None, filename: str = "episodic_memory.json"
+    memory_system: Any = None,
+    filename: str = "episodic_memory.json",
+    eager_episodic: Optional[int] = None,
 ) -> List[Dict[str, Any]]:
-    memories = enterprise_persistence.load_memories(filename) or []
-    if memory_system is not None:
-        _apply_memories(memory_system, memories)
-    logger.debug("Memory system loaded from database: %s memories", len(memories))
+    """Load persisted memories.
+
+    Memory systems that support deferred loading only receive working memory and
+    the most recent ``eager_episodic`` episodic memories; older history is
+    streamed from the database on first recall.
+    """
+    if not _supports_deferred_load(memory_system):
+        memories = enterprise_persistence.load_memories(filename) or []
+        if memory_system is not None:
+            _apply_memories(memory_system, memories)
+        logger.debug("Memory system loaded from database: %s memories", len(memories))
+        return memories
+
+    limit = settings.MEMORY_EAGER_EPISODIC if eager_episodic is None else eager_episodic
+    memories, total, has_more = _load_memory_window(limit)
+    _apply_memories(memory_system, memories, total)
+    if has_more:
+        oldest = next((m["id"] for m in memories if m.get("type") == "episodic"), None)
+        _attach_episodic_stream(memory_system, oldest, total - len(memories))
+    logger.debug(
+        "Memory system loaded from database: %s of %s memories (deferred=%s)",
+        len(memories),
+        total,
+        has_more,
+    )
     return memories
 
 
 async def load_memory_system_async(
-    memory_system: Any = None, filename: str = "episodic_memory.json"
+    memory_system: Any = None,
+    filename: str = "episodic_memory.json",
+    eager_episodic: Optional[int] = None,
 ) -> List[Dict[str, Any]]:
-    memories = await enterprise_persistence.load_memories_async(filename) or []
-    if memory_system is not None:
-        _apply_memories(memory_system, memories)
+    memories = await run_blocking(load_memory_system, memory_system, filename, eager_episodic)
     logger.debug("Memory system loaded from database (async): %s memories", len(memories))
     return memories
 
@@ -378,10 +414,25 @@ def save_all(agent: Any) -> None:
     logger.info("Persisted agent state to database")
 
 
+def _write_snapshot(
+    selector_data: Dict[str, Any], learning_data: Dict[str, Any], memories: List[Dict[str, Any]]
+) -> None:
+    enterprise_persistence.save_action_selector(selector_data)
+    enterprise_persistence.save_learning_system(learning_data)
+    enterprise_persistence.save_memories(memories)
+
+
 async def save_all_async(agent: Any) -> None:
-    await save_action_selector_async(agent.action_selector)
-    await save_learning_system_async(agent.learning_system)
-    await save_memory_system_async(agent.memory_system)
+    """Persist ``agent`` without blocking the event loop.
+
+    The state is copied on the calling (loop) thread, where the agent mutates it,
+    and only the database writes run in a worker thread.
+    """
+    selector_data = copy.deepcopy(_normalize_action_selector(agent.action_selector))
+    learning_data = _normalize_learning_system(agent.learning_system)
+    memories = _serialize_memory_system(agent.memory_system)
+    await run_blocking(_write_snapshot, selector_data, learning_data, memories)
+    _mark_saved(agent.memory_system, memories)
     logger.info("Persisted agent state to database (async)")
 
 
@@ -7,7 +7,7 @@ from __future__ import annotations
 
 import logging
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 
 from .async_utils import run_blocking
 from .database_models import db_manager
@@ -99,12 +99,33 @@ class EnterprisePersistence:
         db_persistence.save_memory(memories)
         logger.debug("Memories saved to database: %s items", len(memories))
 
-    def load_memories(self, *args: Any, **kwargs: Any) -> List[Dict[str, Any]]:
+    def load_memories(
+        self,
+        *args: Any,
+        memory_type: Optional[str] = None,
+        limit: Optional[int] = None,
+        **kwargs: Any,
+    ) -> List[Dict[str, Any]]:
         self._require_database()
-        result = db_persistence.load_memories() or []
+        result = db_persistence.load_memories(memory_type=memory_type, limit=limit) or []
         logger.debug("Memories loaded from database: %s items", len(result))
         return result
 
+    def iter_memories(
+        self,
+        memory_type: Optional[str] = None,
+        before: Optional[str] = None,
+        batch_size: int = 500,
+    ) -> Iterator[Dict[str, Any]]:
+        self._require_database()
+        return db_persistence.iter_memories(
+            memory_type=memory_type, before=before, batch_size=batch_size
+        )
+
+    def count_memories(self, memory_type: Optional[str] = None) -> int:
+        self._require_database()
+        return db_persistence.count_memories(memory_type)
+
     def get_storage_info(self) -> Dict[str, Any]:
         self._ensure_initialized()
         info: Dict[str, Any] = {
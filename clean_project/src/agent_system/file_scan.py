@@ -0,0 +1,369 @@
+"""
+Bounded-memory views over large files for the file reader tool.
+
+Every mode maps the file read-only and touches only the bytes it needs: ranges
+and tails slice the mapping directly, samples probe a fixed number of offsets,
+and grep scans with the regex engine running over the mapping itself. Long
+scans hand already-processed pages back to the kernel (``MADV_DONTNEED``), so
+resident memory stays around ``SCAN_WINDOW`` however large the file is. Text is
+decoded incrementally so a slice never ends in a broken multi-byte character.
+
+The CSV profile streams rows through ``csv.reader`` and keeps per-column
+summaries (numeric quantiles via ``QuantileSketch``), not the rows themselves.
+"""
+
+from __future__ import annotations
+
+import codecs
+import csv
+import mmap
+import random
+import re
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from .streaming_stats import QuantileSketch
+
+SCAN_WINDOW = 64 * 1024 * 1024  # Bytes scanned between releases of mapped pages
+COUNT_CHUNK = 1024 * 1024
+MAX_LINE_BYTES = 8192  # Longer lines are cut and flagged in tail/grep/sample results
+MAX_DISTINCT = 1000  # Distinct values tracked per CSV column before counting stops
+
+Buffer = Union[mmap.mmap, bytes]
+
+
+@contextmanager
+def mapped(path: str) -> Iterator[Buffer]:
+    """Map ``path`` read-only; empty files yield ``b""`` since they cannot be mapped."""
+    with open(path, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            yield b""
+            return
+        try:
+            yield mm
+        finally:
+            mm.close()
+
+
+def ascii_compatible(encoding: str) -> bool:
+    """Line-oriented modes search for raw ``\\n`` bytes, which only works for these."""
+    try:
+        return "\n".encode(encoding) == b"\n" and "a".encode(encoding) == b"a"
+    except LookupError:
+        return False
+
+
+def decode(data: bytes, encoding: str, final: bool = False) -> str:
+    """Decode a slice, dropping a multi-byte character cut at either end."""
+    if encoding.lower().replace("_", "-") in ("utf-8", "utf8"):
+        skip = 0
+        while skip < min(3, len(data)) and 0x80 <= data[skip] <= 0xBF:
+            skip += 1
+        data = data[skip:]
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    return decoder.decode(data, final=final)
+
+
+def _release(buf: Buffer, start: int, end: int) -> None:
+    """Drop mapped pages in [start, end) from this process; they stay in the page cache."""
+    if not isinstance(buf, mmap.mmap) or not hasattr(mmap, "MADV_DONTNEED"):
+        return
+    start -= start % mmap.PAGESIZE
+    end -= end % mmap.PAGESIZE
+    if end > start:
+        buf.madvise(mmap.MADV_DONTNEED, start, end - start)
+
+
+def _count_newlines(buf: Buffer, start: int, end: int) -> int:
+    total = 0
+    for pos in range(start, end, COUNT_CHUNK):
+        total += buf[pos : min(end, pos + COUNT_CHUNK)].count(b"\n")
+    return total
+
+
+def _line_at(buf: Buffer, pos: int) -> tuple[int, int, bool]:
+    """Bounds of the line containing ``pos``, cut to MAX_LINE_BYTES on each side."""
+    start = buf.rfind(b"\n", max(0, pos - MAX_LINE_BYTES), pos) + 1
+    cut = start == 0 and pos > MAX_LINE_BYTES
+    if cut:
+        start = pos - MAX_LINE_BYTES
+    end = buf.find(b"\n", pos, min(len(buf), pos + MAX_LINE_BYTES))
+    if end < 0:
+        end = min(len(buf), pos + MAX_LINE_BYTES)
+        cut = cut or end < len(buf)
+    return start, end, cut
+
+
+def line_offset(buf: Buffer, line: int) -> Optional[int]:
+    """Byte offset at which 1-based ``line`` starts, or None past the end of the file."""
+    remaining, pos, released = line - 1, 0, 0
+    while remaining:
+        end = min(len(buf), pos + COUNT_CHUNK)
+        found = buf[pos:end].count(b"\n")
+        if found >= remaining:
+            for _ in range(remaining):
+                pos = buf.find(b"\n", pos, end) + 1
+            break
+        if end == len(buf):
+            return None
+        remaining -= found
+        pos = end
+        if pos - released >= SCAN_WINDOW:
+            _release(buf, released, pos)
+            released = pos
+    _release(buf, released, pos)
+    return pos if pos < len(buf) or line == 1 else None
+
+
+def read_range(
+    buf: Buffer,
+    encoding: str,
+    offset: int = 0,
+    length: Optional[int] = None,
+    start_line: Optional[int] = None,
+    line_count: Optional[int] = None,
+    max_bytes: int = 1024 * 1024,
+) -> Dict[str, Any]:
+    """Read a byte range, or ``line_count`` lines from ``start_line``, capped at ``max_bytes``."""
+    if start_line is not None:
+        found = line_offset(buf, max(1, int(start_line)))
+        offset = len(buf) if found is None else found
+    offset = min(max(0, int(offset)), len(buf))
+    stop = len(buf) if length is None else min(len(buf), offset + max(0, int(length)))
+    cap = min(stop, offset + max_bytes)
+    if line_count is not None:
+        pos = offset
+        for _ in range(max(0, int(line_count))):
+            nl = buf.find(b"\n", pos, cap)
+            if nl < 0:
+                pos = stop if pos < stop else pos
+                break
+            pos = nl + 1
+        stop = pos
+    end = min(stop, cap)
+    result: Dict[str, Any] = {
+        "content": decode(buf[offset:end], encoding, final=end == len(buf)),
+        "offset": offset,
+        "end_offset": end,
+        "truncated": end < stop,
+    }
+    if start_line is not None:
+        result["start_line"] = max(1, int(start_line))
+    return result
+
+
+def read_tail(
+    buf: Buffer, encoding: str, lines: int = 100, max_bytes: int = 1024 * 1024
+) -> Dict[str, Any]:
+    """The last ``lines`` lines, reading at most ``max_bytes`` back from the end."""
+    size = len(buf)
+    floor = max(0, size - max_bytes)
+    # A trailing newline terminates the last line rather than starting an empty one
+    start = size - 1 if size > floor and buf[size - 1 : size] == b"\n" else size
+    cut = False
+    for _ in range(max(1, int(lines))):
+        nl = buf.rfind(b"\n", floor, start)
+        if nl < 0:
+            cut = floor > 0
+            start = floor - 1
+            break
+        start = nl
+    start += 1
+    if cut:
+        # Drop the partial line the byte cap cut into, unless it is all there is
+        nl = buf.find(b"\n", start, size - 1)
+        start = nl + 1 if nl >= 0 else start
+    text = decode(buf[start:size], encoding, final=True)
+    return {
+        "content": text,
+        "offset": start,
+        "lines": text.count("\n") + (1 if text and not text.endswith("\n") else 0),
+        "truncated": cut,
+    }
+
+
+def grep(
+    buf: Buffer,
+    pattern: str,
+    encoding: str,
+    ignore_case: bool = False,
+    max_matches: int = 100,
+    offset: int = 0,
+    first_line: int = 1,
+) -> Dict[str, Any]:
+    """Matching lines with line numbers, resumable via ``next_offset``/``next_line``.
+
+    The regex runs over one ``SCAN_WINDOW`` of whole lines at a time, so a line
+    longer than a window can only be matched in pieces.
+    """
+    flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+    regex = re.compile(pattern.encode(encoding), flags)
+    size = len(buf)
+    pos = min(max(0, int(offset)), size)
+    line_no, counted_to = int(first_line), pos
+    matches: List[Dict[str, Any]] = []
+    next_offset: Optional[int] = None
+    while pos < size and next_offset is None:
+        window_end = min(size, pos + SCAN_WINDOW)
+        if window_end < size:
+            window_end = buf.rfind(b"\n", pos, window_end) + 1 or window_end
+        scan = pos
+        while scan < window_end:
+            match = regex.search(buf, scan, window_end)
+            if match is None:
+                break
+            start, end, cut = _line_at(buf, match.start())
+            start = max(start, counted_to)
+            line_no += _count_newlines(buf, counted_to, start)
+            counted_to = start
+            if len(matches) == max_matches:
+                next_offset = start
+                break
+            matches.append(
+                {
+                    "line": line_no,
+                    "offset": start,
+                    "text": decode(buf[start:end], encoding, final=True),
+                    **({"line_truncated": True} if cut else {}),
+                }
+            )
+            # One entry per line; an empty match must still advance the scan
+            scan = max(end + 1, match.end(), match.start() + 1)
+        if next_offset is None:
+            line_no += _count_newlines(buf, counted_to, window_end)
+            counted_to = window_end
+        _release(buf, pos, window_end)
+        pos = window_end
+    return {
+        "matches": matches,
+        "count": len(matches),
+        "truncated": next_offset is not None,
+        "next_offset": next_offset,
+        "next_line": line_no if next_offset is not None else None,
+    }
+
+
+def sample(buf: Buffer, encoding: str, count: int = 20, seed: int = 0) -> Dict[str, Any]:
+    """One line from each of ``count`` equal byte strata, chosen reproducibly by ``seed``."""
+    size = len(buf)
+    if not size:
+        return {"samples": [], "count": 0}
+    rng = random.Random(seed)
+    count = max(1, min(int(count), size))
+    stratum = size / count
+    samples: List[Dict[str, Any]] = []
+    seen = set()
+    for i in range(count):
+        probe = int(i * stratum + rng.random() * stratum)
+        start, end, cut = _line_at(buf, min(probe, size - 1))
+        if start in seen:
+            continue
+        seen.add(start)
+        samples.append(
+            {
+                "offset": start,
+                "text": decode(buf[start:end], encoding, final=True),
+                **({"line_truncated": True} if cut else {}),
+            }
+        )
+    return {"samples": samples, "count": len(samples), "seed": seed}
+
+
+class ColumnProfile:
+    """Running summary of one CSV column; numeric values feed a quantile sketch."""
+
+    __slots__ = ("empty", "non_empty", "numeric", "sketch", "distinct", "max_length")
+
+    def __init__(self) -> None:
+        self.empty = 0
+        self.non_empty = 0
+        self.numeric = QuantileSketch()
+        self.distinct: Optional[set] = set()
+        self.max_length = 0
+
+    def add(self, value: str) -> None:
+        if not value.strip():
+            self.empty += 1
+            return
+        self.non_empty += 1
+        self.max_length = max(self.max_length, len(value))
+        if self.distinct is not None:
+            self.distinct.add(value)
+            if len(self.distinct) > MAX_DISTINCT:
+                self.distinct = None
+        try:
+            number = float(value)
+        except ValueError:
+            return
+        if number == number and abs(number) != float("inf"):
+            self.numeric.add(number)
+
+    def summary(self) -> Dict[str, Any]:
+        numeric = self.numeric
+        is_numeric = self.non_empty > 0 and numeric.count == self.non_empty
+        summary: Dict[str, Any] = {
+            "type": "numeric" if is_numeric else "text",
+            "non_empty": self.non_empty,
+            "empty": self.empty,
+            "distinct": len(self.distinct) if self.distinct is not None else None,
+            "distinct_capped": self.distinct is None,
+        }
+        if numeric.count:
+            summary.update(
+                {
+                    "numeric_count": numeric.count,
+                    "min": numeric.min,
+                    "max": numeric.max,
+                    "mean": numeric.mean,
+                    "p50": numeric.quantile(0.5),
+                    "p95": numeric.quantile(0.95),
+                }
+            )
+        if not is_numeric:
+            summary["max_length"] = self.max_length
+        return summary
+
+
+def profile_csv(
+    path: str, encoding: str = "utf-8", max_rows: int = 2000, stats: bool = False
+) -> Dict[str, Any]:
+    """First ``max_rows`` rows as dicts; reading stops there unless ``stats`` is set.
+
+    With ``stats=True`` the whole file is streamed for row counts and per-column stats.
+    """
+    with open(path, "r", encoding=encoding, errors="replace", newline="") as f:
+        reader = csv.reader(f)
+        columns = next(reader, None) or []
+        profiles = [ColumnProfile() for _ in columns]
+        preview: List[Dict[str, str]] = []
+        total = 0
+        ragged = 0
+        for row in reader:
+            if len(preview) < max_rows:
+                preview.append(dict(zip(columns, row)))
+            elif not stats:
+                break
+            total += 1
+            if len(row) != len(columns):
+                ragged += 1
+            if stats:
+                for profile, value in zip(profiles, row):
+                    profile.add(value)
+    result: Dict[str, Any] = {
+        "content": preview,
+        "rows": len(preview),
+        "columns": columns,
+    }
+    if stats:
+        result.update(
+            {
+                "total_rows": total,
+                "ragged_rows": ragged,
+                "column_stats": {
+                    name: profile.summary() for name, profile in zip(columns, profiles)
+                },
+            }
+        )
+    return result
@@ -0,0 +1,168 @@
+"""
+Crash-safe writes for the file writer and edit tools.
+
+``write_atomic`` streams the new content into a temporary file next to the
+target and renames it over the target with ``os.replace``, so readers see
+either the old file or the complete new one, never a truncated mix. With
+``fsync`` the data and the directory entry are flushed to disk before
+returning. ``append`` extends a file in place with ``O_APPEND`` writes.
+
+Both take an iterable of ``str`` or bytes-like chunks. Text is encoded
+incrementally: small pieces (such as the tokens of ``JSONEncoder.iterencode``)
+are batched, and large strings are encoded a slice at a time, so a payload is
+never held in memory as one encoded copy. The byte counts returned are the
+sum of what the file object actually accepted.
+"""
+
+from __future__ import annotations
+
+import codecs
+import itertools
+import json
+import os
+import secrets
+import stat
+from typing import Any, BinaryIO, Iterable, Iterator, List, Optional, Union
+
+WRITE_CHUNK = 256 * 1024  # Characters encoded per write
+JSON_TOKEN_BATCH = 4096  # iterencode tokens joined per chunk
+
+Chunk = Union[str, bytes, bytearray, memoryview]
+
+
+def _create_temp(directory: str, name: str) -> tuple[int, str]:
+    """Open a fresh sibling of ``name`` for writing.
+
+    Unlike ``mkstemp`` (always 0600) the file is created 0666 and the kernel
+    applies the current umask, so new files get the mode ``open()`` would give.
+    """
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+    for _ in range(100):
+        tmp = os.path.join(directory, f".{name}.{secrets.token_hex(4)}.tmp")
+        try:
+            return os.open(tmp, flags, 0o666), tmp
+        except FileExistsError:
+            continue
+    raise FileExistsError(f"no free temporary name for {name} in {directory}")
+
+
+def encode_chunks(chunks: Iterable[Chunk], encoding: str = "utf-8") -> Iterator[Chunk]:
+    """Bytes of ``chunks``, encoding text in batches of about ``WRITE_CHUNK`` characters."""
+    encoder = codecs.getincrementalencoder(encoding)()
+    pending: List[str] = []
+    size = 0
+    for chunk in chunks:
+        if not isinstance(chunk, str):
+            if pending:
+                yield encoder.encode("".join(pending))
+                pending, size = [], 0
+            yield chunk
+        elif len(chunk) > WRITE_CHUNK:
+            if pending:
+                yield encoder.encode("".join(pending))
+                pending, size = [], 0
+            for start in range(0, len(chunk), WRITE_CHUNK):
+                yield encoder.encode(chunk[start : start + WRITE_CHUNK])
+        else:
+            pending.append(chunk)
+            size += len(chunk)
+            if size >= WRITE_CHUNK:
+                yield encoder.encode("".join(pending))
+                pending, size = [], 0
+    yield encoder.encode("".join(pending), final=True)
+
+
+def json_chunks(value: Any, indent: Optional[int] = None) -> Iterator[str]:
+    """``value`` as JSON text in chunks.
+
+    Compact JSON comes from the C encoder in one string, which is still faster
+    than streaming; CPython only has a pure-Python encoder for indented output,
+    and there streaming costs little and keeps memory flat.
+    """
+    if indent is None:
+        yield json.dumps(value, ensure_ascii=False)
+        return
+    tokens = json.JSONEncoder(indent=indent, ensure_ascii=False).iterencode(value)
+    while True:
+        batch = list(itertools.islice(tokens, JSON_TOKEN_BATCH))
+        if not batch:
+            return
+        yield "".join(batch)
+
+
+def _write_all(f: BinaryIO, chunks: Iterable[Chunk], encoding: str, fsync: bool) -> int:
+    written = 0
+    for data in encode_chunks(chunks, encoding):
+        if data:
+            written += f.write(data)
+    f.flush()
+    if fsync:
+        os.fsync(f.fileno())
+    return written
+
+
+def _fsync_dir(directory: str) -> None:
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return  # Not supported on this platform
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def write_atomic(
+    path: str | os.PathLike[str],
+    chunks: Iterable[Chunk],
+    encoding: str = "utf-8",
+    fsync: bool = False,
+) -> int:
+    """Replace ``path`` with ``chunks`` in one rename; returns the bytes written.
+
+    Writing through a symlink replaces its target. The file keeps its permission
+    bits. If the chunks raise or the disk fills up, the temporary file is removed
+    and ``path`` is left as it was.
+    """
+    target = os.path.realpath(path)
+    directory, name = os.path.split(target)
+    try:
+        mode: Optional[int] = stat.S_IMODE(os.stat(target).st_mode)
+    except FileNotFoundError:
+        mode = None
+    fd, tmp = _create_temp(directory, name)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            written = _write_all(f, chunks, encoding, fsync)
+        if mode is not None:
+            os.chmod(tmp, mode)
+        os.replace(tmp, target)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    if fsync:
+        _fsync_dir(directory)
+    return written
+
+
+def append(
+    path: str | os.PathLike[str],
+    chunks: Iterable[Chunk],
+    encoding: str = "utf-8",
+    fsync: bool = False,
+) -> int:
+    """Append ``chunks`` to ``path``, creating it if needed; returns the bytes written.
+
+    Appends are not atomic: if the chunks raise part-way, what was written stays.
+    """
+    created = not os.path.exists(path)
+    with open(path, "ab") as f:
+        written = _write_all(f, chunks, encoding, fsync)
+    if fsync and created:
+        _fsync_dir(os.path.dirname(os.path.abspath(path)))
+    return written
@@ -0,0 +1,387 @@
+"""
+Cached, asynchronous view of a git working tree for ``GitTool``.
+
+``git status`` rescans the whole tree on every call. ``GitRepoState`` instead
+remembers each answer together with a fingerprint of the repository: the stat
+of ``.git/index``, ``HEAD``, the current branch ref and the config/exclude
+files, plus the mtime and size of every tracked file and of the directories
+holding them, and of every directory inside untracked ones. Untracked
+directories that are empty or hold only ignored files are invisible to
+status, yet a file created in one changes its answer; ``git ls-files -o
+--directory`` finds them and is re-run only when the rest of the fingerprint
+moves. Computing the fingerprint is otherwise a run of ``os.stat`` calls, an
+fsmonitor-style dirty check without a subprocess. While it matches, status
+and working-tree diffs are served from memory. New untracked files show up as
+a changed directory mtime. Files modified within ``RACY_WINDOW_NS`` of the
+check are too recent to trust (the same rule git applies to its index), so
+those answers are not cached.
+
+``log`` pages come from an in-memory commit list that is extended from the
+previous tip when HEAD moves forward, and fetched further back only as deeper
+pages are requested. All git processes are asyncio subprocesses, so callers
+await them without holding a thread.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+RACY_WINDOW_NS = 1_000_000_000
+LOG_CHUNK = 200  # Commits fetched per extension of the log cache
+LOG_EXTEND_MAX = 1000  # Larger jumps of HEAD rebuild the log cache instead
+UNTRACKED_DIR_LIMIT = 2000  # More directories below untracked ones disable caching
+_LOG_FORMAT = "--format=%H%x1f%P%x1f%an%x1f%aI%x1f%s%x1e"
+
+_Stat = Optional[Tuple[int, int]]
+
+
+class GitError(RuntimeError):
+    """A git command failed; carries its return code and stderr."""
+
+    def __init__(self, returncode: int, stderr: str) -> None:
+        super().__init__(stderr.strip() or f"git exited with {returncode}")
+        self.returncode = returncode
+        self.stderr = stderr
+
+
+def _stat(path: str) -> _Stat:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def parse_porcelain(data: bytes) -> List[Dict[str, str]]:
+    """Entries of ``git status --porcelain -z``; renames and copies carry ``orig_path``."""
+    entries: List[Dict[str, str]] = []
+    tokens = data.decode("utf-8", "replace").split("\0")
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        i += 1
+        if len(token) < 4:
+            continue
+        entry = {"status": token[:2], "path": token[3:]}
+        if "R" in token[:2] or "C" in token[:2]:
+            entry["orig_path"] = tokens[i] if i < len(tokens) else ""
+            i += 1
+        entries.append(entry)
+    return entries
+
+
+def _parse_log(data: bytes) -> List[Dict[str, Any]]:
+    commits = []
+    for record in data.decode("utf-8", "replace").split("\x1e"):
+        fields = record.strip("\n").split("\x1f")
+        if len(fields) == 5:
+            sha, parents, author, date, subject = fields
+            commits.append(
+                {
+                    "sha": sha,
+                    "parents": parents.split(),
+                    "author": author,
+                    "date": date,
+                    "subject": subject,
+                }
+            )
+    return commits
+
+
+class Fingerprint:
+    """Repository state at one instant; equal fingerprints mean git would answer the same."""
+
+    __slots__ = ("key", "cacheable")
+
+    def __init__(self, key: Any, cacheable: bool) -> None:
+        self.key = key
+        self.cacheable = cacheable
+
+
+class GitRepoState:
+    """Cached status, diffs and commit list for the repository containing ``cwd``."""
+
+    def __init__(self, cwd: str, timeout: float = 30) -> None:
+        self.cwd = cwd
+        self.timeout = timeout
+        self.toplevel: Optional[str] = None
+        self.git_dir = ""
+        self.common_dir = ""
+        self._lock = threading.Lock()
+        self._tracked: Tuple[_Stat, List[str]] = (None, [])
+        # (tracked part of the fingerprint, directories under untracked ones, their stats)
+        self._untracked: Tuple[Any, Optional[List[str]], Tuple[_Stat, ...]] = (None, None, ())
+        self._answers: Dict[Tuple[Any, ...], Tuple[Any, Any]] = {}
+        self._log_tip: Optional[str] = None
+        self._commits: List[Dict[str, Any]] = []
+        self._log_complete = False
+        self.hits = 0
+        self.misses = 0
+        self.git_calls = 0
+
+    # ---------------------------------------------------------------- git
+    async def git(self, *args: str, cwd: Optional[str] = None) -> bytes:
+        """Run ``git --no-pager *args`` and return stdout; raises GitError on failure.
+
+        ``--no-optional-locks`` keeps status from rewriting the index, which would
+        both contend with the user's own git commands and invalidate the fingerprint.
+        """
+        self.git_calls += 1
+        proc = await asyncio.create_subprocess_exec(
+            "git",
+            "--no-pager",
+            "--no-optional-locks",
+            *args,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=cwd or self.cwd,
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), self.timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            raise
+        if proc.returncode != 0:
+            raise GitError(proc.returncode or 1, stderr.decode("utf-8", "replace"))
+        return stdout
+
+    async def _locate(self) -> None:
+        if self.toplevel is not None:
+            return
+        out = await self.git(
+            "rev-parse", "--show-toplevel", "--absolute-git-dir", "--git-common-dir"
+        )
+        toplevel, git_dir, common_dir = out.decode("utf-8", "replace").splitlines()[:3]
+        self.git_dir = git_dir
+        self.common_dir = os.path.abspath(os.path.join(self.cwd, common_dir))
+        self.toplevel = toplevel
+
+    # ------------------------------------------------------- fingerprint
+    def _head_ref(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.git_dir, "HEAD"), "r", encoding="utf-8") as f:
+                head = f.read().strip()
+        except OSError:
+            return None
+        return head[5:] if head.startswith("ref: ") else None
+
+    def _key_stats(self) -> Tuple[_Stat, ...]:
+        ref = self._head_ref()
+        paths = [
+            os.path.join(self.git_dir, "index"),
+            os.path.join(self.git_dir, "HEAD"),
+            os.path.join(self.common_dir, "config"),
+            os.path.join(self.common_dir, "info", "exclude"),
+            os.path.join(self.common_dir, "packed-refs"),
+        ]
+        if ref:
+            paths.append(os.path.join(self.common_dir, ref))
+        return tuple(_stat(p) for p in paths)
+
+    async def _tracked_paths(self) -> List[str]:
+        """Tracked files and their directories, re-listed only when the index changes."""
+        assert self.toplevel is not None
+        index = _stat(os.path.join(self.git_dir, "index"))
+        with self._lock:
+            if self._tracked[0] == index and index is not None:
+                return self._tracked[1]
+        out = await self.git("ls-files", "-z", cwd=self.toplevel)
+        files = [p for p in out.decode("utf-8", "surrogateescape").split("\0") if p]
+        dirs = {""}
+        for rel in files:
+            parent = os.path.dirname(rel)
+            while parent not in dirs:
+                dirs.add(parent)
+                parent = os.path.dirname(parent)
+        paths = [os.path.join(self.toplevel, rel) for rel in sorted(dirs) + files]
+        with self._lock:
+            self._tracked = (index, paths)
+        return paths
+
+    async def _untracked_dirs(self, base: Any) -> Tuple[Optional[List[str]], Tuple[_Stat, ...]]:
+        """Directories at or below untracked ones with their stats; None when there are too
+        many to watch. Re-listed when ``base`` or any of the directories changed."""
+        assert self.toplevel is not None
+        with self._lock:
+            known_base, dirs, known_stats = self._untracked
+        if dirs is not None and known_base == base:
+            stats = tuple(_stat(d) for d in dirs)
+            if stats == known_stats:
+                return dirs, stats
+        out = await self.git(
+            "ls-files", "-o", "--directory", "--exclude-standard", "-z", cwd=self.toplevel
+        )
+        found: Optional[List[str]] = []
+        for rel in out.decode("utf-8", "surrogateescape").split("\0"):
+            if not rel.endswith("/") or found is None:
+                continue
+            for dirpath, _, _ in os.walk(os.path.join(self.toplevel, rel)):
+                found.append(dirpath)
+                if len(found) > UNTRACKED_DIR_LIMIT:
+                    found = None
+                    break
+        stats = tuple(_stat(d) for d in found or ())
+        with self._lock:
+            self._untracked = (base, found, stats)
+        return found, stats
+
+    async def fingerprint(self) -> Fingerprint:
+        """Current state of the repository, taken before any git command it will key."""
+        await self._locate()
+        key = self._key_stats()
+        stats = tuple(_stat(p) for p in await self._tracked_paths())
+        base = (key, hash(stats))
+        dirs, dir_stats = await self._untracked_dirs(base)
+        recent = time.time_ns() - RACY_WINDOW_NS
+        racy = any(s is not None and s[0] >= recent for s in stats + key + dir_stats)
+        return Fingerprint((base, hash(dir_stats)), cacheable=not racy and dirs is not None)
+
+    async def _cached(
+        self, query: Tuple[Any, ...], fp: Fingerprint, *args: str
+    ) -> Tuple[bytes, bool]:
+        with self._lock:
+            answer = self._answers.get(query)
+            if answer is not None and answer[0] == fp.key and fp.cacheable:
+                self.hits += 1
+                return answer[1], True
+            self.misses += 1
+        out = await self.git(*args)
+        if fp.cacheable:
+            with self._lock:
+                self._answers[query] = (fp.key, out)
+        return out, False
+
+    # ----------------------------------------------------------- queries
+    async def status(self, fp: Fingerprint) -> Tuple[List[Dict[str, str]], bool]:
+        out, cached = await self._cached(("status",), fp, "status", "--porcelain", "-z")
+        return parse_porcelain(out), cached
+
+    async def diff(
+        self, fp: Fingerprint, rev_range: Optional[str] = None, path: Optional[str] = None
+    ) -> Tuple[List[str], bool]:
+        """Changed file names; working-tree diffs are cached, ranges naming refs always run."""
+        args = ["diff", "--name-only", "-z"] + ([rev_range] if rev_range else [])
+        args += ["--", path] if path else []
+        if rev_range:
+            out, cached = await self.git(*args), False
+        else:
+            out, cached = await self._cached(("diff", path), fp, *args)
+        return [p for p in out.decode("utf-8", "replace").split("\0") if p], cached
+
+    async def log(self, offset: int, limit: int) -> Tuple[List[Dict[str, Any]], bool, bool]:
+        """Commits ``offset`` to ``offset + limit`` of ``git log``, whether more exist, and
+        whether the page came entirely from the cached commit list."""
+        tip = await self._head_sha()
+        with self._lock:
+            old_tip, commits, complete = self._log_tip, list(self._commits), self._log_complete
+        cached = tip == old_tip
+        if not cached:
+            commits, complete = await self._advance(old_tip, tip, commits, complete)
+        while tip and len(commits) <= offset + limit and not complete:
+            more = _parse_log(
+                await self.git(
+                    "log", _LOG_FORMAT, f"--skip={len(commits)}", "-n", str(LOG_CHUNK), tip
+                )
+            )
+            commits += more
+            complete = len(more) < LOG_CHUNK
+            cached = False
+        with self._lock:
+            self._log_tip, self._commits, self._log_complete = tip, commits, complete
+        return commits[offset : offset + limit], len(commits) > offset + limit, cached
+
+    def _read_head(self) -> Optional[str]:
+        """HEAD's commit read from the ref files, or None when git must resolve it."""
+        ref = self._head_ref()
+        try:
+            if ref is None:
+                with open(os.path.join(self.git_dir, "HEAD"), "r", encoding="utf-8") as f:
+                    sha = f.read().strip()  # Detached HEAD
+            else:
+                with open(os.path.join(self.common_dir, ref), "r", encoding="utf-8") as f:
+                    sha = f.read().strip()
+        except OSError:
+            return None  # Packed ref, or an unborn branch
+        return sha if len(sha) in (40, 64) else None
+
+    async def _head_sha(self) -> Optional[str]:
+        await self._locate()
+        sha = self._read_head()
+        if sha:
+            return sha
+        try:
+            out = await self.git("rev-parse", "--verify", "-q", "HEAD")
+        except GitError:
+            return None  # No commits yet
+        return out.decode().strip() or None
+
+    async def _advance(
+        self, old: Optional[str], tip: Optional[str], commits: List[Dict[str, Any]], complete: bool
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """Prepend the commits HEAD gained since the cached tip ``old``, or start over."""
+        if tip is None:
+            return [], True
+        if old is None or not commits:
+            return [], False
+        for i, known in enumerate(commits):
+            if known["sha"] == tip:  # HEAD moved back to a commit already listed
+                # The suffix is tip's own log only while it is a chain of single
+                # parents; past a merge the list interleaves other branches by date
+                kept = commits[i:]
+                if all(c["parents"] == [n["sha"]] for c, n in zip(kept, kept[1:])):
+                    return kept, complete
+                return [], False
+        try:
+            new = _parse_log(
+                await self.git("log", _LOG_FORMAT, "-n", str(LOG_EXTEND_MAX + 1), f"{old}..{tip}")
+            )
+        except GitError:
+            return [], False
+        shas = {c["sha"] for c in new} | {old}
+        # Only a pure extension of the old history keeps its order when prepended
+        if not new or len(new) > LOG_EXTEND_MAX:
+            return [], False
+        if not all(set(c["parents"]) <= shas for c in new):
+            return [], False
+        return new + commits, complete
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "git_calls": self.git_calls,
+                "cached_commits": len(self._commits),
+            }
+
+
+_states: Dict[str, GitRepoState] = {}
+_states_lock = threading.Lock()
+
+
+def shared_git_state(cwd: str, timeout: float = 30) -> GitRepoState:
+    """Process-wide state for the repository seen from ``cwd``."""
+    key = os.path.realpath(cwd)
+    with _states_lock:
+        state = _states.get(key)
+        if state is None:
+            state = _states[key] = GitRepoState(key, timeout)
+        state.timeout = timeout
+        return state
+
+
+def page(items: Sequence[Any], offset: int, limit: int) -> Dict[str, Any]:
+    """``limit`` items from ``offset`` with the offset of the next page, if any."""
+    end = offset + limit
+    return {
+        "offset": offset,
+        "total": len(items),
+        "next_offset": end if end < len(items) else None,
+        "items": list(items[offset:end]),
+    }
@@ -13,13 +13,24 @@ logger = logging.getLogger(__name__)
 class GoalManager:
     """
     Manages goals with priorities, dependencies, and dynamic updates.
+
+    Dependencies are indexed both ways: each goal keeps a count of unmet
+    dependencies and each dependency knows its dependents, so completing a goal
+    only touches the goals waiting on it. Only runnable goals live in the ready
+    heap, and pending/blocked goals are counted as statuses change.
     """
 
+    _WAITING = (GoalStatus.PENDING, GoalStatus.BLOCKED)
+
     def __init__(self) -> None:
         self.goals: Dict[str, Goal] = {}
+        # Ready heap of (-priority, goal_id); entries whose goal is no longer pending are skipped
         self.active_goals: List[Tuple[float, str]] = []
         self.goal_dependencies: Dict[str, List[str]] = defaultdict(list)
+        self.dependents: Dict[str, List[str]] = defaultdict(list)
+        self.unmet_dependencies: Dict[str, int] = defaultdict(int)
         self.goal_counter = 0
+        self._waiting_count = 0
 
     def add_goal(
         self,
@@ -41,6 +52,7 @@ class GoalManager:
         )
 
         self.goals[goal_id] = goal
+        self._waiting_count += 1
 
         if parent_id and parent_id in self.goals:
             self.goals[parent_id].subgoals.append(goal_id)
@@ -51,32 +63,29 @@ class GoalManager:
         return goal
 
     def get_next_goal(self) -> Optional[Goal]:
-        """Get the highest priority pending goal."""
+        """Get the highest priority pending goal whose dependencies are met."""
         while self.active_goals:
             _, goal_id = heapq.heappop(self.active_goals)
+            goal = self.goals.get(goal_id)
 
-            if goal_id not in self.goals:
+            # Stale entry: goal removed, already started, or blocked since it was queued
+            if goal is None or goal.status != GoalStatus.PENDING:
                 continue
 
-            goal = self.goals[goal_id]
-
-            if goal.status == GoalStatus.PENDING:
-                if self._check_dependencies(goal_id):
-                    goal.status = GoalStatus.IN_PROGRESS
-                    return goal
-
-                goal.status = GoalStatus.BLOCKED
-                heapq.heappush(self.active_goals, (-goal.priority, goal_id))
+            self._set_status(goal, GoalStatus.IN_PROGRESS)
+            return goal
 
         return None
 
-    def update_goal_status(self, goal_id: str, status: GoalStatus, progress: float | None = None) -> None:
+    def update_goal_status(
+        self, goal_id: str, status: GoalStatus, progress: float | None = None
+    ) -> None:
         """Update goal status and progress."""
         if goal_id not in self.goals:
             return
 
         goal = self.goals[goal_id]
-        goal.status = status
+        self._set_status(goal, status)
 
         if progress is not None:
             goal.progress = min(max(progress, 0.0), 1.0)
@@ -84,13 +93,24 @@ class GoalManager:
         if goal.parent_goal_id:
             self._update_parent_progress(goal.parent_goal_id)
 
-        if status == GoalStatus.COMPLETED:
-            self._unblock_dependent_goals(goal_id)
-
     def add_dependency(self, goal_id: str, depends_on: str) -> None:
         """Add a dependency between goals."""
+        if depends_on in self.goal_dependencies[goal_id]:
+            return
         self.goal_dependencies[goal_id].append(depends_on)
 
+        # Dependencies on unknown goals can never be tracked and are ignored
+        dependency = self.goals.get(depends_on)
+        if dependency is None:
+            return
+        self.dependents[depends_on].append(goal_id)
+
+        if dependency.status != GoalStatus.COMPLETED:
+            self.unmet_dependencies[goal_id] += 1
+            goal = self.goals.get(goal_id)
+            if goal is not None and goal.status == GoalStatus.PENDING:
+                self._set_status(goal, GoalStatus.BLOCKED)
+
     def get_goal_hierarchy(self) -> Dict[str, Any]:
         """Get a tree representation of all goals."""
         root_goals = [goal for goal in self.goals.values() if goal.parent_goal_id is None]
@@ -113,12 +133,26 @@ class GoalManager:
 
     def _check_dependencies(self, goal_id: str) -> bool:
         """Check if all dependencies for a goal are met."""
-        dependencies = self.goal_dependencies.get(goal_id, [])
-        return all(
-            self.goals[dep_id].status == GoalStatus.COMPLETED
-            for dep_id in dependencies
-            if dep_id in self.goals
-        )
+        return self.unmet_dependencies.get(goal_id, 0) == 0
+
+    def _set_status(self, goal: Goal, status: GoalStatus) -> None:
+        """Change a goal's status, keeping counters, the ready heap and dependents in sync."""
+        previous = goal.status
+        if status == GoalStatus.PENDING and not self._check_dependencies(goal.id):
+            status = GoalStatus.BLOCKED
+        if previous == status:
+            return
+
+        goal.status = status
+        self._waiting_count += (status in self._WAITING) - (previous in self._WAITING)
+
+        if status == GoalStatus.PENDING:
+            heapq.heappush(self.active_goals, (-goal.priority, goal.id))
+
+        if status == GoalStatus.COMPLETED:
+            self._unblock_dependent_goals(goal.id)
+        elif previous == GoalStatus.COMPLETED:
+            self._reblock_dependent_goals(goal.id)
 
     def _update_parent_progress(self, parent_id: str) -> None:
         """Update parent goal progress based on subgoals."""
@@ -135,19 +169,29 @@ class GoalManager:
         parent.progress = total_progress / len(parent.subgoals)
 
         if parent.progress >= 1.0:
-            parent.status = GoalStatus.COMPLETED
+            self._set_status(parent, GoalStatus.COMPLETED)
 
     def _unblock_dependent_goals(self, completed_goal_id: str) -> None:
         """Unblock goals that were waiting for this goal."""
-        for goal_id, dependencies in self.goal_dependencies.items():
-            if completed_goal_id in dependencies:
-                goal = self.goals.get(goal_id)
-                if goal and goal.status == GoalStatus.BLOCKED and self._check_dependencies(goal_id):
-                    goal.status = GoalStatus.PENDING
-                    heapq.heappush(self.active_goals, (-goal.priority, goal_id))
+        for goal_id in self.dependents.get(completed_goal_id, ()):
+            self.unmet_dependencies[goal_id] -= 1
+            goal = self.goals.get(goal_id)
+            if goal and goal.status == GoalStatus.BLOCKED and self._check_dependencies(goal_id):
+                self._set_status(goal, GoalStatus.PENDING)
+
+    def _reblock_dependent_goals(self, goal_id: str) -> None:
+        """A goal left COMPLETED; its dependents are waiting on it again."""
+        for dependent_id in self.dependents.get(goal_id, ()):
+            self.unmet_dependencies[dependent_id] += 1
+            dependent = self.goals.get(dependent_id)
+            if dependent and dependent.status == GoalStatus.PENDING:
+                self._set_status(dependent, GoalStatus.BLOCKED)
+
+    @property
+    def pending_goal_count(self) -> int:
+        """Number of goals that are pending or blocked."""
+        return self._waiting_count
 
     def has_pending_goals(self) -> bool:
-        """Return True if any goals are pending or queued for processing."""
-        if any(g.status in (GoalStatus.PENDING, GoalStatus.BLOCKED) for g in self.goals.values()):
-            return True
-        return len(self.active_goals) > 0
+        """Return True if any goals are pending or blocked."""
+        return self._waiting_count > 0
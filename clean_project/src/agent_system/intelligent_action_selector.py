@@ -5,12 +5,140 @@ Intelligent action selector with real decision-making capabilities.
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, TypedDict, cast
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypedDict,
+    cast,
+)
 
 from .models import Action, Goal
 
+# NumPy is optional; scoring falls back to pure Python when it is missing
+np: Any = None
+try:
+    import numpy as _np
+
+    np = _np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Common stop words filtered out of goal and action descriptions
+_STOP_WORDS: FrozenSet[str] = frozenset(
+    {
+        "the",
+        "a",
+        "an",
+        "and",
+        "or",
+        "but",
+        "in",
+        "on",
+        "at",
+        "to",
+        "for",
+        "of",
+        "with",
+        "by",
+        "from",
+        "up",
+        "about",
+        "into",
+        "through",
+        "during",
+        "before",
+        "after",
+        "above",
+        "below",
+        "between",
+        "among",
+        "is",
+        "are",
+        "was",
+        "were",
+        "be",
+        "been",
+        "being",
+        "have",
+        "has",
+        "had",
+        "do",
+        "does",
+        "did",
+        "will",
+        "would",
+        "could",
+        "should",
+        "may",
+        "might",
+        "must",
+        "can",
+    }
+)
+
+_ACTION_TYPE_SCORES: Dict[str, float] = {
+    "search_information": 0.9,
+    "load_data": 0.8,
+    "execute_code": 0.7,
+    "analyze_sources": 0.8,
+    "synthesize_findings": 0.6,
+    "save_results": 0.4,
+    "generic_task": 0.3,
+}
+
+# Weights for type, goal alignment, context relevance, history and prerequisites
+_SCORE_WEIGHTS: Tuple[float, float, float, float, float] = (0.3, 0.25, 0.2, 0.15, 0.1)
+
+
+@lru_cache(maxsize=4096)
+def _keywords(text: str) -> Tuple[str, ...]:
+    """Extract meaningful keywords from text (cached, text is lowercased here)."""
+    return tuple(word for word in text.lower().split() if len(word) > 2 and word not in _STOP_WORDS)
+
+
+@dataclass(frozen=True)
+class _GoalFeatures:
+    """Goal- and context-level inputs shared by every candidate in one selection."""
+
+    goal_lower: str
+    goal_keywords: FrozenSet[str]
+    goal_keyword_count: int
+    mentions_research: bool
+    mentions_file: bool
+    mentions_code: bool
+    recent_actions: FrozenSet[str]
+    context_type: str
+    completed_actions: FrozenSet[str]
+
+    @classmethod
+    def build(
+        cls, goal_description: str, context: Dict[str, Any], completed_actions: Iterable[str]
+    ) -> "_GoalFeatures":
+        goal_lower = goal_description.lower()
+        goal_keywords = _keywords(goal_lower)
+        return cls(
+            goal_lower=goal_lower,
+            goal_keywords=frozenset(goal_keywords),
+            goal_keyword_count=len(goal_keywords),
+            mentions_research="research" in goal_lower,
+            mentions_file="file" in goal_lower,
+            mentions_code="code" in goal_lower,
+            recent_actions=frozenset(cast(Sequence[str], context.get("recent_actions", []))),
+            context_type=cast(str, context.get("context_type", "general")),
+            completed_actions=frozenset(completed_actions),
+        )
+
 
 class _HistoryRecord(TypedDict):
     total_attempts: int
@@ -48,114 +176,117 @@ class IntelligentActionSelector:
             f"Selecting action from {len(available_actions)} options for goal: {goal.description}"
         )
 
-        # Score each action
-        scored_actions: List[Tuple[Action, float]] = []
-        for action in available_actions:
-            score = self._calculate_action_score(action, goal, context, completed_actions)
-            scored_actions.append((action, score))
-
-        # Sort by score (highest first)
-        scored_actions.sort(key=lambda x: x[1], reverse=True)
+        features = _GoalFeatures.build(goal.description, context, completed_actions)
+        components = [
+            self._score_components(action, features, context) for action in available_actions
+        ]
+        scores = self._combine_scores(components)
+        best_index = self._argmax(scores)
 
-        best_action, best_score = scored_actions[0]
+        best_action = available_actions[best_index]
+        best_score = scores[best_index]
 
         logger.info(f"Selected action: {best_action.name} (score: {best_score:.3f})")
 
         # Store selection rationale for learning
-        self._store_selection_rationale(best_action, goal, context, best_score)
+        self._store_selection_rationale(
+            best_action, goal, context, best_score, components[best_index]
+        )
 
         return best_action
 
+    def _score_components(
+        self, action: Action, features: _GoalFeatures, context: Dict[str, Any]
+    ) -> Tuple[float, float, float, float, float]:
+        """Compute the unweighted score components for one candidate."""
+        return (
+            self._get_action_type_score(action),
+            self._goal_alignment(action, features),
+            self._context_relevance(action, features, context),
+            self._get_historical_performance_score(action),
+            self._prerequisite_score(action, features.completed_actions),
+        )
+
+    @staticmethod
+    def _combine_scores(components: List[Tuple[float, float, float, float, float]]) -> List[float]:
+        """Weight and clip all candidate components in one batched pass."""
+        if NUMPY_AVAILABLE and len(components) > 1:
+            matrix = np.asarray(components, dtype=float)
+            combined = np.clip(matrix @ np.asarray(_SCORE_WEIGHTS), 0.0, 1.0)
+            return cast(List[float], combined.tolist())
+
+        return [
+            max(0.0, min(1.0, sum(value * weight for value, weight in zip(row, _SCORE_WEIGHTS))))
+            for row in components
+        ]
+
+    @staticmethod
+    def _argmax(scores: List[float]) -> int:
+        """Index of the highest score; ties resolve to the earliest candidate."""
+        if NUMPY_AVAILABLE and len(scores) > 1:
+            return int(np.argmax(scores))
+        return max(range(len(scores)), key=scores.__getitem__)
+
     def _calculate_action_score(
         self, action: Action, goal: Goal, context: Dict[str, Any], completed_actions: List[str]
     ) -> float:
         """Calculate intelligent score for an action."""
-
-        score = 0.0
-
-        # 1. Base score from action type (30%)
-        score += self._get_action_type_score(action) * 0.3
-
-        # 2. Goal alignment score (25%)
-        score += self._calculate_goal_alignment(action, goal) * 0.25
-
-        # 3. Context relevance score (20%)
-        score += self._calculate_context_relevance(action, context) * 0.2
-
-        # 4. Historical performance score (15%)
-        score += self._get_historical_performance_score(action) * 0.15
-
-        # 5. Prerequisite completion score (10%)
-        score += self._calculate_prerequisite_score(action, completed_actions) * 0.1
-
-        return max(0.0, min(1.0, score))  # Ensure score is between 0 and 1
+        features = _GoalFeatures.build(goal.description, context, completed_actions)
+        return self._combine_scores([self._score_components(action, features, context)])[0]
 
     def _get_action_type_score(self, action: Action) -> float:
         """Score based on action type and current context."""
 
-        action_scores = {
-            "search_information": 0.9,
-            "load_data": 0.8,
-            "execute_code": 0.7,
-            "analyze_sources": 0.8,
-            "synthesize_findings": 0.6,
-            "save_results": 0.4,
-            "generic_task": 0.3,
-        }
-
-        return action_scores.get(action.name, 0.5)
+        return _ACTION_TYPE_SCORES.get(action.name, 0.5)
 
     def _calculate_goal_alignment(self, action: Action, goal: Goal) -> float:
         """Calculate how well an action aligns with the goal."""
+        return self._goal_alignment(action, _GoalFeatures.build(goal.description, {}, ()))
 
-        goal_lower = goal.description.lower()
-        action_lower = action.name.lower()
-
-        # Check keyword matches
-        goal_keywords = self._extract_keywords(goal_lower)
-        action_keywords = self._extract_keywords(action_lower)
-
-        if not goal_keywords:
+    def _goal_alignment(self, action: Action, features: _GoalFeatures) -> float:
+        if not features.goal_keyword_count:
             return 0.5
 
-        matches = len(set(goal_keywords) & set(action_keywords))
-        alignment = matches / len(goal_keywords)
+        action_lower = action.name.lower()
+        matches = len(features.goal_keywords.intersection(_keywords(action_lower)))
+        alignment = matches / features.goal_keyword_count
 
         # Boost for specific matches
-        if "research" in goal_lower and "search" in action_lower:
+        if features.mentions_research and "search" in action_lower:
             alignment += 0.3
-        elif "file" in goal_lower and "data" in action_lower:
+        elif features.mentions_file and "data" in action_lower:
             alignment += 0.3
-        elif "code" in goal_lower and ("execute" in action_lower or "code" in action_lower):
+        elif features.mentions_code and ("execute" in action_lower or "code" in action_lower):
             alignment += 0.3
 
         return min(1.0, alignment)
 
     def _calculate_context_relevance(self, action: Action, context: Dict[str, Any]) -> float:
         """Calculate relevance of action to current context."""
+        features = _GoalFeatures.build("", context, ())
+        return self._context_relevance(action, features, context)
 
+    def _context_relevance(
+        self, action: Action, features: _GoalFeatures, context: Dict[str, Any]
+    ) -> float:
         relevance = 0.5  # Base relevance
 
-        # Check if action has been recently used
-        recent_actions = cast(Sequence[str], context.get("recent_actions", []))
-        if action.name in recent_actions:
-            relevance -= 0.2  # Penalize repetition
+        # Penalize repetition of recently used actions
+        if action.name in features.recent_actions:
+            relevance -= 0.2
 
         # Check context-specific preferences
-        context_type = cast(str, context.get("context_type", "general"))
-
+        context_type = features.context_type
         if context_type == "research" and action.name == "search_information":
             relevance += 0.4
-        elif context_type == "analysis" and action.name in ["load_data", "analyze_sources"]:
+        elif context_type == "analysis" and action.name in ("load_data", "analyze_sources"):
             relevance += 0.4
         elif context_type == "development" and action.name == "execute_code":
             relevance += 0.4
 
         # Check parameter relevance
         if action.parameters:
-            param_relevance = self._evaluate_parameter_relevance(
-                action.parameters, context
-            )
+            param_relevance = self._evaluate_parameter_relevance(action.parameters, context)
             relevance += param_relevance * 0.3
 
         return max(0.0, min(1.0, relevance))
@@ -211,91 +342,36 @@ class IntelligentActionSelector:
 
     def _calculate_prerequisite_score(self, action: Action, completed_actions: List[str]) -> float:
         """Calculate score based on prerequisite completion."""
+        return self._prerequisite_score(action, frozenset(completed_actions))
 
+    @staticmethod
+    def _prerequisite_score(action: Action, completed_actions: FrozenSet[str]) -> float:
         prerequisites = action.prerequisites or []
 
         if not prerequisites:
             return 1.0  # No prerequisites, full score
 
-        completed_prerequisites = [
-            prereq for prereq in prerequisites if prereq in completed_actions
-        ]
-
-        if len(prerequisites) == 0:
-            return 1.0
-
-        completion_rate = len(completed_prerequisites) / len(prerequisites)
+        completed = sum(1 for prereq in prerequisites if prereq in completed_actions)
 
         # Additional boost for recent completions
-        if len(completed_prerequisites) == len(prerequisites):
+        if completed == len(prerequisites):
             return 1.0
-        elif len(completed_prerequisites) > 0:
-            return 0.7 + (completion_rate * 0.3)
+        elif completed > 0:
+            return 0.7 + (completed / len(prerequisites) * 0.3)
         else:
             return 0.2  # Low score if prerequisites not met
 
     def _extract_keywords(self, text: str) -> List[str]:
         """Extract meaningful keywords from text."""
-
-        # Common stop words to filter out
-        stop_words = {
-            "the",
-            "a",
-            "an",
-            "and",
-            "or",
-            "but",
-            "in",
-            "on",
-            "at",
-            "to",
-            "for",
-            "of",
-            "with",
-            "by",
-            "from",
-            "up",
-            "about",
-            "into",
-            "through",
-            "during",
-            "before",
-            "after",
-            "above",
-            "below",
-            "between",
-            "among",
-            "is",
-            "are",
-            "was",
-            "were",
-            "be",
-            "been",
-            "being",
-            "have",
-            "has",
-            "had",
-            "do",
-            "does",
-            "did",
-            "will",
-            "would",
-            "could",
-            "should",
-            "may",
-            "might",
-            "must",
-            "can",
-        }
-
-        # Extract words and filter
-        words = text.lower().split()
-        keywords = [word for word in words if len(word) > 2 and word not in stop_words]
-
-        return keywords
+        return list(_keywords(text))
 
     def _store_selection_rationale(
-        self, action: Action, goal: Goal, context: Dict[str, Any], score: float
+        self,
+        action: Action,
+        goal: Goal,
+        context: Dict[str, Any],
+        score: float,
+        components: Tuple[float, float, float, float, float],
     ) -> None:
         """Store rationale for action selection for learning."""
 
@@ -307,9 +383,9 @@ class IntelligentActionSelector:
             "timestamp": context.get("timestamp"),
             "parameters": action.parameters,
             "reasoning": {
-                "goal_alignment": self._calculate_goal_alignment(action, goal),
-                "context_relevance": self._calculate_context_relevance(action, context),
-                "historical_performance": self._get_historical_performance_score(action),
+                "goal_alignment": components[1],
+                "context_relevance": components[2],
+                "historical_performance": components[3],
             },
         }
 
@@ -324,7 +400,9 @@ class IntelligentActionSelector:
 
         self.action_history[action_key]["total_attempts"] += 1
 
-    def update_action_performance(self, action: Action, success: bool, success_score: float) -> None:
+    def update_action_performance(
+        self, action: Action, success: bool, success_score: float
+    ) -> None:
         """Update performance tracking for an action."""
 
         action_key = f"{action.tool_name}_{action.name}"
@@ -356,10 +434,11 @@ class IntelligentActionSelector:
         if not available_actions:
             return []
 
+        features = _GoalFeatures.build(goal.description, {}, ())
         recommendations: List[Tuple[Action, float]] = []
 
         for action in available_actions:
-            alignment = self._calculate_goal_alignment(action, goal)
+            alignment = self._goal_alignment(action, features)
             performance = self._get_historical_performance_score(action)
             type_score = self._get_action_type_score(action)
 
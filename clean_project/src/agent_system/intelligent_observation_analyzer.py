@@ -5,22 +5,102 @@ Intelligent observation analyzer with real AI capabilities.
 from __future__ import annotations
 
 import logging
+import math
 import re
+from collections import Counter, deque
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Deque, Dict, List, Optional, Tuple
 
 from .models import ActionStatus, Goal, Observation
 
 logger = logging.getLogger(__name__)
 
 
-class IntelligentObservationAnalyzer:
-    """AI-powered observation analyzer that provides meaningful insights."""
+@dataclass
+class RollingStat:
+    """Streaming mean/variance (Welford) plus an EWMA of recent values."""
+
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    ewma: float = 0.0
+
+    def update(self, value: float, alpha: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.ewma = value if self.count == 1 else alpha * value + (1 - alpha) * self.ewma
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def zscore(self, value: float) -> float:
+        std = self.std
+        return (value - self.mean) / std if std > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, float]:
+        return {"count": self.count, "mean": self.mean, "std": self.std, "ewma": self.ewma}
+
+
+@dataclass
+class ToolStats:
+    """Rolling latency and success statistics for one tool."""
+
+    latency_ms: RollingStat = field(default_factory=RollingStat)
+    success: RollingStat = field(default_factory=RollingStat)
 
-    def __init__(self) -> None:
+
+@dataclass(frozen=True)
+class _AnalysisRecord:
+    """Compact per-analysis entry kept in the learning ring buffer."""
+
+    action_id: str
+    status: str
+    tool: str
+    outcome_type: str
+    success_score: float
+    anomalies: Tuple[str, ...]
+
+
+class IntelligentObservationAnalyzer:
+    """AI-powered observation analyzer that provides meaningful insights.
+
+    Learning history lives in a fixed-size ring buffer whose aggregates are
+    updated as records enter and leave it, and per-tool and per-outcome
+    statistics are streamed, so insights and anomaly checks cost O(1) per
+    observation with bounded memory.
+    """
+
+    LEARNING_WINDOW = 1000
+    RECENT_WINDOW = 5
+    EWMA_ALPHA = 0.2
+    MIN_SAMPLES_FOR_OUTLIERS = 10
+    LATENCY_OUTLIER_ZSCORE = 3.0
+    DEGRADED_SUCCESS_EWMA = 0.3
+
+    def __init__(self, learning_window: int = LEARNING_WINDOW) -> None:
         self.outcome_patterns = self._load_outcome_patterns()
         self.success_indicators = self._load_success_indicators()
-        self.learning_data: Dict[str, Dict[str, Any]] = {}
+
+        self.learning_data: Deque[_AnalysisRecord] = deque(maxlen=learning_window)
+        self._high_success_count = 0
+        self._success_score_sum = 0.0
+        self._outcome_counts: Counter[str] = Counter()
+        self._anomaly_counts: Counter[str] = Counter()
+
+        self.tool_stats: Dict[str, ToolStats] = {}
+        self.outcome_stats: Dict[str, RollingStat] = {}
+
+        # Statuses and timestamps of the most recent observations, for detect_anomalies()
+        self._recent: Deque[Tuple[ActionStatus, datetime]] = deque(maxlen=self.RECENT_WINDOW)
+        self._recent_failures = 0
 
     def _load_outcome_patterns(self) -> Dict[str, Any]:
         """Load patterns for understanding different types of outcomes."""
@@ -103,8 +183,9 @@ class IntelligentObservationAnalyzer:
         # Generate insights and recommendations
         insights = self._generate_insights(observation, outcome_type, success_score, goal)
 
-        # Detect anomalies
+        # Detect anomalies, including outliers against this tool's rolling statistics
         anomalies = self._detect_anomalies(observation, expected_outcome, goal)
+        anomalies.extend(self._detect_statistical_anomalies(observation))
 
         analysis = {
             "outcome_type": outcome_type,
@@ -425,98 +506,146 @@ class IntelligentObservationAnalyzer:
         obs_ts: datetime = observation.timestamp
         return (datetime.now() - obs_ts).total_seconds()
 
-    def _store_analysis_for_learning(self, observation: Observation, analysis: Dict[str, Any]) -> None:
-        """Store analysis data for machine learning."""
+    def _detect_statistical_anomalies(self, observation: Observation) -> List[str]:
+        """Compare an observation with its tool's history before that history absorbs it."""
+        tool = str(observation.metrics.get("tool", "unknown"))
+        stats = self.tool_stats.get(tool)
+        if stats is None:
+            return []
+
+        anomalies = []
+        latency = observation.metrics.get("latency_ms")
+        if (
+            isinstance(latency, (int, float))
+            and stats.latency_ms.count >= self.MIN_SAMPLES_FOR_OUTLIERS
+            and stats.latency_ms.zscore(float(latency)) > self.LATENCY_OUTLIER_ZSCORE
+        ):
+            anomalies.append(f"Latency outlier for {tool}")
+
+        if (
+            stats.success.count >= self.MIN_SAMPLES_FOR_OUTLIERS
+            and stats.success.ewma < self.DEGRADED_SUCCESS_EWMA
+        ):
+            anomalies.append(f"Degraded success rate for {tool}")
+        return anomalies
 
-        learning_key = f"{observation.action_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    def _store_analysis_for_learning(
+        self, observation: Observation, analysis: Dict[str, Any]
+    ) -> None:
+        """Fold an analysis into the learning ring buffer and the rolling statistics."""
+
+        tool = str(observation.metrics.get("tool", "unknown"))
+        record = _AnalysisRecord(
+            action_id=observation.action_id,
+            status=observation.status.value,
+            tool=tool,
+            outcome_type=analysis["outcome_type"],
+            success_score=analysis["success_score"],
+            anomalies=tuple(analysis["anomalies"]),
+        )
 
-        self.learning_data[learning_key] = {
-            "observation": {
-                "status": observation.status.value,
-                "result": observation.result,
-                "feedback": observation.feedback,
-            },
-            "analysis": analysis,
-            "timestamp": datetime.now().isoformat(),
-        }
+        if len(self.learning_data) == self.learning_data.maxlen:
+            self._account(self.learning_data[0], -1)
+        self.learning_data.append(record)
+        self._account(record, 1)
+
+        stats = self.tool_stats.get(tool)
+        if stats is None:
+            stats = self.tool_stats[tool] = ToolStats()
+        latency = observation.metrics.get("latency_ms")
+        if isinstance(latency, (int, float)):
+            stats.latency_ms.update(float(latency), self.EWMA_ALPHA)
+        stats.success.update(
+            1.0 if observation.status == ActionStatus.SUCCESS else 0.0, self.EWMA_ALPHA
+        )
+
+        outcome = self.outcome_stats.get(record.outcome_type)
+        if outcome is None:
+            outcome = self.outcome_stats[record.outcome_type] = RollingStat()
+        outcome.update(record.success_score, self.EWMA_ALPHA)
 
-        # Keep only recent learning data (limit to 1000 entries)
-        if len(self.learning_data) > 1000:
-            # Remove oldest entries
-            sorted_keys = sorted(self.learning_data.keys())
-            for key in sorted_keys[:-1000]:
-                del self.learning_data[key]
+        if len(self._recent) == self._recent.maxlen and self._recent[0][0] == ActionStatus.FAILURE:
+            self._recent_failures -= 1
+        self._recent.append((observation.status, observation.timestamp))
+        if observation.status == ActionStatus.FAILURE:
+            self._recent_failures += 1
+
+    def _account(self, record: _AnalysisRecord, sign: int) -> None:
+        """Add (sign=1) or remove (sign=-1) a record's share of the window aggregates."""
+        self._high_success_count += sign * (record.success_score > 0.7)
+        self._success_score_sum += sign * record.success_score
+        self._outcome_counts[record.outcome_type] += sign
+        if not self._outcome_counts[record.outcome_type]:
+            del self._outcome_counts[record.outcome_type]
+        for anomaly in record.anomalies:
+            self._anomaly_counts[anomaly] += sign
+            if not self._anomaly_counts[anomaly]:
+                del self._anomaly_counts[anomaly]
 
     def get_learning_insights(self) -> Dict[str, Any]:
         """Get insights from accumulated learning data."""
 
-        if not self.learning_data:
-            return {"message": "No learning data available"}
-
         total_analyses = len(self.learning_data)
-        success_count = sum(
-            1 for data in self.learning_data.values() if data["analysis"]["success_score"] > 0.7
-        )
-
-        avg_success_score = (
-            sum(data["analysis"]["success_score"] for data in self.learning_data.values())
-            / total_analyses
-        )
-
-        common_outcomes: Dict[str, int] = {}
-        for data in self.learning_data.values():
-            outcome_type = data["analysis"]["outcome_type"]
-            common_outcomes[outcome_type] = common_outcomes.get(outcome_type, 0) + 1
+        if not total_analyses:
+            return {"message": "No learning data available"}
 
         return {
             "total_analyses": total_analyses,
-            "high_success_rate": success_count / total_analyses,
-            "average_success_score": avg_success_score,
-            "common_outcome_types": common_outcomes,
+            "high_success_rate": self._high_success_count / total_analyses,
+            "average_success_score": self._success_score_sum / total_analyses,
+            "common_outcome_types": dict(self._outcome_counts),
             "anomaly_patterns": self._identify_anomaly_patterns(),
+            "tool_statistics": {
+                tool: {
+                    "latency_ms": stats.latency_ms.to_dict(),
+                    "success": stats.success.to_dict(),
+                }
+                for tool, stats in self.tool_stats.items()
+            },
+            "outcome_statistics": {
+                outcome: stat.to_dict() for outcome, stat in self.outcome_stats.items()
+            },
         }
 
     def _identify_anomaly_patterns(self) -> List[str]:
         """Identify common anomaly patterns."""
 
-        anomaly_count: Dict[str, int] = {}
-
-        for data in self.learning_data.values():
-            for anomaly in data["analysis"]["anomalies"]:
-                anomaly_count[anomaly] = anomaly_count.get(anomaly, 0) + 1
+        return [
+            f"{anomaly} ({count} occurrences)"
+            for anomaly, count in self._anomaly_counts.most_common(5)
+        ]
 
-        # Return most common anomalies
-        sorted_anomalies = sorted(anomaly_count.items(), key=lambda x: x[1], reverse=True)
+    def detect_anomalies(self, observations: Optional[List[Observation]] = None) -> List[str]:
+        """Detect anomalies across recent observations (required for agent compatibility).
 
-        return [f"{anomaly} ({count} occurrences)" for anomaly, count in sorted_anomalies[:5]]
+        Without arguments this uses the window maintained by analyze_observation,
+        which costs O(1) per call.
+        """
 
-    def detect_anomalies(self, observations: List[Observation]) -> List[str]:
-        """Detect anomalies from a list of recent observations (required for agent compatibility)."""
+        if observations is not None:
+            recent = [(obs.status, obs.timestamp) for obs in observations]
+            failure_count = sum(1 for status, _ in recent if status == ActionStatus.FAILURE)
+        else:
+            recent = list(self._recent)
+            failure_count = self._recent_failures
 
-        if not observations:
+        if not recent:
             return []
 
         anomalies = []
 
         # Check for repeated failures
-        failure_count = sum(1 for obs in observations if obs.status == ActionStatus.FAILURE)
-        if failure_count > len(observations) * 0.5:
+        if failure_count > len(recent) * 0.5:
             anomalies.append("High failure rate detected")
 
         # Check for unusual patterns
-        statuses = [obs.status for obs in observations]
-        if len(set(statuses)) == 1 and statuses[0] == ActionStatus.FAILURE:
+        if failure_count == len(recent):
             anomalies.append("All recent actions failed")
 
-        # Check for timing anomalies
-        import time
-
-        now = time.time()
-        for obs in observations:
-            if hasattr(obs, "timestamp"):
-                time_diff = now - obs.timestamp.timestamp()
-                if time_diff > 300:  # 5 minutes old
-                    anomalies.append("Stale observation detected")
+        # Check for timing anomalies; the oldest observation is the stalest one
+        oldest = min(timestamp for _, timestamp in recent)
+        if (datetime.now() - oldest).total_seconds() > 300:  # 5 minutes old
+            anomalies.append("Stale observation detected")
 
         return anomalies
 
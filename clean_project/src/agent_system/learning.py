@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import heapq
 import logging
-from collections import defaultdict
+import time
+from dataclasses import dataclass
 from typing import Any, Dict, List, Optional, Tuple
 
 from .models import Action, ActionStatus, Goal, Observation, Plan
@@ -9,12 +11,78 @@ from .models import Action, ActionStatus, Goal, Observation, Plan
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class RunningStat:
+    """Constant-size running aggregate of a stream of scores."""
+
+    count: float = 0.0
+    total: float = 0.0
+    ewma: float = 0.0
+    last_seen: float = 0.0
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def update(
+        self,
+        value: float,
+        alpha: float,
+        now: float,
+        half_life: Optional[float] = None,
+    ) -> None:
+        """Fold one observation in, optionally decaying older evidence first."""
+        if half_life and self.count and now > self.last_seen:
+            factor = 0.5 ** ((now - self.last_seen) / half_life)
+            self.count *= factor
+            self.total *= factor
+
+        self.ewma = value if not self.count else alpha * value + (1 - alpha) * self.ewma
+        self.count += 1
+        self.total += value
+        self.last_seen = now
+
+    def to_dict(self) -> Dict[str, float]:
+        return {"n": self.count, "sum": self.total, "ewma": self.ewma, "last": self.last_seen}
+
+    @classmethod
+    def from_payload(cls, payload: Any, alpha: float = 0.2) -> RunningStat:
+        """Build from the compact form, or replay a legacy list of scores."""
+        if isinstance(payload, dict):
+            return cls(
+                count=float(payload.get("n", 0.0)),
+                total=float(payload.get("sum", 0.0)),
+                ewma=float(payload.get("ewma", 0.0)),
+                last_seen=float(payload.get("last", 0.0)),
+            )
+
+        stat = cls()
+        for value in payload or []:
+            stat.update(float(value), alpha, 0.0)
+        return stat
+
+
 class LearningSystem:
-    """Learns from experience and adapts strategies."""
+    """Learns from experience and adapts strategies.
+
+    Strategy and pattern outcomes are kept as running aggregates, so memory and
+    persistence size depend on the number of distinct keys, not on history length.
+    """
+
+    # A strategy needs this many episodes before it can be recommended
+    MIN_STRATEGY_EPISODES = 2
+
+    def __init__(self, ewma_alpha: float = 0.2, decay_half_life: Optional[float] = None) -> None:
+        self.ewma_alpha = ewma_alpha
+        self.decay_half_life = decay_half_life  # seconds; None disables decay
+        self.strategy_performance: Dict[str, RunningStat] = {}
+        self.pattern_library: Dict[str, Dict[str, RunningStat]] = {}
+        self.total_episodes = 0
 
-    def __init__(self) -> None:
-        self.strategy_performance: Dict[str, List[float]] = defaultdict(list)
-        self.pattern_library: Dict[str, List[Tuple[str, float]]] = defaultdict(list)
+        # Max-heap of (-mean, first_seen, version, strategy) with lazy invalidation
+        self._strategy_heap: List[Tuple[float, int, int, str]] = []
+        self._strategy_versions: Dict[str, int] = {}
+        self._strategy_order: Dict[str, int] = {}
 
     def learn_from_episode(
         self,
@@ -26,33 +94,72 @@ class LearningSystem:
         """Learn from a completed episode (goal attempt)."""
         strategy_key = self._identify_strategy(actions)
         success_score = 1.0 if final_success else 0.0
+        now = time.time()
 
-        self.strategy_performance[strategy_key].append(success_score)
+        self.record_strategy(strategy_key, success_score, now)
 
         for action, observation in zip(actions, observations):
             pattern_key = f"{goal.description[:30]}:{action.tool_name}"
             action_success = 1.0 if observation.status == ActionStatus.SUCCESS else 0.0
-            self.pattern_library[pattern_key].append((action.name, action_success))
+            self.record_pattern(pattern_key, action.name, action_success, now)
 
         logger.info("Learned from episode: %s (success: %s)", strategy_key, final_success)
 
+    def record_strategy(self, strategy: str, score: float, now: Optional[float] = None) -> None:
+        """Fold one episode outcome into a strategy's running statistics."""
+        stat = self.strategy_performance.get(strategy)
+        if stat is None:
+            stat = self.strategy_performance[strategy] = RunningStat()
+        stat.update(
+            score, self.ewma_alpha, time.time() if now is None else now, self.decay_half_life
+        )
+        self.total_episodes += 1
+        self._push_strategy(strategy, stat)
+
+    def record_pattern(
+        self, pattern_key: str, action_name: str, score: float, now: Optional[float] = None
+    ) -> None:
+        """Fold one action outcome into the pattern library."""
+        actions = self.pattern_library.setdefault(pattern_key, {})
+        stat = actions.get(action_name)
+        if stat is None:
+            stat = actions[action_name] = RunningStat()
+        stat.update(
+            score, self.ewma_alpha, time.time() if now is None else now, self.decay_half_life
+        )
+
+    def _push_strategy(self, strategy: str, stat: RunningStat) -> None:
+        version = self._strategy_versions.get(strategy, 0) + 1
+        self._strategy_versions[strategy] = version
+        order = self._strategy_order.setdefault(strategy, len(self._strategy_order))
+        if stat.count >= self.MIN_STRATEGY_EPISODES:
+            heapq.heappush(self._strategy_heap, (-stat.mean, order, version, strategy))
+
+        # Drop superseded entries once they dominate the heap
+        if len(self._strategy_heap) > 2 * len(self.strategy_performance) + 16:
+            self._rebuild_strategy_heap()
+
+    def _rebuild_strategy_heap(self) -> None:
+        self._strategy_heap = [
+            (-stat.mean, self._strategy_order[name], self._strategy_versions[name], name)
+            for name, stat in self.strategy_performance.items()
+            if stat.count >= self.MIN_STRATEGY_EPISODES
+        ]
+        heapq.heapify(self._strategy_heap)
+
     def _identify_strategy(self, actions: List[Action]) -> str:
         """Identify strategy from action sequence."""
         return "->".join([action.name for action in actions])
 
     def get_best_strategy(self, goal_type: str) -> Optional[str]:
         """Get the best performing strategy for a goal type."""
-        best_strategy: Optional[str] = None
-        best_score = 0.0
-
-        for strategy, scores in self.strategy_performance.items():
-            if len(scores) >= 2:
-                avg_score = sum(scores) / len(scores)
-                if avg_score > best_score:
-                    best_score = avg_score
-                    best_strategy = strategy
-
-        return best_strategy
+        heap = self._strategy_heap
+        while heap:
+            neg_mean, _, version, strategy = heap[0]
+            if self._strategy_versions.get(strategy) == version:
+                return strategy if -neg_mean > 0.0 else None
+            heapq.heappop(heap)
+        return None
 
     def suggest_improvements(self, goal: Goal, current_plan: Plan) -> List[str]:
         """Suggest improvements based on learned patterns."""
@@ -60,20 +167,20 @@ class LearningSystem:
 
         for action in current_plan.actions:
             pattern_key = f"{goal.description[:30]}:{action.tool_name}"
-            patterns = self.pattern_library.get(pattern_key, [])
+            patterns = self.pattern_library.get(pattern_key)
 
             if patterns:
-                best_action = max(patterns, key=lambda pair: pair[1])
-                if best_action[0] != action.name and best_action[1] > 0.7:
+                best_name, best_stat = max(patterns.items(), key=lambda pair: pair[1].mean)
+                if best_name != action.name and best_stat.mean > 0.7:
                     suggestions.append(
-                        f"Consider using '{best_action[0]}' instead of '{action.name}' "
-                        f"(historical success: {best_action[1]:.1%})"
+                        f"Consider using '{best_name}' instead of '{action.name}' "
+                        f"(historical success: {best_stat.mean:.1%})"
                     )
 
         strategy_key = self._identify_strategy(current_plan.actions)
-        if strategy_key in self.strategy_performance:
-            scores = self.strategy_performance[strategy_key]
-            avg_score = sum(scores) / len(scores)
+        stat = self.strategy_performance.get(strategy_key)
+        if stat is not None and stat.count:
+            avg_score = stat.mean
             if avg_score < 0.5:
                 suggestions.append(
                     f"This strategy has low success rate ({avg_score:.1%}), consider alternative approach"
@@ -86,10 +193,49 @@ class LearningSystem:
         return {
             "strategies_learned": len(self.strategy_performance),
             "patterns_learned": len(self.pattern_library),
-            "total_episodes": sum(len(scores) for scores in self.strategy_performance.values()),
+            "total_episodes": self.total_episodes,
             "best_strategies": {
-                strategy: sum(scores) / len(scores)
-                for strategy, scores in self.strategy_performance.items()
-                if len(scores) >= 2
+                strategy: stat.mean
+                for strategy, stat in self.strategy_performance.items()
+                if stat.count >= self.MIN_STRATEGY_EPISODES
+            },
+        }
+
+    def to_state(self) -> Dict[str, Any]:
+        """Compact, JSON-serializable form used for persistence."""
+        return {
+            "strategy_performance": {
+                strategy: stat.to_dict() for strategy, stat in self.strategy_performance.items()
             },
+            "pattern_library": {
+                key: {name: stat.to_dict() for name, stat in actions.items()}
+                for key, actions in self.pattern_library.items()
+            },
+            "total_episodes": self.total_episodes,
         }
+
+    def load_state(self, data: Dict[str, Any]) -> None:
+        """Merge persisted state, accepting the legacy per-episode list format."""
+        alpha = self.ewma_alpha
+        for strategy, payload in (data.get("strategy_performance") or {}).items():
+            self.strategy_performance[strategy] = RunningStat.from_payload(payload, alpha)
+
+        for key, payload in (data.get("pattern_library") or {}).items():
+            if isinstance(payload, dict):
+                self.pattern_library[key] = {
+                    name: RunningStat.from_payload(stat, alpha) for name, stat in payload.items()
+                }
+                continue
+
+            # Legacy format: list of (action_name, score) pairs
+            actions = self.pattern_library.setdefault(key, {})
+            for action_name, score in payload or []:
+                actions.setdefault(action_name, RunningStat()).update(float(score), alpha, 0.0)
+
+        self.total_episodes = int(
+            data.get("total_episodes")
+            or sum(stat.count for stat in self.strategy_performance.values())
+        )
+        self._strategy_versions = {name: 1 for name in self.strategy_performance}
+        self._strategy_order = {name: i for i, name in enumerate(self.strategy_performance)}
+        self._rebuild_strategy_heap()
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
 from .models import Action, Goal, Memory, Observation
 
@@ -13,10 +13,86 @@ class MemorySystem:
 
     def __init__(self, working_memory_size: int = 10) -> None:
         self.working_memory: List[Memory] = []
-        self.episodic_memory: List[Memory] = []
+        self._episodic_memory: List[Memory] = []
+        self._episodic_loader: Optional[Callable[[], Iterable[Memory]]] = None
+        self._deferred_count = 0
+        # Memory id -> type it was last persisted as, so saves skip unchanged memories
+        self._saved_types: Dict[str, str] = {}
         self.working_memory_size = working_memory_size
         self.memory_counter = 0
 
+    @property
+    def episodic_memory(self) -> List[Memory]:
+        """Episodic memories, hydrating any deferred history on first access."""
+        self._ensure_episodic_loaded()
+        return self._episodic_memory
+
+    @episodic_memory.setter
+    def episodic_memory(self, memories: List[Memory]) -> None:
+        self._episodic_memory = memories
+        self._episodic_loader = None
+        self._deferred_count = 0
+
+    @property
+    def loaded_episodic_memory(self) -> List[Memory]:
+        """Episodic memories currently resident, without triggering a deferred load."""
+        return self._episodic_memory
+
+    @property
+    def episodic_memory_loaded(self) -> bool:
+        return self._episodic_loader is None
+
+    @property
+    def episodic_memory_count(self) -> int:
+        """Number of episodic memories, counting deferred ones without loading them."""
+        return len(self._episodic_memory) + self._deferred_count
+
+    def defer_episodic_memory(self, loader: Callable[[], Iterable[Memory]], count: int = 0) -> None:
+        """Register a loader for older episodic memories, run on first recall.
+
+        The loader must yield memories oldest first; they are placed before any
+        memories already resident so the list stays in chronological order.
+        ``count`` is how many memories it will yield, for statistics.
+        """
+        self._episodic_loader = loader
+        self._deferred_count = count
+
+    def _ensure_episodic_loaded(self) -> None:
+        loader = self._episodic_loader
+        if loader is None:
+            return
+        self._episodic_loader = None
+        self._deferred_count = 0
+
+        resident_ids = {memory.id for memory in self._episodic_memory}
+        older = [memory for memory in loader() if memory.id not in resident_ids]
+        if older:
+            self._episodic_memory[:0] = older
+            self.mark_saved((memory.id, "episodic") for memory in older)
+        logger.debug("Hydrated %s deferred episodic memories", len(older))
+
+    def unsaved_memories(self) -> List[Tuple[Memory, str]]:
+        """Resident memories, with their type, not yet persisted as that type.
+
+        Deferred history is never loaded: it came from storage and is unchanged.
+        """
+        saved = self._saved_types
+        pending = [
+            (memory, "episodic")
+            for memory in self._episodic_memory
+            if saved.get(memory.id) != "episodic"
+        ]
+        pending.extend(
+            (memory, "working")
+            for memory in self.working_memory
+            if saved.get(memory.id) != "working"
+        )
+        return pending
+
+    def mark_saved(self, saved: Iterable[Tuple[str, str]]) -> None:
+        """Record that memories (by id) were persisted with the given type."""
+        self._saved_types.update(saved)
+
     def store_memory(
         self,
         goal_id: str,
@@ -40,8 +116,8 @@ class MemorySystem:
         self.working_memory.append(memory)
 
         if len(self.working_memory) > self.working_memory_size:
-            excess = self.working_memory[self.working_memory_size :]
-            self.episodic_memory.extend(excess)
+            excess = self.working_memory[: -self.working_memory_size]
+            self._episodic_memory.extend(excess)
             self.working_memory = self.working_memory[-self.working_memory_size :]
 
         logger.debug("Stored memory: %s", memory.id)
@@ -86,18 +162,18 @@ class MemorySystem:
 
     def clear_working_memory(self) -> None:
         """Clear working memory (move all to episodic)."""
-        self.episodic_memory.extend(self.working_memory)
+        self._episodic_memory.extend(self.working_memory)
         self.working_memory.clear()
 
     def get_memory_stats(self) -> Dict[str, Any]:
         """Get memory system statistics."""
+        resident = self._episodic_memory
         return {
             "working_memory_size": len(self.working_memory),
-            "episodic_memory_size": len(self.episodic_memory),
+            "episodic_memory_size": self.episodic_memory_count,
             "total_memories": self.memory_counter,
+            # Averaged over resident memories; deferred history stays in storage
             "avg_success_score": (
-                sum(mem.success_score for mem in self.episodic_memory) / len(self.episodic_memory)
-                if self.episodic_memory
-                else 0.0
+                sum(mem.success_score for mem in resident) / len(resident) if resident else 0.0
             ),
         }
@@ -15,6 +15,7 @@ from typing import Any, Dict, List
 
 import psutil
 
+from .streaming_stats import WindowedStats
 from .unified_config import unified_config
 
 logger = logging.getLogger(__name__)
@@ -289,6 +290,10 @@ class ResponseTimeOptimizer:
     def __init__(self) -> None:
         self.response_times: deque[dict[str, Any]] = deque(maxlen=1000)
         self.slow_operations: list[dict[str, Any]] = []
+        # Streaming duration sketches (10-second buckets over the last hour)
+        self.durations = WindowedStats(bucket_seconds=10, bucket_count=360)
+        self.total_operations = 0
+        self.successful_operations = 0
 
     def record_operation(self, operation_name: str, duration: float, success: bool = True) -> None:
         """Record operation response time."""
@@ -300,6 +305,10 @@ class ResponseTimeOptimizer:
                 "success": success,
             }
         )
+        self.durations.add(duration)
+        self.total_operations += 1
+        if success:
+            self.successful_operations += 1
 
         # Track slow operations
         if duration > 1.0:  # Operations taking more than 1 second
@@ -309,22 +318,23 @@ class ResponseTimeOptimizer:
 
     def get_performance_report(self) -> Dict[str, Any]:
         """Get performance report."""
-        if not self.response_times:
+        if not self.total_operations:
             return {"error": "No response time data available"}
 
-        # Calculate statistics
-        durations = [op["duration"] for op in self.response_times]
-        successful_ops = [op for op in self.response_times if op["success"]]
+        # Duration statistics cover the last hour
+        summary = self.durations.summary()
 
         return {
-            "total_operations": len(self.response_times),
-            "successful_operations": len(successful_ops),
-            "success_rate": (
-                len(successful_ops) / len(self.response_times) if self.response_times else 0
-            ),
-            "avg_response_time": sum(durations) / len(durations),
-            "max_response_time": max(durations),
-            "min_response_time": min(durations),
+            "total_operations": self.total_operations,
+            "successful_operations": self.successful_operations,
+            "success_rate": self.successful_operations / self.total_operations,
+            "avg_response_time": summary.get("mean", 0.0),
+            "max_response_time": summary.get("max", 0.0),
+            "min_response_time": summary.get("min", 0.0),
+            "p50_response_time": summary.get("p50", 0.0),
+            "p95_response_time": summary.get("p95", 0.0),
+            "p99_response_time": summary.get("p99", 0.0),
+            "operations_per_minute": self.durations.rate(60) * 60,
             "slow_operations_count": len(self.slow_operations),
             "slowest_operations": sorted(
                 self.slow_operations, key=lambda x: x["duration"], reverse=True
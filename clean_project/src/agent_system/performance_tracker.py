@@ -11,8 +11,10 @@ import statistics
 import time
 from collections import defaultdict, deque
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from .streaming_stats import WindowedStats
 
 logger = logging.getLogger(__name__)
 
@@ -52,11 +54,16 @@ class PerformanceTracker:
     - User satisfaction
     """
 
-    def __init__(self, max_history: int = 1000):
+    def __init__(self, max_history: int = 1000, clock: Callable[[], float] = time.monotonic):
         self.max_history = max_history
         self.metrics_history: Dict[str, deque[PerformanceMetric]] = defaultdict(
             lambda: deque(maxlen=max_history)
         )
+        # Streaming sketches (5-minute buckets over the last day) for trend analysis
+        self._clock = clock
+        self.metric_windows: Dict[str, WindowedStats] = defaultdict(
+            lambda: WindowedStats(bucket_seconds=300, bucket_count=288, clock=self._clock)
+        )
         self.snapshots: List[PerformanceSnapshot] = []
         self.current_metrics: Dict[str, List[float]] = {}
         self.start_time = datetime.now()
@@ -204,21 +211,17 @@ class PerformanceTracker:
             return {"error": f"No data for metric {metric_name}"}
 
         # Filter by time window
-        cutoff_time = datetime.now() - timedelta(hours=hours)
-        recent_values = [m for m in values if m.timestamp >= cutoff_time]
+        window = self.metric_windows[metric_name]
+        summary = window.summary(hours * 3600)
 
-        if not recent_values:
+        if not summary["count"]:
             return {"error": f"No recent data for metric {metric_name}"}
 
         # Calculate trend
-        recent_metric_values = [m.value for m in recent_values]
-        if len(recent_metric_values) >= 2:
+        halves = window.halves(hours * 3600)
+        if halves is not None:
             # Simple linear trend
-            first_half = recent_metric_values[: len(recent_metric_values) // 2]
-            second_half = recent_metric_values[len(recent_metric_values) // 2 :]
-
-            first_avg = statistics.mean(first_half) if first_half else 0
-            second_avg = statistics.mean(second_half) if second_half else 0
+            first_avg, second_avg = halves
 
             if first_avg > 0:
                 trend_percent = ((second_avg - first_avg) / first_avg) * 100
@@ -235,13 +238,16 @@ class PerformanceTracker:
         return {
             "metric": metric_name,
             "time_window_hours": hours,
-            "data_points": len(recent_values),
+            "data_points": summary["count"],
             "trend_percent": trend_percent,
             "trend_direction": trend_direction,
-            "current_value": recent_metric_values[-1] if recent_metric_values else None,
-            "average": statistics.mean(recent_metric_values),
-            "min": min(recent_metric_values),
-            "max": max(recent_metric_values),
+            "current_value": values[-1].value,
+            "average": summary["mean"],
+            "min": summary["min"],
+            "max": summary["max"],
+            "p50": summary["p50"],
+            "p95": summary["p95"],
+            "p99": summary["p99"],
         }
 
     def get_performance_health_score(self) -> Dict[str, Any]:
@@ -343,6 +349,7 @@ class PerformanceTracker:
             name=name, value=value, timestamp=datetime.now(), context=context, unit=unit
         )
         self.metrics_history[name].append(metric)
+        self.metric_windows[name].add(value)
 
     def _get_latest_value(self, metric_name: str) -> Optional[float]:
         """Get the latest value for a metric."""
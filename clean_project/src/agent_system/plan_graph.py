@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import Dict, Iterable, List, Sequence, Set
+
+from .models import Action
+
+
+class PlanGraph:
+    """Prerequisite DAG over a plan's actions.
+
+    Prerequisites naming actions outside the plan cannot be satisfied by it and are
+    ignored. If a dependency cycle leaves nothing ready, the earliest pending action
+    in plan order is released so execution never stalls.
+    """
+
+    def __init__(self, actions: Sequence[Action]) -> None:
+        self.actions: Dict[str, Action] = {action.id: action for action in actions}
+        self.order: List[str] = list(self.actions)
+        self.dependencies: Dict[str, Set[str]] = {
+            action_id: {
+                prereq
+                for prereq in action.prerequisites
+                if prereq in self.actions and prereq != action_id
+            }
+            for action_id, action in self.actions.items()
+        }
+        self.dependents: Dict[str, List[str]] = {action_id: [] for action_id in self.order}
+        for action_id in self.order:
+            for prereq in self.dependencies[action_id]:
+                self.dependents[prereq].append(action_id)
+
+        self.critical_path_length, self.critical_path_cost = self._critical_path()
+
+    def ready(self, completed: Iterable[str]) -> List[Action]:
+        """Pending actions whose prerequisites have all completed, in plan order."""
+        done = set(completed)
+        pending = [action_id for action_id in self.order if action_id not in done]
+        ready = [action_id for action_id in pending if self.dependencies[action_id] <= done]
+        if not ready and pending:
+            ready = pending[:1]
+        return [self.actions[action_id] for action_id in ready]
+
+    @property
+    def parallelism(self) -> float:
+        """Average number of actions that can run per critical-path step."""
+        if not self.critical_path_length:
+            return 0.0
+        return len(self.actions) / self.critical_path_length
+
+    def _critical_path(self) -> tuple[int, float]:
+        """Longest dependency chain, by action count and by summed cost (Kahn's order)."""
+        indegree = {action_id: len(deps) for action_id, deps in self.dependencies.items()}
+        queue = deque(action_id for action_id in self.order if not indegree[action_id])
+        depth: Dict[str, int] = {}
+        cost: Dict[str, float] = {}
+
+        while queue:
+            action_id = queue.popleft()
+            deps = self.dependencies[action_id]
+            depth[action_id] = 1 + max((depth[d] for d in deps), default=0)
+            cost[action_id] = self.actions[action_id].cost + max(
+                (cost[d] for d in deps), default=0.0
+            )
+            for dependent in self.dependents[action_id]:
+                indegree[dependent] -= 1
+                if not indegree[dependent]:
+                    queue.append(dependent)
+
+        length = max(depth.values(), default=0)
+        total_cost = max(cost.values(), default=0.0)
+
+        # Actions caught in a cycle are released one at a time, i.e. serially
+        stuck = [action_id for action_id in self.order if action_id not in depth]
+        if stuck:
+            length += len(stuck)
+            total_cost += sum(self.actions[action_id].cost for action_id in stuck)
+        return length, total_cost
@@ -11,12 +11,13 @@ import time
 from collections import defaultdict, deque
 from contextlib import contextmanager
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
 
 import psutil
 
 from .exceptions import MonitoringError
+from .streaming_stats import WindowedStats
 
 logger = logging.getLogger(__name__)
 
@@ -70,8 +71,13 @@ class ProductionMonitoring:
     - Automated performance recommendations
     """
     
-    def __init__(self) -> None:
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
         self.metrics: Dict[str, Deque[MetricPoint]] = defaultdict(lambda: deque(maxlen=1000))
+        # Streaming sketches (5-second buckets over the last hour) for percentiles and rates
+        self._clock = clock
+        self.metric_windows: Dict[str, WindowedStats] = defaultdict(
+            lambda: WindowedStats(bucket_seconds=5, bucket_count=720, clock=self._clock)
+        )
         self.alert_rules: List[AlertRule] = []
         self.thresholds = PerformanceThreshold()
         self.start_time = datetime.now()
@@ -109,6 +115,7 @@ class ProductionMonitoring:
                 metadata=metadata or {}
             )
             self.metrics[name].append(metric_point)
+            self.metric_windows[name].add(value)
             
             # Check alert rules
             self._check_alerts(name, value)
@@ -246,7 +253,9 @@ class ProductionMonitoring:
             
             # Calculate derived metrics
             metrics["error_rate"] = self._calculate_error_rate()
+            metrics["response_time_p50"] = self._calculate_percentile("request_duration", 0.50)
             metrics["response_time_p95"] = self._calculate_percentile("request_duration", 0.95)
+            metrics["response_time_p99"] = self._calculate_percentile("request_duration", 0.99)
             metrics["throughput"] = self._calculate_throughput()
             
             return metrics
@@ -275,15 +284,13 @@ class ProductionMonitoring:
             return 0.0
     
     def _calculate_percentile(self, metric_name: str, percentile: float) -> float:
-        """Calculate percentile for a metric."""
+        """Calculate percentile for a metric over the last hour."""
         try:
-            points: List[MetricPoint] = list(self.metrics.get(metric_name, []))
-            if not points:
+            window = self.metric_windows.get(metric_name)
+            if window is None:
                 return 0.0
             
-            values = sorted([p.value for p in points])
-            index = int(percentile * len(values))
-            return values[min(index, len(values) - 1)]
+            return window.quantile(percentile)
             
         except Exception as e:
             logger.error(f"Error calculating percentile for {metric_name}: {e}")
@@ -292,15 +299,11 @@ class ProductionMonitoring:
     def _calculate_throughput(self) -> float:
         """Calculate current throughput (requests per minute)."""
         try:
-            now = datetime.now()
-            minute_ago = now - timedelta(minutes=1)
-            
-            recent_requests = [
-                p for p in self.metrics.get("request_count", [])
-                if p.timestamp >= minute_ago
-            ]
+            window = self.metric_windows.get("request_count")
+            if window is None:
+                return 0.0
             
-            return sum(p.value for p in recent_requests)
+            return window.total(60)
             
         except Exception as e:
             logger.error(f"Error calculating throughput: {e}")
@@ -5,24 +5,33 @@ Real web search tool implementation.
 from __future__ import annotations
 
 import ast
-import csv
 import json
 import logging
 import os
 import re
 import shutil
+import stat
 import subprocess
 import sys
 import tempfile
+import threading
 import time
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlsplit
 
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
 from .config_simple import get_api_key, settings, validate_file_path
+from .file_scan import ascii_compatible, grep, mapped, profile_csv, read_range, read_tail, sample
+from .file_scan import decode as decode_slice
+from .file_write import append as append_chunks
+from .file_write import json_chunks, write_atomic
 from .models import ActionStatus
 from .unified_config import unified_config
 
@@ -35,12 +44,153 @@ except Exception:  # Optional dependency; fallback parser will be used
 logger = logging.getLogger(__name__)
 
 
+class SearchResultCache:
+    """LRU cache of search responses with a TTL and an optional JSON file behind it.
+
+    Entries carry a wall-clock expiry so a persisted cache stays valid across
+    processes. The file is rewritten atomically on every insert; search responses
+    are small and infrequent compared to the provider round trip they save.
+    """
+
+    def __init__(
+        self, capacity: int = 128, ttl_seconds: float = 3600.0, path: Optional[str] = None
+    ) -> None:
+        self.capacity = max(0, int(capacity))
+        self.ttl_seconds = float(ttl_seconds)
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        if path:
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.time():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, value: Any) -> None:
+        if not self.capacity or self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+            if self.path:
+                self._save_locked()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            if self.path:
+                self._save_locked()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "capacity": self.capacity,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "path": self.path,
+        }
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable search cache %s: %s", self.path, e)
+            return
+        now = time.time()
+        live = [
+            (key, (entry["expires"], entry["value"]))
+            for key, entry in stored.get("entries", [])
+            if entry.get("expires", 0) > now
+        ]
+        # Stored oldest first, so the most recently used entries survive a smaller capacity
+        for key, entry in live[-self.capacity :] if self.capacity else []:
+            self._entries[key] = entry
+
+    def _save_locked(self) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        entries = [
+            [key, {"expires": expires, "value": value}]
+            for key, (expires, value) in self._entries.items()
+        ]
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(prefix=".search-cache.", dir=directory)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump({"version": 1, "entries": entries}, f, default=str)
+                os.replace(tmp, self.path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        except OSError as e:
+            logger.warning("Failed to persist search cache %s: %s", self.path, e)
+
+
 class RealWebSearchTool:
     """Real web search tool using various search APIs."""
 
-    def __init__(self) -> None:
+    idempotent = True
+    cache_ttl_seconds = 300.0
+
+    ENDPOINTS = {
+        "serpapi": "https://serpapi.com/search.json",
+        "bing": "https://api.bing.microsoft.com/v7.0/search",
+        "google": "https://www.googleapis.com/customsearch/v1",
+        "duckduckgo": "https://api.duckduckgo.com/",
+    }
+
+    def __init__(
+        self,
+        endpoints: Optional[Dict[str, str]] = None,
+        cache: Optional[SearchResultCache] = None,
+        hedge_after: Optional[float] = None,
+        fetch_concurrency: Optional[int] = None,
+        per_host_limit: Optional[int] = None,
+    ) -> None:
+        self.endpoints = {**self.ENDPOINTS, **(endpoints or {})}
+        self.hedge_after = float(
+            settings.WEB_SEARCH_HEDGE_AFTER if hedge_after is None else hedge_after
+        )
+        self.fetch_concurrency = max(
+            1, int(settings.WEB_FETCH_CONCURRENCY if fetch_concurrency is None else fetch_concurrency)
+        )
+        self.per_host_limit = max(
+            1, int(settings.WEB_FETCH_PER_HOST if per_host_limit is None else per_host_limit)
+        )
         self.session = self._create_session()
-        self.cache: Dict[str, Any] = {}  # Simple in-memory cache
+        self.cache = cache if cache is not None else SearchResultCache(
+            capacity=settings.WEB_SEARCH_CACHE_SIZE,
+            ttl_seconds=settings.WEB_SEARCH_CACHE_TTL,
+            path=settings.WEB_SEARCH_CACHE_PATH,
+        )
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
 
     def _create_session(self) -> requests.Session:
         """Create a requests session with retries and timeouts."""
@@ -54,7 +204,10 @@ class RealWebSearchTool:
             allowed_methods=["GET", "POST"],
         )
 
-        adapter = HTTPAdapter(max_retries=retry_strategy)
+        # Keep enough pooled connections per host for the concurrent page fetches
+        adapter = HTTPAdapter(
+            max_retries=retry_strategy, pool_maxsize=max(10, self.fetch_concurrency)
+        )
         session.mount("http://", adapter)
         session.mount("https://", adapter)
 
@@ -92,9 +245,11 @@ class RealWebSearchTool:
 
         # Check cache first
         cache_key = f"{query}_{search_type}_{max_results}_{int(fetch)}_{fetch_limit}"
-        if cache_key in self.cache:
+        cached = self.cache.get(cache_key)
+        self._report_cache_metrics()
+        if cached is not None:
             logger.info("Returning cached search results for query: %s", query)
-            return ActionStatus.SUCCESS, self.cache[cache_key]
+            return ActionStatus.SUCCESS, cached
 
         # Try different search APIs in configured order, skipping disabled providers
         disabled = set(unified_config.api.disabled_search_providers or [])
@@ -104,45 +259,135 @@ class RealWebSearchTool:
             if p in ("serpapi", "bing", "google") and p not in disabled
         ]
 
-        first_success = None
+        result = self._first_success(self._provider_calls(order, query, max_results))
+
+        if result and fetch and result.get("results"):
+            result = {**result, "results": self._fetch_results(result["results"], fetch_limit)}
+
+        if result:
+            self.cache.put(cache_key, result)
+            return ActionStatus.SUCCESS, result
+
+        return ActionStatus.FAILURE, {
+            "error": "Search provider call failed or unsupported",
+            "remediation": "Ensure a supported provider (SERPAPI/BING/GOOGLE+CSE) is configured",
+        }
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
+
+    def clear_cache(self) -> None:
+        self.cache.clear()
+
+    def _report_cache_metrics(self) -> None:
+        try:
+            from .ai_performance_monitor import ai_performance_monitor
+
+            ai_performance_monitor.record_cache_metrics(
+                "web_search", self.cache.hits, self.cache.misses
+            )
+        except Exception as e:  # pragma: no cover - monitoring must never break searches
+            logger.debug(f"Failed to report web search cache metrics: {e}")
+
+    def _provider_calls(
+        self, order: List[str], query: str, max_results: int
+    ) -> List[Callable[[], Optional[Dict[str, Any]]]]:
+        """Build one deferred call per usable provider, in preference order."""
+        calls: List[Callable[[], Optional[Dict[str, Any]]]] = []
         for provider in order:
-            candidate = None
             if provider == "serpapi" and get_api_key("serpapi"):
-                candidate = self._try_serpapi_search(query, max_results)
+                calls.append(lambda: self._try_serpapi_search(query, max_results))
             elif provider == "bing" and get_api_key("bing"):
-                candidate = self._try_bing_search(query, max_results)
+                calls.append(lambda: self._try_bing_search(query, max_results))
             elif provider == "google" and get_api_key("google"):
                 cx = os.getenv("GOOGLE_CSE_ID") or os.getenv("GOOGLE_SEARCH_CX")
                 if cx:
-                    candidate = self._try_google_cse_search(query, max_results, cx)
+                    calls.append(lambda cx=cx: self._try_google_cse_search(query, max_results, cx))
                 else:
                     logger.warning("GOOGLE_SEARCH_KEY present but GOOGLE_CSE_ID/GOOGLE_SEARCH_CX not set")
-            if candidate and first_success is None:
-                first_success = candidate
+        return calls
 
-        result = first_success
+    @staticmethod
+    def _call_provider(call: Callable[[], Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        try:
+            return call()
+        except Exception as e:
+            logger.warning("Search provider raised: %s", e)
+            return None
 
-        if result and fetch and result.get("results"):
-            enriched = []
-            for i, item in enumerate(result["results"][:fetch_limit]):
-                url = item.get("link") or item.get("FirstURL")
-                if not url:
-                    enriched.append(item)
-                    continue
-                page = self._fetch_page(url)
-                if page:
-                    item = {**item, **page}
-                enriched.append(item)
-            result = {**result, "results": enriched}
+    def _first_success(
+        self, calls: List[Callable[[], Optional[Dict[str, Any]]]]
+    ) -> Optional[Dict[str, Any]]:
+        """Return the first provider response with results, calling later providers only as needed.
 
-        if result:
-            self.cache[cache_key] = result
-            return ActionStatus.SUCCESS, result
+        Without hedging, providers are tried strictly in order. With ``hedge_after``
+        set, a provider that has not answered within that budget gets the next one
+        started alongside it and whichever succeeds first wins. A request that loses
+        the race cannot be aborted mid-flight; its response is simply discarded.
+        """
+        if self.hedge_after <= 0 or len(calls) < 2:
+            for call in calls:
+                result = self._call_provider(call)
+                if result:
+                    return result
+            return None
 
-        return ActionStatus.FAILURE, {
-            "error": "Search provider call failed or unsupported",
-            "remediation": "Ensure a supported provider (SERPAPI/BING/GOOGLE+CSE) is configured",
-        }
+        remaining = list(calls)
+        pending: set[Future] = set()
+        while remaining or pending:
+            if remaining and not pending:
+                pending.add(self._pool().submit(self._call_provider, remaining.pop(0)))
+            done, pending = wait(
+                pending, timeout=self.hedge_after if remaining else None, return_when=FIRST_COMPLETED
+            )
+            for future in done:
+                result = future.result()
+                if result:
+                    for other in pending:
+                        other.cancel()
+                    return result
+            if not done and remaining:
+                logger.info("Search provider slower than %.2fs; hedging", self.hedge_after)
+                pending.add(self._pool().submit(self._call_provider, remaining.pop(0)))
+        return None
+
+    def _fetch_results(self, items: List[Dict[str, Any]], fetch_limit: int) -> List[Dict[str, Any]]:
+        """Enrich the first ``fetch_limit`` results with their page content, fetched concurrently."""
+        enriched = list(items[:fetch_limit])
+        futures = {}
+        for i, item in enumerate(enriched):
+            url = item.get("link") or item.get("FirstURL")
+            if url:
+                futures[i] = self._pool().submit(self._fetch_page, url)
+        for i, future in futures.items():
+            page = future.result()
+            if page:
+                enriched[i] = {**enriched[i], **page}
+        return enriched
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.fetch_concurrency, thread_name_prefix="web_search"
+                )
+            return self._executor
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = self._host_slots[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return slot
+
+    def close(self) -> None:
+        """Stop the fetch pool and release pooled connections."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
 
     def _try_serpapi_search(self, query: str, max_results: int) -> Optional[Dict[str, Any]]:
         """Try search using SerpAPI."""
@@ -154,7 +399,7 @@ class RealWebSearchTool:
             params: Dict[str, Any] = {"engine": "google", "q": query, "num": max_results, "api_key": api_key}
 
             response = self.session.get(
-                "https://serpapi.com/search.json", params=params, timeout=settings.TOOL_TIMEOUT
+                self.endpoints["serpapi"], params=params, timeout=settings.TOOL_TIMEOUT
             )
             response.raise_for_status()
 
@@ -193,7 +438,7 @@ class RealWebSearchTool:
             params: Dict[str, Any] = {"q": query, "format": "json", "no_html": "1", "skip_disambig": "1"}
 
             response = self.session.get(
-                "https://api.duckduckgo.com/", params=params, timeout=settings.TOOL_TIMEOUT
+                self.endpoints["duckduckgo"], params=params, timeout=settings.TOOL_TIMEOUT
             )
             response.raise_for_status()
 
@@ -252,7 +497,7 @@ class RealWebSearchTool:
             headers = {"Ocp-Apim-Subscription-Key": api_key}
             params: Dict[str, Any] = {"q": query, "count": max_results}
             resp = self.session.get(
-                "https://api.bing.microsoft.com/v7.0/search",
+                self.endpoints["bing"],
                 headers=headers,
                 params=params,
                 timeout=settings.TOOL_TIMEOUT,
@@ -293,7 +538,7 @@ class RealWebSearchTool:
         try:
             params: Dict[str, Any] = {"key": api_key, "cx": cx, "q": query, "num": min(max_results, 10)}
             resp = self.session.get(
-                "https://www.googleapis.com/customsearch/v1",
+                self.endpoints["google"],
                 params=params,
                 timeout=settings.TOOL_TIMEOUT,
             )
@@ -326,9 +571,10 @@ class RealWebSearchTool:
     def _fetch_page(self, url: str) -> Optional[Dict[str, Any]]:
         """Fetch a web page and extract text summary and metadata."""
         try:
-            resp = self.session.get(url, timeout=min(settings.TOOL_TIMEOUT, 15))
-            resp.raise_for_status()
-            html = resp.text
+            with self._host_slot(url):
+                resp = self.session.get(url, timeout=min(settings.TOOL_TIMEOUT, 15))
+                resp.raise_for_status()
+                html = resp.text
             title = ""
             text = ""
             if BeautifulSoupClass is not None:
@@ -503,6 +749,9 @@ class RealCodeExecutorTool:
                 "security_violation": True,
             }
 
+        if not self._docker_available() and self._pool_enabled():
+            return self._execute_python_pooled(code, timeout)
+
         # Create temporary file for execution
         with tempfile.NamedTemporaryFile(mode="w", suffix=".py", delete=False) as f:
             f.write(code)
@@ -588,6 +837,44 @@ class RealCodeExecutorTool:
             except Exception:
                 pass
 
+    @staticmethod
+    def _pool_enabled() -> bool:
+        return os.name == "posix" and int(getattr(settings, "CODE_EXECUTOR_POOL_SIZE", 0)) > 0
+
+    def _execute_python_pooled(self, code: str, timeout: int) -> tuple[ActionStatus, Any]:
+        """Run already-vetted code on a warm sandbox worker instead of a fresh interpreter."""
+        from .sandbox_pool import SandboxTimeout, parse_memory_limit, shared_sandbox_pool
+
+        pool = shared_sandbox_pool(
+            settings.CODE_EXECUTOR_POOL_SIZE,
+            settings.CODE_EXECUTOR_WORKER_MAX_RUNS,
+            parse_memory_limit(
+                os.getenv("MEMORY_LIMIT", getattr(settings, "MEMORY_LIMIT", "512m"))
+            ),
+        )
+        start_time = time.time()
+        try:
+            reply = pool.run(code, timeout)
+        except SandboxTimeout:
+            return ActionStatus.FAILURE, {
+                "error": f"Code execution timed out after {timeout} seconds",
+                "timeout": True,
+                "sandbox": "pool",
+            }
+        result = {
+            "output": reply["output"],
+            "error": reply["error"],
+            "return_code": reply["return_code"],
+            "execution_time": time.time() - start_time,
+            "language": "python",
+            "timeout_used": timeout,
+            "sandbox": "pool",
+            "pool_hit": reply["pool_hit"],
+        }
+        if reply.get("violation"):
+            result["resource_violation"] = reply["violation"]
+        return ActionStatus.SUCCESS, result
+
     def _execute_python_docker(self, temp_file: str, timeout: int) -> tuple[ActionStatus, Any]:
         """Execute Python code inside a Docker sandbox if available."""
         try:
@@ -746,7 +1033,17 @@ class RealCodeExecutorTool:
 
 
 class RealFileReaderTool:
-    """Real file reader tool with secure path validation and format support."""
+    """Real file reader tool with secure path validation and format support.
+
+    The default ``head`` mode parses JSON and CSV and returns the start of text
+    files; ``stats=True`` adds whole-file column statistics to a CSV read. ``range``, ``tail``, ``grep`` and ``sample`` read any file through a
+    read-only mapping, so multi-GB files can be inspected in bounded memory.
+    """
+
+    idempotent = True  # Files change between calls, so reads are deduplicated but not cached
+
+    MODES = ("head", "range", "tail", "grep", "sample")
+    MAX_JSON_PARSE_BYTES = 64 * 1024 * 1024  # Larger JSON files are returned as text
 
     @property
     def name(self) -> str:
@@ -757,17 +1054,26 @@ class RealFileReaderTool:
         fmt = (kwargs.get("format") or "auto").lower()
         encoding = kwargs.get("encoding", "utf-8")
         max_bytes = int(kwargs.get("max_bytes", 1024 * 1024))  # 1MB default
+        mode = (kwargs.get("mode") or "head").lower()
 
         if not filepath:
             return ActionStatus.FAILURE, {"error": "Filepath is required"}
+        if mode not in self.MODES:
+            return ActionStatus.FAILURE, {
+                "error": f"Unknown mode '{mode}'; expected one of {', '.join(self.MODES)}"
+            }
 
         try:
             if not validate_file_path(filepath):
                 return ActionStatus.FAILURE, {"error": "Access to this path is not allowed"}
 
-            p = Path(filepath)
-            if not p.exists() or not p.is_file():
+            try:
+                st = os.stat(filepath)
+            except (FileNotFoundError, NotADirectoryError):
+                st = None
+            if st is None or not stat.S_ISREG(st.st_mode):
                 return ActionStatus.FAILURE, {"error": f"File not found: {filepath}"}
+            p = Path(filepath)
 
             detected_fmt = fmt
             if fmt == "auto":
@@ -779,65 +1085,159 @@ class RealFileReaderTool:
 
             meta = {
                 "filepath": str(p),
-                "size": p.stat().st_size,
-                "modified": p.stat().st_mtime,
+                "size": st.st_size,
+                "modified": st.st_mtime,
                 "format": detected_fmt,
             }
 
-            if detected_fmt == "json":
+            if mode != "head":
+                return self._read_view(mode, str(p), encoding, max_bytes, kwargs, meta)
+
+            if detected_fmt == "json" and st.st_size <= self.MAX_JSON_PARSE_BYTES:
                 with p.open("r", encoding=encoding) as f:
                     data = json.load(f)
                 return ActionStatus.SUCCESS, {"content": data, **meta}
 
             if detected_fmt == "csv":
-                with p.open("r", encoding=encoding, newline="") as f:
-                    reader = csv.DictReader(f)
-                    rows = []
-                    for i, row in enumerate(reader):
-                        rows.append(row)
-                        if (i + 1) >= 2000:  # cap rows
-                            break
-                meta.update(
-                    {
-                        "rows": len(rows),
-                        "columns": list(rows[0].keys()) if rows else [],
-                    }
+                profile = profile_csv(
+                    str(p),
+                    encoding=encoding,
+                    max_rows=int(kwargs.get("max_rows", 2000)),
+                    stats=bool(kwargs.get("stats", False)),  # Scans the whole file
                 )
-                return ActionStatus.SUCCESS, {"content": rows, **meta}
+                return ActionStatus.SUCCESS, {**profile, **meta}
 
             # Fallback to text
             with p.open("rb") as fb:
                 data = fb.read(max_bytes)
-                truncated = p.stat().st_size > len(data)
+            truncated = st.st_size > len(data)
             try:
-                text = data.decode(encoding, errors="replace")
-            except Exception:
-                text = data.decode("utf-8", errors="replace")
+                text = decode_slice(data, encoding, final=not truncated)
+            except LookupError:
+                text = decode_slice(data, "utf-8", final=not truncated)
             lines = text.count("\n") + (1 if text and not text.endswith("\n") else 0)
             meta.update({"lines": lines, "truncated": truncated})
+            if detected_fmt == "json":
+                meta["parsed"] = False  # Too large to parse whole; use range/grep/tail
             return ActionStatus.SUCCESS, {"content": text, **meta}
 
         except Exception as e:
             logger.error("File read failed: %s", e)
             return ActionStatus.FAILURE, {"error": f"Read failed: {str(e)}"}
 
+    @staticmethod
+    def _read_view(
+        mode: str,
+        path: str,
+        encoding: str,
+        max_bytes: int,
+        params: Dict[str, Any],
+        meta: Dict[str, Any],
+    ) -> tuple[ActionStatus, Any]:
+        """Serve the mmap-backed modes; ``meta`` carries the already-taken stat result."""
+        if not ascii_compatible(encoding):
+            return ActionStatus.FAILURE, {
+                "error": f"Mode '{mode}' needs an ASCII-compatible encoding, not {encoding}"
+            }
+        if mode == "grep" and not params.get("pattern"):
+            return ActionStatus.FAILURE, {"error": "pattern is required for grep mode"}
+
+        def _opt_int(key: str) -> Optional[int]:
+            value = params.get(key)
+            return None if value is None else int(value)
+
+        with mapped(path) as buf:
+            if mode == "range":
+                view = read_range(
+                    buf,
+                    encoding,
+                    offset=int(params.get("offset", 0)),
+                    length=_opt_int("length"),
+                    start_line=_opt_int("start_line"),
+                    line_count=_opt_int("line_count"),
+                    max_bytes=max_bytes,
+                )
+            elif mode == "tail":
+                view = read_tail(
+                    buf, encoding, lines=int(params.get("lines", 100)), max_bytes=max_bytes
+                )
+            elif mode == "grep":
+                try:
+                    view = grep(
+                        buf,
+                        str(params["pattern"]),
+                        encoding,
+                        ignore_case=bool(params.get("ignore_case", False)),
+                        max_matches=int(params.get("max_matches", 100)),
+                        offset=int(params.get("offset", 0)),
+                        first_line=int(params.get("first_line", 1)),
+                    )
+                except re.error as e:
+                    return ActionStatus.FAILURE, {"error": f"invalid pattern: {e}"}
+            else:
+                view = sample(
+                    buf,
+                    encoding,
+                    count=int(params.get("count", 20)),
+                    seed=int(params.get("seed", 0)),
+                )
+        return ActionStatus.SUCCESS, {**view, **meta, "mode": mode}
+
 
 class RealFileWriterTool:
-    """Real file writer tool with secure path validation."""
+    """Real file writer tool with secure path validation.
+
+    ``mode="write"`` (the default) replaces the file atomically through a
+    temporary sibling; ``mode="append"`` extends it. ``content`` may be text,
+    bytes, JSON-serializable data or an iterator of text/bytes chunks, and
+    ``chunks`` takes any iterable of them; chunks are streamed to disk as they
+    arrive. JSON is indented when written and one compact line per call when
+    appended. ``fsync`` (default ``FILE_WRITE_FSYNC``) waits for the data to
+    reach the disk.
+    """
+
+    WRITE_MODES = ("write", "append")
 
     @property
     def name(self) -> str:
         return "file_writer"
 
+    def _chunks(self, content: Any, fmt: str, append: bool) -> Iterable[Any]:
+        if isinstance(content, Iterator):
+            return content
+        if fmt == "json":
+            # If content is string, try to parse; else dump as JSON
+            if isinstance(content, str):
+                try:
+                    parsed = json.loads(content)
+                except json.JSONDecodeError:
+                    parsed = {"content": content}
+            else:
+                parsed = content
+            if append:
+                return [json.dumps(parsed, ensure_ascii=False), "\n"]
+            return json_chunks(parsed, indent=2)
+        if isinstance(content, (str, bytes, bytearray)):
+            return [content]
+        return json_chunks(content)
+
     def execute(self, **kwargs: Any) -> tuple[ActionStatus, Any]:
         filepath = kwargs.get("filepath")
         content = kwargs.get("content")
+        chunks = kwargs.get("chunks")
         fmt = (kwargs.get("format") or "text").lower()
+        mode = (kwargs.get("mode") or "write").lower()
         encoding = kwargs.get("encoding", "utf-8")
         ensure_dir = bool(kwargs.get("ensure_dir", True))
+        fsync = kwargs.get("fsync")
+        fsync = settings.FILE_WRITE_FSYNC if fsync is None else bool(fsync)
 
         if not filepath:
             return ActionStatus.FAILURE, {"error": "Filepath is required"}
+        if mode not in self.WRITE_MODES:
+            return ActionStatus.FAILURE, {"error": f"Unsupported write mode: {mode}"}
+        if chunks is not None and isinstance(chunks, (str, bytes, bytearray, dict)):
+            return ActionStatus.FAILURE, {"error": "chunks must be a list or iterator of chunks"}
 
         try:
             if not validate_file_path(filepath):
@@ -847,33 +1247,18 @@ class RealFileWriterTool:
             if ensure_dir:
                 p.parent.mkdir(parents=True, exist_ok=True)
 
-            bytes_written = 0
-            if fmt == "json":
-                # If content is string, try to parse; else dump as JSON
-                if isinstance(content, str):
-                    try:
-                        parsed = json.loads(content)
-                    except json.JSONDecodeError:
-                        parsed = {"content": content}
-                else:
-                    parsed = content
-                data = json.dumps(parsed, indent=2, ensure_ascii=False)
-                with p.open("w", encoding=encoding) as f:
-                    f.write(data)
-                bytes_written = len(data.encode(encoding))
-            else:
-                text = (
-                    content if isinstance(content, str) else json.dumps(content, ensure_ascii=False)
-                )
-                with p.open("w", encoding=encoding) as f:
-                    f.write(text)
-                bytes_written = len(text.encode(encoding))
+            existed = p.exists()
+            data = chunks if chunks is not None else self._chunks(content, fmt, mode == "append")
+            write = append_chunks if mode == "append" else write_atomic
+            bytes_written = write(p, data, encoding=encoding, fsync=fsync)
 
             meta = {
                 "filepath": str(p),
                 "bytes_written": bytes_written,
                 "format": fmt,
-                "created": True,
+                "mode": mode,
+                "created": not existed,
+                "fsync": fsync,
             }
             return ActionStatus.SUCCESS, meta
 
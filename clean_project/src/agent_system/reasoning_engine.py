@@ -5,13 +5,16 @@ This implements actual intelligence, not just framework.
 
 from __future__ import annotations
 
+import copy
 import logging
 import os
 import re
+from collections import OrderedDict
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
 from .config_simple import settings
+from .embedding_service import EmbeddingService, get_embedding_service
 from .unified_config import unified_config
 
 # Initialize variables for optional imports
@@ -19,11 +22,12 @@ SENTENCE_TRANSFORMERS_AVAILABLE = False
 NUMPY_AVAILABLE = False
 
 # Try to import sentence transformers for semantic similarity
+# Only probe for the package here; the model itself is loaded lazily by the embedding service
 try:
-    from sentence_transformers import SentenceTransformer
+    import importlib.util
 
-    SENTENCE_TRANSFORMERS_AVAILABLE = True
-except ImportError:
+    SENTENCE_TRANSFORMERS_AVAILABLE = importlib.util.find_spec("sentence_transformers") is not None
+except (ImportError, ValueError):
     pass  # Keep as False
 
 # Try to import numpy for similarity calculations
@@ -68,6 +72,15 @@ class ReasoningEngine:
         self.semantic_similarity_enabled: bool = False
         self.model: Any | None = None
         self.pattern_embeddings: Dict[str, Any] = {}
+        # Unit-normalized pattern embeddings stacked row-wise, aligned with _pattern_names
+        self._pattern_names: List[str] = []
+        self._pattern_matrix: Any | None = None
+
+        # LRU of goal analyses keyed by normalized goal text
+        self._analysis_cache: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+        self._analysis_cache_size = max(0, unified_config.ai.analysis_cache_size)
+        self.analysis_cache_hits = 0
+        self.analysis_cache_misses = 0
 
         # Determine whether semantic similarity should be enabled (requires network + optional deps)
         disable_flag = os.getenv("DISABLE_SEMANTIC_SIMILARITY", "").lower() == "true"
@@ -84,42 +97,62 @@ class ReasoningEngine:
                     "Strict mode: sentence-transformers and numpy are required for semantic similarity"
                 )
 
-        # Initialize semantic similarity components
+        # The model is owned by the shared embedding service and loaded on first use;
+        # keyword fallback serves requests until it is ready.
+        self._embedding_service: EmbeddingService | None = None
+        self._setup_fallback_similarity()
         if self.semantic_similarity_enabled and SENTENCE_TRANSFORMERS_AVAILABLE and NUMPY_AVAILABLE:
+            self._embedding_service = get_embedding_service(
+                unified_config.ai.sentence_transformer_model
+            )
+            if unified_config.strict_mode:
+                self._embedding_service.load()
+                self._attach_embedding_model()
+        elif not self.semantic_similarity_enabled:
             logger.info(
-                "Loading sentence transformer model for semantic similarity (model=%s)",
-                unified_config.ai.sentence_transformer_model,
+                "Semantic similarity disabled (terminal_only=%s, disable_flag=%s). "
+                "Using fallback heuristics.",
+                getattr(settings, "TERMINAL_ONLY", False),
+                disable_flag,
             )
-            try:
-                self.model = SentenceTransformer(unified_config.ai.sentence_transformer_model)
-                self.pattern_embeddings = self._precompute_embeddings()
-            except Exception as e:
-                logger.warning(
-                    "Failed to load sentence transformer (%s). Using fallback similarity.",
-                    e,
-                )
-                if unified_config.strict_mode:
-                    raise
-                self.model = None
-                self.pattern_embeddings = {}
-                self._setup_fallback_similarity()
         else:
-            if not self.semantic_similarity_enabled:
-                logger.info(
-                    "Semantic similarity disabled (terminal_only=%s, disable_flag=%s). "
-                    "Using fallback heuristics.",
-                    getattr(settings, "TERMINAL_ONLY", False),
-                    disable_flag,
+            if unified_config.strict_mode:
+                raise RuntimeError(
+                    "Strict mode: sentence-transformers and numpy are required for semantic similarity"
                 )
-            elif not SENTENCE_TRANSFORMERS_AVAILABLE or not NUMPY_AVAILABLE:
-                if unified_config.strict_mode:
-                    raise RuntimeError(
-                        "Strict mode: sentence-transformers and numpy are required for semantic similarity"
-                    )
-                logger.warning("Sentence transformers or numpy not available, using fallback similarity")
+            logger.warning("Sentence transformers or numpy not available, using fallback similarity")
+
+    @property
+    def semantic_model_ready(self) -> bool:
+        return self.model is not None
+
+    def _ensure_semantic_model(self) -> None:
+        """Attach the embedding model once loaded, kicking off the background load if needed."""
+        service = self._embedding_service
+        if self.model is not None or service is None:
+            return
+        if service.is_ready:
+            self._attach_embedding_model()
+        elif service.load_failed:
+            logger.warning("Sentence transformer unavailable, keeping fallback similarity")
+            self._embedding_service = None
+        else:
+            service.start_loading()
+
+    def _attach_embedding_model(self) -> None:
+        try:
+            self.model = self._embedding_service
+            self.pattern_embeddings = self._precompute_embeddings()
+        except Exception as e:
+            logger.warning("Failed to encode goal patterns (%s). Using fallback similarity.", e)
+            if unified_config.strict_mode:
+                raise
             self.model = None
             self.pattern_embeddings = {}
-            self._setup_fallback_similarity()
+            self._embedding_service = None
+            return
+        # Analyses cached while the model was loading used keyword matching only
+        self.clear_analysis_cache()
 
     def _load_goal_patterns(self) -> Dict[str, Any]:
         """Load common goal patterns for intelligent decomposition."""
@@ -205,7 +238,7 @@ class ReasoningEngine:
             pattern = self.goal_patterns[best_match]
 
             # Extract specific parameters from goal
-            parameters = self._extract_parameters(goal_description, pattern)
+            parameters = self.extract_parameters(goal_description, pattern)
 
             return {
                 "pattern": best_match,
@@ -227,7 +260,7 @@ class ReasoningEngine:
             "complexity": self._assess_complexity(goal_description),
         }
 
-    def _extract_parameters(self, goal_description: str, pattern: Dict[str, Any]) -> Dict[str, Any]:
+    def extract_parameters(self, goal_description: str, pattern: Dict[str, Any]) -> Dict[str, Any]:
         """Extract specific parameters from goal description."""
         parameters = {}
 
@@ -318,7 +351,7 @@ class ReasoningEngine:
                     "name": action_name,
                     "tool_name": template["tool"],
                     "description": template["description"],
-                    "parameters": self._customize_parameters(
+                    "parameters": self.customize_parameters(
                         template["parameters"], parameters, action_name
                     ),
                     "prerequisites": [plan[-1]["id"]] if plan else [],
@@ -328,7 +361,7 @@ class ReasoningEngine:
 
         return plan
 
-    def _customize_parameters(
+    def customize_parameters(
         self, base_params: Dict[str, Any], goal_params: Dict[str, Any], action_name: str
     ) -> Dict[str, Any]:
         """Customize action parameters based on goal context."""
@@ -448,19 +481,50 @@ print(f"Statistics: {{result}}")
 
     def _precompute_embeddings(self) -> Dict[str, Any]:
         """Precompute embeddings for all goal patterns for faster similarity calculation."""
-        embeddings = {}
-
-        for pattern_name, pattern in self.goal_patterns.items():
+        names = list(self.goal_patterns.keys())
+        texts = [
             # Create a representative text for each pattern
-            pattern_text = f"{pattern_name.replace('_', ' ')} {pattern.get('description', '')} {', '.join(pattern.get('keywords', []))}"
-            if self.model:
-                embeddings[pattern_name] = self.model.encode(pattern_text)
-            else:
-                # Fallback: create mock embeddings
-                embeddings[pattern_name] = np.random.rand(384)  # Standard dimension
+            f"{name.replace('_', ' ')} {pattern.get('description', '')} {', '.join(pattern.get('keywords', []))}"
+            for name, pattern in self.goal_patterns.items()
+        ]
+        if self.model:
+            # Pattern texts are fixed, so reuse vectors persisted for this model
+            encode = getattr(self.model, "encode_cached", None) or self.model.encode
+            vectors = encode(texts)
+        else:
+            # Fallback: create mock embeddings
+            vectors = np.random.rand(len(texts), 384)  # Standard dimension
 
+        embeddings = dict(zip(names, vectors))
+        self._stack_pattern_embeddings(embeddings)
         return embeddings
 
+    def _stack_pattern_embeddings(self, embeddings: Dict[str, Any]) -> None:
+        """Stack pattern embeddings into one normalized matrix for batched scoring."""
+        self._pattern_names = list(embeddings.keys())
+        if not NUMPY_AVAILABLE or not embeddings:
+            self._pattern_matrix = None
+            return
+        matrix = np.asarray([embeddings[name] for name in self._pattern_names], dtype=float)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self._pattern_matrix = matrix / norms
+
+    def _semantic_scores(self, goal_text: str) -> Dict[str, float]:
+        """Cosine similarity of one goal against every pattern with a single encode."""
+        if not self.model or self._pattern_matrix is None:
+            return {}
+
+        goal_embedding = np.asarray(self.model.encode(goal_text), dtype=float)
+        norm = float(np.linalg.norm(goal_embedding))
+        if norm == 0:
+            return {name: 0.0 for name in self._pattern_names}
+        similarities = self._pattern_matrix @ (goal_embedding / norm)
+        return {
+            name: max(0.0, float(score))
+            for name, score in zip(self._pattern_names, similarities)
+        }
+
     def _setup_fallback_similarity(self) -> None:
         """Setup fallback similarity using TF-IDF-like approach."""
         self.pattern_keywords = {}
@@ -500,6 +564,9 @@ print(f"Statistics: {{result}}")
             return self._fallback_similarity(goal_text, pattern_name)
 
         try:
+            if self._pattern_matrix is not None:
+                return self._semantic_scores(goal_text).get(pattern_name, 0.0)
+
             # Encode the goal text
             goal_embedding = self.model.encode(goal_text)
             pattern_embedding = self.pattern_embeddings[pattern_name]
@@ -547,21 +614,73 @@ print(f"Statistics: {{result}}")
 
         return 0.0
 
+    @staticmethod
+    def _normalize_goal_text(goal_description: str) -> str:
+        return " ".join(goal_description.split())
+
     def enhanced_analyze_goal(self, goal_description: str) -> Dict[str, Any]:
-        """Enhanced goal analysis using both keyword matching and semantic similarity."""
+        """Enhanced goal analysis using both keyword matching and semantic similarity.
+
+        Results are memoized in a bounded LRU keyed by whitespace-normalized goal
+        text; callers receive a copy they are free to mutate.
+        """
+        cache_key = self._normalize_goal_text(goal_description)
+        cached = self._analysis_cache.get(cache_key)
+        if cached is not None:
+            self._analysis_cache.move_to_end(cache_key)
+            self.analysis_cache_hits += 1
+            self._report_cache_metrics()
+            return copy.deepcopy(cached)
+
+        self.analysis_cache_misses += 1
+        analysis = self._analyze_goal_uncached(goal_description)
+        if self._analysis_cache_size:
+            self._analysis_cache[cache_key] = copy.deepcopy(analysis)
+            if len(self._analysis_cache) > self._analysis_cache_size:
+                self._analysis_cache.popitem(last=False)
+        self._report_cache_metrics()
+        return analysis
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for the goal analysis cache."""
+        lookups = self.analysis_cache_hits + self.analysis_cache_misses
+        return {
+            "size": len(self._analysis_cache),
+            "capacity": self._analysis_cache_size,
+            "hits": self.analysis_cache_hits,
+            "misses": self.analysis_cache_misses,
+            "hit_rate": self.analysis_cache_hits / lookups if lookups else 0.0,
+        }
 
+    def clear_analysis_cache(self) -> None:
+        self._analysis_cache.clear()
+
+    def _report_cache_metrics(self) -> None:
+        try:
+            from .ai_performance_monitor import ai_performance_monitor
+
+            ai_performance_monitor.record_cache_metrics(
+                "reasoning_analysis", self.analysis_cache_hits, self.analysis_cache_misses
+            )
+        except Exception as e:  # pragma: no cover - monitoring must never break analysis
+            logger.debug(f"Failed to report reasoning cache metrics: {e}")
+
+    def _analyze_goal_uncached(self, goal_description: str) -> Dict[str, Any]:
+        self._ensure_semantic_model()
         goal_lower = goal_description.lower()
 
         # Method 1: Keyword-based matching (current approach)
         keyword_scores = self._keyword_match_analysis(goal_lower)
 
-        # Method 2: Semantic similarity (new approach)
-        semantic_scores = {}
+        # Method 2: Semantic similarity, one encode scored against all patterns at once
+        semantic_scores: Dict[str, float] = {}
         if self.model:
-            for pattern_name in self.goal_patterns.keys():
-                semantic_scores[pattern_name] = self.calculate_similarity_score(
-                    goal_description, pattern_name
-                )
+            semantic_scores = self._semantic_scores(goal_description)
+            if not semantic_scores:
+                for pattern_name in self.goal_patterns.keys():
+                    semantic_scores[pattern_name] = self.calculate_similarity_score(
+                        goal_description, pattern_name
+                    )
 
         # Combine scores
         combined_scores = self._combine_matching_methods(keyword_scores, semantic_scores)
@@ -575,7 +694,7 @@ print(f"Statistics: {{result}}")
                 pattern = self.goal_patterns[pattern_name]
 
                 # Extract specific parameters from goal
-                parameters = self._extract_parameters(goal_description, pattern)
+                parameters = self.extract_parameters(goal_description, pattern)
 
                 return {
                     "pattern": pattern_name,
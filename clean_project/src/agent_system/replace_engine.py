@@ -0,0 +1,372 @@
+"""
+Two-phase regex replacement across many files, used by ``ReplaceInFilesTool``.
+
+``plan_replacements`` is read-only: it counts the edits per file (in the shared
+code search process pool for large batches) and records a bounded preview plus
+each file's mtime and size. ``commit_plan`` then writes every new file to a
+temporary sibling, backs the originals up under one manifest, and only then
+renames the temporaries into place. A failure before the renames leaves the tree
+untouched; a failure during them rolls the already-renamed files back, and
+``restore_manifest`` undoes a whole committed batch later.
+
+Files above ``stream_threshold`` bytes are never loaded whole: the regex runs on
+a memory-mapped, UTF-8 encoded view and the output is written match by match.
+In that mode ``\\w`` and case-insensitive matching only cover ASCII.
+"""
+
+from __future__ import annotations
+
+import codecs
+import json
+import logging
+import mmap
+import os
+import re
+import shutil
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Generator, Iterator, List, Optional, Sequence, Tuple
+
+from .code_index import PARALLEL_MIN_FILES, chunked, map_ordered
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STREAM_THRESHOLD = 8 * 1024 * 1024
+MANIFEST_SUFFIX = ".manifest.json"
+_PREVIEW_TEXT = 200  # Characters kept per previewed line
+_WRITE_CHUNK = 1024 * 1024
+
+
+class ReplacementConflict(RuntimeError):
+    """A planned file changed on disk before the plan was committed."""
+
+
+@dataclass
+class FilePlan:
+    path: str
+    replacements: int
+    size: int
+    mtime_ns: int
+    streamed: bool = False
+    preview: List[Dict[str, Any]] = field(default_factory=list)
+
+
+@dataclass
+class ReplacementPlan:
+    pattern: str
+    replacement: str
+    flags: int
+    files: List[FilePlan] = field(default_factory=list)
+    truncated: bool = False  # Planning stopped because max_edits was reached
+
+    @property
+    def total_replacements(self) -> int:
+        return sum(f.replacements for f in self.files)
+
+    def preview(self, max_files: int = 20) -> List[Dict[str, Any]]:
+        """Bounded diff preview: the first hunks of the first ``max_files`` files."""
+        return [
+            {"file": f.path, "replacements": f.replacements, "hunks": f.preview}
+            for f in self.files[:max_files]
+        ]
+
+
+# ------------------------------------------------------------------------ plan
+def _count_newlines(text: Any, end: int, newline: Any) -> int:
+    if isinstance(text, str):
+        return text.count(newline, 0, end)
+    # Count a memory-mapped file in slices rather than copying it whole
+    return sum(
+        text[offset : min(offset + _WRITE_CHUNK, end)].count(newline)
+        for offset in range(0, end, _WRITE_CHUNK)
+    )
+
+
+def _hunk(text: Any, match: re.Match[Any], replacement: Any, newline: Any) -> Dict[str, Any]:
+    """Preview of the line holding a match, before and after replacement."""
+    line_start = text.rfind(newline, 0, match.start()) + 1
+    line_end = text.find(newline, match.end())
+    if line_end == -1:
+        line_end = len(text)
+    before = text[line_start:line_end]
+    after = (
+        text[line_start : match.start()] + match.expand(replacement) + text[match.end() : line_end]
+    )
+    if isinstance(before, bytes):
+        before = before.decode("utf-8", errors="replace")
+        after = after.decode("utf-8", errors="replace")
+    return {
+        "line": _count_newlines(text, match.start(), newline) + 1,
+        "before": before[:_PREVIEW_TEXT],
+        "after": after[:_PREVIEW_TEXT],
+    }
+
+
+def _stream_regex(pattern: str, flags: int) -> Optional[re.Pattern[bytes]]:
+    try:
+        return re.compile(pattern.encode("utf-8"), flags)
+    except (re.error, UnicodeEncodeError):
+        return None
+
+
+def _is_utf8(view: Any) -> bool:
+    """Whether a mapped file decodes as UTF-8, checked a slice at a time."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        for offset in range(0, len(view), _WRITE_CHUNK):
+            decoder.decode(view[offset : offset + _WRITE_CHUNK])
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def _plan_file(
+    path: str,
+    pattern: str,
+    replacement: str,
+    flags: int,
+    preview_per_file: int,
+    stream_threshold: int,
+) -> Optional[FilePlan]:
+    try:
+        st = os.stat(path)
+        regex = _stream_regex(pattern, flags) if st.st_size > stream_threshold else None
+        if regex is not None:
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                # Skip undecodable files like the in-memory path does
+                if not _is_utf8(view):
+                    return None
+                hunks: List[Dict[str, Any]] = []
+                count = 0
+                for match in regex.finditer(view):
+                    if count < preview_per_file:
+                        hunks.append(_hunk(view, match, replacement.encode("utf-8"), b"\n"))
+                    count += 1
+            streamed = True
+        else:
+            with open(path, encoding="utf-8", newline="") as f:
+                text = f.read()
+            regex_text = re.compile(pattern, flags)
+            # subn validates the replacement template (e.g. unknown group references)
+            _, count = regex_text.subn(replacement, text)
+            hunks = [
+                _hunk(text, match, replacement, "\n")
+                for _, match in zip(range(preview_per_file), regex_text.finditer(text))
+            ]
+            streamed = False
+    except (OSError, UnicodeDecodeError, ValueError):
+        return None
+    if not count:
+        return None
+    return FilePlan(path, count, st.st_size, st.st_mtime_ns, streamed, hunks)
+
+
+def _iter_plans(paths: Sequence[str], *args: Any) -> Iterator[FilePlan]:
+    for path in paths:
+        file_plan = _plan_file(path, *args)
+        if file_plan is not None:
+            yield file_plan
+
+
+def _plan_files(paths: Sequence[str], *args: Any) -> List[FilePlan]:
+    """Process-pool task: plan a slice of files."""
+    return list(_iter_plans(paths, *args))
+
+
+def plan_replacements(
+    paths: Sequence[str],
+    pattern: str,
+    replacement: str,
+    flags: int = 0,
+    max_edits: int = 1000,
+    preview_per_file: int = 3,
+    stream_threshold: int = DEFAULT_STREAM_THRESHOLD,
+    workers: int = 1,
+) -> ReplacementPlan:
+    """Plan edits for ``paths`` in order until ``max_edits`` replacements are reached.
+
+    Like a serial walk, the file that crosses ``max_edits`` is planned in full.
+    Raises ``re.error`` for an invalid pattern or replacement template.
+    """
+    regex = re.compile(pattern, flags)
+    regex.sub(replacement, "")  # Surface template errors before touching any file
+
+    plan = ReplacementPlan(pattern, replacement, flags)
+    args = (pattern, replacement, flags, preview_per_file, stream_threshold)
+    batches: Generator[List[FilePlan], None, None]
+    given: Dict[str, str] = {}
+    if workers <= 1 or len(paths) < PARALLEL_MIN_FILES:
+        batches = ([file_plan] for file_plan in _iter_plans(paths, *args))
+    else:
+        # Pool workers may not share our working directory; hand them absolute paths
+        given = {os.path.abspath(path): path for path in paths}
+        chunks = chunked(list(given), workers * 8)
+        batches = map_ordered(_plan_files, chunks, *args, workers=workers)
+
+    total = 0
+    for batch in batches:
+        for file_plan in batch:
+            file_plan.path = given.get(file_plan.path, file_plan.path)
+            plan.files.append(file_plan)
+            total += file_plan.replacements
+            if total >= max_edits:
+                plan.truncated = True
+                break
+        if plan.truncated:
+            batches.close()
+            break
+    return plan
+
+
+# ---------------------------------------------------------------------- commit
+def _write_replaced(file_plan: FilePlan, plan: ReplacementPlan, target: Any) -> int:
+    """Write the replaced content of one file to ``target``; returns the edit count."""
+    if file_plan.streamed:
+        regex = _stream_regex(plan.pattern, plan.flags)
+        assert regex is not None
+        replacement = plan.replacement.encode("utf-8")
+        count = 0
+        with (
+            open(file_plan.path, "rb") as f,
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view,
+        ):
+            position = 0
+            for match in regex.finditer(view):
+                for offset in range(position, match.start(), _WRITE_CHUNK):
+                    target.write(view[offset : min(offset + _WRITE_CHUNK, match.start())])
+                target.write(match.expand(replacement))
+                position = match.end()
+                count += 1
+            for offset in range(position, len(view), _WRITE_CHUNK):
+                target.write(view[offset : offset + _WRITE_CHUNK])
+        return count
+
+    with open(file_plan.path, encoding="utf-8", newline="") as f:
+        text = f.read()
+    new_text, count = re.compile(plan.pattern, plan.flags).subn(plan.replacement, text)
+    target.write(new_text.encode("utf-8"))
+    return count
+
+
+def _unchanged(file_plan: FilePlan) -> bool:
+    try:
+        st = os.stat(file_plan.path)
+    except OSError:
+        return False
+    return st.st_size == file_plan.size and st.st_mtime_ns == file_plan.mtime_ns
+
+
+def commit_plan(plan: ReplacementPlan, backup_dir: str | Path) -> Dict[str, Any]:
+    """Apply a plan atomically per file with a single rollback manifest.
+
+    Raises ``ReplacementConflict`` (leaving the tree untouched) if a planned file
+    changed since planning, and re-raises ``OSError`` after rolling back if a
+    rename fails part-way.
+    """
+    backup_root = Path(backup_dir)
+    batch_id = f"replace.{int(time.time())}.{uuid.uuid4().hex[:8]}"
+    batch_dir = backup_root / batch_id
+    manifest_path = backup_root / (batch_id + MANIFEST_SUFFIX)
+    staged: List[Tuple[FilePlan, str, Path]] = []  # (plan, temp path, backup path)
+
+    try:
+        batch_dir.mkdir(parents=True)
+        for n, file_plan in enumerate(plan.files):
+            if not _unchanged(file_plan):
+                raise ReplacementConflict(f"{file_plan.path} changed since it was planned")
+            directory, name = os.path.split(os.path.abspath(file_plan.path))
+            fd, tmp = tempfile.mkstemp(dir=directory, prefix=f".{name}.", suffix=".tmp")
+            backup = batch_dir / f"{n}.{name}.bak"
+            staged.append((file_plan, tmp, backup))
+            with os.fdopen(fd, "wb") as target:
+                count = _write_replaced(file_plan, plan, target)
+            if count != file_plan.replacements or not _unchanged(file_plan):
+                raise ReplacementConflict(f"{file_plan.path} changed while it was rewritten")
+            shutil.copymode(file_plan.path, tmp)
+            shutil.copy2(file_plan.path, backup)
+    except BaseException:
+        for _, tmp, _ in staged:
+            _remove(tmp)
+        shutil.rmtree(batch_dir, ignore_errors=True)
+        raise
+
+    manifest = {
+        "created": time.time(),
+        "pattern": plan.pattern,
+        "replacement": plan.replacement,
+        "files": [
+            {
+                "original": os.path.abspath(fp.path),
+                "backup": str(backup),
+                "replacements": fp.replacements,
+            }
+            for fp, _, backup in staged
+        ],
+    }
+    _write_json_atomic(manifest_path, manifest)
+
+    committed: List[Tuple[FilePlan, str, Path]] = []
+    try:
+        for entry in staged:
+            os.replace(entry[1], entry[0].path)
+            committed.append(entry)
+    except OSError:
+        logger.error("Replacement batch %s failed part-way; rolling back", batch_id)
+        for _, tmp, _ in staged[len(committed) :]:
+            _remove(tmp)
+        _restore_files([{"original": fp.path, "backup": str(b)} for fp, _, b in committed])
+        _remove(str(manifest_path))
+        shutil.rmtree(batch_dir, ignore_errors=True)
+        raise
+
+    return {
+        "manifest": str(manifest_path),
+        "changes": [
+            {"file": fp.path, "replacements": fp.replacements, "backup": str(backup)}
+            for fp, _, backup in staged
+        ],
+    }
+
+
+def restore_manifest(manifest_path: str | Path) -> List[str]:
+    """Restore every file recorded in a replacement manifest; returns the restored paths."""
+    data = json.loads(Path(manifest_path).read_text(encoding="utf-8"))
+    files = data.get("files") or []
+    _restore_files(files)
+    return [entry["original"] for entry in files]
+
+
+def _restore_files(entries: List[Dict[str, Any]]) -> None:
+    for entry in entries:
+        original = entry["original"]
+        directory, name = os.path.split(os.path.abspath(original))
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=f".{name}.", suffix=".tmp")
+        os.close(fd)
+        try:
+            shutil.copy2(entry["backup"], tmp)
+            os.replace(tmp, original)
+        except BaseException:
+            _remove(tmp)
+            raise
+
+
+def _write_json_atomic(path: Path, payload: Dict[str, Any]) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+    except BaseException:
+        _remove(tmp)
+        raise
+
+
+def _remove(path: str) -> None:
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
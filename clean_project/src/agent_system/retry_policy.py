@@ -0,0 +1,158 @@
+"""
+Retry decisions for tool calls: which failures are worth repeating, how long to
+wait before the next attempt, and how many retries the process can afford.
+
+Retries are only useful for transient failures (timeouts, dropped connections,
+rate limits, 5xx responses); repeating a rejected path or an invalid argument
+just multiplies load. A shared ``RetryBudget`` caps retries at a fraction of
+first attempts so a failing dependency cannot turn every call into several.
+"""
+
+from __future__ import annotations
+
+import random
+import re
+import threading
+from typing import Any, Dict, Optional
+
+# Checked in order: a timeout or dropped connection is transient even though it is an OSError
+TRANSIENT_EXCEPTIONS: tuple[type[BaseException], ...] = (TimeoutError, ConnectionError)
+PERMANENT_EXCEPTIONS: tuple[type[BaseException], ...] = (
+    ValueError,
+    TypeError,
+    LookupError,
+    PermissionError,
+    FileNotFoundError,
+    IsADirectoryError,
+    NotImplementedError,
+    SyntaxError,
+)
+
+_PERMANENT_MESSAGE = re.compile(
+    r"not allowed|not permitted|permission denied|access denied|forbidden|no such file"
+    r"|not found|does not exist|invalid|unsupported|security violation|blocked|too large"
+    r"|\b40[0-4]\b",
+    re.IGNORECASE,
+)
+_TRANSIENT_MESSAGE = re.compile(
+    r"timed? ?out|temporar|try again|rate.?limit|too many requests|unavailable|connection"
+    r"|reset by peer|\b(?:429|50[0-4])\b",
+    re.IGNORECASE,
+)
+
+
+def _error_text(result: Any) -> str:
+    if isinstance(result, dict):
+        return str(result.get("error") or result.get("message") or "")
+    return result if isinstance(result, str) else ""
+
+
+def is_retryable(result: Any = None, exc: Optional[BaseException] = None) -> bool:
+    """Whether a failed attempt (a failure ``result`` or a raised ``exc``) may succeed if repeated.
+
+    A tool can decide explicitly with a ``retryable`` key in its result. Otherwise
+    timeouts, connection errors, rate limits and 5xx responses are transient;
+    rejected input (paths, permissions, validation, security checks) is not; and
+    failures that match neither are retried.
+    """
+    if exc is not None:
+        if isinstance(exc, TRANSIENT_EXCEPTIONS):
+            return True
+        if isinstance(exc, PERMANENT_EXCEPTIONS):
+            return False
+        text = str(exc)
+    else:
+        if isinstance(result, dict):
+            if "retryable" in result:
+                return bool(result["retryable"])
+            if result.get("timeout"):
+                return True
+            if result.get("security_violation"):
+                return False
+        text = _error_text(result)
+    if _TRANSIENT_MESSAGE.search(text):
+        return True
+    return not _PERMANENT_MESSAGE.search(text)
+
+
+def backoff_delay(
+    attempt: int, base: float, cap: float, rng: Optional[random.Random] = None
+) -> float:
+    """Full-jitter exponential backoff before retry number ``attempt`` (1-based).
+
+    The delay is uniform in ``[0, min(cap, base * 2 ** (attempt - 1))]``; spreading
+    retries over the whole interval keeps callers that failed together from
+    retrying in lockstep.
+    """
+    if base <= 0 or cap <= 0:
+        return 0.0
+    ceiling = min(cap, base * 2 ** min(max(0, attempt - 1), 32))
+    return (rng or random).uniform(0, ceiling)
+
+
+class RetryBudget:
+    """Token bucket limiting retries to a fraction of traffic.
+
+    Every first attempt deposits ``ratio`` tokens and every retry withdraws one,
+    so sustained retries stay below ``ratio`` of requests. The bucket starts full
+    at ``reserve`` tokens (also its capacity), which lets a quiet process retry
+    occasional failures without having built up traffic first.
+    """
+
+    def __init__(self, ratio: float = 0.2, reserve: float = 10.0) -> None:
+        if ratio < 0 or reserve < 0:
+            raise ValueError("retry budget ratio and reserve must not be negative")
+        self.ratio = ratio
+        self.capacity = max(float(reserve), 1.0) if ratio > 0 else float(reserve)
+        self._tokens = float(reserve)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.denied = 0
+
+    def record_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+            self._tokens = min(self.capacity, self._tokens + self.ratio)
+
+    def try_acquire(self) -> bool:
+        """Take one token for a retry; False (and counted as denied) when the budget is spent."""
+        with self._lock:
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                self.retries += 1
+                return True
+            self.denied += 1
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "ratio": self.ratio,
+                "tokens": round(self._tokens, 3),
+                "capacity": self.capacity,
+                "requests": self.requests,
+                "retries": self.retries,
+                "denied": self.denied,
+            }
+
+
+_shared_budget: Optional[RetryBudget] = None
+_shared_lock = threading.Lock()
+
+
+def shared_retry_budget() -> RetryBudget:
+    """Process-wide budget sized from TOOL_RETRY_BUDGET_RATIO and TOOL_RETRY_BUDGET_RESERVE."""
+    global _shared_budget
+    with _shared_lock:
+        if _shared_budget is None:
+            ratio, reserve = 0.2, 10.0
+            try:  # Avoid import cycles during early bootstrap
+                from .config_simple import settings
+
+                ratio = float(settings.TOOL_RETRY_BUDGET_RATIO)
+                reserve = float(settings.TOOL_RETRY_BUDGET_RESERVE)
+            except Exception:
+                pass
+            _shared_budget = RetryBudget(ratio, reserve)
+        return _shared_budget
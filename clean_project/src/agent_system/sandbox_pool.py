@@ -0,0 +1,365 @@
+"""
+Warm pool of sandboxed Python interpreters for the code executor.
+
+Each worker is a ``python -I`` process started with the same rlimits as a
+one-shot execution (address space, open files, CPU). It reads one JSON request
+per line on stdin, runs the code in a fresh namespace with captured
+stdout/stderr and answers with one JSON line on stdout. Workers are retired
+after ``max_runs`` executions, on a timeout, or on any resource violation, and
+replacements are started in the background so the next call finds a warm one.
+
+This module only imports the standard library because it doubles as the
+worker's entry point (``python -I sandbox_pool.py``).
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import select
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+MAX_TIMEOUT_SECONDS = 60  # RealCodeExecutorTool caps per-call timeouts at this
+DEFAULT_MEMORY_BYTES = 512 * 1024 * 1024
+MIN_MEMORY_BYTES = 64 * 1024 * 1024
+OPEN_FILES_LIMIT = 32
+WORKER_START_TIMEOUT = 10.0
+
+
+class SandboxTimeout(RuntimeError):
+    """The code did not finish within its timeout; the worker was killed."""
+
+
+def parse_memory_limit(value: Any) -> int:
+    """Parse sizes like ``512m`` or ``1g`` into bytes, never below MIN_MEMORY_BYTES."""
+    s = str(value).strip().lower()
+    scale = {"g": 1024**3, "m": 1024**2, "k": 1024}.get(s[-1:], 1)
+    number = s[:-1] if scale != 1 else s
+    return max(MIN_MEMORY_BYTES, int(float(number) * scale))
+
+
+class SandboxWorker:
+    """One warm interpreter and the pipe protocol used to talk to it."""
+
+    def __init__(self, memory_bytes: int, max_runs: int) -> None:
+        cpu_ceiling = max_runs * (MAX_TIMEOUT_SECONDS + 1) + 5
+
+        def _limit_resources() -> None:
+            try:
+                import resource
+
+                # The worker lowers its soft CPU limit per run; the hard limit bounds its lifetime
+                resource.setrlimit(resource.RLIMIT_CPU, (cpu_ceiling, cpu_ceiling))
+                resource.setrlimit(resource.RLIMIT_NOFILE, (OPEN_FILES_LIMIT, OPEN_FILES_LIMIT))
+                resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+            except Exception:
+                pass
+
+        self.proc = subprocess.Popen(
+            [sys.executable, "-I", os.path.abspath(__file__)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            env={**os.environ, "PYTHONPATH": "", "HOME": "/tmp"},
+            cwd="/tmp",
+            preexec_fn=_limit_resources,
+        )
+        self.runs = 0
+        self.ready = False
+        self._buffer = b""
+
+    @property
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def wait_ready(self, timeout: float) -> bool:
+        """Block until the interpreter has started and announced itself."""
+        if not self.ready:
+            self.ready = bool(self._read_reply(time.monotonic() + timeout))
+        return self.ready
+
+    def run(self, code: str, timeout: float) -> Dict[str, Any]:
+        """Execute ``code`` and return the worker's reply.
+
+        Raises SandboxTimeout (after killing the worker) when no reply arrives
+        within ``timeout`` seconds; for a worker that is still starting, the
+        startup counts against the timeout just like a one-shot subprocess.
+        A worker that dies mid-run, e.g. from SIGXCPU, yields a reply with its
+        negative return code and a violation.
+        """
+        assert self.proc.stdin is not None
+        deadline = time.monotonic() + timeout
+        try:
+            self.proc.stdin.write(json.dumps({"code": code, "timeout": timeout}).encode() + b"\n")
+            self.proc.stdin.flush()
+        except (BrokenPipeError, OSError):
+            return self._died()
+
+        if not self.ready:
+            self.ready = self._read_reply(deadline) is not None
+        reply = self._read_reply(deadline) if self.ready else None
+        if reply is None:
+            return self._died()
+        self.runs += 1
+        return reply
+
+    def _read_reply(self, deadline: float) -> Optional[Dict[str, Any]]:
+        """Read one JSON line; None when the worker exited first."""
+        assert self.proc.stdout is not None
+        fd = self.proc.stdout.fileno()
+        while b"\n" not in self._buffer:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.kill()
+                raise SandboxTimeout("Sandbox worker did not reply in time")
+            readable, _, _ = select.select([fd], [], [], remaining)
+            if not readable:
+                continue
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                return None
+            self._buffer += chunk
+        line, self._buffer = self._buffer.split(b"\n", 1)
+        return json.loads(line)
+
+    def _died(self) -> Dict[str, Any]:
+        self.kill()
+        return {
+            "output": "",
+            "error": "",
+            "return_code": self.proc.returncode,
+            "violation": "worker_exited",
+        }
+
+    def kill(self) -> None:
+        if self.alive:
+            self.proc.kill()
+        try:
+            self.proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:  # pragma: no cover - SIGKILL is not ignorable
+            pass
+        for stream in (self.proc.stdin, self.proc.stdout):
+            try:
+                if stream is not None:
+                    stream.close()
+            except OSError:
+                pass
+
+
+class SandboxPool:
+    """Keeps ``size`` idle workers warm and hands them out one run at a time."""
+
+    def __init__(
+        self,
+        size: int = 2,
+        max_runs: int = 50,
+        memory_bytes: int = DEFAULT_MEMORY_BYTES,
+    ) -> None:
+        self.size = max(1, int(size))
+        self.max_runs = max(1, int(max_runs))
+        self.memory_bytes = memory_bytes
+        self.hits = 0
+        self.misses = 0
+        self.recycled = 0
+        self._idle: Deque[SandboxWorker] = deque()
+        self._lock = threading.Lock()
+        self._refilling = False
+        self._refilled = threading.Condition(self._lock)
+        self._closed = False
+
+    def start(self, wait: bool = False) -> None:
+        """Fill the pool up to ``size`` idle workers, in the background unless ``wait``."""
+        with self._lock:
+            if self._closed:
+                return
+            if self._refilling:
+                while wait and self._refilling:
+                    self._refilled.wait()
+                return
+            self._refilling = True
+        if wait:
+            self._refill()
+        else:
+            threading.Thread(target=self._refill, name="sandbox-pool", daemon=True).start()
+
+    def run(self, code: str, timeout: float) -> Dict[str, Any]:
+        """Run ``code`` on a warm worker when one is idle, else on a freshly started one."""
+        worker, hit = self._acquire()
+        try:
+            reply = worker.run(code, timeout)
+        except BaseException:
+            self._retire(worker)
+            raise
+        if reply.get("violation") or worker.runs >= self.max_runs or not worker.alive:
+            self._retire(worker)
+        else:
+            self._release(worker)
+        reply["pool_hit"] = hit
+        return reply
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": self.size,
+            "idle": len(self._idle),
+            "hits": self.hits,
+            "misses": self.misses,
+            "recycled": self.recycled,
+            "max_runs": self.max_runs,
+        }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._closed = True
+            workers, self._idle = list(self._idle), deque()
+        for worker in workers:
+            worker.kill()
+
+    def _acquire(self) -> tuple[SandboxWorker, bool]:
+        with self._lock:
+            while self._idle:
+                worker = self._idle.popleft()
+                if worker.alive:
+                    self.hits += 1
+                    return worker, True
+                worker.kill()
+            self.misses += 1
+        worker = SandboxWorker(self.memory_bytes, self.max_runs)
+        self.start()
+        return worker, False
+
+    def _release(self, worker: SandboxWorker) -> None:
+        with self._lock:
+            if not self._closed and len(self._idle) < self.size:
+                self._idle.append(worker)
+                return
+        worker.kill()
+
+    def _retire(self, worker: SandboxWorker) -> None:
+        worker.kill()
+        with self._lock:
+            self.recycled += 1
+        self.start()
+
+    def _refill(self) -> None:
+        try:
+            while True:
+                with self._lock:
+                    if self._closed or len(self._idle) >= self.size:
+                        return
+                worker = SandboxWorker(self.memory_bytes, self.max_runs)
+                try:
+                    ready = worker.wait_ready(WORKER_START_TIMEOUT)
+                except SandboxTimeout:
+                    ready = False
+                if not ready:
+                    worker.kill()
+                    logger.warning("Sandbox worker failed to start")
+                    return
+                with self._lock:
+                    if self._closed:
+                        worker.kill()
+                        return
+                    self._idle.append(worker)
+        except Exception as e:
+            logger.warning("Failed to start sandbox worker: %s", e)
+        finally:
+            with self._lock:
+                self._refilling = False
+                self._refilled.notify_all()
+
+
+_shared: Dict[tuple, SandboxPool] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_sandbox_pool(size: int, max_runs: int, memory_bytes: int) -> SandboxPool:
+    """Process-wide pool for the given limits, started on first use."""
+    key = (size, max_runs, memory_bytes)
+    with _shared_lock:
+        pool = _shared.get(key)
+        if pool is None:
+            pool = _shared[key] = SandboxPool(size, max_runs, memory_bytes)
+            pool.start()
+        return pool
+
+
+@atexit.register
+def shutdown_sandbox_pools() -> None:
+    with _shared_lock:
+        pools = list(_shared.values())
+        _shared.clear()
+    for pool in pools:
+        pool.shutdown()
+
+
+def _worker_main() -> None:
+    """Serve run requests from the parent until stdin closes or a run breaks a limit."""
+    import builtins
+    import io
+    import resource
+    import signal
+    import traceback
+
+    # The parent owns shutdown; Ctrl-C in the terminal must not kill warm workers mid-reply
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    requests_in, replies = sys.stdin.buffer, sys.stdout
+    sys.stdin = io.StringIO()
+    pristine = dict(vars(builtins))
+    replies.write(json.dumps({"ready": True}) + "\n")
+    replies.flush()
+
+    for line in requests_in:
+        request = json.loads(line)
+        timeout = max(1, int(request["timeout"]))
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+        soft = int(usage.ru_utime + usage.ru_stime) + timeout + 1
+        resource.setrlimit(resource.RLIMIT_CPU, (min(soft, hard), hard))
+
+        out, err = io.StringIO(), io.StringIO()
+        sys.stdout, sys.stderr = out, err
+        return_code, violation = 0, None
+        started = time.perf_counter()
+        try:
+            # Fresh globals and a private copy of builtins so runs cannot see each other's state
+            namespace = {"__name__": "__main__", "__builtins__": dict(pristine)}
+            exec(compile(request["code"], "<sandbox>", "exec"), namespace)
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                return_code = e.code or 0
+            else:
+                print(e.code, file=err)
+                return_code = 1
+        except BaseException as e:
+            # Drop this function's frame so tracebacks start at the user's code
+            traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+            return_code = 1
+            if isinstance(e, MemoryError):
+                violation = "memory"
+        finally:
+            sys.stdout, sys.stderr = sys.__stdout__, sys.__stderr__
+
+        reply = {
+            "output": out.getvalue(),
+            "error": err.getvalue(),
+            "return_code": return_code,
+            "execution_time": time.perf_counter() - started,
+            "violation": violation,
+        }
+        replies.write(json.dumps(reply) + "\n")
+        replies.flush()
+        if violation:
+            return
+
+
+if __name__ == "__main__":
+    _worker_main()
@@ -0,0 +1,241 @@
+"""
+Streaming quantile and rate statistics shared by the monitoring components.
+
+``QuantileSketch`` is a mergeable, log-bucketed sketch (DDSketch-style): every
+quantile estimate is within ``relative_accuracy`` of a true sample value, and its
+size depends on the dynamic range of the data rather than the number of samples.
+``WindowedStats`` keeps a ring of per-interval sketches, so percentiles, rates and
+trends over a recent time window are answered by merging a bounded number of
+buckets instead of sorting or filtering raw samples.
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Magnitudes below this are counted as zero; log-indexing them is meaningless
+_MIN_INDEXABLE = 1e-9
+
+
+class QuantileSketch:
+    """Mergeable relative-error quantile sketch with exact count/sum/min/max."""
+
+    __slots__ = (
+        "relative_accuracy",
+        "_gamma",
+        "_inv_log_gamma",
+        "_positive",
+        "_negative",
+        "_zero",
+        "count",
+        "sum",
+        "min",
+        "max",
+    )
+
+    def __init__(self, relative_accuracy: float = 0.01) -> None:
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._inv_log_gamma = 1 / math.log(self._gamma)
+        self._positive: Dict[int, int] = {}
+        self._negative: Dict[int, int] = {}
+        self._zero = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float, count: int = 1) -> None:
+        if value > _MIN_INDEXABLE:
+            key = math.ceil(math.log(value) * self._inv_log_gamma)
+            self._positive[key] = self._positive.get(key, 0) + count
+        elif value < -_MIN_INDEXABLE:
+            key = math.ceil(math.log(-value) * self._inv_log_gamma)
+            self._negative[key] = self._negative.get(key, 0) + count
+        else:
+            self._zero += count
+        self.count += count
+        self.sum += value * count
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: QuantileSketch) -> None:
+        """Fold another sketch with the same accuracy into this one."""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        for key, n in other._positive.items():
+            self._positive[key] = self._positive.get(key, 0) + n
+        for key, n in other._negative.items():
+            self._negative[key] = self._negative.get(key, 0) + n
+        self._zero += other._zero
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Estimate the q-quantile (0 <= q <= 1); 0.0 when empty."""
+        if not self.count:
+            return 0.0
+        rank = min(max(q, 0.0), 1.0) * (self.count - 1)
+
+        seen = 0
+        for key in sorted(self._negative, reverse=True):
+            seen += self._negative[key]
+            if seen > rank:
+                return self._clamp(-self._bucket_value(key))
+        seen += self._zero
+        if seen > rank:
+            return self._clamp(0.0)
+        for key in sorted(self._positive):
+            seen += self._positive[key]
+            if seen > rank:
+                return self._clamp(self._bucket_value(key))
+        return self.max
+
+    def _bucket_value(self, key: int) -> float:
+        return 2 * self._gamma**key / (self._gamma + 1)
+
+    def _clamp(self, value: float) -> float:
+        return min(max(value, self.min), self.max)
+
+
+class WindowedStats:
+    """Ring of per-interval quantile sketches covering a sliding time window.
+
+    Samples land in the bucket for ``clock() // bucket_seconds``; a bucket is
+    reset when the ring wraps onto it. Queries merge the buckets that fall inside
+    the requested window (the whole ring by default), and the merged sketch is
+    reused until a new sample arrives or the window moves on.
+    """
+
+    def __init__(
+        self,
+        bucket_seconds: float = 10.0,
+        bucket_count: int = 60,
+        relative_accuracy: float = 0.01,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.bucket_seconds = bucket_seconds
+        self.bucket_count = bucket_count
+        self.relative_accuracy = relative_accuracy
+        self._clock = clock
+        self._buckets: List[Optional[QuantileSketch]] = [None] * bucket_count
+        self._epochs: List[int] = [-1] * bucket_count
+        self._version = 0
+        self._cached: Optional[Tuple[Tuple[int, int, int], QuantileSketch]] = None
+        # Bucket currently being written and the [start, end) interval it covers
+        self._current: Optional[QuantileSketch] = None
+        self._current_start = math.inf
+        self._current_end = -math.inf
+
+    @property
+    def span_seconds(self) -> float:
+        return self.bucket_seconds * self.bucket_count
+
+    def add(self, value: float, now: Optional[float] = None, count: int = 1) -> None:
+        if now is None:
+            now = self._clock()
+        bucket = self._current
+        if bucket is None or not self._current_start <= now < self._current_end:
+            bucket = self._bucket_at(now)
+        bucket.add(value, count)
+        self._version += 1
+
+    def _bucket_at(self, now: float) -> QuantileSketch:
+        epoch = int(now // self.bucket_seconds)
+        slot = epoch % self.bucket_count
+        bucket = self._buckets[slot]
+        if bucket is None or self._epochs[slot] != epoch:
+            bucket = self._buckets[slot] = QuantileSketch(self.relative_accuracy)
+            self._epochs[slot] = epoch
+        self._current = bucket
+        self._current_start = epoch * self.bucket_seconds
+        self._current_end = self._current_start + self.bucket_seconds
+        return bucket
+
+    def _live_buckets(self, window_seconds: Optional[float]) -> List[QuantileSketch]:
+        """Buckets inside the window, oldest first."""
+        now_epoch = int(self._clock() // self.bucket_seconds)
+        span = self._window_buckets(window_seconds)
+        live = [
+            (epoch, bucket)
+            for epoch, bucket in zip(self._epochs, self._buckets)
+            if bucket is not None and now_epoch - span < epoch <= now_epoch
+        ]
+        live.sort(key=lambda item: item[0])
+        return [bucket for _, bucket in live]
+
+    def _window_buckets(self, window_seconds: Optional[float]) -> int:
+        if window_seconds is None:
+            return self.bucket_count
+        return max(1, min(self.bucket_count, math.ceil(window_seconds / self.bucket_seconds)))
+
+    def snapshot(self, window_seconds: Optional[float] = None) -> QuantileSketch:
+        """Merged sketch of every sample inside the window."""
+        key = (
+            int(self._clock() // self.bucket_seconds),
+            self._window_buckets(window_seconds),
+            self._version,
+        )
+        if self._cached is not None and self._cached[0] == key:
+            return self._cached[1]
+
+        merged = QuantileSketch(self.relative_accuracy)
+        for bucket in self._live_buckets(window_seconds):
+            merged.merge(bucket)
+        self._cached = (key, merged)
+        return merged
+
+    def quantile(self, q: float, window_seconds: Optional[float] = None) -> float:
+        return self.snapshot(window_seconds).quantile(q)
+
+    def total(self, window_seconds: Optional[float] = None) -> float:
+        """Sum of sample values inside the window."""
+        return self.snapshot(window_seconds).sum
+
+    def rate(self, window_seconds: float) -> float:
+        """Samples per second over the window."""
+        return self.snapshot(window_seconds).count / window_seconds if window_seconds else 0.0
+
+    def summary(self, window_seconds: Optional[float] = None) -> Dict[str, float]:
+        sketch = self.snapshot(window_seconds)
+        if not sketch.count:
+            return {"count": 0}
+        return {
+            "count": sketch.count,
+            "mean": sketch.mean,
+            "min": sketch.min,
+            "max": sketch.max,
+            "p50": sketch.quantile(0.5),
+            "p95": sketch.quantile(0.95),
+            "p99": sketch.quantile(0.99),
+        }
+
+    def halves(self, window_seconds: Optional[float] = None) -> Optional[Tuple[float, float]]:
+        """Mean of the older and newer half of the populated buckets in the window.
+
+        Returns None when the samples fall into fewer than two buckets, i.e. when
+        there is not enough spread in time to speak of a trend.
+        """
+        live = self._live_buckets(window_seconds)
+        if len(live) < 2:
+            return None
+        middle = len(live) // 2
+        older = QuantileSketch(self.relative_accuracy)
+        newer = QuantileSketch(self.relative_accuracy)
+        for bucket in live[:middle]:
+            older.merge(bucket)
+        for bucket in live[middle:]:
+            newer.merge(bucket)
+        return older.mean, newer.mean
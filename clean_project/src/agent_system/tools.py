@@ -2,15 +2,22 @@ from __future__ import annotations
 
 import asyncio
 import atexit
+import copy
+import functools
 import inspect
+import itertools
 import json
 import logging
+import threading
 import time
 from abc import ABC, abstractmethod
-from collections import defaultdict
-from concurrent.futures import ThreadPoolExecutor
-from typing import Any, Awaitable, Coroutine, Dict, Tuple, cast
+from collections import OrderedDict, defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Any, Awaitable, Callable, Coroutine, Dict, Tuple, cast
 
+from .async_utils import background_loop
+from .code_index import parallel_scan, path_filter, regex_trigrams, shared_index
 from .models import Action, ActionStatus, Observation
 from .real_tools import (
     RealCodeExecutorTool,
@@ -18,6 +25,14 @@ from .real_tools import (
     RealFileWriterTool,
     RealWebSearchTool,
 )
+from .replace_engine import (
+    MANIFEST_SUFFIX,
+    ReplacementConflict,
+    commit_plan,
+    plan_replacements,
+    restore_manifest,
+)
+from .retry_policy import backoff_delay, is_retryable, shared_retry_budget
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +40,15 @@ logger = logging.getLogger(__name__)
 class Tool(ABC):
     """Abstract base class for tools."""
 
+    # Execution hints read by ToolRegistry (plain tool classes may declare them too).
+    # Identical concurrent calls to an idempotent tool share one execution; a
+    # positive cache_ttl_seconds additionally caches its successful results.
+    idempotent: bool = False
+    cache_ttl_seconds: float = 0.0
+    max_concurrency: int | None = None  # None uses TOOL_MAX_CONCURRENCY
+    max_attempts: int | None = None  # None uses the registry's max_retries
+    retry_backoff_seconds: float | None = None  # None uses TOOL_RETRY_BACKOFF
+
     @property
     @abstractmethod
     def name(self) -> str:
@@ -35,6 +59,123 @@ class Tool(ABC):
         raise NotImplementedError
 
 
+@dataclass(frozen=True)
+class ToolPolicy:
+    """How the registry schedules, deduplicates and caches calls to one tool."""
+
+    max_concurrency: int = 4
+    idempotent: bool = False
+    cache_ttl_seconds: float = 0.0
+    max_attempts: int | None = None  # None uses the registry's max_retries
+    retry_backoff_seconds: float = 0.1  # Jittered delay doubles from here per retry...
+    retry_backoff_max_seconds: float = 2.0  # ...up to this cap
+
+    @property
+    def cacheable(self) -> bool:
+        return self.idempotent and self.cache_ttl_seconds > 0
+
+
+_NOT_DISPATCHED: Dict[str, Any] = {"cache_hit": False, "deduplicated": False, "queue_wait_ms": 0.0}
+_CACHE_HIT: Dict[str, Any] = {"cache_hit": True, "deduplicated": False, "queue_wait_ms": 0.0}
+
+
+def _call_key(tool_name: str, parameters: Dict[str, Any]) -> Tuple[str, str] | None:
+    """Canonical identity of a call; None when the parameters cannot be keyed."""
+    try:
+        return tool_name, json.dumps(parameters, sort_keys=True, default=repr)
+    except (TypeError, ValueError):
+        return None
+
+
+_SIZE_SAMPLE = 32  # Items measured per container before extrapolating
+_SIZE_NODES = 256  # Values visited per estimate; the rest is extrapolated
+
+
+def _estimated_json_size(value: Any) -> int:
+    """Approximate UTF-8 JSON size of ``value`` without serializing it.
+
+    Exact for small ASCII payloads; large containers are extrapolated from a
+    sample, so the cost stays bounded however big a tool result gets. Values
+    JSON cannot represent count as zero.
+    """
+    return _estimate_size(value, [_SIZE_NODES])
+
+
+def _estimate_size(value: Any, budget: list[int]) -> int:
+    budget[0] -= 1
+    if isinstance(value, str):
+        # isascii() is O(1) on CPython; only non-ASCII text pays for an encode
+        return 2 + (len(value) if value.isascii() else len(value.encode("utf-8", "replace")))
+    if value is None or value is True:
+        return 4
+    if value is False:
+        return 5
+    if isinstance(value, (int, float)):
+        return len(repr(value))
+    count = len(value) if isinstance(value, (dict, list, tuple)) else 0
+    if isinstance(value, dict):
+        items: Any = value.items()
+    elif isinstance(value, (list, tuple)):
+        # Evenly spaced rather than leading items, which are often unrepresentative
+        step = max(1, count // _SIZE_SAMPLE)
+        items = (value[i] for i in range(0, count, step))
+    else:
+        return 0
+    if not count:
+        return 2
+    measured = total = 0
+    for item in itertools.islice(items, _SIZE_SAMPLE):
+        if budget[0] <= 0:
+            break
+        if isinstance(value, dict):
+            total += _estimate_size(str(item[0]), budget) + 2 + _estimate_size(item[1], budget)
+        else:
+            total += _estimate_size(item, budget)
+        measured += 1
+    if not measured:
+        return 2 * count
+    # Brackets plus ", " between items
+    return 2 + total * count // measured + 2 * (count - 1)
+
+
+def _detached(result: Any) -> Any:
+    """Copy a shared result so one caller's mutations do not leak to another."""
+    try:
+        return copy.deepcopy(result)
+    except Exception:
+        return result
+
+
+def _run_queued(
+    tool: Tool, parameters: Dict[str, Any], submitted: float
+) -> Tuple[Tuple[ActionStatus, Any], float]:
+    """Pool entry point: run a sync tool and report how long the call waited for a worker."""
+    queue_wait_ms = (time.perf_counter() - submitted) * 1000.0
+    result = tool.execute(**parameters)
+    if inspect.isawaitable(result):
+        result = background_loop.run(result)
+    return cast(Tuple[ActionStatus, Any], result), queue_wait_ms
+
+
+def _is_async_tool(tool: Tool) -> bool:
+    """True when ``tool.execute`` is a coroutine function, including partials and async callables."""
+    execute: Any = tool.execute
+    while isinstance(execute, functools.partial):
+        execute = execute.func
+    return asyncio.iscoroutinefunction(execute) or asyncio.iscoroutinefunction(
+        getattr(execute, "__call__", None)
+    )
+
+
+def _code_search_workers() -> int:
+    try:  # Avoid import cycles during early bootstrap
+        from .config_simple import settings as _settings
+
+        return int(_settings.CODE_SEARCH_WORKERS)
+    except Exception:
+        return 0
+
+
 # Backwards-compatible aliases to real tool implementations (avoid subclassing Any in type-checking)
 WebSearchTool = RealWebSearchTool
 
@@ -102,14 +243,23 @@ class ShellTool(Tool):
 
 
 class CodeSearchTool(Tool):
-    """Search code/files for a regex pattern within allowed paths."""
+    """Search code/files for a regex pattern within allowed paths.
+
+    Files are narrowed with a persistent trigram index under the search root
+    (see ``code_index``) before being regex-scanned; ``use_index=False`` falls
+    back to walking and scanning the whole tree.
+    """
+
+    idempotent = True
+
+    def __init__(self, workers: int | None = None) -> None:
+        self.workers = _code_search_workers() if workers is None else workers
 
     @property
     def name(self) -> str:
         return "code_search"
 
     def execute(self, **kwargs: Any) -> Tuple[ActionStatus, Any]:
-        import fnmatch
         import os
         import re
 
@@ -133,9 +283,50 @@ class CodeSearchTool(Tool):
         if isinstance(excludes, str):
             excludes = [excludes]
 
-        regex = re.compile(pattern, flags)
-        matches = []
+        try:
+            re.compile(pattern, flags)
+        except re.error as e:
+            return ActionStatus.FAILURE, {"error": f"invalid pattern: {e}"}
+
+        if not kwargs.get("use_index", True) or not os.path.isdir(root):
+            matches = self._scan_tree(root, pattern, flags, includes, excludes, max_results)
+            return ActionStatus.SUCCESS, {"count": len(matches), "matches": matches}
+
+        index = shared_index(root, self.workers)
+        refreshed = index.refresh()
+        # Absolute path scanned -> path reported, relative to the requested root as in the walk
+        selected: Dict[str, str] = {}
+        is_selected = path_filter(root, includes, excludes)
+        for rel in index.candidates(regex_trigrams(pattern)):
+            filepath = os.path.join(root, rel)
+            if is_selected(filepath):
+                selected[os.path.join(index.root, rel)] = filepath
+
+        matches = parallel_scan(list(selected), pattern, flags, max_results, index.workers)
+        for match in matches:
+            match["file"] = selected[match["file"]]
+        return ActionStatus.SUCCESS, {
+            "count": len(matches),
+            "matches": matches,
+            "index": {**refreshed, "candidates": len(selected)},
+        }
 
+    @staticmethod
+    def _scan_tree(
+        root: str,
+        pattern: str,
+        flags: int,
+        includes: list[str],
+        excludes: list[str],
+        max_results: int,
+    ) -> list[Dict[str, Any]]:
+        """Walk and scan the whole tree on one thread (no index)."""
+        import fnmatch
+        import os
+        import re
+
+        regex = re.compile(pattern, flags)
+        matches: list[Dict[str, Any]] = []
         for dirpath, dirnames, filenames in os.walk(root):
             # Apply directory excludes
             dirnames[:] = [
@@ -170,7 +361,7 @@ class CodeSearchTool(Tool):
             if len(matches) >= max_results:
                 break
 
-        return ActionStatus.SUCCESS, {"count": len(matches), "matches": matches}
+        return matches
 
 
 class EditFileTool(Tool):
@@ -183,10 +374,12 @@ class EditFileTool(Tool):
     def execute(self, **kwargs: Any) -> Tuple[ActionStatus, Any]:
         import hashlib
         import json
+        import shutil
         import time
         from pathlib import Path
 
-        from .config_simple import validate_file_path
+        from .config_simple import settings, validate_file_path
+        from .file_write import write_atomic
 
         path = str(kwargs.get("path", "")).strip()
         search = kwargs.get("search")
@@ -213,7 +406,7 @@ class EditFileTool(Tool):
         else:
             new_txt = txt.replace(search, replace)
             replaced = count
-        # backup with meta
+        # backup with meta; the original bytes are copied, then the edit replaces the file atomically
         backup_dir = Path(".agent_state/backups")
         backup_dir.mkdir(parents=True, exist_ok=True)
         ts = int(time.time())
@@ -221,24 +414,30 @@ class EditFileTool(Tool):
         base = f"{p.name}.{safe}.{ts}"
         backup_path = backup_dir / (base + ".bak")
         meta_path = backup_dir / (base + ".meta.json")
+        fsync = kwargs.get("fsync")
+        fsync = settings.FILE_WRITE_FSYNC if fsync is None else bool(fsync)
         try:
-            backup_path.write_text(txt, encoding="utf-8")
-            meta_path.write_text(
-                json.dumps({"original": str(p)}, ensure_ascii=False, indent=2), encoding="utf-8"
+            shutil.copy2(p, backup_path)
+            write_atomic(
+                meta_path, [json.dumps({"original": str(p)}, ensure_ascii=False, indent=2)]
             )
-            p.write_text(new_txt, encoding="utf-8")
+            bytes_written = write_atomic(p, [new_txt], fsync=fsync)
         except Exception as e:
             return ActionStatus.FAILURE, {"error": f"write failed: {e}"}
         return ActionStatus.SUCCESS, {
             "edited": True,
             "replacements": replaced,
+            "bytes_written": bytes_written,
             "backup": str(backup_path),
             "meta": str(meta_path),
         }
 
 
 class RestoreBackupTool(Tool):
-    """Restore a file from a backup created by edit_file/replace_in_files."""
+    """Restore files from a backup created by edit_file/replace_in_files.
+
+    A replace_in_files manifest restores every file of that batch at once.
+    """
 
     @property
     def name(self) -> str:
@@ -250,14 +449,16 @@ class RestoreBackupTool(Tool):
 
         backups_dir = Path(".agent_state/backups")
         latest = bool(kwargs.get("latest", True))
-        backup = kwargs.get("backup")  # path to .bak or .meta.json
+        backup = kwargs.get("backup")  # path to .bak, .meta.json or .manifest.json
         # pick latest meta if requested
         meta_path: Path | None = None
         bak_path: Path | None = None
         try:
             if latest:
                 metas = sorted(
-                    backups_dir.glob("*.meta.json"), key=lambda p: p.stat().st_mtime, reverse=True
+                    [*backups_dir.glob("*.meta.json"), *backups_dir.glob("*" + MANIFEST_SUFFIX)],
+                    key=lambda p: p.stat().st_mtime,
+                    reverse=True,
                 )
                 if not metas:
                     return ActionStatus.FAILURE, {"error": "no backups"}
@@ -271,6 +472,11 @@ class RestoreBackupTool(Tool):
                 else:
                     # infer meta path by swapping extension
                     meta_path = p.with_suffix(".meta.json")
+            if meta_path.name.endswith(MANIFEST_SUFFIX):
+                return ActionStatus.SUCCESS, {
+                    "restored": restore_manifest(meta_path),
+                    "manifest": str(meta_path),
+                }
             data = json.loads(meta_path.read_text(encoding="utf-8"))
             original = data.get("original")
             if not original:
@@ -290,20 +496,24 @@ class RestoreBackupTool(Tool):
 
 
 class ReplaceInFilesTool(Tool):
-    """Search/replace across multiple files (regex), within allowed paths."""
+    """Search/replace across multiple files (regex), within allowed paths.
+
+    Candidates come from the code search trigram index. Edits are planned in
+    parallel first (``dry_run=True`` stops there and returns the preview), then
+    committed atomically with a single backup manifest that restore_backup can
+    roll back in one call.
+    """
+
+    def __init__(self, workers: int | None = None) -> None:
+        self.workers = _code_search_workers() if workers is None else workers
 
     @property
     def name(self) -> str:
         return "replace_in_files"
 
     def execute(self, **kwargs: Any) -> Tuple[ActionStatus, Any]:
-        import fnmatch
-        import hashlib
-        import json
         import os
         import re
-        import time
-        from pathlib import Path
 
         from .config_simple import validate_file_path
 
@@ -316,6 +526,7 @@ class ReplaceInFilesTool(Tool):
         excludes = kwargs.get("exclude", [".git/*", "*.pyc", "node_modules/*", "*.min.js"])
         max_edits = int(kwargs.get("max_edits", 1000))
         flags = re.IGNORECASE if kwargs.get("ignore_case", False) else 0
+        dry_run = bool(kwargs.get("dry_run", False))
         if not pattern:
             return ActionStatus.FAILURE, {"error": "search regex required"}
         if not validate_file_path(root):
@@ -324,72 +535,64 @@ class ReplaceInFilesTool(Tool):
             includes = [includes]
         if isinstance(excludes, str):
             excludes = [excludes]
-        rx = re.compile(pattern, flags)
-        total_edits = 0
-        files_changed = 0
-        changes = []
-        backup_dir = Path(".agent_state/backups")
-        backup_dir.mkdir(parents=True, exist_ok=True)
-        ts = int(time.time())
-        for dirpath, dirnames, filenames in os.walk(root):
-            dirnames[:] = [
-                d
-                for d in dirnames
-                if not any(fnmatch.fnmatch(os.path.join(dirpath, d), ex) for ex in excludes)
-            ]
-            for filename in filenames:
-                filepath = os.path.join(dirpath, filename)
-                if any(fnmatch.fnmatch(filepath, ex) for ex in excludes):
-                    continue
-                if not any(fnmatch.fnmatch(filepath, inc) or inc == "**/*" for inc in includes):
-                    continue
-                if not validate_file_path(filepath):
-                    continue
-                try:
-                    text = Path(filepath).read_text(encoding="utf-8")
-                except Exception:
-                    continue
-                new_text, n = rx.subn(repl, text)
-                if n > 0:
-                    try:
-                        p = Path(filepath)
-                        safe = hashlib.sha1(str(p).encode("utf-8")).hexdigest()[:10]
-                        base = f"{p.name}.{safe}.{ts}"
-                        backup_path = backup_dir / (base + ".bak")
-                        meta_path = backup_dir / (base + ".meta.json")
-                        backup_path.write_text(text, encoding="utf-8")
-                        meta_path.write_text(
-                            json.dumps({"original": str(p)}, ensure_ascii=False, indent=2),
-                            encoding="utf-8",
-                        )
-                        p.write_text(new_text, encoding="utf-8")
-                        files_changed += 1
-                        total_edits += n
-                        changes.append(
-                            {
-                                "file": filepath,
-                                "replacements": n,
-                                "backup": str(backup_path),
-                                "meta": str(meta_path),
-                            }
-                        )
-                    except Exception:
-                        continue
-                if total_edits >= max_edits:
-                    break
-            if total_edits >= max_edits:
-                break
+
+        paths: list[str] = []
+        workers = 1
+        if os.path.isdir(root):
+            index = shared_index(root, self.workers)
+            index.refresh()
+            workers = index.workers
+            is_selected = path_filter(root, includes, excludes)
+            for rel in index.candidates(regex_trigrams(pattern)):
+                filepath = os.path.join(root, rel)
+                if is_selected(filepath) and validate_file_path(filepath):
+                    paths.append(filepath)
+
+        try:
+            plan = plan_replacements(paths, pattern, repl, flags, max_edits=max_edits, workers=workers)
+        except re.error as e:
+            return ActionStatus.FAILURE, {"error": f"invalid search/replace: {e}"}
+
+        summary: Dict[str, Any] = {
+            "files_changed": 0,
+            "total_replacements": plan.total_replacements,
+            "changes": [],
+            "preview": plan.preview(),
+            "truncated": plan.truncated,
+        }
+        if dry_run:
+            summary.update(dry_run=True, files_planned=len(plan.files))
+            return ActionStatus.SUCCESS, summary
+        if not plan.files:
+            return ActionStatus.SUCCESS, summary
+
+        try:
+            committed = commit_plan(plan, ".agent_state/backups")
+        except (ReplacementConflict, OSError) as e:
+            return ActionStatus.FAILURE, {**summary, "error": f"replacement aborted: {e}"}
         return ActionStatus.SUCCESS, {
-            "files_changed": files_changed,
-            "total_replacements": total_edits,
-            "changes": changes,
+            **summary,
+            "files_changed": len(committed["changes"]),
+            "changes": committed["changes"],
+            "manifest": committed["manifest"],
         }
 
 
 class GitTool(Tool):
-    """Restricted git wrapper (read-only)."""
+    """Restricted git wrapper (read-only).
+
+    Status and working-tree diffs are cached until the repository changes and
+    ``log`` pages come from an incrementally extended commit list (see
+    ``git_state``). ``queries`` runs several commands against one snapshot of
+    the tree. Results are paginated with ``offset``/``limit`` and
+    ``next_offset``. ``execute`` is a coroutine, so the registry awaits the git
+    processes on its event loop without holding an executor thread.
+    """
 
     ALLOWED_CMDS = {"status", "log", "diff"}
+    MAX_QUERIES = 10
+    DEFAULT_LIMIT = 200
+    MAX_LIMIT = 1000
 
     @property
     def name(self) -> str:
@@ -400,50 +603,94 @@ class GitTool(Tool):
 
         return bool(re.fullmatch(r"[A-Za-z0-9._/\-]+", tok))
 
-    def execute(self, **kwargs: Any) -> Tuple[ActionStatus, Any]:
-        import subprocess
+    def _window(self, query: Dict[str, Any], cmd: str) -> Tuple[int, int]:
+        if cmd == "log":
+            limit = max(1, min(100, int(query.get("limit", query.get("n", 10)))))
+        else:
+            limit = max(1, min(self.MAX_LIMIT, int(query.get("limit", self.DEFAULT_LIMIT))))
+        return max(0, int(query.get("offset", 0))), limit
 
-        from .config_simple import settings
+    async def _query(self, state: Any, fp: Any, query: Dict[str, Any]) -> Dict[str, Any]:
+        from .git_state import GitError, page
 
-        cmd = str(kwargs.get("cmd", "")).lower().strip()
-        if cmd not in self.ALLOWED_CMDS:
-            return ActionStatus.FAILURE, {"error": "unsupported git cmd"}
+        cmd = str(query.get("cmd", "")).lower().strip()
+        offset, limit = self._window(query, cmd)
+        args: list[str] = ["git", "--no-pager", cmd]
+        items: Any
+        try:
+            if cmd == "log":
+                items, has_more, cached = await state.log(offset, limit)
+                args += ["-n", str(limit), f"--skip={offset}"]
+                lines = [f"{c['sha'][:7]} {c['subject']}" for c in items]
+                window: Dict[str, Any] = {
+                    "offset": offset,
+                    "next_offset": offset + len(items) if has_more else None,
+                    "items": items,
+                }
+            elif cmd == "status":
+                items, cached = await state.status(fp)
+                args += ["--porcelain"]
+                window = page(items, offset, limit)
+                lines = [f"{e['status']} {e['path']}" for e in window["items"]]
+            else:
+                rng, path = query.get("range"), query.get("path")
+                rng = rng if isinstance(rng, str) and self._safe_token(rng) else None
+                path = path if isinstance(path, str) and self._safe_token(path) else None
+                items, cached = await state.diff(fp, rng, path)
+                args += ["--name-only"] + [a for a in (rng, path) if a]
+                window = page(items, offset, limit)
+                lines = window["items"]
+        except GitError as e:
+            return {"cmd": args, "return_code": e.returncode, "stdout": "", "stderr": e.stderr}
+        result = {"cmd": args, "return_code": 0, "stdout": "\n".join(lines), "stderr": ""}
+        result.update(window)
+        result["has_more"] = window["next_offset"] is not None
+        result["cached"] = cached
+        return result
+
+    async def execute(self, **kwargs: Any) -> Tuple[ActionStatus, Any]:
+        import os
 
-        args: list[str] = ["git", "--no-pager"]
+        from .config_simple import settings
+        from .git_state import GitError, shared_git_state
+
+        queries = kwargs.get("queries")
+        batch = isinstance(queries, list)
+        if not batch:
+            queries = [kwargs]
+        elif not queries or len(queries) > self.MAX_QUERIES:
+            return ActionStatus.FAILURE, {
+                "error": f"queries must hold 1 to {self.MAX_QUERIES} git commands"
+            }
+        if not all(isinstance(q, dict) for q in queries):
+            return ActionStatus.FAILURE, {"error": "each query must be an object"}
+        if any(str(q.get("cmd", "")).lower().strip() not in self.ALLOWED_CMDS for q in queries):
+            return ActionStatus.FAILURE, {"error": "unsupported git cmd"}
 
+        state = shared_git_state(os.getcwd(), timeout=settings.TOOL_TIMEOUT)
         try:
-            if cmd == "status":
-                args += ["status", "--porcelain"]
-            elif cmd == "log":
-                n = int(kwargs.get("n", 10))
-                n = max(1, min(100, n))
-                args += ["log", "--oneline", "-n", str(n)]
-            elif cmd == "diff":
-                rng = kwargs.get("range")
-                path = kwargs.get("path")
-                args += ["diff", "--name-only"]
-                if rng and isinstance(rng, str) and self._safe_token(rng):
-                    args.append(rng)
-                if path and isinstance(path, str) and self._safe_token(path):
-                    args.append(path)
-
-            proc = subprocess.run(
-                args, capture_output=True, text=True, timeout=settings.TOOL_TIMEOUT
-            )
+            fp = await state.fingerprint()  # One snapshot of the tree for the whole batch
+            results = [await self._query(state, fp, q) for q in queries]
+        except GitError as e:  # Not a repository, or git itself is unusable
             return ActionStatus.SUCCESS, {
-                "cmd": args,
-                "return_code": proc.returncode,
-                "stdout": proc.stdout[-10000:],
-                "stderr": proc.stderr[-10000:],
+                "cmd": ["git", "rev-parse"],
+                "return_code": e.returncode,
+                "stdout": "",
+                "stderr": e.stderr[-10000:],
             }
-        except subprocess.TimeoutExpired:
+        except asyncio.TimeoutError:
             return ActionStatus.FAILURE, {"error": "git timeout"}
-        except Exception as e:
+        except (OSError, ValueError, TypeError) as e:
             return ActionStatus.FAILURE, {"error": str(e)}
+        return ActionStatus.SUCCESS, {"results": results} if batch else results[0]
 
 
 class TestTool(Tool):
-    """Run unit tests (read-only) and return a compact summary."""
+    """Run unit tests (read-only) and return a compact summary.
+
+    Only test modules whose import closure changed since they last passed are
+    run; ``full=True`` runs them all.
+    """
 
     @property
     def name(self) -> str:
@@ -452,30 +699,27 @@ class TestTool(Tool):
     def execute(self, **kwargs: Any) -> Tuple[ActionStatus, Any]:
         import subprocess
 
+        from .code_quality import QualityToolError, run_tests
         from .config_simple import settings
 
         path = str(kwargs.get("path", "tests"))
         pattern = str(kwargs.get("pattern", "test*.py"))
+        full = bool(kwargs.get("full", False))
         try:
-            cmd = ["python3", "-m", "unittest", "discover", "-s", path, "-p", pattern, "-q"]
-            proc = subprocess.run(
-                cmd, capture_output=True, text=True, timeout=max(settings.TOOL_TIMEOUT, 60)
-            )
-            out = (proc.stdout or "") + (proc.stderr or "")
-            lines = out.strip().splitlines()[-50:]
-            return ActionStatus.SUCCESS, {
-                "cmd": cmd,
-                "return_code": proc.returncode,
-                "output": "\n".join(lines),
-            }
+            result = run_tests(path, pattern, timeout=max(settings.TOOL_TIMEOUT, 60), full=full)
+            return ActionStatus.SUCCESS, result
         except subprocess.TimeoutExpired:
             return ActionStatus.FAILURE, {"error": "tests timed out"}
-        except Exception as e:
+        except (QualityToolError, OSError) as e:
             return ActionStatus.FAILURE, {"error": str(e)}
 
 
 class FormatTool(Tool):
-    """Format Python code using black (writes changes)."""
+    """Format Python code using black (writes changes).
+
+    black stays imported in a warm worker and only files changed since their
+    last cached outcome are formatted; ``use_cache=False`` formats everything.
+    """
 
     @property
     def name(self) -> str:
@@ -484,31 +728,31 @@ class FormatTool(Tool):
     def execute(self, **kwargs: Any) -> Tuple[ActionStatus, Any]:
         import subprocess
 
+        from .code_quality import QualityToolError, run_format
         from .config_simple import settings, validate_file_path
 
         path = str(kwargs.get("path", ".")).strip()
         check = bool(kwargs.get("check", False))
+        use_cache = bool(kwargs.get("use_cache", True))
         if not validate_file_path(path):
             return ActionStatus.FAILURE, {"error": f"path not allowed: {path}"}
-        cmd = ["python3", "-m", "black"] + (["--check"] if check else []) + [path]
         try:
-            proc = subprocess.run(
-                cmd, capture_output=True, text=True, timeout=max(settings.TOOL_TIMEOUT, 60)
+            result = run_format(
+                path, check=check, timeout=max(settings.TOOL_TIMEOUT, 60), use_cache=use_cache
             )
-            return ActionStatus.SUCCESS, {
-                "cmd": cmd,
-                "return_code": proc.returncode,
-                "stdout": proc.stdout[-8000:],
-                "stderr": proc.stderr[-8000:],
-            }
+            return ActionStatus.SUCCESS, result
         except subprocess.TimeoutExpired:
             return ActionStatus.FAILURE, {"error": "format timed out"}
-        except Exception as e:
+        except (QualityToolError, OSError) as e:
             return ActionStatus.FAILURE, {"error": str(e)}
 
 
 class LintTool(Tool):
-    """Run ruff linter (optionally fix)."""
+    """Run ruff linter (optionally fix).
+
+    Only files changed since their last cached result are linted;
+    ``use_cache=False`` lints everything.
+    """
 
     @property
     def name(self) -> str:
@@ -517,26 +761,22 @@ class LintTool(Tool):
     def execute(self, **kwargs: Any) -> Tuple[ActionStatus, Any]:
         import subprocess
 
+        from .code_quality import QualityToolError, run_lint
         from .config_simple import settings, validate_file_path
 
         path = str(kwargs.get("path", ".")).strip()
         fix = bool(kwargs.get("fix", False))
+        use_cache = bool(kwargs.get("use_cache", True))
         if not validate_file_path(path):
             return ActionStatus.FAILURE, {"error": f"path not allowed: {path}"}
-        cmd = ["python3", "-m", "ruff"] + (["--fix"] if fix else []) + [path]
         try:
-            proc = subprocess.run(
-                cmd, capture_output=True, text=True, timeout=max(settings.TOOL_TIMEOUT, 60)
+            result = run_lint(
+                path, fix=fix, timeout=max(settings.TOOL_TIMEOUT, 60), use_cache=use_cache
             )
-            return ActionStatus.SUCCESS, {
-                "cmd": cmd,
-                "return_code": proc.returncode,
-                "stdout": proc.stdout[-8000:],
-                "stderr": proc.stderr[-8000:],
-            }
+            return ActionStatus.SUCCESS, result
         except subprocess.TimeoutExpired:
             return ActionStatus.FAILURE, {"error": "lint timed out"}
-        except Exception as e:
+        except (QualityToolError, OSError, ValueError) as e:
             return ActionStatus.FAILURE, {"error": str(e)}
 
 
@@ -554,7 +794,13 @@ class GenericTool(Tool):
 
 
 class ToolRegistry:
-    """Manages available tools and handles execution with retry logic."""
+    """Manages available tools and handles execution with retry logic.
+
+    Sync tool implementations run on a bounded thread pool per tool, so a burst
+    of slow calls to one tool cannot starve the others. Identical concurrent
+    calls to an idempotent tool share a single execution, and tools with a
+    ``cache_ttl_seconds`` keep successful results in a bounded LRU.
+    """
 
     def __init__(self) -> None:
         self.tools: Dict[str, Tool] = {}
@@ -562,226 +808,378 @@ class ToolRegistry:
             lambda: {"success": 0, "failure": 0, "total": 0}
         )
         self.max_retries = 3
-        max_workers = 4
+        self.default_max_concurrency = 4
+        self.result_cache_size = 256
+        self.retry_backoff_seconds = 0.1
+        self.retry_backoff_max_seconds = 2.0
         try:  # Avoid import cycles during early bootstrap
             from .config_simple import settings as _settings
 
-            max_workers = max(1, int(getattr(_settings, "TOOL_EXECUTOR_WORKERS", max_workers)))
+            self.default_max_concurrency = max(1, int(_settings.TOOL_MAX_CONCURRENCY))
+            self.result_cache_size = max(0, int(_settings.TOOL_RESULT_CACHE_SIZE))
+            self.retry_backoff_seconds = max(0.0, float(_settings.TOOL_RETRY_BACKOFF))
+            self.retry_backoff_max_seconds = max(0.0, float(_settings.TOOL_RETRY_BACKOFF_MAX))
         except Exception:
             pass
-
-        self._executor = ThreadPoolExecutor(
-            max_workers=max_workers,
-            thread_name_prefix="tool-registry",
+        # Shared by every registry so retries stay a bounded share of all tool traffic
+        self.retry_budget = shared_retry_budget()
+        self.retry_classifier: Callable[[Any, Exception | None], bool] = is_retryable
+
+        self.policies: Dict[str, ToolPolicy] = {}
+        self._pools: Dict[str, ThreadPoolExecutor] = {}
+        # Guards pools, in-flight calls and the result cache; tools run outside it
+        self._lock = threading.Lock()
+        self._inflight: Dict[Tuple[str, str], Future[Any]] = {}
+        self._result_cache: OrderedDict[Tuple[str, str], Tuple[float, ActionStatus, Any]] = (
+            OrderedDict()
         )
-        atexit.register(self._executor.shutdown, False)
+        self.result_cache_hits = 0
+        self.result_cache_misses = 0
+        self.deduplicated_calls = 0
+        atexit.register(self.shutdown)
 
     def register_tool(self, tool: Tool) -> None:
         """Register a tool."""
         self.tools[tool.name] = tool
+        self.policies[tool.name] = ToolPolicy(
+            max_concurrency=int(
+                getattr(tool, "max_concurrency", None) or self.default_max_concurrency
+            ),
+            idempotent=bool(getattr(tool, "idempotent", False)),
+            cache_ttl_seconds=float(getattr(tool, "cache_ttl_seconds", 0.0) or 0.0),
+            max_attempts=getattr(tool, "max_attempts", None),
+            retry_backoff_seconds=float(
+                getattr(tool, "retry_backoff_seconds", None) or self.retry_backoff_seconds
+            ),
+            retry_backoff_max_seconds=self.retry_backoff_max_seconds,
+        )
         logger.info("Registered tool: %s", tool.name)
 
+    def configure_tool(self, name: str, **changes: Any) -> ToolPolicy:
+        """Override the execution policy of a registered tool.
+
+        Accepts the ``ToolPolicy`` fields, e.g. ``cache_ttl_seconds=60`` to opt an
+        idempotent tool into result caching or ``max_attempts=1`` to never retry it.
+        """
+        if name not in self.policies:
+            raise KeyError(f"Tool {name} is not registered")
+        policy = replace(self.policies[name], **changes)
+        if policy.max_concurrency < 1:
+            raise ValueError("max_concurrency must be positive")
+        if policy.max_attempts is not None and policy.max_attempts < 1:
+            raise ValueError("max_attempts must be positive")
+        if policy.retry_backoff_seconds < 0 or policy.retry_backoff_max_seconds < 0:
+            raise ValueError("retry backoff must not be negative")
+        with self._lock:
+            self.policies[name] = policy
+            pool = self._pools.pop(name, None)
+            stale = [key for key in self._result_cache if key[0] == name]
+            for key in stale:
+                del self._result_cache[key]
+        if pool is not None:
+            pool.shutdown(wait=False)
+        return policy
+
     def execute_action(self, action: Action, retry: bool = True) -> Observation:
         """Execute an action synchronously (legacy compatibility)."""
         tool = self.tools.get(action.tool_name)
-
         if not tool:
-            logger.error("Tool not found: %s", action.tool_name)
-            return Observation(
-                action_id=action.id,
-                status=ActionStatus.FAILURE,
-                result=None,
-                feedback=f"Tool {action.tool_name} not available",
-            )
+            return self._missing_tool(action)
 
+        policy, max_attempts = self._retry_plan(tool, retry)
+        payload_bytes = _estimated_json_size(action.parameters)
+        dispatch = _NOT_DISPATCHED
+        queue_wait_ms = retry_wait_ms = 0.0
         attempts = 0
-        max_attempts = self.max_retries if retry else 1
-
-        try:
-            payload_bytes = len(json.dumps(action.parameters, ensure_ascii=False).encode("utf-8"))
-        except Exception:
-            payload_bytes = 0
 
         start = time.perf_counter()
-        while attempts < max_attempts:
+        while True:
             attempts += 1
-
+            status, result, error = ActionStatus.FAILURE, None, None
             try:
-                status, result = self._invoke_tool_sync(tool, action.parameters)
-
+                status, result, dispatch = self._dispatch_sync(tool, action.parameters)
+                queue_wait_ms += dispatch["queue_wait_ms"]
                 self._update_tool_stats(tool.name, status)
-
-                duration_ms = (time.perf_counter() - start) * 1000.0
-                try:
-                    result_bytes = len(
-                        json.dumps(result, ensure_ascii=False)[:100000].encode("utf-8")
-                    )
-                except Exception:
-                    result_bytes = 0
-
-                observation = Observation(
-                    action_id=action.id,
-                    status=status,
-                    result=result,
-                    feedback=f"Completed in {attempts} attempt(s)",
-                    metrics={
-                        "tool": tool.name,
-                        "latency_ms": round(duration_ms, 3),
-                        "attempts": attempts,
-                        "payload_bytes": payload_bytes,
-                        "result_bytes": result_bytes,
-                        "success": 1.0 if status == ActionStatus.SUCCESS else 0.0,
-                    },
+            except Exception as exc:
+                logger.error("Tool execution error: %s", exc)
+                error = exc
+
+            delay = self._retry_delay(tool, policy, attempts, max_attempts, status, result, error)
+            if delay is None:
+                return self._observation(
+                    action,
+                    tool,
+                    status,
+                    result,
+                    error,
+                    attempts,
+                    start,
+                    payload_bytes,
+                    self._dispatch_metrics(dispatch, queue_wait_ms),
+                    retry_wait_ms,
                 )
+            time.sleep(delay)
+            retry_wait_ms += delay * 1000.0
 
-                if status == ActionStatus.SUCCESS or not retry:
-                    return observation
+    async def execute_action_async(self, action: Action, retry: bool = True) -> Observation:
+        """Execute an action using the appropriate tool, retrying transient failures (async)."""
+        tool = self.tools.get(action.tool_name)
+        if not tool:
+            return self._missing_tool(action)
 
-                logger.warning("Action failed, attempt %s/%s", attempts, max_attempts)
+        policy, max_attempts = self._retry_plan(tool, retry)
+        payload_bytes = _estimated_json_size(action.parameters)
+        dispatch = _NOT_DISPATCHED
+        queue_wait_ms = retry_wait_ms = 0.0
+        attempts = 0
 
-            except Exception as exc:  # pragma: no cover - placeholder for real tool errors
+        start = time.perf_counter()
+        while True:
+            attempts += 1
+            status, result, error = ActionStatus.FAILURE, None, None
+            try:
+                status, result, dispatch = await self._dispatch(tool, action.parameters)
+                queue_wait_ms += dispatch["queue_wait_ms"]
+                self._update_tool_stats(tool.name, status)
+            except Exception as exc:
                 logger.error("Tool execution error: %s", exc)
+                error = exc
+
+            delay = self._retry_delay(tool, policy, attempts, max_attempts, status, result, error)
+            if delay is None:
+                return self._observation(
+                    action,
+                    tool,
+                    status,
+                    result,
+                    error,
+                    attempts,
+                    start,
+                    payload_bytes,
+                    self._dispatch_metrics(dispatch, queue_wait_ms),
+                    retry_wait_ms,
+                )
+            await asyncio.sleep(delay)
+            retry_wait_ms += delay * 1000.0
 
-                if attempts >= max_attempts:
-                    duration_ms = (time.perf_counter() - start) * 1000.0
-                    return Observation(
-                        action_id=action.id,
-                        status=ActionStatus.FAILURE,
-                        result=None,
-                        feedback=f"Failed after {attempts} attempts: {exc}",
-                        metrics={
-                            "tool": tool.name,
-                            "latency_ms": round(duration_ms, 3),
-                            "attempts": attempts,
-                            "payload_bytes": payload_bytes,
-                            "result_bytes": 0,
-                            "success": 0.0,
-                            "error_type": type(exc).__name__,
-                        },
-                    )
-
-        duration_ms = (time.perf_counter() - start) * 1000.0
+    @staticmethod
+    def _missing_tool(action: Action) -> Observation:
+        logger.error("Tool not found: %s", action.tool_name)
         return Observation(
             action_id=action.id,
             status=ActionStatus.FAILURE,
             result=None,
-            feedback=f"Failed after {max_attempts} attempts",
-            metrics={
-                "tool": tool.name if tool else action.tool_name,
-                "latency_ms": round(duration_ms, 3),
-                "attempts": attempts,
-                "payload_bytes": payload_bytes,
-                "result_bytes": 0,
-                "success": 0.0,
-            },
+            feedback=f"Tool {action.tool_name} not available",
         )
 
-    async def execute_action_async(self, action: Action, retry: bool = True) -> Observation:
-        """Execute an action using the appropriate tool with basic retry logic (async)."""
-        tool = self.tools.get(action.tool_name)
-
-        if not tool:
-            logger.error("Tool not found: %s", action.tool_name)
-            return Observation(
-                action_id=action.id,
-                status=ActionStatus.FAILURE,
-                result=None,
-                feedback=f"Tool {action.tool_name} not available",
-            )
-
-        attempts = 0
-        max_attempts = self.max_retries if retry else 1
+    def _retry_plan(self, tool: Tool, retry: bool) -> Tuple[ToolPolicy, int]:
+        """The tool's policy and attempt limit; also counts the call towards the retry budget."""
+        policy = self.policies.get(tool.name) or ToolPolicy(self.default_max_concurrency)
+        self.retry_budget.record_request()
+        if not retry:
+            return policy, 1
+        return policy, max(1, policy.max_attempts or self.max_retries)
+
+    def _retry_delay(
+        self,
+        tool: Tool,
+        policy: ToolPolicy,
+        attempts: int,
+        max_attempts: int,
+        status: ActionStatus,
+        result: Any,
+        error: Exception | None,
+    ) -> float | None:
+        """Seconds to back off before the next attempt, or None to return this one."""
+        if status == ActionStatus.SUCCESS and error is None or attempts >= max_attempts:
+            return None
+        if not self.retry_classifier(result, error):
+            logger.info("Not retrying %s: the failure is not transient", tool.name)
+            return None
+        if not self.retry_budget.try_acquire():
+            logger.warning("Retry budget exhausted, not retrying %s", tool.name)
+            return None
+        logger.warning("Action failed, attempt %s/%s", attempts, max_attempts)
+        return backoff_delay(
+            attempts, policy.retry_backoff_seconds, policy.retry_backoff_max_seconds
+        )
 
-        payload_bytes = 0
-        try:
-            payload_bytes = len(json.dumps(action.parameters, ensure_ascii=False).encode("utf-8"))
-        except Exception:
-            payload_bytes = 0
+    @staticmethod
+    def _observation(
+        action: Action,
+        tool: Tool,
+        status: ActionStatus,
+        result: Any,
+        error: Exception | None,
+        attempts: int,
+        start: float,
+        payload_bytes: int,
+        dispatch_metrics: Dict[str, Any],
+        retry_wait_ms: float,
+    ) -> Observation:
+        metrics: Dict[str, Any] = {
+            "tool": tool.name,
+            "latency_ms": round((time.perf_counter() - start) * 1000.0, 3),
+            "attempts": attempts,
+            "payload_bytes": payload_bytes,
+            # Sized once for the returned attempt, by estimate rather than serialization
+            "result_bytes": _estimated_json_size(result),
+            "success": 1.0 if status == ActionStatus.SUCCESS else 0.0,
+            "retry_wait_ms": round(retry_wait_ms, 3),
+            **dispatch_metrics,
+        }
+        if error is not None:
+            metrics["error_type"] = type(error).__name__
+            feedback = f"Failed after {attempts} attempt(s): {error}"
+        elif status == ActionStatus.SUCCESS:
+            feedback = f"Completed in {attempts} attempt(s)"
+        else:
+            feedback = f"Failed after {attempts} attempt(s)"
+        return Observation(
+            action_id=action.id, status=status, result=result, feedback=feedback, metrics=metrics
+        )
 
-        start = time.perf_counter()
-        while attempts < max_attempts:
-            attempts += 1
+    def _dispatch_sync(
+        self, tool: Tool, parameters: Dict[str, Any]
+    ) -> Tuple[ActionStatus, Any, Dict[str, Any]]:
+        """Run one attempt from a synchronous caller, honouring the tool policy."""
+        policy, key, cached = self._lookup_cached(tool, parameters)
+        if cached is not None:
+            return cached[0], cached[1], _CACHE_HIT
 
-            try:
-                status, result = await self._invoke_tool(tool, action.parameters)
+        if _is_async_tool(tool):
+            status, result = self._invoke_tool_sync(tool, parameters)
+            return self._finish_call(policy, key, status, result, 0.0, joined=False)
 
-                self._update_tool_stats(tool.name, status)
+        future, joined = self._submit(tool, parameters, policy, key)
+        (status, result), queue_wait_ms = future.result()
+        return self._finish_call(policy, key, status, result, queue_wait_ms, joined)
 
-                duration_ms = (time.perf_counter() - start) * 1000.0
-                try:
-                    result_bytes = len(
-                        json.dumps(result, ensure_ascii=False)[:100000].encode("utf-8")
-                    )
-                except Exception:
-                    result_bytes = 0
-
-                observation = Observation(
-                    action_id=action.id,
-                    status=status,
-                    result=result,
-                    feedback=f"Completed in {attempts} attempt(s)",
-                    metrics={
-                        "tool": tool.name,
-                        "latency_ms": round(duration_ms, 3),
-                        "attempts": attempts,
-                        "payload_bytes": payload_bytes,
-                        "result_bytes": result_bytes,
-                        "success": 1.0 if status == ActionStatus.SUCCESS else 0.0,
-                    },
+    async def _dispatch(
+        self, tool: Tool, parameters: Dict[str, Any]
+    ) -> Tuple[ActionStatus, Any, Dict[str, Any]]:
+        """Run one attempt from a coroutine, honouring the tool policy."""
+        policy, key, cached = self._lookup_cached(tool, parameters)
+        if cached is not None:
+            return cached[0], cached[1], _CACHE_HIT
+
+        if _is_async_tool(tool):
+            status, result = await self._invoke_tool(tool, parameters)
+            return self._finish_call(policy, key, status, result, 0.0, joined=False)
+
+        future, joined = self._submit(tool, parameters, policy, key)
+        # Shield the shared future so a cancelled caller does not cancel joined callers
+        (status, result), queue_wait_ms = await asyncio.shield(asyncio.wrap_future(future))
+        return self._finish_call(policy, key, status, result, queue_wait_ms, joined)
+
+    def _submit(
+        self,
+        tool: Tool,
+        parameters: Dict[str, Any],
+        policy: ToolPolicy,
+        key: Tuple[str, str] | None,
+    ) -> Tuple[Future[Any], bool]:
+        """Queue a sync tool call on its pool, joining an identical call already in flight."""
+        with self._lock:
+            if key is not None and policy.idempotent:
+                inflight = self._inflight.get(key)
+                if inflight is not None:
+                    self.deduplicated_calls += 1
+                    return inflight, True
+
+            pool = self._pools.get(tool.name)
+            if pool is None:
+                pool = self._pools[tool.name] = ThreadPoolExecutor(
+                    max_workers=policy.max_concurrency,
+                    thread_name_prefix=f"tool-{tool.name}",
                 )
+            future = pool.submit(_run_queued, tool, parameters, time.perf_counter())
+            if key is not None and policy.idempotent:
+                self._inflight[key] = future
 
-                if status == ActionStatus.SUCCESS or not retry:
-                    return observation
+        if key is not None and policy.idempotent:
+            future.add_done_callback(lambda done: self._forget_inflight(key, done))
+        return future, False
 
-                logger.warning("Action failed, attempt %s/%s", attempts, max_attempts)
+    def _forget_inflight(self, key: Tuple[str, str], future: Future[Any]) -> None:
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
 
-            except Exception as exc:  # pragma: no cover - placeholder for real tool errors
-                logger.error("Tool execution error: %s", exc)
-
-                if attempts >= max_attempts:
-                    duration_ms = (time.perf_counter() - start) * 1000.0
-                    return Observation(
-                        action_id=action.id,
-                        status=ActionStatus.FAILURE,
-                        result=None,
-                        feedback=f"Failed after {attempts} attempts: {exc}",
-                        metrics={
-                            "tool": tool.name,
-                            "latency_ms": round(duration_ms, 3),
-                            "attempts": attempts,
-                            "payload_bytes": payload_bytes,
-                            "result_bytes": 0,
-                            "success": 0.0,
-                            "error_type": type(exc).__name__,
-                        },
-                    )
-
-        duration_ms = (time.perf_counter() - start) * 1000.0
-        return Observation(
-            action_id=action.id,
-            status=ActionStatus.FAILURE,
-            result=None,
-            feedback=f"Failed after {max_attempts} attempts",
-            metrics={
-                "tool": tool.name if tool else action.tool_name,
-                "latency_ms": round(duration_ms, 3),
-                "attempts": attempts,
-                "payload_bytes": payload_bytes,
-                "result_bytes": 0,
-                "success": 0.0,
-            },
+    def _lookup_cached(
+        self, tool: Tool, parameters: Dict[str, Any]
+    ) -> Tuple[ToolPolicy, Tuple[str, str] | None, Tuple[ActionStatus, Any] | None]:
+        policy = self.policies.get(tool.name) or ToolPolicy(self.default_max_concurrency)
+        if not policy.idempotent:
+            return policy, None, None
+        key = _call_key(tool.name, parameters)
+        if key is None or not policy.cacheable or not self.result_cache_size:
+            return policy, key, None
+
+        cached: Tuple[ActionStatus, Any] | None = None
+        with self._lock:
+            entry = self._result_cache.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._result_cache.move_to_end(key)
+                self.result_cache_hits += 1
+                cached = entry[1], _detached(entry[2])
+            else:
+                if entry is not None:
+                    del self._result_cache[key]
+                self.result_cache_misses += 1
+        self._report_cache_metrics()
+        return policy, key, cached
+
+    def _finish_call(
+        self,
+        policy: ToolPolicy,
+        key: Tuple[str, str] | None,
+        status: ActionStatus,
+        result: Any,
+        queue_wait_ms: float,
+        joined: bool,
+    ) -> Tuple[ActionStatus, Any, Dict[str, Any]]:
+        if joined:
+            # Joined callers get their own copy of the shared result
+            result = _detached(result)
+        elif (
+            key is not None
+            and policy.cacheable
+            and self.result_cache_size
+            and status == ActionStatus.SUCCESS
+        ):
+            with self._lock:
+                self._result_cache[key] = (
+                    time.monotonic() + policy.cache_ttl_seconds,
+                    status,
+                    _detached(result),
+                )
+                self._result_cache.move_to_end(key)
+                while len(self._result_cache) > self.result_cache_size:
+                    self._result_cache.popitem(last=False)
+        return (
+            status,
+            result,
+            {"cache_hit": False, "deduplicated": joined, "queue_wait_ms": queue_wait_ms},
         )
 
+    @staticmethod
+    def _dispatch_metrics(dispatch: Dict[str, Any], queue_wait_ms: float) -> Dict[str, Any]:
+        return {
+            "cache_hit": 1.0 if dispatch["cache_hit"] else 0.0,
+            "deduplicated": 1.0 if dispatch["deduplicated"] else 0.0,
+            "queue_wait_ms": round(queue_wait_ms, 3),
+        }
+
     async def _invoke_tool(
         self, tool: Tool, parameters: Dict[str, Any]
     ) -> Tuple[ActionStatus, Any]:
-        """Invoke the tool, running sync implementations in a worker thread."""
-        if inspect.iscoroutinefunction(tool.execute):
-            result = await tool.execute(**parameters)
-        else:
-            loop = asyncio.get_running_loop()
-            result = await loop.run_in_executor(self._executor, lambda: tool.execute(**parameters))
+        """Invoke the tool, running sync implementations on the tool's pool."""
+        if not _is_async_tool(tool):
+            status, result, _ = await self._dispatch(tool, parameters)
+            return status, result
 
+        result = await tool.execute(**parameters)
         if inspect.isawaitable(result):
             result = await result
 
@@ -816,22 +1214,56 @@ class ToolRegistry:
             }
         return stats
 
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for the idempotent tool result cache."""
+        lookups = self.result_cache_hits + self.result_cache_misses
+        return {
+            "size": len(self._result_cache),
+            "capacity": self.result_cache_size,
+            "hits": self.result_cache_hits,
+            "misses": self.result_cache_misses,
+            "hit_rate": self.result_cache_hits / lookups if lookups else 0.0,
+            "deduplicated_calls": self.deduplicated_calls,
+        }
+
+    def get_retry_stats(self) -> Dict[str, Any]:
+        """Counters of the process-wide retry budget."""
+        return self.retry_budget.stats()
+
+    def clear_result_cache(self) -> None:
+        with self._lock:
+            self._result_cache.clear()
+
+    def shutdown(self) -> None:
+        """Stop the per-tool worker pools without waiting for running calls."""
+        with self._lock:
+            pools = list(self._pools.values())
+            self._pools.clear()
+        for pool in pools:
+            pool.shutdown(wait=False)
+
+    def _report_cache_metrics(self) -> None:
+        try:
+            from .ai_performance_monitor import ai_performance_monitor
+
+            ai_performance_monitor.record_cache_metrics(
+                "tool_results", self.result_cache_hits, self.result_cache_misses
+            )
+        except Exception as e:  # pragma: no cover - monitoring must never break tool calls
+            logger.debug(f"Failed to report tool cache metrics: {e}")
+
     def _invoke_tool_sync(self, tool: Tool, parameters: Dict[str, Any]) -> Tuple[ActionStatus, Any]:
-        """Synchronous wrapper to invoke a tool that may be async or sync."""
+        """Run a tool from synchronous code; async tools run on the shared background loop."""
         res = tool.execute(**parameters)
-        if inspect.isawaitable(res):
-            # Try to run coroutine safely
-            try:
-                # If no loop is running, run directly
-                return asyncio.run(cast(Coroutine[Any, Any, Tuple[ActionStatus, Any]], res))
-            except RuntimeError:
-                # Event loop already running; execute in a worker thread with its own loop
-                from concurrent.futures import ThreadPoolExecutor as _TPE
-
-                def _run() -> Tuple[ActionStatus, Any]:
-                    return asyncio.run(cast(Coroutine[Any, Any, Tuple[ActionStatus, Any]], res))
-
-                with _TPE(max_workers=1) as ex:
-                    fut = ex.submit(_run)
-                    return fut.result()
-        return res
+        if not inspect.isawaitable(res):
+            return res
+        if not background_loop.in_loop_thread():
+            return background_loop.run(res)
+
+        # Called synchronously from a coroutine on the background loop itself: blocking on
+        # that loop would deadlock, so this (rare) nested call gets a private loop instead.
+        def _run() -> Tuple[ActionStatus, Any]:
+            return asyncio.run(cast(Coroutine[Any, Any, Tuple[ActionStatus, Any]], res))
+
+        with ThreadPoolExecutor(max_workers=1) as ex:
+            return ex.submit(_run).result()
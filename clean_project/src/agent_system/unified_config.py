@@ -22,6 +22,8 @@ class AgentConfig:
 
     max_cycles: int = 100
     max_concurrent_goals: int = 2
+    max_parallel_actions: int = 4  # Independent plan actions dispatched together per goal step
+    max_parallel_actions_per_tool: int = 2
     default_goal_priority: float = 0.5
     working_memory_size: int = 10
     learning_rate: float = 0.1
@@ -29,6 +31,7 @@ class AgentConfig:
     enable_cross_session_learning: bool = True
     enable_performance_monitoring: bool = True
     enable_debug_tracking: bool = True
+    debug_sample_rate: float = 1.0  # Fraction of AI decisions recorded by the debugger
 
 
 @dataclass
@@ -37,14 +40,30 @@ class ToolConfig:
 
     timeout_seconds: int = 30
     max_retries: int = 3
+    retry_backoff_seconds: float = 0.1  # Base of the jittered exponential delay between attempts
+    retry_backoff_max_seconds: float = 2.0
+    retry_budget_ratio: float = 0.2  # Retries allowed per first attempt, across all tools
+    retry_budget_reserve: int = 10  # Retries available before any traffic has built up the budget
     code_execution_timeout: int = 10
+    code_executor_pool_size: int = 2  # Warm sandbox interpreters; 0 starts one process per run
+    code_executor_worker_max_runs: int = 50  # Runs before a sandbox worker is recycled
     safe_file_paths: List[str] = field(default_factory=lambda: ["/tmp", ".", "./workspace"])
     blocked_file_paths: List[str] = field(
         default_factory=lambda: ["/etc", "/bin", "/usr", "/var/log"]
     )
     max_file_size_mb: int = 100
+    file_write_fsync: bool = False  # fsync written files and their directory before returning
     allow_shell_commands: bool = False
     allow_network_access: bool = True
+    max_concurrency_per_tool: int = 4  # Worker threads per tool; slow tools cannot starve others
+    result_cache_size: int = 256  # Cached results of idempotent tools with a TTL
+    code_search_workers: int = 0  # Processes for code search indexing/scanning; 0 = CPU count
+    web_search_cache_size: int = 128  # Search responses kept in the LRU cache
+    web_search_cache_ttl_seconds: int = 3600
+    web_search_cache_path: Optional[str] = None  # JSON file persisting the search cache
+    web_search_hedge_after_seconds: float = 0.0  # Start the next provider after this delay; 0 = off
+    web_fetch_concurrency: int = 8  # Result pages fetched in parallel per search
+    web_fetch_per_host: int = 2  # Concurrent connections to any single host
 
 
 @dataclass
@@ -130,6 +149,12 @@ class AIConfig:
     enable_semantic_similarity: bool = True
     sentence_transformer_model: str = "all-MiniLM-L6-v2"
     similarity_threshold: float = 0.5
+    analysis_cache_size: int = 256  # Goal analyses kept per normalized goal text
+    embedding_cache_dir: str = ".agent_embeddings"
+    embedding_batch_window_ms: float = 5.0  # How long to wait to coalesce encode requests
+    embedding_max_batch_size: int = 64
+    plan_cache_size: int = 128  # Plan templates kept per (pattern, parameters, tool set)
+    cross_session_plan_confidence: float = 0.8  # Reuse a learned sequence without planning
 
     # Learning
     enable_meta_learning: bool = True
@@ -242,6 +267,15 @@ class UnifiedConfig:
         v = os.getenv("AGENT_MAX_CONCURRENT_GOALS")
         if v is not None:
             self.agent.max_concurrent_goals = int(v)
+        v = os.getenv("AGENT_MAX_PARALLEL_ACTIONS")
+        if v is not None:
+            self.agent.max_parallel_actions = int(v)
+        v = os.getenv("AGENT_MAX_PARALLEL_ACTIONS_PER_TOOL")
+        if v is not None:
+            self.agent.max_parallel_actions_per_tool = int(v)
+        v = os.getenv("AGENT_DEBUG_SAMPLE_RATE")
+        if v is not None:
+            self.agent.debug_sample_rate = float(v)
         v = os.getenv("AGENT_ENABLE_LEARNING")
         if v is not None:
             self.agent.enable_cross_session_learning = v.lower() == "true"
@@ -253,6 +287,54 @@ class UnifiedConfig:
         v = os.getenv("TOOL_MAX_RETRIES")
         if v is not None:
             self.tools.max_retries = int(v)
+        v = os.getenv("TOOL_RETRY_BACKOFF")
+        if v is not None:
+            self.tools.retry_backoff_seconds = float(v)
+        v = os.getenv("TOOL_RETRY_BACKOFF_MAX")
+        if v is not None:
+            self.tools.retry_backoff_max_seconds = float(v)
+        v = os.getenv("TOOL_RETRY_BUDGET_RATIO")
+        if v is not None:
+            self.tools.retry_budget_ratio = float(v)
+        v = os.getenv("TOOL_RETRY_BUDGET_RESERVE")
+        if v is not None:
+            self.tools.retry_budget_reserve = int(v)
+        v = os.getenv("FILE_WRITE_FSYNC")
+        if v is not None:
+            self.tools.file_write_fsync = v.lower() == "true"
+        v = os.getenv("TOOL_MAX_CONCURRENCY_PER_TOOL")
+        if v is not None:
+            self.tools.max_concurrency_per_tool = int(v)
+        v = os.getenv("TOOL_RESULT_CACHE_SIZE")
+        if v is not None:
+            self.tools.result_cache_size = int(v)
+        v = os.getenv("CODE_SEARCH_WORKERS")
+        if v is not None:
+            self.tools.code_search_workers = int(v)
+        v = os.getenv("CODE_EXECUTOR_POOL_SIZE")
+        if v is not None:
+            self.tools.code_executor_pool_size = int(v)
+        v = os.getenv("CODE_EXECUTOR_WORKER_MAX_RUNS")
+        if v is not None:
+            self.tools.code_executor_worker_max_runs = int(v)
+        v = os.getenv("WEB_SEARCH_CACHE_SIZE")
+        if v is not None:
+            self.tools.web_search_cache_size = int(v)
+        v = os.getenv("WEB_SEARCH_CACHE_TTL")
+        if v is not None:
+            self.tools.web_search_cache_ttl_seconds = int(v)
+        v = os.getenv("WEB_SEARCH_CACHE_PATH")
+        if v is not None:
+            self.tools.web_search_cache_path = v or None
+        v = os.getenv("WEB_SEARCH_HEDGE_AFTER")
+        if v is not None:
+            self.tools.web_search_hedge_after_seconds = float(v)
+        v = os.getenv("WEB_FETCH_CONCURRENCY")
+        if v is not None:
+            self.tools.web_fetch_concurrency = int(v)
+        v = os.getenv("WEB_FETCH_PER_HOST")
+        if v is not None:
+            self.tools.web_fetch_per_host = int(v)
 
         # API settings
         self.api.serpapi_key = os.getenv("SERPAPI_KEY")
@@ -292,6 +374,9 @@ class UnifiedConfig:
         v = os.getenv("ENABLE_SEMANTIC_SIMILARITY")
         if v is not None:
             self.ai.enable_semantic_similarity = v.lower() == "true"
+        v = os.getenv("EMBEDDING_CACHE_DIR")
+        if v is not None:
+            self.ai.embedding_cache_dir = v
 
         # Distributed settings
         v = os.getenv("DISTRIBUTED_ENABLED")
@@ -414,6 +499,12 @@ class UnifiedConfig:
             raise ValueError("timeout_seconds must be positive")
         if self.tools.max_retries < 0:
             raise ValueError("max_retries cannot be negative")
+        if self.tools.max_concurrency_per_tool <= 0:
+            raise ValueError("max_concurrency_per_tool must be positive")
+        if self.tools.web_fetch_concurrency <= 0 or self.tools.web_fetch_per_host <= 0:
+            raise ValueError("web_fetch_concurrency and web_fetch_per_host must be positive")
+        if self.tools.retry_budget_ratio < 0 or self.tools.retry_budget_reserve < 0:
+            raise ValueError("retry_budget_ratio and retry_budget_reserve must not be negative")
 
         # Validate security config
         if self.security.max_memory_mb <= 0:
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
 import unittest
+from unittest.mock import patch
 
+from agent_system import intelligent_action_selector
 from agent_system.action_selector import ActionSelector
+from agent_system.intelligent_action_selector import IntelligentActionSelector
 from agent_system.models import Action, Goal
 
 
@@ -44,5 +47,55 @@ class ActionSelectorTests(unittest.TestCase):
         self.assertGreaterEqual(updated, initial)
 
 
+class IntelligentActionSelectorTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.selector = IntelligentActionSelector()
+        self.goal = Goal(id="goal_1", description="Research file formats with code", priority=0.5)
+        names = ["generic_task", "save_results", "search_information", "load_data", "execute_code"]
+        self.actions = [
+            Action(
+                id=f"goal_1_action_{idx}",
+                name=name,
+                tool_name="generic_tool",
+                parameters={"query": "file formats"},
+                expected_outcome="task_completed",
+                cost=0.1,
+                prerequisites=["goal_1_action_0"] if idx == 3 else [],
+            )
+            for idx, name in enumerate(names)
+        ]
+        self.context = {"recent_actions": ["search_information"], "search_terms": ["file"]}
+
+    def test_batched_scores_match_per_action_scores(self):
+        features = intelligent_action_selector._GoalFeatures.build(
+            self.goal.description, self.context, []
+        )
+        components = [
+            self.selector._score_components(action, features, self.context)
+            for action in self.actions
+        ]
+        batched = self.selector._combine_scores(components)
+        individual = [
+            self.selector._calculate_action_score(action, self.goal, self.context, [])
+            for action in self.actions
+        ]
+        for got, expected in zip(batched, individual):
+            self.assertAlmostEqual(got, expected)
+
+    def test_selection_is_identical_without_numpy(self):
+        with_numpy = self.selector.select_action(self.actions, self.goal, self.context, [])
+        with patch.object(intelligent_action_selector, "NUMPY_AVAILABLE", False):
+            without_numpy = IntelligentActionSelector().select_action(
+                self.actions, self.goal, self.context, []
+            )
+        self.assertEqual(with_numpy.id, without_numpy.id)
+
+    def test_ties_resolve_to_first_candidate(self):
+        first = self.actions[0]
+        twin = Action(**{**first.__dict__, "id": "goal_1_action_twin"})
+        selected = self.selector.select_action([first, twin], self.goal, {}, [])
+        self.assertEqual(selected.id, first.id)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from agent_system.agent import AutonomousAgent, GoalExecutionContext
+from agent_system.models import Action, ActionStatus, Observation, Plan
+
+
+def _scripted_agent(delays: dict[str, float], steps_per_goal: int = 3):
+    """Agent whose goal steps just sleep, recording concurrency and step order."""
+    agent = AutonomousAgent()
+    agent.goal_contexts.clear()
+    log: list[str] = []
+    in_flight = {"now": 0, "peak": 0}
+
+    async def step(context: GoalExecutionContext) -> bool:
+        in_flight["now"] += 1
+        in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        try:
+            await asyncio.sleep(delays[context.goal.description])
+        finally:
+            in_flight["now"] -= 1
+        log.append(context.goal.description)
+        if context.steps + 1 >= steps_per_goal:
+            agent.goal_contexts.pop(context.goal.id, None)
+        return True
+
+    agent._process_goal_step = step  # type: ignore[method-assign]
+    for description in delays:
+        agent.add_goal(description)
+    return agent, log, in_flight
+
+
+@pytest.mark.asyncio
+async def test_fast_goals_do_not_wait_for_slow_ones():
+    agent, log, _ = _scripted_agent({"slow": 0.2, "fast": 0.01})
+
+    await agent.run_async(max_cycles=10, max_concurrent_goals=2)
+
+    # Lock-step cycles would interleave the goals; here the fast goal finishes first
+    assert log[:3] == ["fast", "fast", "fast"]
+    assert log.count("slow") == 3
+
+
+@pytest.mark.asyncio
+async def test_max_concurrent_goals_bounds_in_flight_steps():
+    agent, log, in_flight = _scripted_agent({f"goal {i}": 0.01 for i in range(6)})
+
+    await agent.run_async(max_cycles=10, max_concurrent_goals=2)
+
+    assert in_flight["peak"] == 2
+    assert len(log) == 18
+
+
+@pytest.mark.asyncio
+async def test_step_budget_and_latency_tracking():
+    agent, log, _ = _scripted_agent({"a": 0.01, "b": 0.01}, steps_per_goal=100)
+
+    await agent.run_async(max_cycles=2, max_concurrent_goals=2)
+
+    assert len(log) == 4
+    contexts = list(agent.goal_contexts.values())
+    assert {ctx.steps for ctx in contexts} == {2}
+    assert all(ctx.avg_step_latency_ms >= 10 for ctx in contexts)
+
+
+@pytest.mark.asyncio
+async def test_independent_plan_actions_run_concurrently():
+    agent = AutonomousAgent()
+    agent.goal_contexts.clear()
+    goal = agent.add_goal("research two sources and merge them")
+    actions = [
+        Action("s1", "search_one", "generic_tool", {}, "found", 0.3),
+        Action("s2", "search_two", "generic_tool", {}, "found", 0.3),
+        Action("merge", "merge", "generic_tool", {}, "merged", 0.3, prerequisites=["s1", "s2"]),
+    ]
+    context = GoalExecutionContext(
+        goal=goal, plan=Plan(goal.id, actions, 0.9, 0.8), initialized=True
+    )
+    in_flight = {"now": 0, "peak": 0}
+    order: list[str] = []
+
+    async def execute(action: Action, retry: bool = True) -> Observation:
+        in_flight["now"] += 1
+        in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        await asyncio.sleep(0.05)
+        in_flight["now"] -= 1
+        order.append(action.id)
+        return Observation(action.id, ActionStatus.SUCCESS, {"ok": True})
+
+    agent.tool_registry.execute_action_async = execute  # type: ignore[method-assign]
+
+    await agent._process_goal_step(context)
+    assert sorted(order) == ["s1", "s2"]
+    assert in_flight["peak"] == 2
+
+    await agent._process_goal_step(context)
+    assert order[-1] == "merge"
+    assert context.graph is not None and context.graph.critical_path_length == 2
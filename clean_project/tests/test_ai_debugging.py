@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from agent_system.ai_debugging import AIDebugger, DecisionType
+
+
+def _log_selection(debugger: AIDebugger, name: str = "search_information") -> str:
+    return debugger.log_action_selection(
+        [{"name": name, "id": name}], {"name": name, "id": name}, {"final_score": 0.7}
+    )
+
+
+def _log_analysis(debugger: AIDebugger) -> str:
+    return debugger.log_goal_analysis(
+        "research python packaging", {"confidence": 0.9, "pattern": "research"}
+    )
+
+
+def test_ring_buffer_evicts_from_id_and_type_indexes(tmp_path):
+    debugger = AIDebugger(debug_dir=str(tmp_path), max_decisions=3)
+
+    first = _log_analysis(debugger)
+    ids = [_log_selection(debugger) for _ in range(3)]
+
+    assert len(set(ids)) == 3
+    assert len(debugger.decisions) == 3
+    assert debugger.get_decision_explanation(first) is None
+    assert debugger.get_decision(ids[-1]).decision_type == DecisionType.ACTION_SELECTION
+    assert list(debugger.decision_history["goal_analysis"]) == []
+    assert list(debugger.decision_history["action_selection"]) == ids
+
+    _log_analysis(debugger)
+    assert debugger.get_decision_explanation(ids[0]) is None
+    assert list(debugger.decision_history["action_selection"]) == ids[1:]
+
+
+def test_sampling_is_per_decision_type(tmp_path):
+    debugger = AIDebugger(debug_dir=str(tmp_path), sample_rate=0.5)
+
+    for _ in range(4):
+        _log_analysis(debugger)
+        _log_selection(debugger)
+
+    assert len(debugger.decision_history["goal_analysis"]) == 2
+    assert len(debugger.decision_history["action_selection"]) == 2
+    assert debugger.decisions_sampled_out == 4
+    assert debugger.generate_debug_report()["statistics"]["decisions_sampled_out"] == 4
+
+
+@pytest.mark.asyncio
+async def test_async_export_streams_jsonl(tmp_path):
+    debugger = AIDebugger(debug_dir=str(tmp_path))
+    ids = [_log_analysis(debugger), _log_selection(debugger)]
+
+    path = await debugger.save_debug_data_async()
+
+    lines = [json.loads(line) for line in open(path, encoding="utf-8")]
+    assert lines[0]["statistics"]["total_decisions"] == 2
+    assert [line["decision_id"] for line in lines[1:]] == ids
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from agent_system.ai_performance_monitor import AIPerformanceMonitor, MetricSeries
+
+
+def test_metric_series_wraps_and_samples_metadata():
+    series = MetricSeries(capacity=4, metadata_interval=2)
+    now = time.monotonic()
+    for i in range(6):
+        series.append(now + i, float(i), {"i": i})
+
+    points = list(series)
+    assert len(series) == 4
+    assert [p.value for p in points] == [2.0, 3.0, 4.0, 5.0]
+    assert [p.metadata for p in points] == [{"i": 2}, {}, {"i": 4}, {}]
+    assert set(series.metadata) == {2, 4}
+
+
+class _SlowTimestamp:
+    """Clock reading that yields the GIL while it is stored into a series."""
+
+    def __init__(self) -> None:
+        self.value = time.monotonic()
+
+    def __float__(self) -> float:
+        time.sleep(0.0001)
+        return self.value
+
+
+def test_concurrent_writers_keep_every_sample(tmp_path):
+    # The loop, offloaded planning and tool pool threads all record metrics
+    monitor = AIPerformanceMonitor(
+        monitor_dir=str(tmp_path), threshold_check_interval=60, clock=_SlowTimestamp
+    )
+    try:
+        threads = [
+            threading.Thread(
+                target=lambda: [monitor.record_cache_metrics("plan", 1, 1) for _ in range(100)]
+            )
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert list(monitor.metrics_history) == ["plan_cache_hit_rate"]
+        assert monitor.metrics_history["plan_cache_hit_rate"].total_count == 400
+    finally:
+        monitor.close()
+
+
+def test_thresholds_are_checked_in_batches(tmp_path):
+    monitor = AIPerformanceMonitor(monitor_dir=str(tmp_path), threshold_check_interval=60)
+    try:
+        for _ in range(50):
+            monitor.record_decision_metrics("action_selection", 10.0, 0.1, True)
+
+        # Recording alone never evaluates thresholds
+        assert monitor.alert_history == []
+
+        monitor.check_pending_thresholds()
+        assert [a.metric_name for a in monitor.alert_history] == ["decision_accuracy"]
+
+        # Reporting flushes pending checks, but the repeat alert is deduplicated
+        monitor.record_goal_metrics(False, 4, 1)
+        performance = monitor.get_current_performance()
+        assert {a.metric_name for a in monitor.alert_history} == {
+            "decision_accuracy",
+            "goal_completion_rate",
+        }
+        assert performance["current_metrics"]["goal_completion_rate"] == 0.25
+    finally:
+        monitor.close()
+
+
+def test_a_breach_between_ticks_is_not_hidden_by_a_later_reading(tmp_path):
+    monitor = AIPerformanceMonitor(monitor_dir=str(tmp_path), threshold_check_interval=60)
+    try:
+        monitor.record_goal_metrics(True, 10, 9)
+        monitor.check_pending_thresholds()
+        monitor.record_goal_metrics(False, 10, 1)
+        monitor.record_goal_metrics(True, 10, 9)
+        monitor.check_pending_thresholds()
+        assert [(a.metric_name, a.current_value) for a in monitor.alert_history] == [
+            ("goal_completion_rate", 0.1)
+        ]
+    finally:
+        monitor.close()
+
+
+def test_background_tick_evaluates_pending_thresholds(tmp_path):
+    monitor = AIPerformanceMonitor(monitor_dir=str(tmp_path), threshold_check_interval=0.01)
+    try:
+        monitor.record_goal_metrics(False, 10, 1)
+        deadline = time.monotonic() + 2
+        while not monitor.alert_history and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert [a.metric_name for a in monitor.alert_history] == ["goal_completion_rate"]
+    finally:
+        monitor.close()
+
+
+def test_trends_come_from_streaming_windows(tmp_path):
+    now = [0.0]
+    monitor = AIPerformanceMonitor(
+        monitor_dir=str(tmp_path), threshold_check_interval=60, clock=lambda: now[0]
+    )
+    try:
+        for latency in (10.0, 10.0, 20.0, 20.0):
+            monitor.record_step_latency("g1", latency)
+            now[0] += 900
+
+        trend = monitor.get_performance_trends(2)["trends"]["goal_step_latency_ms"]
+        assert trend["data_points"] == 4
+        assert trend["avg_value"] == 15.0
+        assert trend["trend"] == "improving"
+        assert abs(trend["p95_value"] - 20.0) <= 0.2
+
+        # Samples older than the window drop out
+        assert (
+            monitor.get_performance_trends(1)["trends"]["goal_step_latency_ms"]["data_points"] == 3
+        )
+        now[0] += 3 * 3600
+        assert "goal_step_latency_ms" not in monitor.get_performance_trends(2)["trends"]
+    finally:
+        monitor.close()
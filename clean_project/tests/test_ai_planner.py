@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import pytest
+
+from agent_system.ai_planner import AIHierarchicalPlanner
+from agent_system.models import Goal
+from agent_system.reasoning_engine import ReasoningEngine
+
+TOOLS = ["generic_tool", "web_search", "file_reader", "file_writer", "code_executor"]
+
+
+class _StubCrossSession:
+    def __init__(self, result=None) -> None:
+        self.result = result
+
+    def get_best_action_sequence_with_confidence(self, goal_description):
+        return self.result
+
+
+class _CountingEngine(ReasoningEngine):
+    def __init__(self) -> None:
+        super().__init__()
+        self._embedding_service = None
+        self.analyses = 0
+
+    def enhanced_analyze_goal(self, goal_description):
+        self.analyses += 1
+        return super().enhanced_analyze_goal(goal_description)
+
+
+@pytest.fixture
+def planner() -> AIHierarchicalPlanner:
+    planner = AIHierarchicalPlanner()
+    planner.reasoning_engine = _CountingEngine()
+    planner.cross_session_learning = _StubCrossSession()
+    planner.clear_plan_cache()
+    return planner
+
+
+def _describe(plan):
+    return [
+        (a.id, a.name, a.tool_name, a.parameters, a.cost, a.prerequisites) for a in plan.actions
+    ]
+
+
+def test_same_kind_of_goal_reuses_plan_template(planner: AIHierarchicalPlanner):
+    planner.create_plan(Goal("g1", "research sqlite internals", 0.5), TOOLS)
+    second = planner.create_plan(Goal("g2", "research graph databases", 0.5), TOOLS)
+
+    fresh = AIHierarchicalPlanner()
+    fresh.reasoning_engine = planner.reasoning_engine
+    fresh.cross_session_learning = _StubCrossSession()
+    fresh._plan_cache_size = 0
+    expected = fresh.create_plan(Goal("g2", "research graph databases", 0.5), TOOLS)
+
+    stats = planner.get_cache_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert _describe(second) == _describe(expected)
+    assert second.actions[0].parameters["query"] == "research graph databases"
+
+
+def test_tool_set_is_part_of_the_template_key(planner: AIHierarchicalPlanner):
+    planner.create_plan(Goal("g1", "research sqlite internals", 0.5), TOOLS)
+    plan = planner.create_plan(
+        Goal("g2", "research graph databases", 0.5), ["generic_tool", "file_writer"]
+    )
+
+    assert planner.get_cache_stats()["misses"] == 2
+    assert "web_search" not in {action.tool_name for action in plan.actions}
+
+
+def test_confident_cross_session_sequence_skips_goal_analysis(planner: AIHierarchicalPlanner):
+    planner.cross_session_learning = _StubCrossSession(
+        (["search_information", "save_results"], 0.9)
+    )
+
+    plan = planner.create_plan(Goal("g1", "research sqlite internals", 0.5), TOOLS)
+
+    assert planner.reasoning_engine.analyses == 0
+    assert [action.name for action in plan.actions] == ["search_information", "save_results"]
+    assert plan.actions[1].prerequisites == [plan.actions[0].id]
+    assert plan.confidence == 0.9
+    assert planner.get_cache_stats()["cross_session_plans"] == 1
+
+
+def test_low_confidence_cross_session_sequence_is_ignored(planner: AIHierarchicalPlanner):
+    planner.cross_session_learning = _StubCrossSession((["search_information"], 0.5))
+
+    planner.create_plan(Goal("g1", "research sqlite internals", 0.5), TOOLS)
+
+    assert planner.reasoning_engine.analyses == 1
+    assert planner.get_cache_stats()["cross_session_plans"] == 0
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from agent_system.code_index import (
+    INDEX_DIRNAME,
+    PARALLEL_MIN_FILES,
+    TrigramIndex,
+    regex_trigrams,
+    required_literals,
+)
+from agent_system.models import ActionStatus
+from agent_system.tools import CodeSearchTool
+
+
+def _write(path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def _located(result):
+    return sorted((m["file"], m["line"]) for m in result["matches"])
+
+
+@pytest.mark.parametrize(
+    "pattern, expected",
+    [
+        ("def foo", [["def foo"]]),
+        (r"class\s+Tool", [["class", "Tool"]]),
+        ("ab+c", [["ab", "bc"]]),
+        ("abc*d", [["ab", "d"]]),
+        ("foo|bar", [["foo"], ["bar"]]),
+        (r"x(abc|def)yz\.py", [["x", "yz.py"]]),
+        ("[]x]yz", [["yz"]]),
+        ("(?x) a b c", None),
+        (r"foo\x41bar", [["foo", "bar"]]),
+        (r"ab\u00e9cd", [["ab", "cd"]]),
+        (r"ab\U0001F600cd", [["ab", "cd"]]),
+        (r"\N{LATIN SMALL LETTER A}bc", [["bc"]]),
+        (r"ab\101cd", [["ab", "cd"]]),
+        (r"ab\0cd", [["ab", "cd"]]),
+        (r"(ab)cd\1ef", [["cd", "ef"]]),
+    ],
+)
+def test_required_literals(pattern, expected):
+    assert required_literals(pattern) == expected
+
+
+@pytest.mark.parametrize(
+    "pattern",
+    [r"foo\x41bar", r"foo\u0041bar", r"foo\N{LATIN CAPITAL LETTER A}bar", r"foo\101bar"],
+)
+def test_multi_character_escapes_do_not_hide_matches(tmp_path, pattern):
+    _write(tmp_path / "a.txt", "prefix fooAbar suffix\n")
+    tool = CodeSearchTool(workers=1)
+    _, indexed = tool.execute(path=str(tmp_path), pattern=pattern)
+    _, scanned = tool.execute(path=str(tmp_path), pattern=pattern, use_index=False)
+    assert indexed["count"] == scanned["count"] == 1
+
+
+def test_patterns_without_trigrams_do_not_filter():
+    assert regex_trigrams(r"\w+") is None
+    assert regex_trigrams("abc|d") is None
+    assert len(regex_trigrams("import os|import sys")) == 2
+
+
+def test_index_refreshes_incrementally_and_persists(tmp_path):
+    _write(tmp_path / "a.py", "def alpha():\n    return 1\n")
+    _write(tmp_path / "pkg" / "b.py", "def beta():\n    return 2\n")
+    _write(tmp_path / ".git" / "HEAD", "def alpha\n")
+
+    index = TrigramIndex(str(tmp_path), workers=1)
+    assert index.refresh() == {"files": 2, "updated": 2, "removed": 0}
+    assert index.candidates(regex_trigrams("def ALPHA")) == ["a.py"]
+    assert (tmp_path / INDEX_DIRNAME / "trigrams.bin").exists()
+
+    (tmp_path / "a.py").unlink()
+    _write(tmp_path / "pkg" / "b.py", "def beta():\n    return alpha()\n")
+    reloaded = TrigramIndex(str(tmp_path), workers=1)
+    assert reloaded.refresh() == {"files": 1, "updated": 1, "removed": 1}
+    assert reloaded.candidates(regex_trigrams("alpha")) == [os.path.join("pkg", "b.py")]
+    assert TrigramIndex(str(tmp_path), workers=1).refresh()["updated"] == 0
+
+
+def test_indexed_search_matches_tree_scan(tmp_path):
+    for i in range(PARALLEL_MIN_FILES + 10):
+        body = f"class Widget{i}:\n    pass\n"
+        if i % 7 == 0:
+            body += f"def handle_{i}_request():\n    return None\n"
+        _write(tmp_path / f"pkg{i % 3}" / f"mod_{i}.py", body)
+    _write(tmp_path / "notes.log", "def handle_0_request in a log\n")
+
+    tool = CodeSearchTool(workers=2)  # exercise the process pool
+    queries = [
+        {"pattern": r"def handle_\d+_request"},
+        {"pattern": "pass"},  # every file is a candidate
+        {"pattern": "HANDLE_7", "ignore_case": True},
+        {"pattern": "HANDLE_7", "ignore_case": False},
+        {"pattern": r"Widget1\d", "include": "*/pkg1/*"},
+        {"pattern": "class", "exclude": [f"{tmp_path}/pkg0", "*.log"]},
+    ]
+    for query in queries:
+        status, indexed = tool.execute(path=str(tmp_path), **query)
+        _, scanned = tool.execute(path=str(tmp_path), use_index=False, **query)
+        assert status == ActionStatus.SUCCESS
+        assert _located(indexed) == _located(scanned), query
+
+    _, result = tool.execute(path=str(tmp_path), pattern=r"def handle_\d+_request")
+    assert result["index"]["updated"] == 0
+    assert result["index"]["candidates"] == result["count"]
+
+
+def test_invalid_pattern_is_reported(tmp_path):
+    status, result = CodeSearchTool(workers=1).execute(path=str(tmp_path), pattern="(")
+    assert status == ActionStatus.FAILURE
+    assert "invalid pattern" in result["error"]
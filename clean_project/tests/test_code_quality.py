@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from agent_system.code_quality import ImportGraph, QualityCache, run_format, run_lint, run_tests
+from agent_system.models import ActionStatus
+from agent_system.tools import TestTool
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # tools resolve paths and keep their cache under the cwd
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "tests").mkdir()
+    files = {
+        "pkg/__init__.py": "",
+        "pkg/core.py": "def add(x, y):\n    return x + y\n",
+        "pkg/extra.py": "from .core import add\n\n\ndef double(x):\n    return add(x, x)\n",
+        "pkg/other.py": "VALUE = 1\n",
+    }
+    for name, module, symbol, check in [
+        ("test_core", "pkg.core", "add", "add(1, 2) == 3"),
+        ("test_extra", "pkg.extra", "double", "double(2) == 4"),
+        ("test_other", "pkg.other", "VALUE", "VALUE == 1"),
+    ]:
+        files[f"tests/{name}.py"] = (
+            f"import unittest\n\nfrom {module} import {symbol}\n\n\n"
+            f"class T(unittest.TestCase):\n    def test_it(self):\n        self.assertTrue({check})\n"
+        )
+    for name, content in files.items():
+        (tmp_path / name).write_text(content, encoding="utf-8")
+    return tmp_path
+
+
+def test_import_graph_resolves_absolute_and_relative_imports(project):
+    cache = QualityCache(str(project))
+    graph = ImportGraph(cache, [str(project / "tests"), str(project)])
+    extra = str(project / "pkg" / "extra.py")
+    assert graph.dependencies(extra) == [
+        str(project / "pkg" / "__init__.py"),
+        str(project / "pkg" / "core.py"),
+    ]
+
+    before = graph.closure_digest(str(project / "tests" / "test_extra.py"))
+    (project / "pkg" / "core.py").write_text("def add(x, y):\n    return y + x\n", encoding="utf-8")
+    after = ImportGraph(cache, [str(project / "tests"), str(project)])
+    assert after.closure_digest(str(project / "tests" / "test_extra.py")) != before
+
+
+def test_only_tests_affected_by_a_change_rerun(project):
+    first = run_tests("tests")
+    assert first["return_code"] == 0
+    assert first["selected"] == ["test_core", "test_extra", "test_other"]
+
+    unchanged = run_tests("tests")
+    assert unchanged["selected"] == [] and unchanged["skipped_count"] == 3
+    assert unchanged["time_saved_ms"] > 0
+
+    (project / "pkg" / "core.py").write_text("def add(x, y):\n    return x - y\n", encoding="utf-8")
+    status, result = TestTool().execute(path="tests")
+    assert status == ActionStatus.SUCCESS
+    assert result["selected"] == ["test_core", "test_extra"]
+    assert result["return_code"] == 1 and "FAILED" in result["output"]
+
+    # Failing modules run again even though nothing changed; full=True runs everything
+    assert run_tests("tests")["selected"] == ["test_core", "test_extra"]
+    assert len(run_tests("tests", full=True)["selected"]) == 3
+
+
+def test_lint_only_relints_changed_files(project):
+    pytest.importorskip("ruff")
+    first = run_lint("pkg")
+    assert (first["return_code"], first["files_checked"]) == (0, 4)
+
+    (project / "pkg" / "other.py").write_text("import os\nVALUE = 1\n", encoding="utf-8")
+    second = run_lint("pkg")
+    assert (second["files_checked"], second["files_cached"]) == (1, 3)
+    assert second["return_code"] == 1 and "F401" in second["stdout"]
+    assert second["time_saved_ms"] > 0
+
+    fixed = run_lint("pkg", fix=True)
+    assert fixed["files_checked"] == 1 and fixed["return_code"] == 0
+    assert "import os" not in (project / "pkg" / "other.py").read_text(encoding="utf-8")
+
+
+def test_format_reuses_the_warm_worker_and_cached_results(project):
+    pytest.importorskip("black")
+    (project / "pkg" / "other.py").write_text("VALUE  =  {'a':1}\n", encoding="utf-8")
+
+    check = run_format("pkg", check=True)
+    assert check["return_code"] == 1 and "would reformat pkg/other.py" in check["stderr"]
+    assert check["files_checked"] == 4
+
+    again = run_format("pkg", check=True)
+    assert again["worker_warm"] and again["files_checked"] == 0
+    assert again["return_code"] == 1 and again["time_saved_ms"] > 0
+
+    written = run_format("pkg")
+    assert written["files_checked"] == 1 and "reformatted pkg/other.py" in written["stderr"]
+    assert (project / "pkg" / "other.py").read_text(encoding="utf-8") == 'VALUE = {"a": 1}\n'
+    assert run_format("pkg", check=True)["return_code"] == 0
+    assert os.path.exists(project / ".agent_state" / "quality_cache.json")
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import json
+import sys
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from agent_system.cross_session_learning import CrossSessionLearningSystem
+
+
+def _brute_force_similar(system: CrossSessionLearningSystem, goal: str):
+    goal_lower = goal.lower()
+    matches = []
+    for pattern in system.knowledge_patterns.values():
+        similarity = system._calculate_text_similarity(goal_lower, pattern.description.lower())
+        if similarity > 0.3:
+            matches.append((pattern.pattern_id, similarity))
+    matches.sort(key=lambda x: x[1], reverse=True)
+    return matches
+
+
+def test_indexed_lookup_matches_full_scan(tmp_path: Path):
+    system = CrossSessionLearningSystem(knowledge_dir=tmp_path)
+    goals = [
+        "research python asyncio patterns",
+        "research rust async runtimes",
+        "write python unit tests",
+        "analyze sales data",
+    ]
+    for goal in goals:
+        system.learn_from_goal(goal, [{"name": "search_information"}], 1.0)
+
+    for query in ("research python", "python tests", "quarterly sales data", ""):
+        indexed = [(p.pattern_id, sim) for p, sim in system.find_similar_patterns(query, limit=10)]
+        assert indexed == _brute_force_similar(system, query)
+
+
+def test_lookups_from_another_thread_survive_eviction(tmp_path: Path):
+    # The planner searches from a worker thread while goals learn on the loop
+    system = CrossSessionLearningSystem(knowledge_dir=tmp_path)
+    system.max_patterns = 20
+    system.eviction_slack = 0.0
+    done = threading.Event()
+    errors = []
+
+    def search():
+        while not done.is_set():
+            try:
+                system.find_similar_patterns("research shared topic words", limit=3)
+            except Exception as exc:  # pragma: no cover - only on regression
+                errors.append(exc)
+                return
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # Switch threads often enough to interleave the two
+    thread = threading.Thread(target=search)
+    thread.start()
+    try:
+        for i in range(3000):
+            system.learn_from_goal(f"research shared topic words {i}", [{"name": "a"}], 0.1)
+    finally:
+        done.set()
+        thread.join()
+        sys.setswitchinterval(interval)
+    assert errors == []
+    assert len(system.knowledge_patterns) == 20
+
+
+def test_eviction_is_amortized_and_stale_patterns_expire(tmp_path: Path):
+    system = CrossSessionLearningSystem(knowledge_dir=tmp_path)
+    system.max_patterns = 10
+
+    for i in range(11):
+        system.learn_from_goal(f"goal number {i}", [{"name": "act"}], 1.0)
+    assert len(system.knowledge_patterns) == 11  # within the eviction slack
+
+    for i in range(11, 12):
+        system.learn_from_goal(f"goal number {i}", [{"name": "act"}], 1.0)
+    assert len(system.knowledge_patterns) == 10
+
+    old = next(iter(system.knowledge_patterns.values()))
+    old.last_used = datetime.now() - timedelta(days=system.pattern_retention_days + 1)
+    system._touch_pattern(old)
+    system.learn_from_goal("fresh goal", [{"name": "act"}], 1.0)
+    assert old.pattern_id not in system.knowledge_patterns
+    assert all(old.pattern_id not in ids for ids in system._word_index.values())
+
+
+def test_persistence_appends_and_rotates(tmp_path: Path):
+    system = CrossSessionLearningSystem(knowledge_dir=tmp_path)
+    first = system.learn_from_goal("collect weather data", [{"name": "fetch"}], 1.0)
+    system._save_knowledge_base()
+    second = system.learn_from_goal("summarize weather data", [{"name": "summarize"}], 0.5)
+    system._save_knowledge_base()
+
+    journal = tmp_path / "knowledge_patterns.jsonl"
+    entries = [json.loads(line) for line in journal.read_text().splitlines()]
+    assert [entry["pattern"]["pattern_id"] for entry in entries] == [first, second]
+
+    system.end_current_session()
+    restored = CrossSessionLearningSystem(knowledge_dir=tmp_path)
+    assert set(restored.knowledge_patterns) == {first, second}
+    assert len(restored.session_history) == 1
+    assert restored.find_similar_patterns("collect weather data")[0][0].pattern_id == first
+
+    # Force compaction: the snapshot takes over and the journal is retired
+    restored._pattern_journal_entries = 10_000
+    restored._remove_pattern(second)
+    restored._save_knowledge_base()
+    assert not journal.exists()
+    snapshot = json.loads((tmp_path / "knowledge_patterns.json").read_text())
+    assert set(snapshot) == {first}
+    assert set(CrossSessionLearningSystem(knowledge_dir=tmp_path).knowledge_patterns) == {first}
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import os
+import threading
+
+import numpy as np
+
+from agent_system import embedding_service
+from agent_system.embedding_service import EmbeddingService
+
+
+class _SlowModel:
+    """Encoder that records batch sizes and takes long enough for requests to pile up."""
+
+    def __init__(self) -> None:
+        self.batches: list[int] = []
+        self.release = threading.Event()
+
+    def encode(self, texts):
+        self.release.wait(1.0)
+        self.batches.append(len(texts))
+        return np.stack([np.full(4, float(len(text))) for text in texts])
+
+
+def _service(tmp_path, model, **kwargs) -> EmbeddingService:
+    service = EmbeddingService(
+        "fake/model", cache_dir=tmp_path, model_factory=lambda name: model, **kwargs
+    )
+    service.load()
+    return service
+
+
+def test_concurrent_encodes_are_coalesced_into_micro_batches(tmp_path):
+    model = _SlowModel()
+    service = _service(tmp_path, model, batch_window_ms=50)
+    results: dict[int, np.ndarray] = {}
+
+    def worker(i: int) -> None:
+        results[i] = service.encode("x" * (i + 1))
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    model.release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert sum(model.batches) == 8
+    assert len(model.batches) < 8
+    for i, vector in results.items():
+        assert vector.tolist() == [float(i + 1)] * 4
+
+
+def test_pattern_embeddings_are_reused_from_disk(tmp_path):
+    first_model = _SlowModel()
+    first_model.release.set()
+    texts = ["research topic", "write code"]
+    first = _service(tmp_path, first_model).encode_cached(texts)
+
+    second_model = _SlowModel()
+    second = _service(tmp_path, second_model).encode_cached(texts)
+
+    assert second_model.batches == []
+    np.testing.assert_array_equal(first, second)
+    assert len(list(tmp_path.glob("fake_model-*.npy"))) == 1
+
+
+def test_failed_cache_write_leaves_no_temporary_file(tmp_path, monkeypatch):
+    model = _SlowModel()
+    model.release.set()
+
+    def full_disk(*args, **kwargs):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(embedding_service.os, "replace", full_disk)
+    vectors = _service(tmp_path, model).encode_cached(["research topic"])
+
+    assert vectors.tolist() == [[14.0] * 4]
+    assert os.listdir(tmp_path) == []
+
+
+def test_failed_load_is_reported(tmp_path):
+    def broken(name):
+        raise OSError("no network")
+
+    service = EmbeddingService("fake/model", cache_dir=tmp_path, model_factory=broken)
+    service.start_loading()
+
+    assert service.wait_until_ready(timeout=5) is False
+    assert service.load_failed
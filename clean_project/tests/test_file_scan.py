@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from agent_system import real_tools
+from agent_system.models import ActionStatus
+from agent_system.real_tools import RealFileReaderTool
+
+SRC = os.path.join(os.path.dirname(__file__), "..", "src")
+
+
+@pytest.fixture
+def log_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # file paths must sit under an allowed directory
+    path = tmp_path / "app.log"
+    path.write_bytes(
+        "".join(f"{i} {'ERROR' if i % 25 == 0 else 'info'} é\n" for i in range(1, 201)).encode()
+    )
+    return str(path)
+
+
+def test_range_tail_grep_and_sample(log_file):
+    tool = RealFileReaderTool()
+
+    status, lines = tool.execute(filepath=log_file, mode="range", start_line=10, line_count=2)
+    assert status == ActionStatus.SUCCESS
+    assert lines["content"] == "10 info é\n11 info é\n"
+
+    # A byte range cutting through "é" never returns a broken character
+    _, cut = tool.execute(filepath=log_file, mode="range", offset=8, length=5)
+    assert cut["content"] == "\n2 i"
+    _, cut = tool.execute(filepath=log_file, mode="range", offset=0, length=8)
+    assert cut["content"] == "1 info "
+
+    _, tail = tool.execute(filepath=log_file, mode="tail", lines=2)
+    assert tail["content"] == "199 info é\n200 ERROR é\n"
+
+    _, first = tool.execute(
+        filepath=log_file, mode="grep", pattern="error", ignore_case=True, max_matches=3
+    )
+    assert [m["line"] for m in first["matches"]] == [25, 50, 75]
+    assert first["truncated"]
+    _, rest = tool.execute(
+        filepath=log_file,
+        mode="grep",
+        pattern="ERROR",
+        offset=first["next_offset"],
+        first_line=first["next_line"],
+    )
+    assert [m["line"] for m in rest["matches"]] == [100, 125, 150, 175, 200]
+
+    _, sampled = tool.execute(filepath=log_file, mode="sample", count=5, seed=1)
+    assert sampled["count"] == 5
+    assert sampled == tool.execute(filepath=log_file, mode="sample", count=5, seed=1)[1]
+    assert all(s["text"].endswith(" é") for s in sampled["samples"])
+
+    status, bad = tool.execute(filepath=log_file, mode="grep", pattern="(")
+    assert status == ActionStatus.FAILURE and "invalid pattern" in bad["error"]
+
+
+def test_reads_stat_the_file_once(log_file, monkeypatch):
+    calls = []
+    real_stat = os.stat
+    size = os.path.getsize(log_file)
+
+    def counting_stat(path, *args, **kwargs):
+        if str(path) == log_file:
+            calls.append(path)
+        return real_stat(path, *args, **kwargs)
+
+    monkeypatch.setattr(real_tools.os, "stat", counting_stat)
+    status, result = RealFileReaderTool().execute(filepath=log_file, max_bytes=64)
+    assert status == ActionStatus.SUCCESS
+    assert result["truncated"] and result["size"] == size
+    assert len(calls) == 1
+
+
+def test_csv_is_profiled_while_streaming(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / "data.csv"
+    rows = ["id,price,city"] + [f"{i},{i * 1.5},{'Oslo' if i % 2 else ''}" for i in range(1, 5001)]
+    path.write_text("\n".join(rows) + "\n", encoding="utf-8")
+
+    status, preview = RealFileReaderTool().execute(filepath=str(path), max_rows=10)
+    assert status == ActionStatus.SUCCESS
+    assert preview["rows"] == 10 and "total_rows" not in preview  # stops after the preview
+
+    status, result = RealFileReaderTool().execute(filepath=str(path), max_rows=10, stats=True)
+    assert status == ActionStatus.SUCCESS
+    assert result["rows"] == 10 and result["total_rows"] == 5000
+    assert result["content"][0] == {"id": "1", "price": "1.5", "city": "Oslo"}
+
+    price = result["column_stats"]["price"]
+    assert price["type"] == "numeric"
+    assert (price["min"], price["max"]) == (1.5, 7500.0)
+    assert abs(price["p50"] - 3750) / 3750 < 0.02
+    city = result["column_stats"]["city"]
+    assert (city["type"], city["non_empty"], city["empty"], city["distinct"]) == (
+        "text",
+        2500,
+        2500,
+        1,
+    )
+    assert result["column_stats"]["id"]["distinct_capped"]
+
+
+def test_peak_rss_stays_bounded_on_a_2gb_file(tmp_path):
+    path = tmp_path / "huge.log"
+    size = 2 * 1024**3
+    with open(path, "wb") as f:  # sparse: only the marked lines occupy disk
+        f.write(b"ERROR first\n")
+        f.seek(size // 2)
+        f.write(b"\nERROR middle\n")
+        f.seek(size - 32)
+        f.write(b"\nERROR near end\nlast line\n")
+
+    script = textwrap.dedent("""
+        import json, os, resource, sys
+        os.chdir(os.path.dirname(sys.argv[1]))
+        from agent_system.real_tools import RealFileReaderTool
+        tool = RealFileReaderTool()
+        before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        results = [
+            tool.execute(filepath=sys.argv[1], mode="grep", pattern=r"ERROR \\w+")[1]["count"],
+            tool.execute(filepath=sys.argv[1], mode="tail", lines=2)[1]["content"],
+            tool.execute(filepath=sys.argv[1], mode="range", start_line=3, line_count=1)[1]["offset"],
+            tool.execute(filepath=sys.argv[1], mode="sample", count=20)[1]["count"],
+        ]
+        growth_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before
+        print(json.dumps({"results": results, "growth_mb": growth_kb / 1024}))
+        """)
+    out = subprocess.run(
+        [sys.executable, "-c", script, str(path)],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": os.path.abspath(SRC)},
+        timeout=120,
+    )
+    assert out.returncode == 0, out.stderr
+    report = json.loads(out.stdout.strip().splitlines()[-1])
+    assert report["results"][:3] == [3, "ERROR near end\nlast line\n", size // 2 + 1]
+    assert report["growth_mb"] < 256, report
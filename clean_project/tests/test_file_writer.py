@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import json
+import os
+
+import pytest
+
+from agent_system import file_write
+from agent_system.models import ActionStatus
+from agent_system.real_tools import RealFileWriterTool
+from agent_system.tools import EditFileTool
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # edit_file keeps its backups under the cwd
+    return tmp_path
+
+
+def test_write_replaces_atomically_and_counts_encoded_bytes(workdir):
+    target = workdir / "out" / "data.json"
+    status, meta = RealFileWriterTool().execute(
+        filepath=str(target), content={"name": "café", "rows": list(range(3))}, format="json"
+    )
+    assert status == ActionStatus.SUCCESS
+    assert meta["created"] is True and meta["mode"] == "write"
+    expected = json.dumps({"name": "café", "rows": [0, 1, 2]}, indent=2, ensure_ascii=False)
+    assert target.read_text(encoding="utf-8") == expected
+    assert meta["bytes_written"] == len(expected.encode("utf-8")) == target.stat().st_size
+
+    os.chmod(target, 0o640)
+
+    def failing():
+        yield "partial"
+        raise RuntimeError("stream broke")
+
+    status, error = RealFileWriterTool().execute(filepath=str(target), content=failing())
+    assert status == ActionStatus.FAILURE and "stream broke" in error["error"]
+    assert target.read_text(encoding="utf-8") == expected  # old content survives intact
+    assert os.listdir(target.parent) == ["data.json"]  # no temporary left behind
+
+    status, meta = RealFileWriterTool().execute(filepath=str(target), content="new")
+    assert meta["created"] is False and target.read_text(encoding="utf-8") == "new"
+    assert oct(target.stat().st_mode & 0o777) == oct(0o640)
+
+
+def test_append_and_streamed_chunks(workdir, monkeypatch):
+    synced = []
+    real_fsync = os.fsync
+    monkeypatch.setattr(file_write.os, "fsync", lambda fd: synced.append(fd) or real_fsync(fd))
+    log = workdir / "events.jsonl"
+    tool = RealFileWriterTool()
+    for n in range(3):
+        status, meta = tool.execute(
+            filepath=str(log), content={"n": n, "é": True}, format="json", mode="append"
+        )
+        assert status == ActionStatus.SUCCESS and meta["bytes_written"] == 21
+    assert [json.loads(line)["n"] for line in log.read_text(encoding="utf-8").splitlines()] == [
+        0,
+        1,
+        2,
+    ]
+    assert synced == []
+
+    big = workdir / "big.txt"
+    chunks = (f"line {i} ✓\n" for i in range(100_000))
+    status, meta = tool.execute(filepath=str(big), chunks=chunks, fsync=True)
+    assert meta["bytes_written"] == big.stat().st_size
+    assert big.read_text(encoding="utf-8").count("✓") == 100_000
+    assert len(synced) == 2  # the file and its directory
+
+    status, meta = tool.execute(filepath=str(big), chunks=[b"raw\n", "tail\n"], mode="append")
+    assert meta["bytes_written"] == 9 and big.read_bytes().endswith(b"raw\ntail\n")
+
+    assert tool.execute(filepath=str(big), content="x", mode="truncate")[0] == ActionStatus.FAILURE
+    assert tool.execute(filepath=str(big), chunks="not a list")[0] == ActionStatus.FAILURE
+
+
+def test_edit_file_backs_up_original_bytes_and_replaces_atomically(workdir, monkeypatch):
+    source = workdir / "module.py"
+    source.write_text("VALUE = 1\nOTHER = 1\n", encoding="utf-8")
+    os.chmod(source, 0o755)
+    inode = source.stat().st_ino
+
+    status, result = EditFileTool().execute(path="module.py", search="= 1", replace="= 2")
+    assert status == ActionStatus.SUCCESS
+    assert source.read_text(encoding="utf-8") == "VALUE = 2\nOTHER = 1\n"
+    assert result["bytes_written"] == source.stat().st_size
+    assert source.stat().st_ino != inode  # renamed into place, not rewritten
+    assert oct(source.stat().st_mode & 0o777) == oct(0o755)
+    assert (workdir / result["backup"]).read_text(encoding="utf-8") == "VALUE = 1\nOTHER = 1\n"
+
+    def full_disk(*args, **kwargs):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(file_write.os, "replace", full_disk)
+    status, error = EditFileTool().execute(path="module.py", search="OTHER", replace="MORE")
+    assert status == ActionStatus.FAILURE and "No space left" in error["error"]
+    assert source.read_text(encoding="utf-8") == "VALUE = 2\nOTHER = 1\n"
+    assert not [name for name in os.listdir(workdir) if name.endswith(".tmp")]
+
+
+def test_new_files_follow_the_current_umask(workdir):
+    previous = os.umask(0o027)  # changed after import; must still apply
+    try:
+        file_write.write_atomic(workdir / "fresh.txt", ["data"])
+    finally:
+        os.umask(previous)
+    assert oct((workdir / "fresh.txt").stat().st_mode & 0o777) == oct(0o640)
+    assert os.listdir(workdir) == ["fresh.txt"]
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import shutil
+import subprocess
+
+import pytest
+
+from agent_system import git_state
+from agent_system.models import Action, ActionStatus
+from agent_system.tools import GitTool, ToolRegistry
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+
+
+def git(repo, *args: str) -> str:
+    return subprocess.run(
+        ["git", "-c", "user.name=Test", "-c", "user.email=test@example.com", *args],
+        cwd=repo,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+
+
+def commit(repo, name: str, content: str) -> None:
+    (repo / name).write_text(content, encoding="utf-8")
+    git(repo, "add", name)
+    git(repo, "commit", "-q", "-m", f"update {name}")
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    # Files written by the test are seconds old at most; treat them as settled
+    monkeypatch.setattr(git_state, "RACY_WINDOW_NS", 0)
+    monkeypatch.chdir(tmp_path)
+    git(tmp_path, "init", "-q")
+    commit(tmp_path, "a.txt", "one\n")
+    return tmp_path
+
+
+@pytest.mark.asyncio
+async def test_status_is_cached_until_the_tree_changes(repo):
+    tool = GitTool()
+    status, first = await tool.execute(cmd="status")
+    assert status == ActionStatus.SUCCESS
+    assert (first["return_code"], first["items"], first["cached"]) == (0, [], False)
+
+    _, second = await tool.execute(cmd="status")
+    assert second["cached"] is True
+
+    (repo / "a.txt").write_text("changed\n", encoding="utf-8")
+    _, modified = await tool.execute(cmd="status")
+    assert modified["cached"] is False
+    assert modified["items"] == [{"status": " M", "path": "a.txt"}]
+
+    (repo / "new.txt").write_text("new\n", encoding="utf-8")
+    _, untracked = await tool.execute(cmd="status")
+    assert untracked["stdout"].splitlines() == [" M a.txt", "?? new.txt"]
+
+    git(repo, "add", "new.txt")
+    _, staged = await tool.execute(cmd="status")
+    assert {"status": "A ", "path": "new.txt"} in staged["items"]
+
+
+@pytest.mark.asyncio
+async def test_files_in_empty_or_ignored_only_directories_invalidate_status(repo):
+    commit(repo, ".gitignore", "*.o\n")
+    (repo / "empty").mkdir()
+    (repo / "build" / "sub").mkdir(parents=True)
+    (repo / "build" / "sub" / "x.o").write_text("obj\n", encoding="utf-8")
+    tool = GitTool()
+    await tool.execute(cmd="status")
+    _, clean = await tool.execute(cmd="status")
+    assert (clean["items"], clean["cached"]) == ([], True)
+
+    (repo / "empty" / "new.txt").write_text("new\n", encoding="utf-8")
+    _, first = await tool.execute(cmd="status")
+    assert (first["items"], first["cached"]) == ([{"status": "??", "path": "empty/"}], False)
+
+    (repo / "build" / "sub" / "main.c").write_text("int main;\n", encoding="utf-8")
+    _, second = await tool.execute(cmd="status")
+    assert {"status": "??", "path": "build/"} in second["items"]
+    assert second["cached"] is False
+
+
+@pytest.mark.asyncio
+async def test_recently_written_files_are_not_cached(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    git(tmp_path, "init", "-q")
+    commit(tmp_path, "a.txt", "one\n")
+    tool = GitTool()
+    (tmp_path / "a.txt").write_text("changed\n", encoding="utf-8")
+    await tool.execute(cmd="status")
+    _, again = await tool.execute(cmd="status")
+    assert again["cached"] is False  # a.txt is younger than RACY_WINDOW_NS
+    assert again["items"] == [{"status": " M", "path": "a.txt"}]
+
+
+@pytest.mark.asyncio
+async def test_log_extends_the_cached_commit_list(repo):
+    tool = GitTool()
+    commit(repo, "b.txt", "two\n")
+    _, first = await tool.execute(cmd="log", n=5)
+    assert [c["subject"] for c in first["items"]] == ["update b.txt", "update a.txt"]
+
+    calls = git_state.shared_git_state(str(repo)).git_calls
+    _, again = await tool.execute(cmd="log", n=5)
+    assert again["cached"] is True
+    assert git_state.shared_git_state(str(repo)).git_calls == calls
+
+    commit(repo, "c.txt", "three\n")
+    _, extended = await tool.execute(cmd="log", n=1)
+    assert extended["stdout"].endswith("update c.txt")
+    assert extended["has_more"] is True and extended["next_offset"] == 1
+    _, rest = await tool.execute(cmd="log", n=5, offset=extended["next_offset"])
+    assert [c["subject"] for c in rest["items"]] == ["update b.txt", "update a.txt"]
+    assert rest["items"][0]["parents"] == [first["items"][0]["parents"][0]]
+
+    git(repo, "reset", "-q", "--hard", "HEAD~2")
+    _, rewound = await tool.execute(cmd="log")
+    assert [c["subject"] for c in rewound["items"]] == ["update a.txt"]
+
+
+@pytest.mark.asyncio
+async def test_log_rebuilds_when_head_moves_back_across_a_merge(repo, monkeypatch):
+    # Dated so that git log lists the side commit between the merge and the main one
+    monkeypatch.setenv("GIT_COMMITTER_DATE", "2030-01-01T00:00:10")
+    commit(repo, "c.txt", "main\n")
+    git(repo, "checkout", "-q", "-b", "side", "HEAD~1")
+    monkeypatch.setenv("GIT_COMMITTER_DATE", "2030-01-01T00:00:20")
+    commit(repo, "b.txt", "side\n")
+    git(repo, "checkout", "-q", "-")
+    monkeypatch.setenv("GIT_COMMITTER_DATE", "2030-01-01T00:00:30")
+    git(repo, "merge", "-q", "--no-edit", "side")
+    tool = GitTool()
+    _, merged = await tool.execute(cmd="log", n=10)
+    assert [c["subject"] for c in merged["items"][1:]] == [
+        "update b.txt",
+        "update c.txt",
+        "update a.txt",
+    ]
+
+    git(repo, "reset", "-q", "--hard", "side")
+    _, rewound = await tool.execute(cmd="log", n=10)
+    assert [c["subject"] for c in rewound["items"]] == ["update b.txt", "update a.txt"]
+
+
+@pytest.mark.asyncio
+async def test_batched_queries_and_pagination(repo):
+    for i in range(5):
+        (repo / f"f{i}.txt").write_text("x\n", encoding="utf-8")
+    (repo / "a.txt").write_text("edited\n", encoding="utf-8")
+
+    status, result = await GitTool().execute(
+        queries=[
+            {"cmd": "status", "limit": 2},
+            {"cmd": "status", "offset": 4, "limit": 2},
+            {"cmd": "diff"},
+            {"cmd": "log", "n": 1},
+        ]
+    )
+    assert status == ActionStatus.SUCCESS
+    head, tail, diff, log = result["results"]
+    assert head["total"] == 6 and head["next_offset"] == 2 and len(head["items"]) == 2
+    assert [e["path"] for e in tail["items"]] == ["f3.txt", "f4.txt"]
+    assert tail["has_more"] is False and tail["next_offset"] is None
+    assert tail["cached"] is True  # the batch shares one snapshot of the tree
+    assert diff["items"] == ["a.txt"]
+    assert log["items"][0]["subject"] == "update a.txt"
+
+    status, error = await GitTool().execute(queries=[{"cmd": "status"}, {"cmd": "push"}])
+    assert status == ActionStatus.FAILURE and error == {"error": "unsupported git cmd"}
+
+
+@pytest.mark.asyncio
+async def test_registry_awaits_git_tool_and_reports_non_repositories(tmp_path, monkeypatch):
+    registry = ToolRegistry()
+    registry.register_tool(GitTool())
+    action = Action(
+        id="g1",
+        name="git",
+        tool_name="git",
+        parameters={"cmd": "status"},
+        expected_outcome="git_ok",
+        cost=0.05,
+    )
+    try:
+        monkeypatch.chdir(tmp_path)
+        observation = await registry.execute_action_async(action)
+        assert observation.status == ActionStatus.SUCCESS
+        assert observation.result["return_code"] != 0
+        assert "not a git repository" in observation.result["stderr"]
+
+        git(tmp_path, "init", "-q")
+        (tmp_path / "x.txt").write_text("x\n", encoding="utf-8")
+        observation = registry.execute_action(action)  # sync callers still work
+        assert observation.result["items"] == [{"status": "??", "path": "x.txt"}]
+    finally:
+        registry.shutdown()
@@ -32,6 +32,42 @@ class GoalManagerTests(unittest.TestCase):
         second = self.manager.get_next_goal()
         self.assertEqual(second.id, child.id)
 
+    def test_blocked_goals_stay_out_of_ready_queue(self):
+        first = self.manager.add_goal("First", priority=0.1)
+        waiting = self.manager.add_goal("Waiting", priority=0.9)
+        self.manager.add_dependency(waiting.id, first.id)
+
+        self.assertEqual(waiting.status, GoalStatus.BLOCKED)
+        self.assertEqual(self.manager.get_next_goal().id, first.id)
+        self.assertIsNone(self.manager.get_next_goal())
+        self.assertTrue(self.manager.has_pending_goals())
+
+        self.manager.update_goal_status(first.id, GoalStatus.COMPLETED, progress=1.0)
+        self.assertEqual(self.manager.get_next_goal().id, waiting.id)
+        self.assertFalse(self.manager.has_pending_goals())
+
+    def test_goal_waits_for_every_dependency(self):
+        a = self.manager.add_goal("A")
+        b = self.manager.add_goal("B")
+        c = self.manager.add_goal("C", priority=0.9)
+        self.manager.add_dependency(c.id, a.id)
+        self.manager.add_dependency(c.id, b.id)
+        self.manager.add_dependency(c.id, "goal_missing")
+
+        self.manager.update_goal_status(a.id, GoalStatus.COMPLETED)
+        self.assertEqual(c.status, GoalStatus.BLOCKED)
+        self.manager.update_goal_status(b.id, GoalStatus.COMPLETED)
+        self.assertEqual(c.status, GoalStatus.PENDING)
+        self.assertEqual(self.manager.get_next_goal().id, c.id)
+
+    def test_pending_count_tracks_status_changes(self):
+        goals = [self.manager.add_goal(f"Goal {i}") for i in range(5)]
+        self.assertEqual(self.manager.pending_goal_count, 5)
+
+        self.manager.get_next_goal()
+        self.manager.update_goal_status(goals[1].id, GoalStatus.FAILED)
+        self.assertEqual(self.manager.pending_goal_count, 3)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import statistics
+from datetime import datetime, timedelta
+
+from agent_system.intelligent_observation_analyzer import (
+    IntelligentObservationAnalyzer,
+    RollingStat,
+)
+from agent_system.models import ActionStatus, Goal, Observation
+
+
+def _observation(
+    status: ActionStatus = ActionStatus.SUCCESS,
+    tool: str = "web_search",
+    latency_ms: float = 10.0,
+    timestamp: datetime | None = None,
+) -> Observation:
+    observation = Observation(
+        action_id="search_information",
+        status=status,
+        result={"results": ["found"]} if status == ActionStatus.SUCCESS else None,
+        feedback="Completed" if status == ActionStatus.SUCCESS else "failed",
+        metrics={"tool": tool, "latency_ms": latency_ms},
+    )
+    if timestamp is not None:
+        observation.timestamp = timestamp
+    return observation
+
+
+def _goal() -> Goal:
+    return Goal(id="g1", description="research python packaging", priority=0.5)
+
+
+def test_rolling_stat_matches_batch_statistics():
+    values = [3.0, 7.0, 1.0, 9.0, 4.0]
+    stat = RollingStat()
+    for value in values:
+        stat.update(value, alpha=0.5)
+
+    assert stat.count == 5
+    assert abs(stat.mean - statistics.mean(values)) < 1e-9
+    assert abs(stat.std - statistics.stdev(values)) < 1e-9
+    assert stat.ewma == 5.0
+
+
+def test_learning_window_is_bounded_and_aggregates_follow_evictions():
+    analyzer = IntelligentObservationAnalyzer(learning_window=3)
+    goal = _goal()
+
+    for _ in range(3):
+        analyzer.analyze_observation(_observation(), "search results", goal)
+    for _ in range(3):
+        analyzer.analyze_observation(_observation(ActionStatus.FAILURE), "search results", goal)
+
+    insights = analyzer.get_learning_insights()
+    assert len(analyzer.learning_data) == 3
+    assert insights["total_analyses"] == 3
+    assert insights["high_success_rate"] == 0.0
+    assert sum(insights["common_outcome_types"].values()) == 3
+    assert insights["tool_statistics"]["web_search"]["success"]["count"] == 6
+
+
+def test_detect_anomalies_uses_recent_window():
+    analyzer = IntelligentObservationAnalyzer()
+    goal = _goal()
+
+    assert analyzer.detect_anomalies() == []
+    analyzer.analyze_observation(_observation(), "search results", goal)
+    assert analyzer.detect_anomalies() == []
+
+    for _ in range(5):
+        analyzer.analyze_observation(_observation(ActionStatus.FAILURE), "search results", goal)
+    assert analyzer.detect_anomalies() == [
+        "High failure rate detected",
+        "All recent actions failed",
+    ]
+
+    stale = datetime.now() - timedelta(minutes=10)
+    assert (
+        analyzer.detect_anomalies(
+            [_observation(timestamp=stale), _observation(timestamp=stale)]
+        ).count("Stale observation detected")
+        == 1
+    )
+
+
+def test_latency_outlier_is_flagged_against_tool_history():
+    analyzer = IntelligentObservationAnalyzer()
+    goal = _goal()
+
+    for latency in (10.0, 11.0, 9.0, 10.5, 9.5) * 2:
+        analysis = analyzer.analyze_observation(
+            _observation(latency_ms=latency), "search results", goal
+        )
+        assert "Latency outlier for web_search" not in analysis["anomalies"]
+
+    analysis = analyzer.analyze_observation(_observation(latency_ms=500.0), "search results", goal)
+    assert "Latency outlier for web_search" in analysis["anomalies"]
+    assert (
+        "Latency outlier for web_search (1 occurrences)"
+        in analyzer.get_learning_insights()["anomaly_patterns"]
+    )
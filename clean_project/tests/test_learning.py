@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import unittest
+
+from agent_system.learning import LearningSystem, RunningStat
+
+
+class LearningSystemTests(unittest.TestCase):
+    def test_best_strategy_tracks_updates(self):
+        learning = LearningSystem()
+        for score in (1.0, 1.0):
+            learning.record_strategy("a->b", score)
+        for score in (1.0, 0.0):
+            learning.record_strategy("c->d", score)
+        self.assertEqual(learning.get_best_strategy("any"), "a->b")
+
+        for _ in range(4):
+            learning.record_strategy("a->b", 0.0)
+        self.assertEqual(learning.get_best_strategy("any"), "c->d")
+
+    def test_best_strategy_requires_two_episodes(self):
+        learning = LearningSystem()
+        learning.record_strategy("single", 1.0)
+        self.assertIsNone(learning.get_best_strategy("any"))
+
+    def test_heap_stays_bounded(self):
+        learning = LearningSystem()
+        for _ in range(1000):
+            learning.record_strategy("only", 1.0)
+        self.assertLessEqual(len(learning._strategy_heap), 2 * 1 + 17)
+        self.assertEqual(learning.get_learning_stats()["total_episodes"], 1000)
+
+    def test_decay_weights_recent_outcomes(self):
+        stat = RunningStat()
+        stat.update(0.0, alpha=0.2, now=0.0, half_life=10.0)
+        stat.update(1.0, alpha=0.2, now=100.0, half_life=10.0)
+        self.assertGreater(stat.mean, 0.99)
+        self.assertEqual(stat.last_seen, 100.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,9 +4,14 @@ Tests throughput, latency, concurrency, and resource usage.
 """
 
 import asyncio
+import os
+import shutil
 import statistics
 import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from datetime import datetime
 from typing import Dict, List
 from unittest.mock import AsyncMock, patch
 
@@ -14,9 +19,12 @@ import pytest
 
 from agent_system.advanced_monitoring import AdvancedMonitoringSystem, MetricType
 from agent_system.agent import AutonomousAgent
+from agent_system.ai_performance_monitor import AIPerformanceMonitor, MetricPoint
 from agent_system.cache_manager import cache_manager
 from agent_system.distributed_message_queue import DistributedMessageQueue, MessagePriority
-from agent_system.tools import ToolRegistry
+from agent_system.intelligent_action_selector import IntelligentActionSelector
+from agent_system.models import Action, ActionStatus, Goal
+from agent_system.tools import CodeSearchTool, Tool, ToolRegistry
 
 
 @dataclass
@@ -202,6 +210,209 @@ class PerformanceBenchmark:
             total_time,
         )
 
+    @staticmethod
+    def benchmark_action_selection(
+        candidate_counts: List[int] = [10, 50, 200],
+        iterations: int = 200,
+    ) -> Dict[int, BenchmarkResult]:
+        """Benchmark IntelligentActionSelector latency versus candidate count."""
+        names = ["search_information", "load_data", "execute_code", "analyze_sources"]
+        goal = Goal(id="bench", description="Research data files and execute code", priority=0.5)
+        context = {"recent_actions": ["load_data"], "context_type": "research"}
+        results = {}
+
+        for count in candidate_counts:
+            selector = IntelligentActionSelector()
+            actions = [
+                Action(
+                    id=f"bench_action_{i}",
+                    name=names[i % len(names)],
+                    tool_name="generic_tool",
+                    parameters={"query": f"data files {i}"},
+                    expected_outcome="done",
+                    cost=0.1,
+                    prerequisites=[f"bench_action_{i - 1}"] if i % 3 == 0 and i else [],
+                )
+                for i in range(count)
+            ]
+            times = []
+
+            start_time = time.perf_counter()
+            for _ in range(iterations):
+                select_start = time.perf_counter()
+                selector.select_action(actions, goal, context, [])
+                times.append(time.perf_counter() - select_start)
+            total_time = time.perf_counter() - start_time
+
+            results[count] = PerformanceBenchmark._calculate_stats(
+                f"action_selection_{count}_candidates",
+                times,
+                iterations,
+                total_time,
+            )
+
+        return results
+
+    @staticmethod
+    def benchmark_code_search(
+        root: str,
+        file_count: int = 2000,
+        queries: List[str] = [r"def handle_\w+_request", "TODO: remove", r"class Widget\d+"],
+        iterations: int = 5,
+    ) -> Dict[str, BenchmarkResult]:
+        """Compare the full tree scan with cold and warm trigram-indexed code search."""
+        for i in range(file_count):
+            package = os.path.join(root, f"pkg{i % 20}")
+            os.makedirs(package, exist_ok=True)
+            with open(os.path.join(package, f"module_{i}.py"), "w", encoding="utf-8") as f:
+                f.write(f"class Widget{i}:\n")
+                for j in range(50):
+                    f.write(f"    def method_{j}(self, value):\n        return value * {j}\n")
+                if i % 97 == 0:
+                    f.write(f"def handle_{i}_request():\n    pass  # TODO: remove\n")
+
+        def run(tool: CodeSearchTool, use_index: bool) -> float:
+            start = time.perf_counter()
+            for query in queries:
+                tool.execute(pattern=query, path=root, use_index=use_index)
+            return time.perf_counter() - start
+
+        results = {}
+        tool = CodeSearchTool()
+        modes = {
+            "scan": lambda: run(tool, use_index=False),
+            "cold_index": lambda: run(CodeSearchTool(), use_index=True),
+            "warm_index": lambda: run(tool, use_index=True),
+        }
+        for mode, measure in modes.items():
+            times = []
+            for _ in range(iterations):
+                if mode == "cold_index":
+                    shutil.rmtree(os.path.join(root, ".agent_code_index"), ignore_errors=True)
+                times.append(measure())
+            results[mode] = PerformanceBenchmark._calculate_stats(
+                f"code_search_{mode}_{file_count}_files",
+                times,
+                iterations * len(queries),
+                sum(times),
+            )
+        return results
+
+    @staticmethod
+    def benchmark_async_tool_overhead(iterations: int = 300) -> Dict[str, BenchmarkResult]:
+        """Per-call overhead of an async no-op tool on each registry execution path.
+
+        ``native`` awaits ``execute_action_async`` on the caller's loop,
+        ``background_loop`` calls ``execute_action`` from sync code, and
+        ``per_call_loop`` replays the former bridge of one thread plus one
+        ``asyncio.run`` per call.
+        """
+
+        class AsyncNoopTool(Tool):
+            @property
+            def name(self) -> str:
+                return "async_noop"
+
+            async def execute(self, **kwargs):
+                return ActionStatus.SUCCESS, None
+
+        def per_call_loop(tool, parameters):
+            with ThreadPoolExecutor(max_workers=1) as ex:
+                return ex.submit(asyncio.run, tool.execute(**parameters)).result()
+
+        def make_registry(legacy: bool = False) -> ToolRegistry:
+            registry = ToolRegistry()
+            registry.register_tool(AsyncNoopTool())
+            if legacy:
+                registry._invoke_tool_sync = per_call_loop
+            return registry
+
+        def action(i: int) -> Action:
+            return Action(
+                id=f"noop-{i}",
+                name="noop",
+                tool_name="async_noop",
+                parameters={"i": i},
+                expected_outcome="done",
+                cost=0.0,
+            )
+
+        async def run_native(registry: ToolRegistry) -> List[float]:
+            times = []
+            for i in range(iterations):
+                start = time.perf_counter()
+                await registry.execute_action_async(action(i), retry=False)
+                times.append(time.perf_counter() - start)
+            return times
+
+        def run_sync(registry: ToolRegistry) -> List[float]:
+            times = []
+            for i in range(iterations):
+                start = time.perf_counter()
+                registry.execute_action(action(i), retry=False)
+                times.append(time.perf_counter() - start)
+            return times
+
+        modes = {
+            "native": lambda: asyncio.run(run_native(make_registry())),
+            "background_loop": lambda: run_sync(make_registry()),
+            "per_call_loop": lambda: run_sync(make_registry(legacy=True)),
+        }
+        results = {}
+        for mode, measure in modes.items():
+            times = measure()
+            results[mode] = PerformanceBenchmark._calculate_stats(
+                f"async_tool_overhead_{mode}", times, iterations, sum(times)
+            )
+        return results
+
+    @staticmethod
+    def benchmark_monitor_step_overhead(
+        monitor_dir: str, steps: int = 20000
+    ) -> Dict[str, BenchmarkResult]:
+        """Per-step cost of recording an agent step's metrics in AIPerformanceMonitor.
+
+        One step records a step latency and two decisions, as the agent does.
+        ``series`` is the current ring-buffer path with batched threshold checks;
+        ``per_point`` replays the former path of one ``MetricPoint`` per sample in a
+        deque plus an inline threshold check.
+        """
+
+        class PerPointMonitor(AIPerformanceMonitor):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.points = defaultdict(lambda: deque(maxlen=self.history_size))
+
+            def _record_metric(self, metric_name, value, metadata=None):
+                point = MetricPoint(timestamp=datetime.now(), value=value, metadata=metadata or {})
+                self.points[metric_name].append(point)
+                self.current_metrics[metric_name] = value
+                self._check_thresholds(metric_name, value)
+
+        def run(monitor: AIPerformanceMonitor) -> List[float]:
+            times = []
+            try:
+                for i in range(steps):
+                    start = time.perf_counter()
+                    monitor.record_step_latency("goal", 12.5)
+                    monitor.record_decision_metrics("action_selection", 3.0, 0.9, True)
+                    monitor.record_decision_metrics("observation_analysis", 2.0, 0.8, True)
+                    times.append(time.perf_counter() - start)
+            finally:
+                monitor.close()
+            return times
+
+        results = {}
+        for mode, monitor_class in (
+            ("series", AIPerformanceMonitor),
+            ("per_point", PerPointMonitor),
+        ):
+            times = run(monitor_class(monitor_dir=monitor_dir, threshold_check_interval=60))
+            results[mode] = PerformanceBenchmark._calculate_stats(
+                f"monitor_step_overhead_{mode}", times, steps, sum(times)
+            )
+        return results
+
     @staticmethod
     def _calculate_stats(
         name: str,
@@ -314,6 +525,43 @@ async def test_benchmark_tool_execution():
     assert result.operations > 0
 
 
+@pytest.mark.benchmark
+def test_benchmark_code_search(tmp_path):
+    """Benchmark code search: full scan versus cold and warm trigram index."""
+    results = PerformanceBenchmark.benchmark_code_search(str(tmp_path), file_count=600)
+    PerformanceBenchmark.print_results(list(results.values()))
+    assert results["warm_index"].p50 < results["scan"].p50
+
+
+@pytest.mark.benchmark
+def test_benchmark_action_selection():
+    """Benchmark action selection latency versus candidate count."""
+    results = PerformanceBenchmark.benchmark_action_selection(
+        candidate_counts=[10, 50, 200],
+        iterations=100,
+    )
+    PerformanceBenchmark.print_results(list(results.values()))
+    assert all(r.operations == 100 for r in results.values())
+    assert results[200].p95 < 0.05  # Selecting among 200 candidates stays well under 50ms
+
+
+@pytest.mark.benchmark
+def test_benchmark_async_tool_overhead():
+    """Benchmark per-call overhead of an async no-op tool."""
+    results = PerformanceBenchmark.benchmark_async_tool_overhead(iterations=300)
+    PerformanceBenchmark.print_results(list(results.values()))
+    assert results["background_loop"].p50 < results["per_call_loop"].p50
+    assert results["native"].p50 < results["per_call_loop"].p50
+
+
+@pytest.mark.benchmark
+def test_benchmark_monitor_step_overhead(tmp_path):
+    """Benchmark the metrics-recording overhead of one agent step."""
+    results = PerformanceBenchmark.benchmark_monitor_step_overhead(str(tmp_path), steps=20000)
+    PerformanceBenchmark.print_results(list(results.values()))
+    assert results["series"].p50 < results["per_point"].p50
+
+
 class TestAdvancedMonitoringSystem:
     """Tests for business metric handling in the monitoring system."""
 
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import sys
 from pathlib import Path
+from types import SimpleNamespace
 
 import pytest
 
@@ -19,6 +20,7 @@ from agent_system.enhanced_persistence import (
     load_memory_system_async,
     save_action_selector,
     save_action_selector_async,
+    save_all_async,
     save_learning_system,
     save_learning_system_async,
     save_memory_system,
@@ -65,16 +67,39 @@ def test_action_selector_roundtrip():
 
 def test_learning_system_roundtrip():
     learning = LearningSystem()
-    learning.strategy_performance["strategy"] = [1.0, 0.5]
-    learning.pattern_library["pattern"] = [("act", 0.75)]
+    learning.record_strategy("strategy", 1.0)
+    learning.record_strategy("strategy", 0.5)
+    learning.record_pattern("pattern", "act", 0.75)
 
     save_learning_system(learning)
 
     restored = LearningSystem()
     payload = load_learning_system(restored)
 
-    assert payload["strategy_performance"]["strategy"] == [1.0, 0.5]
-    assert restored.pattern_library["pattern"] == [("act", 0.75)]
+    assert payload["strategy_performance"]["strategy"]["n"] == 2
+    assert payload["strategy_performance"]["strategy"]["sum"] == 1.5
+    assert restored.pattern_library["pattern"]["act"].mean == 0.75
+    assert restored.total_episodes == 2
+    assert restored.get_best_strategy("any") == "strategy"
+
+
+def test_learning_system_loads_legacy_score_lists():
+    save_learning_system(
+        {
+            "strategy_performance": {"good": [1.0, 1.0, 0.0], "bad": [0.0, 0.0]},
+            "pattern_library": {"pattern": [["act", 1.0], ["act", 0.0], ["other", 1.0]]},
+        }
+    )
+
+    restored = LearningSystem()
+    load_learning_system(restored)
+
+    assert restored.strategy_performance["good"].count == 3
+    assert abs(restored.strategy_performance["good"].mean - 2 / 3) < 1e-9
+    assert restored.pattern_library["pattern"]["act"].mean == 0.5
+    assert restored.pattern_library["pattern"]["other"].mean == 1.0
+    assert restored.total_episodes == 5
+    assert restored.get_best_strategy("any") == "good"
 
 
 def test_memory_system_roundtrip():
@@ -132,16 +157,18 @@ async def test_async_action_selector_roundtrip():
 @pytest.mark.asyncio
 async def test_async_learning_system_roundtrip():
     learning = LearningSystem()
-    learning.strategy_performance["strategy"] = [0.8, 0.9]
-    learning.pattern_library["pattern"] = [("reflect", 0.6)]
+    learning.record_strategy("strategy", 0.8)
+    learning.record_strategy("strategy", 0.9)
+    learning.record_pattern("pattern", "reflect", 0.6)
 
     await save_learning_system_async(learning)
 
     restored = LearningSystem()
     payload = await load_learning_system_async(restored)
 
-    assert payload["strategy_performance"]["strategy"] == [0.8, 0.9]
-    assert restored.pattern_library["pattern"] == [("reflect", 0.6)]
+    assert payload["strategy_performance"]["strategy"]["n"] == 2
+    assert abs(restored.strategy_performance["strategy"].mean - 0.85) < 1e-9
+    assert restored.pattern_library["pattern"]["reflect"].mean == 0.6
 
 
 @pytest.mark.asyncio
@@ -179,3 +206,123 @@ async def test_async_memory_system_roundtrip():
     assert len(payload) == 1
     assert len(restored.working_memory) == 1
     assert restored.working_memory[0].observation.metrics["duration_ms"] == 5
+
+
+@pytest.mark.asyncio
+async def test_save_all_async_writes_a_snapshot_taken_on_the_loop(monkeypatch):
+    selector = IntelligentActionSelector()
+    selector.action_history["goal/test"] = {
+        "total_attempts": 1,
+        "successes": 1,
+        "success_scores": [1.0],
+    }
+    memory_system = MemorySystem()
+    _store_memories(memory_system, 2)
+    agent = SimpleNamespace(
+        action_selector=selector, learning_system=LearningSystem(), memory_system=memory_system
+    )
+    real_save = enterprise_persistence.save_action_selector
+
+    def save_while_the_loop_mutates(selector_data, *args, **kwargs):
+        # Goals keep running while the write is in flight
+        selector.action_history["goal/test"]["success_scores"].append(0.0)
+        selector.action_history["goal/other"] = {"total_attempts": 1}
+        _store_memories(memory_system, 1)
+        real_save(selector_data, *args, **kwargs)
+
+    monkeypatch.setattr(enterprise_persistence, "save_action_selector", save_while_the_loop_mutates)
+    await save_all_async(agent)
+
+    payload = load_action_selector(IntelligentActionSelector())
+    assert payload["action_history"] == {
+        "goal/test": {"total_attempts": 1, "successes": 1, "success_scores": [1.0]}
+    }
+    assert len(load_memory_system(MemorySystem())) == 2
+
+
+def _store_memories(memory_system: MemorySystem, count: int) -> None:
+    for index in range(count):
+        action = Action(
+            id=f"action-{index}",
+            name="search_information",
+            tool_name="web",
+            parameters={"query": f"q{index}"},
+            expected_outcome="result",
+            cost=0.1,
+            prerequisites=[],
+        )
+        observation = Observation(
+            action_id=action.id,
+            status=ActionStatus.SUCCESS,
+            result={"index": index},
+        )
+        memory_system.store_memory(
+            goal_id="goal-stream",
+            action=action,
+            observation=observation,
+            context={"goal_description": f"stream memory {index}"},
+            success_score=0.5,
+        )
+
+
+def test_memory_system_defers_older_episodic_memories():
+    memory_system = MemorySystem(working_memory_size=3)
+    _store_memories(memory_system, 12)
+    save_memory_system(memory_system)
+
+    restored = MemorySystem(working_memory_size=3)
+    payload = load_memory_system(restored, eager_episodic=2)
+
+    assert len(payload) == 5
+    assert len(restored.working_memory) == 3
+    assert not restored.episodic_memory_loaded
+    assert len(restored.loaded_episodic_memory) == 2
+    assert restored.memory_counter == 12
+
+    # New memories are numbered after the persisted ones, without hydration.
+    _store_memories(restored, 1)
+    assert restored.working_memory[-1].id == "mem_13"
+    assert not restored.episodic_memory_loaded
+
+    # First recall streams the remaining history in chronological order.
+    ids = [memory.id for memory in restored.episodic_memory]
+    assert restored.episodic_memory_loaded
+    assert sorted(ids) == sorted(f"mem_{index}" for index in range(1, 11))
+    assert ids[-1] == "mem_10"
+
+
+@pytest.mark.asyncio
+async def test_saves_and_stats_leave_deferred_history_in_the_database(monkeypatch):
+    memory_system = MemorySystem(working_memory_size=3)
+    _store_memories(memory_system, 12)
+    save_memory_system(memory_system)
+
+    restored = MemorySystem(working_memory_size=3)
+    load_memory_system(restored, eager_episodic=2)
+    stats = restored.get_memory_stats()
+    assert stats["episodic_memory_size"] == 9
+    assert stats["avg_success_score"] == 0.5
+    assert not restored.episodic_memory_loaded
+
+    written = []
+    real_save = enterprise_persistence.save_memories
+
+    def record(memories, *args, **kwargs):
+        written.append(sorted((memory["id"], memory["type"]) for memory in memories))
+        real_save(memories, *args, **kwargs)
+
+    monkeypatch.setattr(enterprise_persistence, "save_memories", record)
+    agent = SimpleNamespace(
+        action_selector=IntelligentActionSelector(),
+        learning_system=LearningSystem(),
+        memory_system=restored,
+    )
+    await save_all_async(agent)
+    _store_memories(restored, 1)
+    await save_all_async(agent)
+
+    assert not restored.episodic_memory_loaded
+    # Only the new memory and the one it pushed out of working memory are written
+    assert written == [[], [("mem_10", "episodic"), ("mem_13", "working")]]
+    assert restored.get_memory_stats()["episodic_memory_size"] == 10
+    assert len(restored.episodic_memory) == 10
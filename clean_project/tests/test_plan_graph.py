@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from agent_system.models import Action
+from agent_system.plan_graph import PlanGraph
+
+
+def _action(action_id: str, *prereqs: str, cost: float = 1.0) -> Action:
+    return Action(
+        id=action_id,
+        name=action_id,
+        tool_name="generic_tool",
+        parameters={},
+        expected_outcome="done",
+        cost=cost,
+        prerequisites=list(prereqs),
+    )
+
+
+def test_ready_actions_follow_prerequisites():
+    graph = PlanGraph(
+        [_action("search_a"), _action("search_b"), _action("merge", "search_a", "search_b")]
+    )
+
+    assert [a.id for a in graph.ready([])] == ["search_a", "search_b"]
+    assert [a.id for a in graph.ready(["search_a"])] == ["search_b"]
+    assert [a.id for a in graph.ready(["search_a", "search_b"])] == ["merge"]
+    assert graph.ready(["search_a", "search_b", "merge"]) == []
+
+
+def test_critical_path_counts_longest_chain():
+    graph = PlanGraph(
+        [
+            _action("a", cost=2.0),
+            _action("b", cost=0.5),
+            _action("c", "a", cost=1.0),
+            _action("d", "b", "c", cost=1.0),
+        ]
+    )
+
+    assert graph.critical_path_length == 3
+    assert graph.critical_path_cost == 4.0
+    assert graph.parallelism == 4 / 3
+
+
+def test_unknown_prerequisites_are_ignored_and_cycles_do_not_stall():
+    graph = PlanGraph([_action("a", "external"), _action("b", "c"), _action("c", "b")])
+
+    assert [a.id for a in graph.ready([])] == ["a"]
+    assert [a.id for a in graph.ready(["a"])] == ["b"]
+    assert [a.id for a in graph.ready(["a", "b"])] == ["c"]
+    assert graph.critical_path_length == 3
@@ -49,7 +49,7 @@ async def test_provider_order_and_disable(monkeypatch):
     assert status == ActionStatus.SUCCESS
     assert result.get("search_engine") == "bing"
     assert called["bing"] == 1
-    assert called["serpapi"] == 1  # tried after bing only if needed; our fake returns directly
+    assert called["serpapi"] == 0  # tried after bing only if needed
 
     # Now disable bing; serpapi should be used
     unified_config.api.disabled_search_providers = ["bing"]
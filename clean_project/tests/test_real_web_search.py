@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import pytest
+
+from agent_system import real_tools
+from agent_system.models import ActionStatus
+from agent_system.real_tools import RealWebSearchTool, SearchResultCache
+from agent_system.unified_config import unified_config
+
+
+class StubSearchServer(ThreadingHTTPServer):
+    """Serves fake provider APIs under /<provider> and HTML pages under /page/<n>."""
+
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.hits: dict[str, int] = {}
+        self.delays: dict[str, float] = {}
+        self.statuses: dict[str, int] = {}
+        self.active_pages = 0
+        self.max_active_pages = 0
+        self.lock = threading.Lock()
+
+    @property
+    def base(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server: StubSearchServer
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        route = urlsplit(self.path).path.strip("/")
+        provider = route.split("/")[0]
+        with self.server.lock:
+            self.server.hits[provider] = self.server.hits.get(provider, 0) + 1
+        if provider == "page":
+            return self._page(route)
+        time.sleep(self.server.delays.get(provider, 0))
+        status = self.server.statuses.get(provider, 200)
+        links = [f"{self.server.base}/page/{i}" for i in range(4)]
+        if provider == "serpapi":
+            body = {"organic_results": [{"title": provider, "link": link} for link in links]}
+        elif provider == "bing":
+            body = {"webPages": {"value": [{"name": provider, "url": link} for link in links]}}
+        else:
+            body = {"items": [{"title": provider, "link": link} for link in links]}
+        self._send(status, "application/json", json.dumps(body))
+
+    def _page(self, route: str) -> None:
+        with self.server.lock:
+            self.server.active_pages += 1
+            self.server.max_active_pages = max(
+                self.server.max_active_pages, self.server.active_pages
+            )
+        try:
+            time.sleep(0.2)
+            self._send(200, "text/html", f"<html><title>{route}</title><p>body</p></html>")
+        finally:
+            with self.server.lock:
+                self.server.active_pages -= 1
+
+    def _send(self, status: int, content_type: str, body: str) -> None:
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    server = StubSearchServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(real_tools, "get_api_key", lambda provider: "test-key")
+    monkeypatch.setenv("GOOGLE_CSE_ID", "cx")
+    monkeypatch.setenv("NO_PROXY", "127.0.0.1")
+    monkeypatch.setattr(unified_config.api, "search_provider_order", ["serpapi", "bing", "google"])
+    monkeypatch.setattr(unified_config.api, "disabled_search_providers", [])
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _tool(server: StubSearchServer, **kwargs) -> RealWebSearchTool:
+    endpoints = {p: f"{server.base}/{p}" for p in ("serpapi", "bing", "google")}
+    kwargs.setdefault("cache", SearchResultCache(capacity=8, ttl_seconds=60))
+    return RealWebSearchTool(endpoints=endpoints, **kwargs)
+
+
+def test_injected_empty_cache_is_kept(stub):
+    cache = SearchResultCache(capacity=8, ttl_seconds=60)
+    tool = _tool(stub, cache=cache, hedge_after=0)
+    try:
+        assert len(cache) == 0 and tool.cache is cache
+        tool.execute(query="python")
+        assert len(cache) == 1
+    finally:
+        tool.close()
+
+
+def test_providers_stop_at_first_success(stub):
+    stub.statuses["serpapi"] = 403
+    tool = _tool(stub, hedge_after=0)
+    try:
+        status, result = tool.execute(query="python")
+        assert status == ActionStatus.SUCCESS
+        assert result["search_engine"] == "bing"
+        assert stub.hits == {"serpapi": 1, "bing": 1}
+
+        # Repeated queries come from the cache
+        assert tool.execute(query="python")[1] == result
+        assert stub.hits == {"serpapi": 1, "bing": 1}
+        assert tool.get_cache_stats()["hits"] == 1
+    finally:
+        tool.close()
+
+
+def test_slow_provider_is_hedged(stub):
+    stub.delays["serpapi"] = 1.5
+    tool = _tool(stub, hedge_after=0.1)
+    try:
+        started = time.monotonic()
+        status, result = tool.execute(query="python")
+        assert status == ActionStatus.SUCCESS
+        assert result["search_engine"] == "bing"
+        assert time.monotonic() - started < 1.0
+        assert "google" not in stub.hits
+    finally:
+        tool.close()
+
+
+def test_pages_are_fetched_concurrently_within_host_limit(stub):
+    tool = _tool(stub, fetch_concurrency=4, per_host_limit=2)
+    try:
+        started = time.monotonic()
+        status, result = tool.execute(query="python", fetch=True, fetch_limit=4)
+        elapsed = time.monotonic() - started
+        assert status == ActionStatus.SUCCESS
+        assert [r["title"] for r in result["results"]] == [f"page/{i}" for i in range(4)]
+        assert stub.max_active_pages == 2
+        assert elapsed < 0.75  # four 200ms pages, two at a time
+    finally:
+        tool.close()
+
+
+def test_cache_is_bounded_expires_and_persists(tmp_path):
+    path = str(tmp_path / "search-cache.json")
+    cache = SearchResultCache(capacity=2, ttl_seconds=60, path=path)
+    for key in ("a", "b", "c"):
+        cache.put(key, {"key": key})
+    assert cache.get("a") is None
+    assert cache.get("b") == {"key": "b"}
+
+    reloaded = SearchResultCache(capacity=1, ttl_seconds=60, path=path)
+    assert len(reloaded) == 1
+    assert reloaded.get("c") == {"key": "c"}
+
+    expiring = SearchResultCache(capacity=2, ttl_seconds=0.05)
+    expiring.put("a", 1)
+    time.sleep(0.1)
+    assert expiring.get("a") is None
+    assert len(expiring) == 0
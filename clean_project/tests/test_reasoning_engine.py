@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import threading
+
+import numpy as np
+import pytest
+
+from agent_system.embedding_service import EmbeddingService
+from agent_system.reasoning_engine import ReasoningEngine
+
+
+class _CountingModel:
+    """Deterministic stand-in for SentenceTransformer that counts encode calls."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def encode(self, texts):
+        self.calls += 1
+        if isinstance(texts, str):
+            return self._vector(texts)
+        return np.stack([self._vector(text) for text in texts])
+
+    @staticmethod
+    def _vector(text: str) -> np.ndarray:
+        vector = np.zeros(16)
+        for word in text.lower().split():
+            vector[sum(map(ord, word)) % 16] += 1.0
+        return vector
+
+
+@pytest.fixture
+def engine() -> ReasoningEngine:
+    engine = ReasoningEngine()
+    engine.model = _CountingModel()
+    engine.pattern_embeddings = engine._precompute_embeddings()
+    engine.clear_analysis_cache()
+    return engine
+
+
+def test_goal_is_encoded_once_per_analysis(engine: ReasoningEngine):
+    model = engine.model
+    model.calls = 0
+
+    engine.enhanced_analyze_goal("research the history of graph databases")
+
+    assert model.calls == 1
+
+
+def test_batched_similarity_matches_pairwise_cosine(engine: ReasoningEngine):
+    goal = "find and analyze online sources about sqlite"
+    batched = engine._semantic_scores(goal)
+    goal_vector = engine.model.encode(goal)
+
+    for name, pattern_vector in engine.pattern_embeddings.items():
+        expected = float(
+            np.dot(goal_vector, pattern_vector)
+            / (np.linalg.norm(goal_vector) * np.linalg.norm(pattern_vector))
+        )
+        assert batched[name] == pytest.approx(max(0.0, expected))
+
+
+def test_repeated_goals_hit_the_analysis_cache(engine: ReasoningEngine):
+    model = engine.model
+    first = engine.enhanced_analyze_goal("research  python packaging")
+    model.calls = 0
+    first["parameters"]["mutated"] = True
+
+    second = engine.enhanced_analyze_goal("research python packaging ")
+
+    assert model.calls == 0
+    assert "mutated" not in second["parameters"]
+    assert second["pattern"] == first["pattern"]
+    stats = engine.get_cache_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+
+def test_analysis_cache_is_bounded(engine: ReasoningEngine):
+    engine._analysis_cache_size = 2
+    for goal in ("research a", "research b", "research c"):
+        engine.enhanced_analyze_goal(goal)
+    assert list(engine._analysis_cache) == ["research b", "research c"]
+
+
+def test_keyword_fallback_serves_until_model_is_ready(tmp_path):
+    model = _CountingModel()
+    gate = threading.Event()
+
+    def factory(name):
+        gate.wait(5)
+        return model
+
+    engine = ReasoningEngine()
+    engine.model = None
+    engine._embedding_service = EmbeddingService("fake", cache_dir=tmp_path, model_factory=factory)
+
+    pending = engine.enhanced_analyze_goal("research graph databases")
+    assert not engine.semantic_model_ready
+    assert pending["pattern"] == "research"
+
+    gate.set()
+    assert engine._embedding_service.wait_until_ready(timeout=5)
+    engine.enhanced_analyze_goal("write a python script")
+
+    assert engine.semantic_model_ready
+    assert set(engine.pattern_embeddings) == set(engine.goal_patterns)
+    # Fallback analyses are dropped once semantic scoring is available
+    assert "research graph databases" not in engine._analysis_cache
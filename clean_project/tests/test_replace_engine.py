@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import os
+import re
+
+import pytest
+
+from agent_system.code_index import PARALLEL_MIN_FILES
+from agent_system.models import ActionStatus
+from agent_system.replace_engine import (
+    ReplacementConflict,
+    commit_plan,
+    plan_replacements,
+    restore_manifest,
+)
+from agent_system.tools import ReplaceInFilesTool, RestoreBackupTool
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    # Backups go to .agent_state/backups relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def _tree(root, count: int) -> list[str]:
+    paths = []
+    for i in range(count):
+        path = root / "src" / f"mod_{i}.py"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"import old_name\nvalue = old_name.run({i})\n", encoding="utf-8")
+        paths.append(str(path))
+    return paths
+
+
+def test_plan_is_read_only_bounded_and_stops_at_max_edits(workdir):
+    paths = _tree(workdir, 5)
+    before = [open(p).read() for p in paths]
+
+    plan = plan_replacements(paths, r"old_(\w+)", r"new_\1", max_edits=4, preview_per_file=1)
+
+    assert [open(p).read() for p in paths] == before
+    assert [f.replacements for f in plan.files] == [2, 2]
+    assert plan.truncated
+    assert plan.preview(max_files=1) == [
+        {
+            "file": paths[0],
+            "replacements": 2,
+            "hunks": [{"line": 1, "before": "import old_name", "after": "import new_name"}],
+        }
+    ]
+    with pytest.raises(re.error):
+        plan_replacements(paths, "old", r"\2")
+
+
+def test_commit_writes_atomically_and_manifest_rolls_back(workdir):
+    paths = _tree(workdir, 3)
+    crlf = workdir / "src" / "crlf.py"
+    crlf.write_bytes(b"old_name = 1\r\n")
+    paths.append(str(crlf))
+
+    plan = plan_replacements(paths, "old_name", "new_name")
+    result = commit_plan(plan, workdir / "backups")
+
+    assert open(paths[0]).read() == "import new_name\nvalue = new_name.run(0)\n"
+    assert crlf.read_bytes() == b"new_name = 1\r\n"
+    assert len(result["changes"]) == 4
+    assert not [n for n in os.listdir(workdir / "src") if n.endswith(".tmp")]
+
+    restored = restore_manifest(result["manifest"])
+    assert sorted(restored) == sorted(os.path.abspath(p) for p in paths)
+    assert open(paths[0]).read() == "import old_name\nvalue = old_name.run(0)\n"
+    assert crlf.read_bytes() == b"old_name = 1\r\n"
+
+
+def test_conflicting_change_aborts_without_touching_the_tree(workdir):
+    paths = _tree(workdir, 3)
+    plan = plan_replacements(paths, "old_name", "new_name")
+    with open(paths[2], "a", encoding="utf-8") as f:
+        f.write("# edited meanwhile\n")
+
+    with pytest.raises(ReplacementConflict):
+        commit_plan(plan, workdir / "backups")
+
+    assert all("old_name" in open(p).read() for p in paths)
+    assert not [n for n in os.listdir(workdir / "src") if n.endswith(".tmp")]
+    assert os.listdir(workdir / "backups") == []
+
+
+def test_large_files_are_streamed(workdir):
+    path = workdir / "big.txt"
+    path.write_bytes(b"keep line\n" * 5000 + b"old_name here\n" + b"tail\n" * 5000)
+
+    plan = plan_replacements([str(path)], "old_(name)", r"new_\1", stream_threshold=1024)
+    assert plan.files[0].streamed
+    assert plan.files[0].preview[0]["line"] == 5001
+
+    commit_plan(plan, workdir / "backups")
+    data = path.read_bytes()
+    assert b"new_name here\n" in data and b"old_name" not in data
+    assert len(data) == path.stat().st_size == 10 * 5000 + 14 + 5 * 5000
+
+
+def test_undecodable_files_are_skipped_whether_streamed_or_not(workdir):
+    path = workdir / "binary.txt"
+    content = b"\xff\xfe\x00foo\x80\n" + b"foo\n" * 1000
+    path.write_bytes(content)
+
+    for threshold in (1024, len(content) + 1):  # streamed, then read whole
+        plan = plan_replacements([str(path)], "foo", "bar", stream_threshold=threshold)
+        assert plan.files == []
+    assert path.read_bytes() == content
+
+    # An incomplete multi-byte sequence at the end is caught too
+    path.write_bytes(b"foo\n" * 1000 + b"\xe2\x82")
+    assert plan_replacements([str(path)], "foo", "bar", stream_threshold=1024).files == []
+
+
+def test_index_candidates_do_not_drop_escaped_patterns(workdir):
+    (workdir / "src").mkdir()
+    (workdir / "src" / "a.txt").write_text("fooAbar\n", encoding="utf-8")
+    status, result = ReplaceInFilesTool(workers=1).execute(
+        path="src", search=r"foo\x41bar", replace="done"
+    )
+    assert status == ActionStatus.SUCCESS and result["files_changed"] == 1
+    assert (workdir / "src" / "a.txt").read_text(encoding="utf-8") == "done\n"
+
+
+def test_tool_dry_run_commit_and_single_restore(workdir):
+    _tree(workdir, PARALLEL_MIN_FILES + 6)
+    (workdir / "src" / "skip.log").write_text("old_name\n", encoding="utf-8")
+    tool = ReplaceInFilesTool(workers=2)
+
+    status, preview = tool.execute(path="src", search="old_name", replace="new_name", dry_run=True)
+    assert status == ActionStatus.SUCCESS
+    assert preview["files_planned"] == PARALLEL_MIN_FILES + 6
+    assert len(preview["preview"]) == 20
+    assert "old_name" in (workdir / "src" / "mod_0.py").read_text()
+
+    status, result = tool.execute(path="src", search="old_name", replace="new_name")
+    assert status == ActionStatus.SUCCESS
+    assert result["files_changed"] == PARALLEL_MIN_FILES + 6
+    assert result["total_replacements"] == 2 * (PARALLEL_MIN_FILES + 6)
+    assert (workdir / "src" / "skip.log").read_text() == "old_name\n"
+
+    status, restored = RestoreBackupTool().execute()
+    assert status == ActionStatus.SUCCESS
+    assert restored["manifest"] == result["manifest"]
+    assert len(restored["restored"]) == PARALLEL_MIN_FILES + 6
+    assert "old_name" in (workdir / "src" / "mod_0.py").read_text()
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import json
+import random
+from typing import Any, Tuple
+
+import pytest
+
+from agent_system import tools
+from agent_system.models import Action, ActionStatus
+from agent_system.retry_policy import RetryBudget, backoff_delay, is_retryable
+from agent_system.tools import Tool, ToolRegistry
+
+
+class FlakyTool(Tool):
+    """Fails with the queued results first, then succeeds."""
+
+    def __init__(self, *failures: Any) -> None:
+        self.failures = list(failures)
+        self.calls = 0
+
+    @property
+    def name(self) -> str:
+        return "flaky"
+
+    def execute(self, **kwargs: Any) -> Tuple[ActionStatus, Any]:
+        self.calls += 1
+        if self.failures:
+            failure = self.failures.pop(0)
+            if isinstance(failure, Exception):
+                raise failure
+            return ActionStatus.FAILURE, failure
+        return ActionStatus.SUCCESS, {"ok": True}
+
+
+def action() -> Action:
+    return Action(
+        id="a1",
+        name="call",
+        tool_name="flaky",
+        parameters={},
+        expected_outcome="done",
+        cost=0.1,
+    )
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(tools.time, "sleep", sleeps.append)
+    registry = ToolRegistry()
+    registry.retry_budget = RetryBudget(ratio=0.5, reserve=10)
+    registry.sleeps = sleeps
+    yield registry
+    registry.shutdown()
+
+
+def test_classifier_separates_transient_from_deterministic_failures():
+    assert is_retryable({"error": "Request timed out after 30s"})
+    assert is_retryable({"error": "HTTP 503 Service Unavailable"})
+    assert is_retryable(exc=ConnectionResetError("reset by peer"))
+    assert is_retryable({"error": "something odd happened"})  # unknown failures are retried
+
+    assert not is_retryable({"error": "Access to path not allowed: /etc/passwd"})
+    assert not is_retryable({"error": "Security violation: import os", "security_violation": True})
+    assert not is_retryable(exc=FileNotFoundError("missing.txt"))
+    assert not is_retryable(exc=ValueError("bad argument"))
+    assert not is_retryable({"error": "timed out", "retryable": False})
+
+
+def test_backoff_is_jittered_exponential_and_capped():
+    rng = random.Random(7)
+    for attempt, ceiling in [(1, 0.1), (2, 0.2), (3, 0.4), (10, 1.0)]:
+        delays = [backoff_delay(attempt, 0.1, 1.0, rng) for _ in range(200)]
+        assert all(0 <= d <= ceiling for d in delays)
+        assert max(delays) > ceiling * 0.8 and len(set(delays)) > 100
+    assert backoff_delay(3, 0.0, 1.0) == 0.0
+
+
+def test_budget_caps_retries_at_a_share_of_requests():
+    budget = RetryBudget(ratio=0.1, reserve=2)
+    granted = 0
+    for _ in range(100):
+        budget.record_request()
+        granted += budget.try_acquire()
+    assert granted <= 2 + 10 + 1
+    assert budget.stats()["denied"] == 100 - granted
+
+
+def test_deterministic_failures_are_not_retried(registry):
+    tool = FlakyTool({"error": "Access to path not allowed: /etc"})
+    registry.register_tool(tool)
+
+    observation = registry.execute_action(action())
+    assert observation.status == ActionStatus.FAILURE
+    assert tool.calls == 1 and registry.sleeps == []
+    assert observation.result == {"error": "Access to path not allowed: /etc"}
+    assert observation.metrics["attempts"] == 1
+
+
+def test_transient_failures_back_off_and_recover(registry):
+    tool = FlakyTool({"error": "rate limited"}, TimeoutError("slow upstream"))
+    registry.register_tool(tool)
+
+    observation = registry.execute_action(action())
+    assert observation.status == ActionStatus.SUCCESS
+    assert observation.metrics["attempts"] == 3
+    assert len(registry.sleeps) == 2
+    assert 0 <= registry.sleeps[0] <= 0.1 and 0 <= registry.sleeps[1] <= 0.2
+    assert observation.metrics["retry_wait_ms"] == pytest.approx(sum(registry.sleeps) * 1000, 0.01)
+
+
+@pytest.mark.asyncio
+async def test_async_path_honours_per_tool_attempts_and_the_budget(registry, monkeypatch):
+    async def no_sleep(delay):
+        registry.sleeps.append(delay)
+
+    monkeypatch.setattr(tools.asyncio, "sleep", no_sleep)
+    tool = FlakyTool(*[{"error": "temporarily unavailable"}] * 10)
+    registry.register_tool(tool)
+    registry.configure_tool("flaky", max_attempts=5)
+
+    observation = await registry.execute_action_async(action())
+    assert observation.metrics["attempts"] == 5 and tool.calls == 5
+
+    registry.retry_budget = RetryBudget(ratio=0.0, reserve=0)
+    tool.calls = 0
+    observation = await registry.execute_action_async(action())
+    assert tool.calls == 1 and observation.status == ActionStatus.FAILURE
+    assert registry.get_retry_stats()["denied"] == 1
+
+
+def test_size_estimate_matches_json_without_serializing():
+    small = {"query": "python packaging", "limit": 10, "flags": [True, None, 1.5], "é": "ü"}
+    exact = len(json.dumps(small, ensure_ascii=False).encode("utf-8"))
+    assert tools._estimated_json_size(small) == exact
+
+    rows = [{"id": i, "name": f"row-{i:05d}"} for i in range(20000)]
+    actual = len(json.dumps(rows).encode("utf-8"))
+    assert abs(tools._estimated_json_size(rows) - actual) / actual < 0.05
+    assert tools._estimated_json_size(object()) == 0
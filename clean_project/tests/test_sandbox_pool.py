@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from agent_system.config_simple import settings
+from agent_system.models import ActionStatus
+from agent_system.real_tools import RealCodeExecutorTool
+from agent_system.sandbox_pool import SandboxPool, SandboxTimeout, parse_memory_limit
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="sandbox workers rely on rlimits")
+
+
+@pytest.fixture
+def pool():
+    pool = SandboxPool(size=1, max_runs=3, memory_bytes=parse_memory_limit("256m"))
+    pool.start(wait=True)
+    yield pool
+    pool.shutdown()
+
+
+def test_warm_workers_run_code_in_fresh_namespaces(pool):
+    first = pool.run("x = 41\nprint(x + 1)", timeout=5)
+    assert first["pool_hit"] is True
+    assert first["output"] == "42\n" and first["return_code"] == 0
+
+    second = pool.run("print('x' in globals())\n__builtins__['len'] = None", timeout=5)
+    assert second["output"] == "False\n"
+    assert pool.run("print(len('abc'))", timeout=5)["output"] == "3\n"
+    # Third run on the same worker hits max_runs, so it was recycled
+    assert pool.stats()["recycled"] == 1
+
+
+def test_errors_and_exit_codes_match_a_subprocess(pool):
+    failed = pool.run("def f():\n    raise ValueError('boom')\nf()", timeout=5)
+    assert failed["return_code"] == 1
+    assert failed["error"].startswith('Traceback (most recent call last):\n  File "<sandbox>"')
+    assert "ValueError: boom" in failed["error"]
+    assert pool.run("exit(3)", timeout=5)["return_code"] == 3
+
+
+def test_timeouts_and_violations_recycle_the_worker(pool):
+    with pytest.raises(SandboxTimeout):
+        pool.run("while True:\n    pass", timeout=1)
+
+    reply = pool.run("data = bytearray(1024 ** 3)", timeout=5)
+    assert reply["violation"] == "memory"
+    assert pool.stats()["recycled"] == 2
+
+    pool.start(wait=True)
+    assert pool.run("print('ok')", timeout=5)["pool_hit"] is True
+
+
+def test_tool_reports_pool_use_and_keeps_ast_check(monkeypatch):
+    monkeypatch.setattr(settings, "CODE_EXECUTOR_POOL_SIZE", 1)
+    tool = RealCodeExecutorTool()
+
+    status, result = tool.execute(code="import os")
+    assert status == ActionStatus.FAILURE and result["security_violation"]
+
+    statuses = [tool.execute(code="print(sum(range(10)))") for _ in range(3)]
+    assert all(status == ActionStatus.SUCCESS for status, _ in statuses)
+    assert [r["output"] for _, r in statuses] == ["45\n"] * 3
+    assert all(r["sandbox"] == "pool" for _, r in statuses)
+    assert any(r["pool_hit"] for _, r in statuses[1:])
+
+    status, result = tool.execute(code="while True:\n    pass", timeout=1)
+    assert status == ActionStatus.FAILURE and result["timeout"]
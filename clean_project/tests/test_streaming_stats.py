@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from agent_system.performance_optimizer import ResponseTimeOptimizer
+from agent_system.performance_tracker import PerformanceTracker
+from agent_system.production_monitoring import ProductionMonitoring
+from agent_system.streaming_stats import QuantileSketch, WindowedStats
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _exact_quantile(values, q):
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+def test_sketch_quantiles_are_within_relative_accuracy():
+    rng = random.Random(7)
+    values = [rng.lognormvariate(3, 1) for _ in range(5000)] + [0.0] * 50 + [-5.0] * 10
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+
+    for q in (0.0, 0.01, 0.5, 0.95, 0.99, 1.0):
+        exact = _exact_quantile(values, q)
+        assert sketch.quantile(q) == pytest.approx(exact, rel=0.011, abs=1e-9)
+    assert sketch.count == len(values)
+    assert sketch.mean == pytest.approx(sum(values) / len(values))
+
+
+def test_merged_sketches_match_a_single_sketch():
+    rng = random.Random(11)
+    values = [rng.uniform(1, 500) for _ in range(2000)]
+    whole = QuantileSketch()
+    left, right = QuantileSketch(), QuantileSketch()
+    for i, value in enumerate(values):
+        whole.add(value)
+        (left if i % 2 else right).add(value)
+
+    left.merge(right)
+    for q in (0.5, 0.95, 0.99):
+        assert left.quantile(q) == whole.quantile(q)
+    assert (left.min, left.max, left.count) == (whole.min, whole.max, whole.count)
+
+    with pytest.raises(ValueError):
+        left.merge(QuantileSketch(relative_accuracy=0.05))
+
+
+def test_windowed_stats_expire_old_buckets_and_report_rates():
+    clock = FakeClock()
+    stats = WindowedStats(bucket_seconds=10, bucket_count=6, clock=clock)
+
+    for _ in range(30):
+        stats.add(100.0)
+    clock.now += 30
+    for _ in range(60):
+        stats.add(1.0)
+
+    assert stats.snapshot().count == 90
+    assert stats.rate(10) == pytest.approx(6.0)
+    assert stats.total(10) == pytest.approx(60.0)
+    assert stats.quantile(0.99) == pytest.approx(100.0, rel=0.01)
+    assert stats.halves() == pytest.approx((100.0, 1.0))
+
+    clock.now += 40  # the first batch is now older than the 60s ring
+    summary = stats.summary()
+    assert summary["count"] == 60
+    assert summary["max"] == 1.0
+    assert stats.halves() is None
+
+    clock.now += 120
+    assert stats.summary() == {"count": 0}
+
+
+def test_production_monitoring_percentiles_and_throughput():
+    clock = FakeClock()
+    monitoring = ProductionMonitoring(clock=clock)
+
+    for i in range(1, 101):
+        monitoring.record_request("/goals", "GET", 200, duration=i / 100)
+    clock.now += 120
+    for _ in range(5):
+        monitoring.record_request("/goals", "GET", 200, duration=0.5)
+
+    assert monitoring._calculate_throughput() == 5
+    assert monitoring._calculate_percentile("request_duration", 0.95) == pytest.approx(
+        0.95, rel=0.02
+    )
+    assert monitoring._calculate_percentile("missing", 0.5) == 0.0
+
+
+def test_performance_tracker_trend_uses_windows():
+    clock = FakeClock()
+    tracker = PerformanceTracker(clock=clock)
+
+    for duration in (100.0, 100.0, 200.0, 200.0):
+        tracker.track_response_time("plan", duration)
+        clock.now += 600
+
+    trend = tracker.get_trend_analysis("response_time_plan", hours=1)
+    assert trend["data_points"] == 4
+    assert trend["trend_direction"] == "degrading"
+    assert trend["trend_percent"] == pytest.approx(100.0)
+    assert trend["current_value"] == 200.0
+    assert trend["p50"] == pytest.approx(100.0, rel=0.01)
+
+
+def test_response_time_optimizer_reports_percentiles():
+    optimizer = ResponseTimeOptimizer()
+    for i in range(1, 101):
+        optimizer.record_operation("run_cycle", i / 10, success=i % 10 != 0)
+
+    report = optimizer.get_performance_report()
+    assert report["total_operations"] == 100
+    assert report["success_rate"] == 0.9
+    assert report["p99_response_time"] == pytest.approx(9.9, rel=0.02)
+    assert report["operations_per_minute"] == 100
+    assert report["slow_operations_count"] == 90
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+import asyncio
+import threading
 import unittest
+from typing import Any, Tuple
 
 from agent_system.models import Action, ActionStatus
-from agent_system.tools import GenericTool, ToolRegistry
+from agent_system.tools import GenericTool, Tool, ToolRegistry
 
 
 class ToolRegistryTests(unittest.TestCase):
@@ -42,5 +45,148 @@ class ToolRegistryTests(unittest.TestCase):
         self.assertEqual(observation.status, ActionStatus.FAILURE)
 
 
+class CountingTool(Tool):
+    """Idempotent tool that blocks on a gate and counts its executions."""
+
+    idempotent = True
+
+    def __init__(self, name: str = "lookup") -> None:
+        self._name = name
+        self.calls = 0
+        self.gate = threading.Event()
+        self.gate.set()
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    def execute(self, **kwargs: Any) -> Tuple[ActionStatus, Any]:
+        self.calls += 1
+        self.gate.wait(5)
+        if kwargs.get("fail"):
+            return ActionStatus.FAILURE, {"error": "boom"}
+        return ActionStatus.SUCCESS, {"query": kwargs.get("query"), "items": [1, 2]}
+
+
+def _action(tool_name: str, **parameters: Any) -> Action:
+    return Action(
+        id=f"{tool_name}_action",
+        name=f"{tool_name}_step",
+        tool_name=tool_name,
+        parameters=parameters,
+        expected_outcome="task_completed",
+        cost=0.1,
+    )
+
+
+class ToolSchedulingTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.registry = ToolRegistry()
+        self.tool = CountingTool()
+        self.registry.register_tool(self.tool)
+
+    def tearDown(self) -> None:
+        self.tool.gate.set()
+        self.registry.shutdown()
+
+    async def test_identical_in_flight_calls_share_one_execution(self):
+        self.tool.gate.clear()
+        first = asyncio.create_task(
+            self.registry.execute_action_async(_action("lookup", query="x"))
+        )
+        second = asyncio.create_task(
+            self.registry.execute_action_async(_action("lookup", query="x"))
+        )
+        await asyncio.sleep(0.05)
+        self.tool.gate.set()
+        observations = await asyncio.gather(first, second)
+
+        self.assertEqual(self.tool.calls, 1)
+        self.assertEqual(sorted(o.metrics["deduplicated"] for o in observations), [0.0, 1.0])
+        self.assertEqual(observations[0].result, observations[1].result)
+        self.assertIsNot(observations[0].result, observations[1].result)
+        self.assertEqual(self.registry.get_cache_stats()["deduplicated_calls"], 1)
+
+    async def test_ttl_cache_is_opt_in_and_skips_failures(self):
+        await self.registry.execute_action_async(_action("lookup", query="x"))
+        await self.registry.execute_action_async(_action("lookup", query="x"))
+        self.assertEqual(self.tool.calls, 2)
+
+        self.registry.configure_tool("lookup", cache_ttl_seconds=60)
+        await self.registry.execute_action_async(_action("lookup", query="x"))
+        cached = await self.registry.execute_action_async(_action("lookup", query="x"))
+        self.assertEqual(self.tool.calls, 3)
+        self.assertEqual(cached.metrics["cache_hit"], 1.0)
+        self.assertEqual(cached.result["items"], [1, 2])
+
+        self.registry.execute_action(_action("lookup", fail=True), retry=False)
+        self.registry.execute_action(_action("lookup", fail=True), retry=False)
+        self.assertEqual(self.tool.calls, 5)
+        self.assertEqual(self.registry.get_cache_stats()["hits"], 1)
+
+    async def test_slow_tool_does_not_starve_other_tools(self):
+        fast = CountingTool("fast")
+        self.registry.register_tool(fast)
+        self.registry.configure_tool("lookup", max_concurrency=1)
+        self.tool.gate.clear()
+
+        slow = [
+            asyncio.create_task(self.registry.execute_action_async(_action("lookup", query=i)))
+            for i in range(3)
+        ]
+        quick = await asyncio.wait_for(
+            self.registry.execute_action_async(_action("fast", query="y")), timeout=2
+        )
+        self.assertEqual(quick.status, ActionStatus.SUCCESS)
+        self.assertFalse(any(task.done() for task in slow))
+
+        await asyncio.sleep(0.05)
+        self.tool.gate.set()
+        observations = await asyncio.gather(*slow)
+        self.assertGreater(max(o.metrics["queue_wait_ms"] for o in observations), 10.0)
+
+
+class LoopRecordingTool(Tool):
+    """Async tool that records which event loop each call ran on."""
+
+    def __init__(self) -> None:
+        self.loops: list[asyncio.AbstractEventLoop] = []
+
+    @property
+    def name(self) -> str:
+        return "async_probe"
+
+    async def execute(self, **kwargs: Any) -> Tuple[ActionStatus, Any]:
+        self.loops.append(asyncio.get_running_loop())
+        await asyncio.sleep(0)
+        return ActionStatus.SUCCESS, {"n": len(self.loops)}
+
+
+class AsyncToolTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.registry = ToolRegistry()
+        self.tool = LoopRecordingTool()
+        self.registry.register_tool(self.tool)
+
+    def tearDown(self) -> None:
+        self.registry.shutdown()
+
+    async def test_async_dispatch_awaits_on_the_callers_loop(self):
+        observation = await self.registry.execute_action_async(_action("async_probe"))
+        self.assertEqual(observation.status, ActionStatus.SUCCESS)
+        self.assertIs(self.tool.loops[-1], asyncio.get_running_loop())
+
+    async def test_sync_calls_share_one_background_loop(self):
+        # A running loop in this thread used to force a new thread and loop per call
+        for _ in range(3):
+            observation = self.registry.execute_action(_action("async_probe"))
+            self.assertEqual(observation.status, ActionStatus.SUCCESS)
+        self.assertEqual(len({id(loop) for loop in self.tool.loops}), 1)
+        self.assertIsNot(self.tool.loops[0], asyncio.get_running_loop())
+
+        await asyncio.to_thread(self.registry.execute_action, _action("async_probe"))
+        self.assertIs(self.tool.loops[-1], self.tool.loops[0])
+
+
 if __name__ == "__main__":
     unittest.main()